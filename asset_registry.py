@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+素材の変換と登録の共通処理
+
+sakura_video_ingest.py（動画のメザニン変換）と music/audio_normalizer.py（BGMの正規化）に
+共通する処理をまとめたモジュールです。
+
+- ffprobeによる長さの取得
+- 一時ファイルに書き出してから置き換える出力（中断しても不完全なファイルを残さない）
+- メタデータJSONのアトミックな読み書き
+- 変換済みかどうかの判定と、プロセスプールでの並列変換
+"""
+
+import os
+import hashlib
+import json
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+
+from file_lock import locked
+
+
+def probe_duration(path):
+    """
+    ffprobeでメディアファイルの長さを取得する
+
+    Args:
+        path (str): 動画・音源ファイルのパス
+
+    Returns:
+        float: 長さ（秒）、取得できない場合は0
+    """
+    try:
+        result = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", path],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True
+        )
+        return float(result.stdout.strip() or 0)
+    except (subprocess.CalledProcessError, ValueError, OSError):
+        return 0.0
+
+
+@contextmanager
+def atomic_output(destination, suffix):
+    """
+    一時ファイルに書き出し、成功した場合だけ destination に置き換える
+
+    Args:
+        destination (str): 最終的な出力ファイルのパス
+        suffix (str): 一時ファイルの拡張子（出力ディレクトリのglobに拾われないものにする）
+
+    Yields:
+        str: 書き込み先の一時ファイルのパス
+    """
+    fd, temp_path = tempfile.mkstemp(suffix=suffix, dir=os.path.dirname(destination))
+    os.close(fd)
+    try:
+        yield temp_path
+        os.replace(temp_path, destination)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def load_metadata(metadata_file):
+    """
+    メタデータを読み込む
+
+    Args:
+        metadata_file (str): メタデータファイルのパス
+
+    Returns:
+        dict: ファイル名をキーとしたメタデータ
+    """
+    if not os.path.exists(metadata_file):
+        return {}
+    try:
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        print(f"警告: メタデータを読み込めませんでした: {metadata_file}")
+        return {}
+
+
+def save_metadata(metadata, metadata_file):
+    """
+    メタデータをアトミックに保存する
+
+    Args:
+        metadata (dict): ファイル名をキーとしたメタデータ
+        metadata_file (str): メタデータファイルのパス
+    """
+    os.makedirs(os.path.dirname(metadata_file), exist_ok=True)
+    with atomic_output(metadata_file, '.json.part') as temp_path:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=4)
+
+
+class AssetConverter:
+    """
+    入力ファイルを1つずつ変換し、出力ディレクトリとメタデータに登録する基底クラス
+
+    サブクラスは output_suffix・label と、settings()・task()・describe() を実装する。
+    メタデータの各エントリには 'file'・'source'・'source_size'・'source_mtime' と、
+    settings() の各キーが含まれている必要がある。
+    """
+    # 出力ファイルの拡張子
+    output_suffix = None
+    # メッセージに使う処理名と対象（例: ('変換', '動画')）
+    label = ('変換', 'ファイル')
+
+    def __init__(self, output_dir, max_workers=None):
+        """
+        初期化
+
+        Args:
+            output_dir (str): 変換したファイルの出力先
+            max_workers (int): 並列変換数（Noneの場合はCPU数）
+        """
+        self.output_dir = output_dir
+        self.metadata_file = os.path.join(output_dir, "metadata.json")
+        self.max_workers = max_workers
+
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def settings(self):
+        """変換結果に影響する設定（変更された場合は変換し直す）を返す"""
+        raise NotImplementedError
+
+    def task(self):
+        """
+        プロセスプールで実行する変換関数と追加の引数を返す
+
+        関数は (入力ファイル, 出力ファイル, *引数) で呼び出され、メタデータのエントリを返す。
+        """
+        raise NotImplementedError
+
+    def describe(self, entry):
+        """登録したエントリの表示内容を返す"""
+        return entry['file']
+
+    def accepts(self, source):
+        """変換対象の入力ファイルかどうか"""
+        return True
+
+    def destination_for(self, source, metadata, taken):
+        """
+        入力ファイルに対応する出力ファイルのパスを返す
+
+        同じ名前のファイルが別の入力ファイル（別のディレクトリの同名ファイルや、
+        拡張子だけが違うファイル）で登録済み・変換予定の場合は、入力ファイルのパスの
+        ハッシュを付けた名前にして上書きを防ぐ。
+
+        Args:
+            source (str): 入力ファイルのパス
+            metadata (dict): 登録済みのメタデータ
+            taken (set): 今回の変換で使用するファイル名
+
+        Returns:
+            str: 出力ファイルのパス
+        """
+        source = os.path.abspath(source)
+        stem = os.path.splitext(os.path.basename(source))[0]
+        name = stem + self.output_suffix
+        entry = metadata.get(name)
+        if name in taken or (entry and os.path.abspath(entry.get('source', '')) != source):
+            digest = hashlib.sha1(source.encode('utf-8')).hexdigest()[:8]
+            name = f"{stem}-{digest}{self.output_suffix}"
+        return os.path.join(self.output_dir, name)
+
+    def is_up_to_date(self, source, entry):
+        """登録済みのファイルが入力ファイル・設定と一致しているか確認する"""
+        if not entry or not os.path.exists(os.path.join(self.output_dir, entry['file'])):
+            return False
+        source_stat = os.stat(source)
+        return (entry.get('source_size') == source_stat.st_size
+                and entry.get('source_mtime') == source_stat.st_mtime
+                and all(entry.get(key) == value for key, value in self.settings().items()))
+
+    def convert(self, source_files):
+        """
+        複数のファイルをプロセスプールで並列に変換する
+
+        Args:
+            source_files (list): 入力ファイルのパスのリスト
+
+        Returns:
+            list: 新たに登録したファイルのパスのリスト
+        """
+        action, noun = self.label
+        metadata = load_metadata(self.metadata_file)
+
+        jobs = {}
+        seen = set()
+        for source in source_files:
+            if not source or not os.path.exists(source) or not self.accepts(source):
+                continue
+            if os.path.abspath(source) in seen:
+                continue
+            seen.add(os.path.abspath(source))
+            destination = self.destination_for(source, metadata, jobs.keys())
+            if self.is_up_to_date(source, metadata.get(os.path.basename(destination))):
+                print(f"{action}済みのためスキップします: {source}")
+                continue
+            jobs[os.path.basename(destination)] = (source, destination)
+
+        if not jobs:
+            print(f"{action}が必要な{noun}はありません。")
+            return []
+
+        print(f"{len(jobs)}件の{noun}を{action}します...")
+        function, args = self.task()
+        converted = []
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(function, source, destination, *args): source
+                for source, destination in jobs.values()
+            }
+            for future in as_completed(futures):
+                source = futures[future]
+                try:
+                    entry = future.result()
+                except subprocess.CalledProcessError as e:
+                    print(f"警告: {action}に失敗しました: {source}")
+                    print(f"エラー詳細: {e.stderr}")
+                    continue
+                except Exception as e:
+                    print(f"警告: {action}中にエラーが発生しました: {source}")
+                    print(f"エラー詳細: {str(e)}")
+                    continue
+
+                # 完了ごとにメタデータを保存し、中断しても登録済みの分は残す
+                # （監視デーモンなど他のプロセスの更新を消さないよう、ロックして読み直す）
+                with locked(self.metadata_file):
+                    metadata = load_metadata(self.metadata_file)
+                    metadata[entry['file']] = entry
+                    save_metadata(metadata, self.metadata_file)
+                converted.append(os.path.join(self.output_dir, entry['file']))
+                print(f"{action}しました: {self.describe(entry)}")
+
+        return converted
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ベンチマーク結果の比較（性能の劣化の検出）
+=========================================
+
+run_benchmarks.py の2つの結果ファイル（基準と比較対象）を読み込み、指標ごとに
+繰り返し計測した値の中央値・MAD（中央絶対偏差）と、中央値の変化率の信頼区間（ブートストラップ）を求めます。
+変化率が指標ごとのしきい値を超えて悪化し、信頼区間が「変化なし」を含まない場合に劣化と判定します。
+しきい値を超えて悪化していても信頼区間が「変化なし」を含む場合は、劣化を見逃さないよう「要再計測」として
+不合格にします（計測回数を増やして再計測し、区間を狭めて判定します）。
+比較対象で失敗したベンチマーク（結果ファイルの errors）の指標と、基準にあって比較対象にない指標も不合格とします。
+
+使用方法:
+    python benchmarks/compare.py output/benchmarks/results/baseline.json output/benchmarks/results/latest.json
+
+    # しきい値を指標ごとに変更（指標名のパターン=パーセント）
+    python benchmarks/compare.py base.json new.json --threshold "render.*.fps=3" --threshold "*.peak_rss_mb=15"
+
+劣化・要再計測・失敗・欠落の指標がある場合は終了コード1で終了します（--report-only を指定した場合は常に0）。
+"""
+
+import os
+import sys
+import argparse
+import fnmatch
+import json
+import random
+import statistics
+from typing import Dict, List, Optional, Tuple
+
+# 指標名のパターンごとのしきい値（%、最初に一致したものを使う）
+DEFAULT_THRESHOLDS = [
+    ("*.fps", 5.0),
+    ("*.peak_rss_mb", 10.0),
+    ("*.stage.*", 10.0),
+    ("*seconds", 5.0),
+    ("*.mb_per_second", 10.0),
+    ("*.pages_per_second", 10.0),
+    ("*.import_ms", 10.0),
+    ("*", 10.0),
+]
+
+# 時間の指標で、これより小さい差（秒）は判定しない（短い区間のばらつきを無視する）
+DEFAULT_MIN_SECONDS = 0.05
+
+DEFAULT_CONFIDENCE = 0.95
+BOOTSTRAP_RESAMPLES = 2000
+# 信頼区間を求めるのに必要な1回あたりの計測回数
+MIN_SAMPLES = 3
+
+# 判定
+VERDICT_REGRESSION = "悪化"
+VERDICT_IMPROVEMENT = "改善"
+VERDICT_UNCHANGED = "変化なし"
+VERDICT_RERUN = "要再計測"  # しきい値を超えて悪化したが、信頼区間が変化なしを含む
+VERDICT_NOISY = "判定不能"  # しきい値を超えて改善したが、信頼区間が変化なしを含む
+VERDICT_FAILED = "失敗"    # 比較対象でベンチマークが失敗した
+VERDICT_MISSING = "欠落"   # 基準にあるが、比較対象では計測されていない
+VERDICT_SKIPPED = "対象外"  # 比較対象では実行するベンチマークに選ばれていない
+VERDICT_NEW = "新規"       # 比較対象にだけある
+
+# 不合格とする判定
+FAILING_VERDICTS = (VERDICT_REGRESSION, VERDICT_RERUN, VERDICT_FAILED, VERDICT_MISSING)
+
+# 環境の違いとして警告する項目
+ENVIRONMENT_KEYS = ["machine", "cpu_count", "python", "ffmpeg"]
+
+
+def load_results(path: str) -> Dict:
+    """ベンチマーク結果を読み込む"""
+    with open(path, "r", encoding="utf-8") as f:
+        results = json.load(f)
+    if "metrics" not in results:
+        raise ValueError(f"ベンチマーク結果のファイルではありません: {path}")
+    return results
+
+
+def median_absolute_deviation(samples: List[float]) -> float:
+    """
+    MAD（中央絶対偏差）
+
+    正規分布の標準偏差と同じ尺度になるように 1.4826 倍した値を返す。
+    """
+    center = statistics.median(samples)
+    return 1.4826 * statistics.median(abs(x - center) for x in samples)
+
+
+def bootstrap_interval(baseline: List[float], candidate: List[float],
+                       confidence: float = DEFAULT_CONFIDENCE,
+                       resamples: int = BOOTSTRAP_RESAMPLES) -> Tuple[float, float]:
+    """
+    中央値の変化率（%）の信頼区間をブートストラップで求める
+
+    同じ結果ファイルからは毎回同じ区間になるように、乱数のシードを固定する。
+
+    Returns:
+        (下限, 上限)（%）
+    """
+    rng = random.Random(0)
+    changes = []
+    for _ in range(resamples):
+        base = statistics.median(rng.choices(baseline, k=len(baseline)))
+        cand = statistics.median(rng.choices(candidate, k=len(candidate)))
+        if base:
+            changes.append((cand - base) / abs(base) * 100)
+    if not changes:
+        return 0.0, 0.0
+    changes.sort()
+    alpha = (1 - confidence) / 2
+    low = changes[int(alpha * (len(changes) - 1))]
+    high = changes[int((1 - alpha) * (len(changes) - 1))]
+    return low, high
+
+
+def threshold_for(name: str, thresholds: List[Tuple[str, float]]) -> float:
+    """指標名に一致する最初のしきい値（%）"""
+    for pattern, percent in thresholds:
+        if fnmatch.fnmatchcase(name, pattern):
+            return percent
+    return DEFAULT_THRESHOLDS[-1][1]
+
+
+def compare_metric(name: str, baseline: Optional[Dict], candidate: Optional[Dict],
+                   threshold: float, min_seconds: float, confidence: float) -> Dict:
+    """
+    1つの指標を比較
+
+    Args:
+        name: 指標名
+        baseline: 基準の指標（unit, better, samples）
+        candidate: 比較対象の指標
+        threshold: 劣化と判定する変化率（%）
+        min_seconds: 判定しない時間の差（秒）
+        confidence: 信頼区間の信頼水準
+
+    Returns:
+        比較結果（中央値・MAD・変化率・信頼区間・判定）
+    """
+    comparison = {"name": name, "threshold": threshold}
+    if not baseline or not candidate or not baseline["samples"] or not candidate["samples"]:
+        comparison["verdict"] = VERDICT_MISSING
+        return comparison
+
+    base_samples, cand_samples = baseline["samples"], candidate["samples"]
+    base_median = statistics.median(base_samples)
+    cand_median = statistics.median(cand_samples)
+    change = (cand_median - base_median) / abs(base_median) * 100 if base_median else 0.0
+    comparison.update({
+        "unit": candidate["unit"],
+        "better": candidate["better"],
+        "baseline": {"median": base_median, "mad": median_absolute_deviation(base_samples), "n": len(base_samples)},
+        "candidate": {"median": cand_median, "mad": median_absolute_deviation(cand_samples), "n": len(cand_samples)},
+        "change": change,
+    })
+
+    # 悪化する方向を正にそろえる（大きいほど良い指標は符号を反転）
+    sign = -1 if candidate["better"] == "higher" else 1
+    worse = change * sign
+
+    enough = len(base_samples) >= MIN_SAMPLES and len(cand_samples) >= MIN_SAMPLES
+    if enough:
+        low, high = bootstrap_interval(base_samples, cand_samples, confidence)
+        comparison["interval"] = [low, high]
+        # 悪化方向に並べ替えた区間で、0（変化なし）を含むかどうかを判定する
+        worse_low, worse_high = sorted((low * sign, high * sign))
+    else:
+        worse_low = worse_high = worse
+
+    if candidate["unit"] == "s" and abs(cand_median - base_median) < min_seconds:
+        comparison["verdict"] = VERDICT_UNCHANGED
+    elif worse > threshold:
+        comparison["verdict"] = VERDICT_REGRESSION if worse_low > 0 else VERDICT_RERUN
+    elif worse < -threshold:
+        comparison["verdict"] = VERDICT_IMPROVEMENT if worse_high < 0 else VERDICT_NOISY
+    else:
+        comparison["verdict"] = VERDICT_UNCHANGED
+    if not enough and comparison["verdict"] in (VERDICT_REGRESSION, VERDICT_IMPROVEMENT):
+        comparison["note"] = f"計測回数が{MIN_SAMPLES}回未満のため信頼区間なし"
+    return comparison
+
+
+def error_for(name: str, errors: Dict[str, str]) -> Optional[str]:
+    """指標が属するベンチマーク（render.1080p、scrape など）のエラー"""
+    matches = [key for key in errors if name == key or name.startswith(key + ".")]
+    return errors[max(matches, key=len)] if matches else None
+
+
+def was_selected(name: str, config: Dict) -> bool:
+    """指標のベンチマークが、結果ファイルの設定で実行対象に選ばれていたかどうか"""
+    parts = name.split(".")
+    if "benchmarks" in config and parts[0] not in config["benchmarks"]:
+        return False
+    if parts[0] == "render" and len(parts) > 1 and "resolutions" in config:
+        return parts[1] in config["resolutions"]
+    return True
+
+
+def _missing_verdict(name: str, baseline: Optional[Dict], candidate: Dict) -> Tuple[str, Optional[str]]:
+    """どちらかの結果に計測値がない指標の判定と、比較対象のエラー"""
+    error = error_for(name, candidate.get("errors") or {})
+    if error:
+        return VERDICT_FAILED, error
+    if not baseline or not baseline["samples"]:
+        return VERDICT_NEW, None
+    if name in candidate["metrics"]:
+        # 指標はあるが計測値がない（全ての回が失敗した）
+        return VERDICT_FAILED, None
+    if not was_selected(name, candidate.get("config", {})):
+        return VERDICT_SKIPPED, None
+    return VERDICT_MISSING, None
+
+
+def compare_results(baseline: Dict, candidate: Dict, thresholds: List[Tuple[str, float]] = DEFAULT_THRESHOLDS,
+                    min_seconds: float = DEFAULT_MIN_SECONDS,
+                    confidence: float = DEFAULT_CONFIDENCE) -> List[Dict]:
+    """
+    2つのベンチマーク結果の全ての指標を比較
+
+    Returns:
+        指標ごとの比較結果のリスト（指標名の順）
+    """
+    names = sorted(set(baseline["metrics"]) | set(candidate["metrics"]))
+    comparisons = []
+    for name in names:
+        comparison = compare_metric(name, baseline["metrics"].get(name), candidate["metrics"].get(name),
+                                    threshold_for(name, thresholds), min_seconds, confidence)
+        if comparison["verdict"] == VERDICT_MISSING:
+            comparison["verdict"], error = _missing_verdict(name, baseline["metrics"].get(name), candidate)
+            if error:
+                comparison["error"] = error
+        comparisons.append(comparison)
+    return comparisons
+
+
+def unmatched_errors(comparisons: List[Dict], candidate: Dict) -> Dict[str, str]:
+    """比較対象のエラーのうち、どの指標にも対応しないもの（基準にもないベンチマークの失敗など）"""
+    errors = candidate.get("errors") or {}
+    names = [c["name"] for c in comparisons]
+    return {key: error for key, error in errors.items()
+            if not any(name == key or name.startswith(key + ".") for name in names)}
+
+
+def environment_warnings(baseline: Dict, candidate: Dict) -> List[str]:
+    """計測した環境や素材の設定の違い（比較の前提が崩れている可能性）"""
+    warnings = []
+    base_env, cand_env = baseline.get("environment", {}), candidate.get("environment", {})
+    for key in ENVIRONMENT_KEYS:
+        if base_env.get(key) != cand_env.get(key):
+            warnings.append(f"{key} が異なります: {base_env.get(key)} -> {cand_env.get(key)}")
+    base_config, cand_config = baseline.get("config", {}), candidate.get("config", {})
+    for key in ("length", "fixtures", "download_workers", "upload_chunk_mb"):
+        if base_config.get(key) != cand_config.get(key):
+            warnings.append(f"ベンチマークの設定（{key}）が異なります")
+    if cand_env.get("dirty"):
+        warnings.append("比較対象はコミットされていない変更を含む状態で計測されています")
+    return warnings
+
+
+def _describe(results: Dict, path: str) -> str:
+    environment = results.get("environment", {})
+    commit = (environment.get("commit") or "")[:8] or "不明"
+    label = f" {results['label']}" if results.get("label") else ""
+    return f"{os.path.basename(path)}（{commit}{label}, {results.get('created_at', '')}）"
+
+
+def format_report(comparisons: List[Dict], warnings: List[str], baseline_name: str, candidate_name: str,
+                  show_all: bool = False, errors: Optional[Dict[str, str]] = None) -> str:
+    """比較結果の表（既定では変化のあった指標だけ）"""
+    lines = [f"基準:     {baseline_name}", f"比較対象: {candidate_name}", ""]
+    for warning in warnings:
+        lines.append(f"警告: {warning}")
+    if warnings:
+        lines.append("")
+    if errors:
+        lines.append("比較対象で失敗したベンチマーク:")
+        for name, error in sorted(errors.items()):
+            lines.append(f"  {name}: {error}")
+        lines.append("")
+
+    header = (f"{'指標':<44} {'基準 (中央値±MAD)':>22} {'比較対象 (中央値±MAD)':>22} "
+              f"{'変化率':>8} {'信頼区間':>18} {'しきい値':>6}  判定")
+    lines.append(header)
+    lines.append("-" * len(header))
+    shown = 0
+    for c in comparisons:
+        if not show_all and c["verdict"] == VERDICT_UNCHANGED:
+            continue
+        shown += 1
+        if "baseline" not in c:
+            mark = " <<" if c["verdict"] in FAILING_VERDICTS else ""
+            lines.append(f"{c['name']:<44} {'':>22} {'':>22} {'':>8} {'':>18} {'':>6}  {c['verdict']}{mark}")
+            continue
+        base, cand = c["baseline"], c["candidate"]
+        interval = f"[{c['interval'][0]:+.1f}, {c['interval'][1]:+.1f}]%" if "interval" in c else "-"
+        mark = " <<" if c["verdict"] in FAILING_VERDICTS else ""
+        lines.append(
+            f"{c['name']:<44} {base['median']:>12.3f}±{base['mad']:<9.3f} {cand['median']:>12.3f}±{cand['mad']:<9.3f} "
+            f"{c['change']:>+7.1f}% {interval:>18} {c['threshold']:>5.0f}%  {c['verdict']}{mark}"
+            + (f"（{c['note']}）" if c.get("note") else "")
+        )
+    if not shown:
+        lines.append("変化のあった指標はありません。")
+
+    counts = {}
+    for c in comparisons:
+        counts[c["verdict"]] = counts.get(c["verdict"], 0) + 1
+    lines.append("")
+    lines.append("  ".join(f"{verdict}: {counts.get(verdict, 0)}" for verdict in
+                           (VERDICT_REGRESSION, VERDICT_RERUN, VERDICT_FAILED, VERDICT_MISSING, VERDICT_IMPROVEMENT,
+                            VERDICT_NOISY, VERDICT_UNCHANGED, VERDICT_SKIPPED, VERDICT_NEW)))
+    return "\n".join(lines)
+
+
+def parse_threshold(value: str) -> Tuple[str, float]:
+    """'パターン=パーセント' の形式のしきい値を解析"""
+    pattern, sep, percent = value.rpartition("=")
+    try:
+        if not sep or not pattern:
+            raise ValueError
+        return pattern, float(percent)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"しきい値は '指標名のパターン=パーセント' で指定してください: {value}")
+
+
+def parse_arguments():
+    """コマンドライン引数をパース"""
+    parser = argparse.ArgumentParser(description="2つのベンチマーク結果を比較して性能の劣化を検出するツール")
+    parser.add_argument("baseline", help="基準の結果ファイル")
+    parser.add_argument("candidate", help="比較対象の結果ファイル")
+    parser.add_argument("--threshold", "-t", type=parse_threshold, action="append", default=[],
+                        help="指標ごとのしきい値（例: 'render.*.fps=3'、複数指定可、既定のしきい値より優先）")
+    parser.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS,
+                        help=f"判定しない時間の差（秒）（デフォルト: {DEFAULT_MIN_SECONDS}）")
+    parser.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE,
+                        help=f"信頼区間の信頼水準（デフォルト: {DEFAULT_CONFIDENCE}）")
+    parser.add_argument("--all", action="store_true", help="変化のない指標も表示する")
+    parser.add_argument("--output", "-o", help="比較結果をJSONで保存する")
+    parser.add_argument("--report-only", action="store_true", help="劣化があっても終了コード0で終了する")
+    return parser.parse_args()
+
+
+def main():
+    """メイン関数"""
+    args = parse_arguments()
+
+    try:
+        baseline = load_results(args.baseline)
+        candidate = load_results(args.candidate)
+    except (OSError, ValueError) as e:
+        print(f"エラー: 結果ファイルを読み込めませんでした: {e}")
+        sys.exit(2)
+
+    thresholds = args.threshold + DEFAULT_THRESHOLDS
+    comparisons = compare_results(baseline, candidate, thresholds, args.min_seconds, args.confidence)
+    warnings = environment_warnings(baseline, candidate)
+    print(format_report(comparisons, warnings, _describe(baseline, args.baseline),
+                        _describe(candidate, args.candidate), args.all, candidate.get("errors")))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"baseline": args.baseline, "candidate": args.candidate, "warnings": warnings,
+                       "errors": candidate.get("errors") or {}, "metrics": comparisons},
+                      f, ensure_ascii=False, indent=2)
+
+    failing = False
+    for verdict, message in ((VERDICT_REGRESSION, "性能が悪化した指標があります"),
+                             (VERDICT_RERUN, "悪化の可能性がある指標があります（計測回数を増やして再計測してください）"),
+                             (VERDICT_FAILED, "比較対象で計測に失敗した指標があります"),
+                             (VERDICT_MISSING, "比較対象で計測されていない指標があります")):
+        names = [c["name"] for c in comparisons if c["verdict"] == verdict]
+        if names:
+            print(f"\n{message}: {', '.join(names)}")
+            failing = True
+    unmatched = unmatched_errors(comparisons, candidate)
+    if unmatched:
+        print(f"\n比較対象で失敗したベンチマークがあります: {', '.join(sorted(unmatched))}")
+        failing = True
+    if failing and not args.report_only:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,660 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ベンチマーク用の素材（フィクスチャ）
+===================================
+
+ベンチマークの結果が手元の素材やサイトの状態に左右されないように、次の素材を用意します。
+
+- ffmpeg の lavfi ソースで合成した、決まった内容の動画（解像度ごと）と音源
+- BGMerサイトと同じ構造の一覧ページ・音源ページ（合成したもの、または実際のサイトから記録したもの）
+- ダウンロードの計測に使う決まった内容のファイル
+
+ページとファイルはローカルのHTTPサーバー（FixtureServer）から配信し、
+YouTubeの再開可能なアップロードと同じ手順でチャンクを受け取るエンドポイントも提供します。
+
+使用方法:
+    # 素材を作成（作成済みで設定が同じ場合は何もしない）
+    python benchmarks/fixtures.py build --resolutions 720p,1080p,4k
+
+    # 実際のサイトの一覧ページ・音源ページを記録（合成したページの代わりに使用）
+    python benchmarks/fixtures.py record --keywords 桜
+
+    # サーバーだけを起動
+    python benchmarks/fixtures.py serve --port 8765
+"""
+
+import os
+import sys
+import argparse
+import hashlib
+import json
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+# プロジェクトのルートディレクトリ
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 素材の出力先
+BENCHMARK_DIR = os.path.join(PROJECT_ROOT, "output", "benchmarks")
+DEFAULT_FIXTURE_DIR = os.path.join(BENCHMARK_DIR, "fixtures")
+MANIFEST_FILE = "manifest.json"
+SITE_DIR = "site"
+FILES_DIR = "files"
+MUSIC_DIR = "music"
+
+# 解像度の名前 -> (幅, 高さ)
+RESOLUTIONS = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+# 合成する素材の既定値
+DEFAULT_CLIPS = 4
+DEFAULT_CLIP_SECONDS = 12
+DEFAULT_FPS = 30
+DEFAULT_TONES = 2
+DEFAULT_TONE_SECONDS = 60
+DEFAULT_SITE_ITEMS = 60
+DEFAULT_ITEMS_PER_PAGE = 12
+DEFAULT_KEYWORDS = ["桜", "サクラ"]
+DEFAULT_DOWNLOAD_FILES = 4
+DEFAULT_DOWNLOAD_MB = 16
+# 素材の内容を決める乱数のシード（変更すると素材が作り直される）
+DEFAULT_SEED = 20240401
+
+# 素材の内容に影響する設定を変えた場合に上げる
+FIXTURE_VERSION = 1
+
+
+def ffmpeg_version() -> Optional[str]:
+    """ffmpegのバージョン（見つからない場合はNone）"""
+    try:
+        result = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.splitlines()[0] if result.stdout else None
+
+
+def _run_ffmpeg(args: List[str], output_path: str):
+    """ffmpegを実行し、一時ファイルに書き出してから置き換える"""
+    temp_path = f"{output_path}.tmp{os.path.splitext(output_path)[1]}"
+    command = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error"] + args + [
+        # 実行環境やバージョンによる埋め込み情報の差をなくす
+        "-map_metadata", "-1", "-fflags", "+bitexact", "-flags", "+bitexact", temp_path
+    ]
+    try:
+        subprocess.run(command, check=True)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.replace(temp_path, output_path)
+
+
+def synthesize_video(path: str, width: int, height: int, seconds: float, fps: int, seed: int):
+    """
+    テストパターンの動画を合成
+
+    testsrc2 の動くパターンにシード固定のノイズと色相の変化を加え、
+    実際の素材に近いエンコードの負荷がかかるようにする。
+
+    Args:
+        path: 出力先（.mp4）
+        width: 幅
+        height: 高さ
+        seconds: 長さ（秒）
+        fps: フレームレート
+        seed: ノイズのシード（クリップごとに変える）
+    """
+    source = (
+        f"testsrc2=size={width}x{height}:rate={fps}:duration={seconds},"
+        f"noise=alls=12:allf=t+u:all_seed={seed % 2147483647},"
+        f"hue=h={(seed * 47) % 360}+t*8"
+    )
+    _run_ffmpeg([
+        "-f", "lavfi", "-i", source,
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "20",
+        "-pix_fmt", "yuv420p", "-g", str(fps), "-threads", "1",
+    ], path)
+
+
+def synthesize_tone(path: str, seconds: float, base_frequency: float):
+    """
+    和音の音源を合成（ステレオ、44.1kHz）
+
+    Args:
+        path: 出力先（.mp3）
+        seconds: 長さ（秒）
+        base_frequency: 根音の周波数（Hz）
+    """
+    left = f"0.2*sin(2*PI*{base_frequency}*t)+0.1*sin(2*PI*{base_frequency * 1.5}*t)"
+    right = f"0.2*sin(2*PI*{base_frequency}*t)+0.1*sin(2*PI*{base_frequency * 1.25}*t)"
+    _run_ffmpeg([
+        "-f", "lavfi", "-i", f"aevalsrc={left}|{right}:s=44100:d={seconds}",
+        "-c:a", "libmp3lame", "-b:a", "192k",
+    ], path)
+
+
+def write_binary(path: str, size: int, seed: int):
+    """決まった内容の（圧縮できない）バイナリファイルを書き出す"""
+    rng = random.Random(seed)
+    chunk = 1024 * 1024
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining > 0:
+            n = min(chunk, remaining)
+            f.write(rng.randbytes(n))
+            remaining -= n
+
+
+def _listing_page(keyword: str, items: List[Tuple[int, str]], page: int, last_page: int) -> str:
+    """BGMerの検索結果と同じ構造の一覧ページ"""
+    quoted = urllib.parse.quote(keyword)
+    articles = "\n".join(
+        f'<article class="music"><h2 class="music-title"><a href="/music/{music_id}">{title}</a></h2>'
+        f'<div class="meta"><time>2024-03-{music_id % 28 + 1:02d}</time>'
+        f'<span class="tag">{keyword}</span><span class="tag">春</span></div></article>'
+        for music_id, title in items
+    )
+    head_next = f'<link rel="next" href="/page/{page + 1}/?s={quoted}">' if page < last_page else ""
+    link_next = f'<a class="next" href="/page/{page + 1}/?s={quoted}">次へ</a>' if page < last_page else ""
+    return (
+        f'<!DOCTYPE html><html lang="ja"><head><meta charset="utf-8">'
+        f'<title>「{keyword}」の検索結果 - ページ{page}</title>{head_next}</head>'
+        f'<body><main>{articles}</main><nav class="pagination">{link_next}</nav></body></html>'
+    )
+
+
+def _music_page(music_id: int, title: str) -> str:
+    """BGMerの音源ページと同じ構造の詳細ページ"""
+    paragraphs = "".join(
+        f"<p>{title}の雰囲気をイメージした楽曲です。春の映像や桜の風景に合わせてお使いください。（{i + 1}）</p>"
+        for i in range(6)
+    )
+    return (
+        f'<!DOCTYPE html><html lang="ja"><head><meta charset="utf-8"><title>{title}</title></head>'
+        f'<body><article><h1>{title}</h1><div class="music-title">{title}</div>'
+        f'<div class="download"><a href="/files/music_{music_id}_short.mp3">SHORT ダウンロード</a>'
+        f'<a href="/files/music_{music_id}_long.mp3">LONG ダウンロード</a></div>'
+        f'<div class="music-description">{paragraphs}</div>'
+        f'<h2>概要</h2><p>{title}（フィクスチャ）</p></article></body></html>'
+    )
+
+
+def synthesize_site(site_dir: str, keywords: List[str], items: int, per_page: int, seed: int) -> Dict:
+    """
+    BGMerサイトと同じ構造のページを合成
+
+    Args:
+        site_dir: ページの保存先
+        keywords: 検索キーワード（キーワードごとに一覧を作成）
+        items: 1キーワードあたりの音源数
+        per_page: 1ページあたりの音源数
+        seed: タイトルの並びを決めるシード
+
+    Returns:
+        ページのマニフェスト（"pages": リクエストのパス -> ファイル名）
+    """
+    rng = random.Random(seed)
+    words = ["ソメイヨシノ", "夜桜", "花吹雪", "春風", "桜並木", "花筏", "しだれ桜", "山桜"]
+    pages: Dict[str, str] = {}
+    os.makedirs(site_dir, exist_ok=True)
+
+    def save(request_path: str, html: str):
+        file_name = f"page_{len(pages):04d}.html"
+        with open(os.path.join(site_dir, file_name), "w", encoding="utf-8") as f:
+            f.write(html)
+        pages[request_path] = file_name
+
+    music_id = 1000
+    for keyword in keywords:
+        entries = []
+        for _ in range(items):
+            music_id += 1
+            entries.append((music_id, f"{rng.choice(words)}の調べ No.{music_id}"))
+            save(f"/music/{music_id}", _music_page(music_id, entries[-1][1]))
+        last_page = max(1, -(-len(entries) // per_page))
+        quoted = urllib.parse.quote(keyword)
+        for page in range(1, last_page + 1):
+            path = f"/?s={quoted}" if page == 1 else f"/page/{page}/?s={quoted}"
+            save(path, _listing_page(keyword, entries[(page - 1) * per_page:page * per_page], page, last_page))
+
+    return {"base_url": None, "keywords": keywords, "pages": pages}
+
+
+def record_site(site_dir: str, keywords: List[str], base_url: str = "https://bgmer.net") -> Dict:
+    """
+    実際のサイトの一覧ページと音源ページを記録
+
+    スクレイパー（music/bgmer_scraper_optimized.py）で巡回し、取得した全てのページを保存する。
+    通常のスクレイピングと同じく、リクエストの間隔を空けて取得する。
+
+    Args:
+        site_dir: ページの保存先
+        keywords: 検索キーワード
+        base_url: サイトのベースURL
+
+    Returns:
+        ページのマニフェスト
+    """
+    sys.path.append(os.path.join(PROJECT_ROOT, "music"))
+    from bgmer_scraper_optimized import BGMerScraper
+    from bgmer_catalog import MusicCatalog, CatalogCrawler
+
+    os.makedirs(site_dir, exist_ok=True)
+    pages: Dict[str, str] = {}
+
+    def save(response, *args, **kwargs):
+        if response.status_code != 200 or "html" not in response.headers.get("Content-Type", ""):
+            return
+        request_path = response.request.path_url
+        if request_path in pages:
+            return
+        file_name = f"page_{len(pages):04d}.html"
+        with open(os.path.join(site_dir, file_name), "w", encoding="utf-8") as f:
+            f.write(response.text)
+        pages[request_path] = file_name
+
+    scraper = BGMerScraper(base_url=base_url, cache_dir=None)
+    scraper.session.hooks["response"].append(save)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        catalog = MusicCatalog(os.path.join(temp_dir, "catalog.json"))
+        CatalogCrawler(scraper, catalog).refresh(keywords)
+
+    print(f"{len(pages)}ページを記録しました: {site_dir}")
+    return {"base_url": base_url, "keywords": keywords, "pages": pages}
+
+
+def load_manifest(fixture_dir: str) -> Dict:
+    """素材のマニフェスト（作成されていない場合は空の辞書）"""
+    path = os.path.join(fixture_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        print(f"警告: 素材のマニフェストを読み込めませんでした: {path}")
+        return {}
+
+
+def save_manifest(fixture_dir: str, manifest: Dict):
+    """素材のマニフェストをアトミックに保存"""
+    os.makedirs(fixture_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(suffix=".json", dir=fixture_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, os.path.join(fixture_dir, MANIFEST_FILE))
+
+
+def _settings_key(settings: Dict) -> str:
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def build_fixtures(
+    fixture_dir: str = DEFAULT_FIXTURE_DIR,
+    resolutions: List[str] = ("1080p",),
+    clips: int = DEFAULT_CLIPS,
+    clip_seconds: float = DEFAULT_CLIP_SECONDS,
+    fps: int = DEFAULT_FPS,
+    tones: int = DEFAULT_TONES,
+    tone_seconds: float = DEFAULT_TONE_SECONDS,
+    site_items: int = DEFAULT_SITE_ITEMS,
+    items_per_page: int = DEFAULT_ITEMS_PER_PAGE,
+    keywords: List[str] = DEFAULT_KEYWORDS,
+    download_files: int = DEFAULT_DOWNLOAD_FILES,
+    download_mb: int = DEFAULT_DOWNLOAD_MB,
+    seed: int = DEFAULT_SEED,
+    media: bool = True,
+) -> Dict:
+    """
+    ベンチマーク用の素材を作成
+
+    素材の種類ごとに設定をマニフェストに記録し、設定が同じものは作り直さない
+    （記録したページは合成したページで上書きしない）。
+
+    Args:
+        media: 動画と音源も合成するか（Falseの場合はffmpegを使わないページとファイルだけ）
+
+    Returns:
+        素材のマニフェスト
+    """
+    manifest = load_manifest(fixture_dir)
+    manifest["version"] = FIXTURE_VERSION
+    manifest.setdefault("videos", {})
+
+    # 解像度ごとの動画
+    for name in (resolutions if media else ()):
+        if name not in RESOLUTIONS:
+            raise ValueError(f"不明な解像度です: {name}（{', '.join(RESOLUTIONS)}）")
+        width, height = RESOLUTIONS[name]
+        settings = {"version": FIXTURE_VERSION, "size": [width, height], "clips": clips,
+                    "seconds": clip_seconds, "fps": fps, "seed": seed}
+        video_dir = os.path.join(fixture_dir, name, "videos")
+        entry = manifest["videos"].get(name, {})
+        if entry.get("key") == _settings_key(settings) and all(os.path.exists(p) for p in entry["files"]):
+            continue
+        print(f"{name}（{width}x{height}）の動画を{clips}本合成しています...")
+        if os.path.isdir(video_dir):
+            shutil.rmtree(video_dir)
+        os.makedirs(video_dir)
+        files = []
+        for i in range(clips):
+            path = os.path.join(video_dir, f"clip_{i:02d}.mp4")
+            synthesize_video(path, width, height, clip_seconds, fps, seed + i)
+            files.append(path)
+        manifest["videos"][name] = {"key": _settings_key(settings), "settings": settings, "files": files}
+        save_manifest(fixture_dir, manifest)
+
+    # BGM
+    settings = {"version": FIXTURE_VERSION, "tones": tones, "seconds": tone_seconds}
+    entry = manifest.get("music", {})
+    if media and (entry.get("key") != _settings_key(settings)
+                  or not all(os.path.exists(p) for p in entry["files"])):
+        print(f"音源を{tones}本合成しています...")
+        music_dir = os.path.join(fixture_dir, MUSIC_DIR)
+        os.makedirs(music_dir, exist_ok=True)
+        files = []
+        for i in range(tones):
+            path = os.path.join(music_dir, f"tone_{i:02d}.mp3")
+            synthesize_tone(path, tone_seconds, 220.0 * (1.5 ** i))
+            files.append(path)
+        manifest["music"] = {"key": _settings_key(settings), "settings": settings, "files": files}
+        save_manifest(fixture_dir, manifest)
+
+    # サイトのページ
+    settings = {"version": FIXTURE_VERSION, "keywords": list(keywords), "items": site_items,
+                "per_page": items_per_page, "seed": seed}
+    entry = manifest.get("site", {})
+    if entry.get("recorded"):
+        pass
+    elif entry.get("key") != _settings_key(settings):
+        site_dir = os.path.join(fixture_dir, SITE_DIR)
+        if os.path.isdir(site_dir):
+            shutil.rmtree(site_dir)
+        site = synthesize_site(site_dir, list(keywords), site_items, items_per_page, seed)
+        manifest["site"] = dict(site, key=_settings_key(settings), recorded=False)
+        save_manifest(fixture_dir, manifest)
+
+    # ダウンロード用のファイル
+    settings = {"version": FIXTURE_VERSION, "files": download_files, "mb": download_mb, "seed": seed}
+    entry = manifest.get("downloads", {})
+    files_dir = os.path.join(fixture_dir, FILES_DIR)
+    if entry.get("key") != _settings_key(settings) or not all(
+            os.path.exists(os.path.join(files_dir, name)) for name in entry["files"]):
+        print(f"ダウンロード用のファイル（{download_mb}MB x {download_files}）を作成しています...")
+        os.makedirs(files_dir, exist_ok=True)
+        names = []
+        for i in range(download_files):
+            name = f"download_{i:02d}.mp3"
+            write_binary(os.path.join(files_dir, name), download_mb * 1024 * 1024, seed + i)
+            names.append(name)
+        manifest["downloads"] = {"key": _settings_key(settings), "settings": settings, "files": names}
+        save_manifest(fixture_dir, manifest)
+
+    return manifest
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    """素材サーバーのリクエストハンドラ"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "SakuraFixtureServer/1.0"
+    # ヘッダーと本文を別々に送るため、Nagleアルゴリズムを無効にして遅延ACKの待ち（約40ms）を避ける
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "text/plain; charset=utf-8",
+              headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        path = urllib.parse.urlsplit(self.path).path
+        if path.startswith(f"/{FILES_DIR}/"):
+            self._send_file(os.path.basename(path))
+            return
+        page = self.server.pages.get(self.path)
+        if page is None:
+            self._send(404, b"not found")
+            return
+        self._send(200, page, "text/html; charset=utf-8")
+
+    def _send_file(self, name: str):
+        """ダウンロード用のファイルを返す（Rangeリクエストに対応）"""
+        path = self.server.resolve_file(name)
+        if path is None:
+            self._send(404, b"not found")
+            return
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        status = 200
+        range_header = self.headers.get("Range", "")
+        if range_header.startswith("bytes="):
+            first, _, last = range_header[6:].partition("-")
+            start = int(first) if first else 0
+            end = min(int(last), size - 1) if last else size - 1
+            if start >= size:
+                self._send(416, headers={"Content-Range": f"bytes */{size}"})
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(1024 * 1024, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+    def do_POST(self):
+        """再開可能なアップロードのセッションを開始（YouTube Data APIと同じ手順）"""
+        self._discard_body()
+        if not urllib.parse.urlsplit(self.path).path.startswith("/upload"):
+            self._send(404, b"not found")
+            return
+        session_id = uuid.uuid4().hex
+        with self.server.lock:
+            self.server.uploads[session_id] = 0
+        host = self.headers.get("Host", "%s:%d" % self.server.server_address[:2])
+        self._send(200, b"", headers={"Location": f"http://{host}/upload/session/{session_id}"})
+
+    def do_PUT(self):
+        """アップロードのチャンクを受け取る（最後のチャンクまでは308を返す）"""
+        session_id = urllib.parse.urlsplit(self.path).path.rpartition("/")[2]
+        with self.server.lock:
+            received = self.server.uploads.get(session_id)
+        if received is None:
+            self._discard_body()
+            self._send(404, b"not found")
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        content_range = self.headers.get("Content-Range", "")
+        total = content_range.rpartition("/")[2]
+        remaining = length
+        while remaining > 0:
+            chunk = self.rfile.read(min(1024 * 1024, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+        received += length - remaining
+        with self.server.lock:
+            self.server.uploads[session_id] = received
+
+        if total.isdigit() and received >= int(total):
+            body = json.dumps({"id": session_id[:11], "snippet": {"title": "fixture"}}).encode("utf-8")
+            self._send(200, body, "application/json")
+        else:
+            self._send(308, headers={"Range": f"bytes=0-{received - 1}"} if received else None)
+
+    def _discard_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if length:
+            self.rfile.read(length)
+
+
+class FixtureServer:
+    """
+    記録・合成したページとダウンロード用のファイルを配信するローカルHTTPサーバー
+
+    with文で使用すると、別スレッドで起動して終了時に停止する。
+    """
+
+    def __init__(self, fixture_dir: str = DEFAULT_FIXTURE_DIR, host: str = "127.0.0.1", port: int = 0):
+        """
+        初期化メソッド
+
+        Args:
+            fixture_dir: 素材のディレクトリ（build_fixtures で作成したもの）
+            host: 待ち受けるアドレス
+            port: ポート番号（0の場合は空いているポート）
+        """
+        self.fixture_dir = fixture_dir
+        self.httpd = ThreadingHTTPServer((host, port), _FixtureHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.lock = threading.Lock()
+        self.httpd.uploads = {}
+        self.httpd.pages = {}
+        self.httpd.resolve_file = self._resolve_file
+        self._thread: Optional[threading.Thread] = None
+        self._load_pages()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _load_pages(self):
+        """ページを読み込み、記録したページのサイトへのリンクをサーバーのURLに書き換える"""
+        site = load_manifest(self.fixture_dir).get("site", {})
+        site_dir = os.path.join(self.fixture_dir, SITE_DIR)
+        original = site.get("base_url")
+        for request_path, file_name in site.get("pages", {}).items():
+            with open(os.path.join(site_dir, file_name), "r", encoding="utf-8") as f:
+                html = f.read()
+            if original:
+                html = html.replace(original, self.base_url)
+            self.httpd.pages[request_path] = html.encode("utf-8")
+
+    def _resolve_file(self, name: str) -> Optional[str]:
+        files_dir = os.path.join(self.fixture_dir, FILES_DIR)
+        path = os.path.join(files_dir, name)
+        if os.path.isfile(path):
+            return path
+        # 音源ページのリンク（music_<id>_long.mp3 など）はダウンロード用のファイルのどれかを返す
+        candidates = sorted(os.listdir(files_dir)) if os.path.isdir(files_dir) else []
+        if not candidates:
+            return None
+        index = int(hashlib.sha1(name.encode("utf-8")).hexdigest(), 16) % len(candidates)
+        return os.path.join(files_dir, candidates[index])
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+
+def parse_arguments():
+    """コマンドライン引数をパース"""
+    parser = argparse.ArgumentParser(description="ベンチマーク用の素材の作成・記録・配信")
+    parser.add_argument("--fixture-dir", default=DEFAULT_FIXTURE_DIR,
+                        help=f"素材のディレクトリ（デフォルト: {DEFAULT_FIXTURE_DIR}）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="素材を作成")
+    build.add_argument("--resolutions", default="720p,1080p",
+                       help=f"動画の解像度（カンマ区切り、{', '.join(RESOLUTIONS)}）（デフォルト: 720p,1080p）")
+    build.add_argument("--clips", type=int, default=DEFAULT_CLIPS, help="解像度ごとの動画の本数")
+    build.add_argument("--clip-seconds", type=float, default=DEFAULT_CLIP_SECONDS, help="動画1本の長さ（秒）")
+
+    record = subparsers.add_parser("record", help="実際のサイトのページを記録")
+    record.add_argument("--keywords", default=",".join(DEFAULT_KEYWORDS), help="検索キーワード（カンマ区切り）")
+    record.add_argument("--base-url", default="https://bgmer.net", help="サイトのベースURL")
+
+    serve = subparsers.add_parser("serve", help="素材サーバーを起動")
+    serve.add_argument("--host", default="127.0.0.1", help="待ち受けるアドレス")
+    serve.add_argument("--port", type=int, default=8765, help="ポート番号")
+
+    return parser.parse_args()
+
+
+def main():
+    """メイン関数"""
+    args = parse_arguments()
+
+    if args.command == "build":
+        if not ffmpeg_version():
+            print("エラー: ffmpegが見つかりません。素材の合成にはffmpegが必要です。")
+            sys.exit(1)
+        build_fixtures(args.fixture_dir, args.resolutions.split(","), args.clips, args.clip_seconds)
+        print(f"素材を作成しました: {args.fixture_dir}")
+    elif args.command == "record":
+        keywords = [k for k in args.keywords.split(",") if k]
+        site_dir = os.path.join(args.fixture_dir, SITE_DIR + ".recording")
+        site = record_site(site_dir, keywords, args.base_url)
+        final_dir = os.path.join(args.fixture_dir, SITE_DIR)
+        if os.path.isdir(final_dir):
+            shutil.rmtree(final_dir)
+        os.replace(site_dir, final_dir)
+        manifest = load_manifest(args.fixture_dir)
+        manifest["site"] = dict(site, recorded=True)
+        save_manifest(args.fixture_dir, manifest)
+    else:
+        server = FixtureServer(args.fixture_dir, args.host, args.port)
+        print(f"素材サーバーを起動しました: {server.base_url}（Ctrl+Cで停止）", flush=True)
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
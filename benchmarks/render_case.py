@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+動画生成のベンチマークの1回分（run_benchmarks.py から子プロセスとして実行）
+
+sakura_video_generator.py の素材・出力ディレクトリと解像度を合成した素材に差し替えて動画を生成し、
+生成にかかった時間とフレーム数を結果ファイル（JSON）に書き出します。
+区間ごとの時間は、親プロセスが環境変数 SAKURA_TRACE_DIR で指定したトレースから集計します。
+
+使用方法:
+    python benchmarks/render_case.py --fixture-dir output/benchmarks/fixtures --resolution 1080p \\
+        --length 30 --output-dir /tmp/render --result /tmp/render/result.json
+
+--outputs を指定すると、1回のデコードから複数の出力を生成する場合（generate_outputs）を計測します。
+"""
+
+import os
+import sys
+import argparse
+import json
+import random
+import time
+
+from fixtures import PROJECT_ROOT, RESOLUTIONS, MUSIC_DIR, DEFAULT_SEED
+
+sys.path.append(os.path.join(PROJECT_ROOT, "video"))
+
+
+def parse_arguments():
+    """コマンドライン引数をパース"""
+    parser = argparse.ArgumentParser(description="動画生成のベンチマークの1回分")
+    parser.add_argument("--fixture-dir", required=True, help="素材のディレクトリ")
+    parser.add_argument("--resolution", choices=list(RESOLUTIONS), required=True, help="解像度")
+    parser.add_argument("--length", type=int, required=True, help="動画の長さ（秒）")
+    parser.add_argument("--style", default="ranking", help="動画スタイル")
+    parser.add_argument("--output-dir", required=True, help="動画の出力先ディレクトリ")
+    parser.add_argument("--result", required=True, help="結果ファイル（JSON）の出力先")
+    parser.add_argument("--outputs", help="1回のデコードから生成する出力（カンマ区切り、例: 1080p,shorts）")
+    return parser.parse_args()
+
+
+def main():
+    """メイン関数"""
+    args = parse_arguments()
+
+    import sakura_video_generator as generator_module
+
+    # 素材・出力先・解像度を差し替える（メタデータや効果音は存在しないパスにして読み込ませない）
+    missing = os.path.join(args.output_dir, "missing")
+    generator_module.VIDEO_DIR = os.path.join(args.fixture_dir, args.resolution, "videos")
+    generator_module.MUSIC_DIR = os.path.join(args.fixture_dir, MUSIC_DIR)
+    generator_module.SFX_DIR = missing
+    generator_module.VIDEO_METADATA_FILE = os.path.join(missing, "metadata.json")
+    generator_module.MUSIC_METADATA_FILE = os.path.join(missing, "metadata.json")
+    generator_module.MUSIC_LIBRARY_INDEX = os.path.join(missing, "index.json")
+    generator_module.OUTPUT_DIR = args.output_dir
+    generator_module.DEFAULT_RESOLUTION = RESOLUTIONS[args.resolution]
+
+    # 素材とBGMの選び方を毎回同じにする
+    random.seed(DEFAULT_SEED)
+
+    generator = generator_module.SakuraVideoGenerator(
+        output_file=f"bench_{args.resolution}.mp4",
+        style=args.style,
+        length=args.length,
+        title="ベンチマーク"
+    )
+    start = time.perf_counter()
+    if args.outputs:
+        output_files = list(generator.generate_outputs(args.outputs.split(",")).values())
+    else:
+        output_files = [generator.generate_video()]
+    seconds = time.perf_counter() - start
+    output_file = output_files[0]
+
+    # 書き出したフレーム数はタイムラインの長さから求める
+    timeline_file = os.path.splitext(output_file)[0] + generator_module.TIMELINE_SUFFIX
+    with open(timeline_file, "r", encoding="utf-8") as f:
+        duration = json.load(f)["duration"]
+
+    result = {
+        "seconds": seconds,
+        "frames": int(duration * generator_module.DEFAULT_FPS),
+        "output_bytes": sum(os.path.getsize(path) for path in output_files),
+    }
+    with open(args.result, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+再現可能なベンチマーク
+=====================
+
+合成した素材（fixtures.py）を使って次の項目を計測し、結果をJSONで保存します。
+素材とページは毎回同じ内容なので、別のコミットや別の日の結果と比較できます。
+
+- render:   動画生成の fps・実行時間・区間ごとの時間・最大メモリ使用量（解像度ごと）
+- scrape:   ローカルサーバーから配信したページのスクレイピング速度（ページ/秒）
+- download: ローカルサーバーからの音源のダウンロード速度（MB/秒）
+- upload:   ローカルサーバーへの再開可能なアップロードの速度（YouTubeUploader、MB/秒）
+- startup:  各スクリプトのモジュールの読み込み時間（-X importtime）と --help の実行時間
+
+使用方法:
+    python benchmarks/run_benchmarks.py --resolutions 720p,1080p --repeat 3
+    python benchmarks/run_benchmarks.py --benchmarks scrape,download,upload --repeat 5
+
+結果は output/benchmarks/results/<日時>-<コミット>.json に保存されます。
+"""
+
+import os
+import sys
+import argparse
+import contextlib
+import io
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from fixtures import (
+    PROJECT_ROOT, BENCHMARK_DIR, DEFAULT_FIXTURE_DIR, FILES_DIR, RESOLUTIONS, build_fixtures, ffmpeg_version
+)
+from startup import ENTRY_POINTS, entry_name, run_startup
+
+sys.path.append(PROJECT_ROOT)
+import tracing
+
+# スクレイパー・ダウンローダー・アップローダー（依存ライブラリが必要なため、使用するベンチマークの中で読み込む）
+sys.path.append(os.path.join(PROJECT_ROOT, "music"))
+sys.path.append(os.path.join(PROJECT_ROOT, "video"))
+
+# 結果の保存先
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+RESULT_VERSION = 1
+
+BENCHMARKS = ["render", "scrape", "download", "upload", "startup"]
+
+# デフォルト設定
+DEFAULT_REPEAT = 5  # 3回では中央値の信頼区間が広く、しきい値付近の劣化を判定できないことが多い
+DEFAULT_WARMUP = 1
+DEFAULT_RENDER_LENGTH = 30
+DEFAULT_DOWNLOAD_WORKERS = 4
+DEFAULT_UPLOAD_CHUNK_MB = 8
+SERVER_START_TIMEOUT = 30  # 秒
+
+# 数値が大きいほど良い指標と小さいほど良い指標
+HIGHER_IS_BETTER = "higher"
+LOWER_IS_BETTER = "lower"
+
+
+def add_sample(metrics: Dict, name: str, value: float, unit: str, better: str):
+    """指標に1回分の計測値を追加"""
+    metric = metrics.setdefault(name, {"unit": unit, "better": better, "samples": []})
+    metric["samples"].append(value)
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        result = subprocess.run(["git"] + list(args), cwd=PROJECT_ROOT, capture_output=True,
+                                text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def environment_info() -> Dict:
+    """計測した環境（結果を比較する際に、同じ条件で計測したか確認するため）"""
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "ffmpeg": ffmpeg_version(),
+    }
+
+
+def _peak_rss_mb(rusage) -> float:
+    # Linux は KB、macOS はバイト単位
+    scale = 1 if sys.platform == "darwin" else 1024
+    return rusage.ru_maxrss * scale / 1024 / 1024
+
+
+def run_render(fixture_dir: str, resolution: str, length: int, work_dir: str,
+               outputs: Optional[str] = None) -> Dict[str, float]:
+    """
+    動画生成を子プロセスで1回実行
+
+    子プロセスにはトレースを有効にして起動し、区間ごとの時間をトレースから集計する。
+
+    Args:
+        fixture_dir: 素材のディレクトリ
+        resolution: 解像度の名前
+        length: 動画の長さ（秒）
+        work_dir: 出力とトレースの作業ディレクトリ（実行ごとに空のもの）
+        outputs: 1回のデコードから生成する出力（カンマ区切り、Noneの場合は通常の生成）
+
+    Returns:
+        指標名 -> 値
+    """
+    trace_dir = os.path.join(work_dir, "traces")
+    result_file = os.path.join(work_dir, "result.json")
+    command = [
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "render_case.py"),
+        "--fixture-dir", fixture_dir, "--resolution", resolution, "--length", str(length),
+        "--output-dir", work_dir, "--result", result_file,
+    ]
+    if outputs:
+        command += ["--outputs", outputs]
+    env = dict(os.environ, **{tracing.TRACE_DIR_ENV: trace_dir})
+
+    start = time.perf_counter()
+    with open(os.path.join(work_dir, "render.log"), "w", encoding="utf-8") as log:
+        process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, env=env)
+        peak_rss = None
+        if hasattr(os, "wait4"):
+            # 子プロセスごとの最大メモリ使用量を取得する
+            _, status, rusage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            peak_rss = _peak_rss_mb(rusage)
+        else:
+            process.wait()
+    wall_seconds = time.perf_counter() - start
+
+    if process.returncode != 0:
+        raise RuntimeError(f"動画生成が失敗しました（終了コード {process.returncode}）: "
+                           f"{os.path.join(work_dir, 'render.log')}")
+
+    with open(result_file, "r", encoding="utf-8") as f:
+        result = json.load(f)
+
+    values = {
+        "fps": result["frames"] / result["seconds"],
+        "seconds": result["seconds"],
+        "wall_seconds": wall_seconds,
+    }
+    if peak_rss is not None:
+        values["peak_rss_mb"] = peak_rss
+    _, stats, _ = tracing.merge_traces(trace_dir)
+    for name, (_, total, _, _) in stats.items():
+        values[f"stage.{name}"] = total
+    return values
+
+
+@contextlib.contextmanager
+def _without_delays(*modules):
+    """スクレイパーのサーバー負荷軽減のための待機を省略する（ローカルサーバーのため）"""
+
+    class NoDelayTime:
+        def __getattr__(self, name):
+            return getattr(time, name)
+
+        @staticmethod
+        def sleep(seconds):
+            pass
+
+    originals = [module.time for module in modules]
+    for module in modules:
+        module.time = NoDelayTime()
+    try:
+        yield
+    finally:
+        for module, original in zip(modules, originals):
+            module.time = original
+
+
+def run_scrape(base_url: str, keywords: List[str], work_dir: str) -> Dict[str, float]:
+    """
+    一覧ページの巡回と音源ページの取得を1回実行（キャッシュなし、待機なし）
+
+    Returns:
+        指標名 -> 値
+    """
+    import bgmer_catalog
+    import bgmer_scraper_optimized
+    from bgmer_catalog import MusicCatalog, CatalogCrawler
+    from bgmer_scraper_optimized import BGMerScraper
+
+    scraper = BGMerScraper(base_url=base_url, cache_dir=None)
+    pages = [0]
+    scraper.session.hooks["response"].append(lambda response, *args, **kwargs: pages.__setitem__(0, pages[0] + 1))
+    catalog = MusicCatalog(os.path.join(work_dir, "catalog.json"))
+
+    with _without_delays(bgmer_catalog, bgmer_scraper_optimized):
+        start = time.perf_counter()
+        music_list = CatalogCrawler(scraper, catalog).refresh(keywords)
+        seconds = time.perf_counter() - start
+
+    if not music_list or not any(music.get("download_links") for music in music_list):
+        raise RuntimeError("音源ページを解析できませんでした（素材のページを確認してください）")
+    return {"pages_per_second": pages[0] / seconds, "seconds": seconds}
+
+
+def run_download(base_url: str, file_names: List[str], workers: int, work_dir: str) -> Dict[str, float]:
+    """
+    音源のダウンロードを1回実行（SakuraSoundDownloader で同時にダウンロード）
+
+    Returns:
+        指標名 -> 値
+    """
+    from sakura_sound_downloader import SakuraSoundDownloader
+
+    downloader = SakuraSoundDownloader(download_dir=os.path.join(work_dir, "downloads"), max_workers=workers)
+    music_list = [
+        {"title": f"bench_{i:02d}", "download_links": {"long": f"{base_url}/{FILES_DIR}/{name}"}}
+        for i, name in enumerate(file_names)
+    ]
+    start = time.perf_counter()
+    paths = downloader.download_all_music(music_list)
+    seconds = time.perf_counter() - start
+
+    if len(paths) != len(music_list):
+        raise RuntimeError(f"ダウンロードに失敗したファイルがあります（{len(paths)}/{len(music_list)}）")
+    total_bytes = sum(os.path.getsize(path) for path in paths)
+    return {"mb_per_second": total_bytes / 1024 / 1024 / seconds, "seconds": seconds}
+
+
+def run_upload(base_url: str, file_paths: List[str], chunk_size: int, work_dir: str) -> Dict[str, float]:
+    """
+    アップロードを1回実行（YouTubeUploader で、素材サーバーをAPIのエンドポイントとしてチャンクを送信）
+
+    Returns:
+        指標名 -> 値
+    """
+    from google.auth.credentials import AnonymousCredentials
+    import youtube_uploader
+    from youtube_uploader import YouTubeUploader, build_service
+
+    # 認証情報ディレクトリをプロジェクト内に作らないようにする
+    youtube_uploader.CREDENTIALS_DIR = os.path.join(work_dir, "credentials")
+    credentials = AnonymousCredentials()
+    # 素材サーバーのURLに書き換えたディスカバリドキュメントから構築する
+    youtube = build_service(credentials, base_url)
+
+    start = time.perf_counter()
+    for file_path in file_paths:
+        response = YouTubeUploader(
+            file_path, chunk_size=chunk_size, progress_callback=None, credentials=credentials, youtube=youtube
+        ).upload_video()
+        if not response or "id" not in response:
+            raise RuntimeError(f"アップロードが失敗しました: {file_path}")
+    seconds = time.perf_counter() - start
+    total_bytes = sum(os.path.getsize(path) for path in file_paths)
+    return {"mb_per_second": total_bytes / 1024 / 1024 / seconds, "seconds": seconds}
+
+
+@contextlib.contextmanager
+def fixture_server(fixture_dir: str):
+    """
+    素材サーバーを別プロセスで起動（計測するクライアントとGILを取り合わないように）
+
+    Yields:
+        サーバーのベースURL
+    """
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures.py"),
+               "--fixture-dir", fixture_dir, "serve", "--port", "0"]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    try:
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        line = ""
+        while "http://" not in line:
+            line = process.stdout.readline()
+            if not line and (process.poll() is not None or time.monotonic() > deadline):
+                raise RuntimeError("素材サーバーを起動できませんでした")
+        yield "http://" + line.split("http://", 1)[1].split("（", 1)[0].strip()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def measure(name: str, func: Callable[[str], Dict[str, float]], repeat: int, warmup: int,
+            metrics: Dict, units: Dict[str, tuple], verbose: bool, errors: Dict):
+    """
+    ベンチマークを繰り返し実行して計測値を追加
+
+    Args:
+        name: 指標名の接頭辞（render.1080p など）
+        func: 作業ディレクトリを受け取って1回実行し、指標名 -> 値 を返す関数
+        repeat: 計測する回数
+        warmup: 計測前に実行して捨てる回数
+        metrics: 計測値を追加する辞書
+        units: 指標名 -> (単位, 良い方向)（stage. で始まる指標は秒・小さいほど良い）
+        verbose: 計測中の出力を表示するか
+        errors: 失敗したベンチマークの記録先
+    """
+    for i in range(warmup + repeat):
+        label = "ウォームアップ" if i < warmup else f"{i - warmup + 1}/{repeat}"
+        print(f"  {name} [{label}]...", end=" ", flush=True)
+        work_dir = tempfile.mkdtemp(prefix="sakura_bench_")
+        output = io.StringIO()
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(sys.stdout if verbose else output):
+                values = func(work_dir)
+        except Exception as e:
+            print("失敗")
+            errors[name] = f"{type(e).__name__}: {e}"
+            print(f"    エラー: {errors[name]}")
+            return
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        print(f"{time.perf_counter() - start:.2f}秒")
+        if i < warmup:
+            continue
+        for key, value in values.items():
+            unit, better = units.get(key, ("s", LOWER_IS_BETTER))
+            add_sample(metrics, f"{name}.{key}", value, unit, better)
+
+
+def format_results(metrics: Dict) -> str:
+    """結果の一覧（中央値・最小・最大）"""
+    lines = [f"{'指標':<48} {'中央値':>12} {'最小':>12} {'最大':>12}  単位"]
+    for name, metric in sorted(metrics.items()):
+        samples = metric["samples"]
+        lines.append(f"{name:<48} {statistics.median(samples):>12.3f} {min(samples):>12.3f} "
+                     f"{max(samples):>12.3f}  {metric['unit']}")
+    return "\n".join(lines)
+
+
+def save_results(results: Dict, path: str):
+    """結果をアトミックに保存"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(suffix=".json", dir=directory)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+def parse_arguments():
+    """コマンドライン引数をパース"""
+    parser = argparse.ArgumentParser(description="合成した素材を使った再現可能なベンチマーク")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS),
+                        help=f"実行するベンチマーク（カンマ区切り、{', '.join(BENCHMARKS)}）")
+    parser.add_argument("--resolutions", default="720p,1080p",
+                        help=f"動画生成を計測する解像度（カンマ区切り、{', '.join(RESOLUTIONS)}）（デフォルト: 720p,1080p）")
+    parser.add_argument("--length", type=int, default=DEFAULT_RENDER_LENGTH,
+                        help=f"生成する動画の長さ（秒）（デフォルト: {DEFAULT_RENDER_LENGTH}）")
+    parser.add_argument("--render-outputs",
+                        help="1回のデコードから複数の出力を生成する場合も計測する（カンマ区切り、例: 1080p,shorts）")
+    parser.add_argument("--repeat", "-n", type=int, default=DEFAULT_REPEAT,
+                        help=f"計測する回数（デフォルト: {DEFAULT_REPEAT}）")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP,
+                        help=f"計測前に実行して捨てる回数（デフォルト: {DEFAULT_WARMUP}）")
+    parser.add_argument("--download-workers", type=int, default=DEFAULT_DOWNLOAD_WORKERS,
+                        help=f"同時ダウンロード数（デフォルト: {DEFAULT_DOWNLOAD_WORKERS}）")
+    parser.add_argument("--upload-chunk-mb", type=int, default=DEFAULT_UPLOAD_CHUNK_MB,
+                        help=f"アップロードのチャンクサイズ（MB）（デフォルト: {DEFAULT_UPLOAD_CHUNK_MB}）")
+    parser.add_argument("--fixture-dir", default=DEFAULT_FIXTURE_DIR,
+                        help=f"素材のディレクトリ（デフォルト: {DEFAULT_FIXTURE_DIR}）")
+    parser.add_argument("--output", "-o", help="結果の保存先（デフォルト: output/benchmarks/results/<日時>-<コミット>.json）")
+    parser.add_argument("--label", help="結果に記録するラベル（比較の際の表示名）")
+    parser.add_argument("--verbose", "-v", action="store_true", help="計測中の各スクリプトの出力を表示する")
+    return parser.parse_args()
+
+
+def main():
+    """メイン関数"""
+    args = parse_arguments()
+    selected = [name for name in args.benchmarks.split(",") if name]
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        print(f"エラー: 不明なベンチマークです: {', '.join(sorted(unknown))}")
+        sys.exit(1)
+    resolutions = [name for name in args.resolutions.split(",") if name]
+
+    media = "render" in selected
+    if media and not ffmpeg_version():
+        print("エラー: ffmpegが見つかりません。動画生成のベンチマークにはffmpegが必要です。")
+        sys.exit(1)
+    manifest = build_fixtures(args.fixture_dir, resolutions, media=media)
+
+    environment = environment_info()
+    metrics: Dict = {}
+    errors: Dict = {}
+    common = dict(repeat=args.repeat, warmup=args.warmup, metrics=metrics, verbose=args.verbose, errors=errors)
+
+    if "render" in selected:
+        units = {"fps": ("fps", HIGHER_IS_BETTER), "peak_rss_mb": ("MB", LOWER_IS_BETTER)}
+        for resolution in resolutions:
+            print(f"動画生成（{resolution}, {args.length}秒）を計測しています...")
+            measure(f"render.{resolution}",
+                    lambda work_dir, resolution=resolution: run_render(
+                        args.fixture_dir, resolution, args.length, work_dir),
+                    units=units, **common)
+            if args.render_outputs:
+                print(f"複数出力の動画生成（{resolution}, {args.render_outputs}）を計測しています...")
+                measure(f"render.{resolution}.outputs",
+                        lambda work_dir, resolution=resolution: run_render(
+                            args.fixture_dir, resolution, args.length, work_dir, args.render_outputs),
+                        units=units, **common)
+
+    if "startup" in selected:
+        print("各スクリプトの起動時間を計測しています...")
+        units = {"import_ms": ("ms", LOWER_IS_BETTER)}
+        for script in ENTRY_POINTS:
+            measure(f"startup.{entry_name(script)}", lambda work_dir, script=script: run_startup(script),
+                    units=units, **common)
+
+    network = [name for name in selected if name in ("scrape", "download", "upload")]
+    if network:
+        file_names = manifest["downloads"]["files"]
+        file_paths = [os.path.join(args.fixture_dir, FILES_DIR, name) for name in file_names]
+        with fixture_server(args.fixture_dir) as base_url:
+            print(f"素材サーバー: {base_url}")
+            if "scrape" in selected:
+                print("スクレイピングを計測しています...")
+                measure("scrape", lambda work_dir: run_scrape(base_url, manifest["site"]["keywords"], work_dir),
+                        units={"pages_per_second": ("pages/s", HIGHER_IS_BETTER)}, **common)
+            if "download" in selected:
+                print("ダウンロードを計測しています...")
+                measure("download", lambda work_dir: run_download(base_url, file_names, args.download_workers, work_dir),
+                        units={"mb_per_second": ("MB/s", HIGHER_IS_BETTER)}, **common)
+            if "upload" in selected:
+                print("アップロードを計測しています...")
+                chunk_size = args.upload_chunk_mb * 1024 * 1024
+                measure("upload", lambda work_dir: run_upload(base_url, file_paths, chunk_size, work_dir),
+                        units={"mb_per_second": ("MB/s", HIGHER_IS_BETTER)}, **common)
+
+    results = {
+        "version": RESULT_VERSION,
+        "label": args.label,
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": environment,
+        "config": {
+            "benchmarks": selected,
+            "resolutions": resolutions,
+            "length": args.length,
+            "render_outputs": args.render_outputs,
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "download_workers": args.download_workers,
+            "upload_chunk_mb": args.upload_chunk_mb,
+            "fixtures": {
+                "videos": {name: entry["settings"] for name, entry in manifest.get("videos", {}).items()
+                           if media and name in resolutions},
+                "music": manifest["music"]["settings"] if media else None,
+                "downloads": manifest["downloads"]["settings"],
+                "site_recorded": manifest["site"].get("recorded", False),
+            },
+        },
+        "metrics": metrics,
+        "errors": errors,
+    }
+
+    output = args.output
+    if not output:
+        commit = (environment["commit"] or "nogit")[:8]
+        output = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{commit}.json")
+    save_results(results, output)
+
+    print()
+    if metrics:
+        print(format_results(metrics))
+    print(f"\n結果を保存しました: {output}")
+    if errors:
+        print(f"失敗したベンチマーク: {', '.join(sorted(errors))}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
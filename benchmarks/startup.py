@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+各スクリプトの起動時間の計測
+===========================
+
+パイプラインや監視デーモンから1日に何百回も起動されるスクリプトについて、
+python -X importtime でモジュールの読み込み時間を、`--help` の実行で起動から終了までの時間を計測します。
+読み込みに時間のかかっているモジュール（遅延読み込みの候補）も表示します。
+
+使用方法:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --scripts video/sakura_video_generator.py,video/youtube_uploader.py --top 15
+
+run_benchmarks.py --benchmarks startup でも同じ計測を行い、結果を compare.py で比較できます。
+"""
+
+import os
+import sys
+import argparse
+import re
+import statistics
+import subprocess
+import time
+from typing import Dict, List, Tuple
+
+from fixtures import PROJECT_ROOT
+
+# 計測するスクリプト（プロジェクトのルートからの相対パス、いずれも --help で終了するもの）
+ENTRY_POINTS = [
+    "video/sakura_video_generator.py",
+    "video/youtube_uploader.py",
+    "video/render_broker.py",
+    "video/watch_daemon.py",
+    "video/batch_publisher.py",
+    "video/thumbnail_generator.py",
+    "sakura_video_downloader.py",
+    "pipeline.py",
+    "music/sakura_sound_downloader.py",
+]
+
+DEFAULT_REPEAT = 5
+
+# `--help` がこの秒数で終わらない場合は失敗とする（引数を解析せずに本処理を始めるスクリプトの検出）
+HELP_TIMEOUT = 30
+DEFAULT_TOP = 10
+
+# -X importtime の出力（import time: self [us] | cumulative | imported package）
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def entry_name(script: str) -> str:
+    """指標名に使うスクリプトの名前（拡張子なし）"""
+    return os.path.splitext(os.path.basename(script))[0]
+
+
+def parse_import_time(stderr: str, module: str) -> Tuple[float, List[Tuple[float, str]]]:
+    """
+    -X importtime の出力を集計
+
+    読み込まれたモジュールは、そのモジュールが読み込んだモジュールの後に、浅いインデントで出力される。
+
+    Args:
+        stderr: -X importtime の出力
+        module: 計測したモジュール名
+
+    Returns:
+        (モジュールの読み込み時間（ミリ秒、インタープリタの起動を除く）,
+         (累積時間（ミリ秒）, モジュール名) のリスト（モジュールが直接読み込んだもの）)
+    """
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match:
+            _, cumulative, indent, name = match.groups()
+            entries.append((len(indent), int(cumulative) / 1000, name))
+
+    for index in range(len(entries) - 1, -1, -1):
+        depth, total, name = entries[index]
+        if name == module:
+            break
+    else:
+        return 0.0, []
+
+    direct = []
+    for child_depth, cumulative, child in reversed(entries[:index]):
+        if child_depth <= depth:
+            break
+        if child_depth == depth + 2:
+            direct.append((cumulative, child))
+    return total, direct
+
+
+def measure_import(script: str) -> Tuple[float, List[Tuple[float, str]]]:
+    """
+    スクリプトをモジュールとして読み込む時間を計測
+
+    スクリプトと同じディレクトリで実行し、同じディレクトリの他のモジュールも読み込めるようにする。
+
+    Args:
+        script: スクリプトのパス（プロジェクトのルートからの相対パス）
+
+    Returns:
+        (読み込み時間（ミリ秒）, 直接読み込んだモジュールの内訳)
+    """
+    path = os.path.join(PROJECT_ROOT, script)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {entry_name(script)}"],
+        cwd=os.path.dirname(path), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "不明なエラー"
+        raise RuntimeError(f"{script} を読み込めませんでした: {error}")
+    return parse_import_time(result.stderr, entry_name(script))
+
+
+def measure_help(script: str) -> float:
+    """
+    `スクリプト --help` の起動から終了までの時間（秒）
+
+    インタープリタの起動時間も含む、オーケストレーションから見た起動コスト。
+    ENTRY_POINTS のスクリプトは、--help で引数の説明だけを表示して終了する（argparse）必要がある。
+    """
+    path = os.path.join(PROJECT_ROOT, script)
+    start = time.perf_counter()
+    try:
+        result = subprocess.run([sys.executable, path, "--help"], cwd=os.path.dirname(path),
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                                timeout=HELP_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"{script} --help が {HELP_TIMEOUT} 秒以内に終了しませんでした")
+    seconds = time.perf_counter() - start
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "不明なエラー"
+        raise RuntimeError(f"{script} --help が失敗しました: {error}")
+    return seconds
+
+
+def run_startup(script: str) -> Dict[str, float]:
+    """
+    1つのスクリプトの起動時間を1回計測（run_benchmarks.py から使用）
+
+    Returns:
+        指標名 -> 値
+    """
+    import_ms, _ = measure_import(script)
+    help_seconds = measure_help(script)
+    return {"import_ms": import_ms, "help_seconds": help_seconds}
+
+
+def parse_arguments():
+    """コマンドライン引数をパース"""
+    parser = argparse.ArgumentParser(description="各スクリプトの起動時間（モジュールの読み込み時間）を計測するツール")
+    parser.add_argument("--scripts", default=",".join(ENTRY_POINTS),
+                        help="計測するスクリプト（プロジェクトのルートからの相対パス、カンマ区切り）")
+    parser.add_argument("--repeat", "-n", type=int, default=DEFAULT_REPEAT,
+                        help=f"計測する回数（中央値を表示）（デフォルト: {DEFAULT_REPEAT}）")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP,
+                        help=f"表示する読み込みの遅いモジュールの数（デフォルト: {DEFAULT_TOP}）")
+    return parser.parse_args()
+
+
+def main():
+    """メイン関数"""
+    args = parse_arguments()
+    scripts = [script for script in args.scripts.split(",") if script]
+
+    print(f"{'スクリプト':<40} {'読み込み(ms)':>14} {'--help(秒)':>12}")
+    print("-" * 68)
+    breakdowns = {}
+    failed = False
+    for script in scripts:
+        try:
+            imports = [measure_import(script) for _ in range(args.repeat)]
+            helps = [measure_help(script) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{script:<40} {'失敗':>14}")
+            print(f"    {e}")
+            failed = True
+            continue
+        import_ms = statistics.median(total for total, _ in imports)
+        print(f"{script:<40} {import_ms:>14.1f} {statistics.median(helps):>12.3f}")
+        breakdowns[script] = imports[-1][1]
+
+    for script, top_level in breakdowns.items():
+        print(f"\n{script} で読み込みに時間のかかっているモジュール:")
+        for ms, name in sorted(top_level, reverse=True)[:args.top]:
+            print(f"  {ms:>10.1f} ms  {name}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
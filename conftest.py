@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+テスト共通のフィクスチャ
+
+- clock: ジョブキュー（lease_queue.py、video/upload_queue.py）とレンダリングのブローカー
+  （video/render_broker.py）のテストで使う、差し替え可能な時計
+- youtube: YouTube Data APIの再開可能なアップロードを受け取るスタンドインサーバーと、
+  そこに接続する匿名の認証情報・APIサービス（video/ のアップロードのテストで使う）
+
+video/ のテストでも使うため、テストはプロジェクトのルートで実行してください:
+    python -m pytest test_lease_queue.py video/
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+
+class Clock:
+    """テスト用の時計（time.time の代わりに使う）"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """time.time を差し替えた時計（clock.now を進めて時間の経過を再現する）"""
+    clock = Clock()
+    monkeypatch.setattr(time, 'time', clock)
+    # ジッターは上限を返し、待機時間を決定的にする
+    monkeypatch.setattr(random, 'uniform', lambda low, high: high)
+    return clock
+
+
+class YouTubeStandInServer:
+    """
+    再開可能なアップロードのセッション開始とチャンクの受信だけを実装したサーバー
+
+    put_errors に (ステータス, エラー理由) を入れると、次のチャンクの送信にそのエラーを返す。
+    登録されていないセッションへの送信には404（セッションの期限切れ）を返す。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.inserted = []
+        self.put_errors = []
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _read_body(self):
+                return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+            def _send(self, status, body=b'', headers=None):
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                # videos.insert（uploadType=resumable）: メタデータを受け取りセッションURIを返す
+                metadata = json.loads(self._read_body() or b'{}')
+                session_id = uuid.uuid4().hex
+                with server.lock:
+                    server.sessions[session_id] = (metadata, 0)
+                self._send(200, headers={'Location': f"{server.base_url}/upload/session/{session_id}"})
+
+            def do_PUT(self):
+                session_id = self.path.rpartition('/')[2]
+                chunk = self._read_body()
+                with server.lock:
+                    error = server.put_errors.pop(0) if server.put_errors else None
+                    session = server.sessions.get(session_id)
+                if error:
+                    status, reason = error
+                    body = json.dumps({'error': {'code': status, 'errors': [{'reason': reason}]}})
+                    self._send(status, body.encode('utf-8'), {'Content-Type': 'application/json'})
+                    return
+                if session is None:
+                    self._send(404)
+                    return
+                metadata, received = session
+                received += len(chunk)
+                with server.lock:
+                    server.sessions[session_id] = (metadata, received)
+                total = self.headers.get('Content-Range', '').rpartition('/')[2]
+                if total.isdigit() and received >= int(total):
+                    with server.lock:
+                        video_id = f"video{len(server.inserted)}"
+                        server.inserted.append(metadata)
+                    body = json.dumps({'id': video_id, 'snippet': metadata['snippet']}).encode('utf-8')
+                    self._send(200, body, {'Content-Type': 'application/json'})
+                else:
+                    self._send(308, headers={'Range': f"bytes=0-{received - 1}"} if received else None)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def youtube(monkeypatch, tmp_path):
+    """スタンドインサーバーと、そこに接続する匿名の認証情報・APIサービス"""
+    pytest.importorskip('googleapiclient')
+    pytest.importorskip('google_auth_httplib2')
+    from google.auth.credentials import AnonymousCredentials
+    import youtube_uploader
+
+    # アップローダーが認証情報ディレクトリをプロジェクト内に作らないようにする
+    monkeypatch.setattr(youtube_uploader, 'CREDENTIALS_DIR', str(tmp_path / 'credentials'))
+    credentials = AnonymousCredentials()
+    with YouTubeStandInServer() as server:
+        yield SimpleNamespace(
+            server=server,
+            credentials=credentials,
+            service=youtube_uploader.build_service(credentials, server.base_url)
+        )
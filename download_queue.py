@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+再開可能なダウンロードジョブキュー
+
+sakura_video_downloader.pyの検索結果やプレイリストの各動画を、SQLiteに保存された
+ジョブとして管理します。プロセスが途中で終了しても、次回の実行時には
+未完了のジョブだけを同じ出力ディレクトリで再開できます（.partファイルからの続きを含む）。
+
+ジョブの状態:
+    pending     : 未処理（再試行待ちを含む）
+    in_progress : ワーカーが処理中（リース期限切れで pending に戻る）
+    done        : 完了
+    failed      : 再試行回数の上限に達した
+"""
+
+import json
+
+from lease_queue import LeaseQueue, STATUS_DONE
+
+# デフォルト設定
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_BASE = 30  # 秒
+DEFAULT_BACKOFF_MAX = 3600  # 秒
+DEFAULT_LEASE_SECONDS = 600  # 処理中ジョブのリース期間（秒）
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    origin TEXT NOT NULL,
+    url TEXT NOT NULL UNIQUE,
+    video_id TEXT,
+    title TEXT,
+    output_dir TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    lease_until REAL NOT NULL DEFAULT 0,
+    worker TEXT,
+    last_error TEXT,
+    result TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, next_attempt_at);
+"""
+
+
+class DownloadQueue(LeaseQueue):
+    """SQLiteに保存される永続ダウンロードジョブキュー"""
+    table = 'jobs'
+    schema = SCHEMA
+
+    def __init__(self, db_path, max_attempts=DEFAULT_MAX_ATTEMPTS, backoff_base=DEFAULT_BACKOFF_BASE,
+                 backoff_max=DEFAULT_BACKOFF_MAX, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        初期化メソッド
+
+        Args:
+            db_path (str): SQLiteデータベースのパス
+            max_attempts (int): 1ジョブあたりの最大試行回数
+            backoff_base (float): 再試行の基本待機時間（秒）
+            backoff_max (float): 再試行の最大待機時間（秒）
+            lease_seconds (float): 処理中ジョブのリース期間（秒）
+        """
+        super().__init__(db_path, max_attempts, backoff_base, backoff_max, lease_seconds)
+
+    def enqueue(self, entries, source, origin, output_dir):
+        """
+        動画をジョブとして追加する（登録済みのURLは無視される）
+
+        Args:
+            entries (list): 動画情報のリスト（'url' が必須）
+            source (str): ジョブの種類（search, playlist）
+            origin (str): 検索クエリまたはプレイリストURL
+            output_dir (str): ダウンロード先ディレクトリ
+
+        Returns:
+            int: 新たに追加したジョブ数
+        """
+        now = self._now()
+        added = 0
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            for entry in entries:
+                cursor = conn.execute(
+                    """INSERT OR IGNORE INTO jobs
+                       (source, origin, url, video_id, title, output_dir, created_at, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (source, origin, entry['url'], entry.get('id'), entry.get('title'),
+                     output_dir, now, now)
+                )
+                added += cursor.rowcount
+            conn.execute('COMMIT')
+        return added
+
+    def complete(self, job, result):
+        """
+        ジョブを完了にする
+
+        Args:
+            job (dict): claim() で取得したジョブ
+            result (dict): ダウンロード結果の動画情報
+
+        Returns:
+            bool: 記録できた場合はTrue（リースが切れて他のワーカーに渡っていた場合はFalse）
+        """
+        return self._update_owned(
+            job, 'status = ?, result = ?, lease_until = 0, last_error = NULL, updated_at = ?',
+            (STATUS_DONE, json.dumps(result, ensure_ascii=False), self._now())
+        )
+
+    def results(self, status=STATUS_DONE):
+        """
+        指定した状態のジョブ結果を取得する
+
+        Args:
+            status (str): ジョブの状態
+
+        Returns:
+            list: 動画情報のリスト
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT result FROM jobs WHERE status = ? AND result IS NOT NULL ORDER BY id",
+                (status,)
+            ).fetchall()
+        return [json.loads(row['result']) for row in rows]
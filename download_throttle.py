@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ダウンロードの帯域・ディスク容量制御
+
+sakura_video_downloader.pyから使用する、帯域制限とクォータ管理のためのモジュールです。
+
+- トークンバケットによる帯域制限（同時に実行されるすべてのダウンロードで共有）
+- 1ファイルあたりの最大サイズ
+- 実行ごとの合計バイト数クォータ
+- 1日あたりの合計バイト数クォータ（状態ファイルに保存され、プロセスをまたいで有効）
+- 空きディスク容量の下限（下回った場合は失敗させずにキューを一時停止して待機）
+"""
+
+import os
+import re
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# 状態ファイルのデフォルトパス
+DEFAULT_STATE_FILE = os.path.join(os.getcwd(), 'downloads', 'download_quota.json')
+
+# バックプレッシャー時の再確認間隔（秒）
+DEFAULT_POLL_INTERVAL = 30
+
+# サイズ表記の単位
+SIZE_UNITS = {
+    '': 1,
+    'K': 1024,
+    'M': 1024 ** 2,
+    'G': 1024 ** 3,
+    'T': 1024 ** 4,
+}
+
+
+def parse_size(value):
+    """
+    "500M" や "2G" のようなサイズ表記をバイト数に変換する
+
+    Args:
+        value (str|int|None): サイズ表記
+
+    Returns:
+        int: バイト数（Noneの場合はNone）
+    """
+    if value is None or isinstance(value, int):
+        return value
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*', str(value), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"サイズの形式が正しくありません: {value}")
+    number, unit = match.groups()
+    return int(float(number) * SIZE_UNITS[unit.upper()])
+
+
+def format_size(num_bytes):
+    """
+    バイト数を読みやすい表記に変換する
+
+    Args:
+        num_bytes (int): バイト数
+
+    Returns:
+        str: サイズ表記
+    """
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f}TB"
+
+
+class TokenBucket:
+    """スレッドセーフなトークンバケット"""
+
+    def __init__(self, rate, capacity=None):
+        """
+        初期化メソッド
+
+        Args:
+            rate (float): 1秒あたりに補充されるトークン数（バイト/秒）
+            capacity (float): バケットの容量（Noneの場合は1秒分）
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount):
+        """
+        指定量のトークンを消費する（不足している場合は補充されるまで待機する）
+
+        Args:
+            amount (float): 消費するトークン数
+        """
+        while amount > 0:
+            # 容量を超える要求は容量単位に分割して消費する
+            chunk = min(amount, self.capacity)
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= chunk:
+                    self.tokens -= chunk
+                    amount -= chunk
+                    continue
+                wait = (chunk - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class QuotaExceeded(Exception):
+    """クォータを超過した場合の例外"""
+    pass
+
+
+# 1日の使用量を状態ファイルに保存する間隔（バイト）
+DAILY_FLUSH_BYTES = 16 * 1024 ** 2
+
+# match_filter でスキップした理由
+SKIP_FILE_SIZE = 'file_size'  # 1ファイルあたりの上限（何度試しても同じ）
+SKIP_RUN_QUOTA = 'run_quota'  # 実行ごとのクォータ（次回の実行では回復する）
+
+
+class DownloadThrottle:
+    """帯域・ディスク容量・クォータを管理するクラス"""
+
+    def __init__(self, output_dir, rate_limit=None, max_file_size=None, max_run_bytes=None,
+                 max_daily_bytes=None, min_free_space=None, state_file=DEFAULT_STATE_FILE,
+                 poll_interval=DEFAULT_POLL_INTERVAL):
+        """
+        初期化メソッド
+
+        Args:
+            output_dir (str): ダウンロード先ディレクトリ（空き容量の確認に使用）
+            rate_limit (int): 全ダウンロード合計の帯域上限（バイト/秒）
+            max_file_size (int): 1ファイルあたりの最大サイズ（バイト）
+            max_run_bytes (int): 実行ごとの合計ダウンロード量の上限（バイト）
+            max_daily_bytes (int): 1日あたりの合計ダウンロード量の上限（バイト）
+            min_free_space (int): 空きディスク容量の下限（バイト）
+            state_file (str): 1日あたりの使用量を記録する状態ファイル
+            poll_interval (float): 一時停止中の再確認間隔（秒）
+        """
+        self.output_dir = output_dir
+        self.max_file_size = parse_size(max_file_size)
+        self.max_run_bytes = parse_size(max_run_bytes)
+        self.max_daily_bytes = parse_size(max_daily_bytes)
+        self.min_free_space = parse_size(min_free_space)
+        self.state_file = state_file
+        self.poll_interval = poll_interval
+
+        rate_limit = parse_size(rate_limit)
+        self.bucket = TokenBucket(rate_limit) if rate_limit else None
+
+        self.lock = threading.Lock()
+        # この実行で転送したバイト数
+        self.run_bytes = 0
+        # 開始前に予約し、まだ転送していないバイト数（全スレッドの合計）
+        self.reserved = 0
+        # 1日の使用量のうち、まだ状態ファイルに保存していないバイト数
+        self.unsaved_daily = 0
+        # match_filter でスキップした理由（yt-dlpを呼び出したスレッドごと）
+        self.skipped = threading.local()
+        # ダウンロード中の予約とファイル（yt-dlpを呼び出したスレッドごと）
+        self.current = threading.local()
+        # ファイルごとの最後に通知されたダウンロード済みバイト数
+        self.progress = {}
+
+    # ---- yt-dlp との連携 ----
+
+    def apply_to(self, ydl_opts):
+        """
+        yt-dlpのオプションに帯域・容量制御を組み込む
+
+        Args:
+            ydl_opts (dict): yt-dlpのオプション（直接更新される）
+
+        Returns:
+            dict: 更新したオプション
+        """
+        ydl_opts.setdefault('progress_hooks', []).append(self.progress_hook)
+        ydl_opts['match_filter'] = self.match_filter
+        if self.max_file_size:
+            ydl_opts['max_filesize'] = self.max_file_size
+        return ydl_opts
+
+    def match_filter(self, info, *, incomplete=False):
+        """
+        ダウンロード開始前の確認（yt-dlpのmatch_filterとして使用）
+
+        Args:
+            info (dict): 動画情報
+            incomplete (bool): 情報が不完全な段階での呼び出しかどうか
+
+        Returns:
+            str: スキップする理由（ダウンロードする場合はNone）
+        """
+        if incomplete:
+            return None
+
+        # 同じスレッドの前の動画で使わなかった予約を解放する
+        self.settle()
+
+        estimated = self._estimate_size(info)
+        if self.max_file_size and estimated and estimated > self.max_file_size:
+            reason = (f"ファイルサイズが上限を超えるためスキップします: "
+                      f"{format_size(estimated)} > {format_size(self.max_file_size)}")
+            self.skipped.reason = (SKIP_FILE_SIZE, reason)
+            return reason
+
+        try:
+            self.wait_for_capacity(estimated or 0)
+        except QuotaExceeded as e:
+            self.skipped.reason = (SKIP_RUN_QUOTA, str(e))
+            return str(e)
+        return None
+
+    def pop_skip_reason(self):
+        """
+        このスレッドで最後に match_filter がスキップした理由を取得して消去する
+
+        Returns:
+            tuple: (SKIP_FILE_SIZE または SKIP_RUN_QUOTA, メッセージ)、スキップしていない場合はNone
+        """
+        reason = getattr(self.skipped, 'reason', None)
+        self.skipped.reason = None
+        return reason
+
+    def progress_hook(self, d):
+        """
+        ダウンロード進捗ごとの処理（yt-dlpのprogress_hooksとして使用）
+
+        帯域とクォータには、この実行で実際に転送したバイト数だけを通知ごとに数え、
+        開始時の予約から差し引く。途中から再開した .part ファイルでは最初の通知に
+        再開前の分も含まれるため、最初の通知の値を起点にする（最初の1ブロック分は数えない）。
+
+        Args:
+            d (dict): 進捗情報
+        """
+        status = d.get('status')
+        if status not in ('downloading', 'finished', 'error'):
+            return
+        filename = d.get('filename')
+        downloaded = d.get('downloaded_bytes')
+        with self.lock:
+            last = self.progress.get(filename)
+            delta = max(0, downloaded - last) if last is not None and downloaded is not None else 0
+            if status == 'downloading':
+                self.progress[filename] = downloaded if downloaded is not None else (last or 0)
+                self._current_files().add(filename)
+            else:
+                self.progress.pop(filename, None)
+                self._current_files().discard(filename)
+            self._charge(delta)
+            flush = self.unsaved_daily >= DAILY_FLUSH_BYTES or status != 'downloading'
+
+        if flush:
+            self._flush_daily_usage()
+        if status == 'downloading':
+            if self.bucket and delta:
+                self.bucket.consume(delta)
+            # ダウンロード中に空き容量が下限を下回った場合は一時停止する
+            self._wait_for_disk()
+
+    def settle(self):
+        """
+        このスレッドのダウンロードを締めくくる
+
+        使わなかった予約を解放し、中断・失敗したファイルの進捗を消去して、
+        1日の使用量を保存する。yt-dlpの呼び出しが終わったら（例外の場合も）呼び出す。
+        """
+        with self.lock:
+            self.reserved -= getattr(self.current, 'reservation', 0)
+            self.current.reservation = 0
+            for filename in self._current_files():
+                self.progress.pop(filename, None)
+            self.current.files = set()
+        self._flush_daily_usage()
+
+    def _current_files(self):
+        """このスレッドでダウンロード中のファイル（ロックを取得して呼び出す）"""
+        if not hasattr(self.current, 'files'):
+            self.current.files = set()
+        return self.current.files
+
+    def _charge(self, num_bytes):
+        """転送したバイト数を使用量に加え、このスレッドの予約から差し引く（ロックを取得して呼び出す）"""
+        if not num_bytes:
+            return
+        self.run_bytes += num_bytes
+        self.unsaved_daily += num_bytes
+        used = min(num_bytes, getattr(self.current, 'reservation', 0))
+        self.current.reservation = getattr(self.current, 'reservation', 0) - used
+        self.reserved -= used
+
+    # ---- クォータとバックプレッシャー ----
+
+    def wait_for_capacity(self, estimated=0):
+        """
+        新しいダウンロードを開始できるまで待機し、推定サイズを予約する
+
+        予約は確認と同じロックの中で行うため、同時に開始した複数のワーカーが
+        揃ってクォータを超えることはない。実行ごとのクォータを超える場合は
+        待っても回復しないため例外を送出する。1日のクォータと空きディスク容量は、
+        回復するまでキューを一時停止する。
+
+        Args:
+            estimated (int): これからダウンロードするファイルの推定サイズ（バイト）
+        """
+        while True:
+            with self.lock:
+                committed = self.run_bytes + self.reserved
+                if self.max_run_bytes and committed + estimated > self.max_run_bytes:
+                    raise QuotaExceeded(
+                        f"実行ごとのクォータに達したためスキップします: "
+                        f"{format_size(committed)} / {format_size(self.max_run_bytes)}"
+                    )
+                daily = (self._daily_usage() + self.unsaved_daily + self.reserved
+                         if self.max_daily_bytes else 0)
+                if not self.max_daily_bytes or daily + estimated <= self.max_daily_bytes:
+                    self.reserved += estimated
+                    self.current.reservation = getattr(self.current, 'reservation', 0) + estimated
+                    break
+            print(f"1日のクォータに達しました。ダウンロードを一時停止します "
+                  f"({format_size(daily)} / {format_size(self.max_daily_bytes)})")
+            time.sleep(self.poll_interval)
+
+        self._wait_for_disk(estimated)
+
+    def _wait_for_disk(self, estimated=0):
+        """空きディスク容量が下限を上回るまで待機する"""
+        if not self.min_free_space:
+            return
+        while True:
+            free = shutil.disk_usage(self.output_dir).free
+            if free - estimated >= self.min_free_space:
+                return
+            print(f"空きディスク容量が不足しています。ダウンロードを一時停止します "
+                  f"(空き: {format_size(free)}, 下限: {format_size(self.min_free_space)})")
+            time.sleep(self.poll_interval)
+
+    @staticmethod
+    def _estimate_size(info):
+        """動画情報からダウンロードサイズを推定する"""
+        formats = info.get('requested_formats') or [info]
+        total = 0
+        for fmt in formats:
+            total += fmt.get('filesize') or fmt.get('filesize_approx') or 0
+        return total
+
+    def _load_state(self):
+        """状態ファイルを読み込む"""
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return {}
+
+    def _daily_usage(self):
+        """本日のダウンロード量を取得する"""
+        state = self._load_state()
+        return state.get('daily', {}).get(datetime.now().strftime("%Y-%m-%d"), 0)
+
+    def _flush_daily_usage(self):
+        """まだ保存していない本日のダウンロード量を状態ファイルに加算する"""
+        with self.lock:
+            num_bytes, self.unsaved_daily = self.unsaved_daily, 0
+            if not self.max_daily_bytes or not num_bytes:
+                return
+            state = self._load_state()
+            today = datetime.now().strftime("%Y-%m-%d")
+            # 当日分のみ保持する
+            daily = {today: state.get('daily', {}).get(today, 0) + num_bytes}
+            state['daily'] = daily
+
+            state_dir = os.path.dirname(self.state_file) or '.'
+            os.makedirs(state_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(suffix='.json', dir=state_dir)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(state, f, ensure_ascii=False, indent=4)
+                os.replace(temp_path, self.state_file)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+プロセス間で共有するファイルの排他ロック
+
+複数のプロセスが同じJSONファイル（クォータの使用量、素材のメタデータなど）を
+読み込み・変更・保存する場合に、その間を排他制御するために使います。
+ロックは対象ファイルと同じ場所の <ファイル名>.lock に対して取得します。
+"""
+
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def locked(path):
+    """
+    ファイルの排他ロックを取得する（他のプロセスが保持している間は待つ）
+
+    Args:
+        path (str): 排他制御する対象のファイルのパス
+
+    Yields:
+        None
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path + '.lock', 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+リース付きの永続ジョブキュー（SQLite）
+
+ダウンロードキュー（download_queue.py）、アップロードキュー（video/upload_queue.py）、
+レンダリングのブローカー（video/render_broker.py）に共通する、ジョブの取得・リースの延長・失敗時の再試行予約を実装する基底クラスです。
+ワーカーが途中で終了しても、リース期限が切れたジョブは次の claim() で再取得されます。
+claim() はジョブに取得ごとのトークンを記録し、リースの延長・失敗・完了などの更新は
+そのトークンを持つワーカーからだけ受け付けます（リース切れで他のワーカーに渡った
+ジョブを、元のワーカーが上書きしないようにするため）。
+
+ジョブの状態:
+    pending     : 未処理（再試行待ちを含む）
+    in_progress : ワーカーが処理中（リース期限切れで pending に戻る）
+    done        : 完了
+    failed      : 再試行回数の上限に達した
+"""
+
+import os
+import random
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+# ジョブの状態
+STATUS_PENDING = 'pending'
+STATUS_IN_PROGRESS = 'in_progress'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+class LeaseLost(Exception):
+    """リースが切れて、ジョブが他のワーカーに渡っていた"""
+    pass
+
+
+class LeaseQueue:
+    """
+    SQLiteに保存されるリース付きジョブキューの基底クラス
+
+    サブクラスは table と schema を指定する。テーブルには status, attempts,
+    next_attempt_at, lease_until, worker, last_error, updated_at の列が必要。
+
+    ジョブを更新するメソッドは claim() で取得したジョブを受け取り、リースを
+    失っていた場合は何も変更せずに False を返す。
+    """
+    # ジョブを保存するテーブル名
+    table = None
+    # テーブルを作成するSQL
+    schema = None
+
+    def __init__(self, db_path, max_attempts, backoff_base, backoff_max, lease_seconds):
+        """
+        初期化メソッド
+
+        Args:
+            db_path (str): SQLiteデータベースのパス
+            max_attempts (int): 1ジョブあたりの最大試行回数
+            backoff_base (float): 再試行の基本待機時間（秒）
+            backoff_max (float): 再試行の最大待機時間（秒）
+            lease_seconds (float): 処理中ジョブのリース期間（秒）
+        """
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease_seconds = lease_seconds
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+        with self._connect() as conn:
+            conn.executescript(self.schema)
+            # 所有者の列がない古いデータベースには追加する
+            columns = {row['name'] for row in conn.execute(f"PRAGMA table_info({self.table})")}
+            if 'worker' not in columns:
+                conn.execute(f"ALTER TABLE {self.table} ADD COLUMN worker TEXT")
+
+    @contextmanager
+    def _connect(self):
+        """スレッドごとに独立した接続を開く"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _now():
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def _decode(self, row):
+        """行をジョブ情報の辞書に変換する（JSONの列を持つサブクラスはオーバーライドする）"""
+        return dict(row)
+
+    def _select_claimable(self, conn, now):
+        """
+        取得するジョブの行を選ぶ（claim() のトランザクション内で呼ばれる）
+
+        取得の条件や順序が異なるサブクラスはオーバーライドする。
+
+        Args:
+            conn (sqlite3.Connection): トランザクション中の接続
+            now (float): 現在時刻（UNIX時間）
+
+        Returns:
+            sqlite3.Row: 取得するジョブの行（実行可能なジョブがない場合はNone）
+        """
+        return conn.execute(
+            f"""SELECT * FROM {self.table}
+                WHERE (status = ? AND next_attempt_at <= ?)
+                   OR (status = ? AND lease_until < ?)
+                ORDER BY id LIMIT 1""",
+            (STATUS_PENDING, now, STATUS_IN_PROGRESS, now)
+        ).fetchone()
+
+    def claim(self, worker=None):
+        """
+        実行可能なジョブを1件取得して処理中にする
+
+        リース期限が切れた処理中ジョブ（前回の実行が途中で終了したもの）も対象になる。
+        ジョブの 'worker' には、ワーカーの識別子に取得ごとの乱数を付けたトークンが入る。
+
+        Args:
+            worker (str): ワーカーの識別子（Noneの場合は ホスト名:プロセスID）
+
+        Returns:
+            dict: ジョブ情報（実行可能なジョブがない場合はNone）
+        """
+        now = time.time()
+        worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+        token = f"{worker}:{uuid.uuid4().hex[:8]}"
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = self._select_claimable(conn, now)
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute(
+                f"""UPDATE {self.table} SET status = ?, attempts = attempts + 1, lease_until = ?,
+                    worker = ?, updated_at = ? WHERE id = ?""",
+                (STATUS_IN_PROGRESS, now + self.lease_seconds, token, self._now(), row['id'])
+            )
+            conn.execute('COMMIT')
+        job = self._decode(row)
+        job['attempts'] += 1
+        job['worker'] = token
+        return job
+
+    def _update_owned(self, job, assignments, params):
+        """
+        リースを持っている処理中のジョブだけを更新する
+
+        Args:
+            job (dict): claim() で取得したジョブ
+            assignments (str): SET句
+            params (tuple): SET句のパラメータ
+
+        Returns:
+            bool: 更新できた場合はTrue（リースが切れて他のワーカーに渡っていた場合はFalse）
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE {self.table} SET {assignments} WHERE id = ? AND status = ? AND worker = ?",
+                tuple(params) + (job['id'], STATUS_IN_PROGRESS, job['worker'])
+            )
+        return cursor.rowcount > 0
+
+    def heartbeat(self, job):
+        """
+        処理中ジョブのリースを延長する
+
+        Args:
+            job (dict): claim() で取得したジョブ
+
+        Returns:
+            bool: 延長できた場合はTrue（リースを失っていた場合はFalse）
+        """
+        return self._update_owned(job, 'lease_until = ?', (time.time() + self.lease_seconds,))
+
+    def fail(self, job, error, retry=True):
+        """
+        ジョブの失敗を記録する（上限に達するまでは指数バックオフで再試行を予約する）
+
+        Args:
+            job (dict): claim() で取得したジョブ（'attempts' はこれまでの試行回数）
+            error (str): エラー内容
+            retry (bool): 再試行するかどうか
+
+        Returns:
+            tuple: (記録できた場合はTrue（リースを失っていた場合はFalse）,
+                    次の試行までの待機時間（秒、再試行しない場合はNone）)
+        """
+        attempts = job['attempts']
+        if retry and attempts < self.max_attempts:
+            delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+            # 複数ワーカーが同時に再試行しないようにジッターを加える
+            delay = random.uniform(delay / 2, delay)
+            status, next_attempt_at = STATUS_PENDING, time.time() + delay
+        else:
+            delay, status, next_attempt_at = None, STATUS_FAILED, 0
+
+        recorded = self._update_owned(
+            job, 'status = ?, next_attempt_at = ?, lease_until = 0, last_error = ?, updated_at = ?',
+            (status, next_attempt_at, str(error), self._now())
+        )
+        return recorded, delay
+
+    def release(self, job, next_attempt_at=0):
+        """
+        処理せずにジョブを戻す（試行回数には数えない）
+
+        Args:
+            job (dict): claim() で取得したジョブ
+            next_attempt_at (float): 次に実行可能になる時刻（UNIX時間）
+
+        Returns:
+            bool: 戻せた場合はTrue（リースを失っていた場合はFalse）
+        """
+        return self._update_owned(
+            job,
+            'status = ?, attempts = MAX(attempts - 1, 0), next_attempt_at = ?, lease_until = 0, updated_at = ?',
+            (STATUS_PENDING, next_attempt_at, self._now())
+        )
+
+    def next_attempt_in(self):
+        """
+        次に実行可能になる再試行待ちジョブまでの時間を取得する
+
+        Returns:
+            float: 待機時間（秒）、待機中のジョブがない場合はNone
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                f"""SELECT MIN(CASE WHEN status = ? THEN next_attempt_at ELSE lease_until END) AS t
+                    FROM {self.table} WHERE status IN (?, ?)""",
+                (STATUS_PENDING, STATUS_PENDING, STATUS_IN_PROGRESS)
+            ).fetchone()
+        if row is None or row['t'] is None:
+            return None
+        return max(0.0, row['t'] - time.time())
+
+    def counts(self):
+        """
+        状態ごとのジョブ数を取得する
+
+        Returns:
+            dict: 状態をキーとしたジョブ数
+        """
+        counts = {STATUS_PENDING: 0, STATUS_IN_PROGRESS: 0, STATUS_DONE: 0, STATUS_FAILED: 0}
+        with self._connect() as conn:
+            for row in conn.execute(f"SELECT status, COUNT(*) AS n FROM {self.table} GROUP BY status"):
+                counts[row['status']] = row['n']
+        return counts
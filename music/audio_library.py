@@ -0,0 +1,207 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+
+# プロジェクトのルートディレクトリ
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 動画生成スクリプトが参照する音楽ディレクトリ
+MUSIC_DIR = os.path.join(PROJECT_ROOT, "resources", "music")
+
+# コンテンツアドレス方式の保存先（音楽ディレクトリのglob対象外になるようサブディレクトリに置く）
+DEFAULT_LIBRARY_DIR = os.path.join(MUSIC_DIR, ".library")
+
+# ハッシュ計算時の読み込みサイズ
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    """
+    ファイルのSHA-256ハッシュを計算する
+
+    Args:
+        path (str): ファイルのパス
+
+    Returns:
+        str: 16進数表記のハッシュ
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AudioLibrary:
+    """
+    ダウンロードした音源を内容のハッシュで管理するライブラリ
+
+    音源の実体はハッシュ名のファイル（blobs/ab/abcdef....mp3）として1つだけ保存し、
+    タイトル・URL・バリアント（SHORT/LONG）との対応をインデックスに記録する。
+    音楽ディレクトリには人が読めるファイル名のハードリンクを作成するため、
+    同じ音源が別のタイトルで見つかってもディスクを消費しない。
+    """
+    def __init__(self, library_dir=DEFAULT_LIBRARY_DIR, links_dir=MUSIC_DIR):
+        """
+        初期化
+
+        Args:
+            library_dir (str): 実体とインデックスの保存先
+            links_dir (str): 人が読めるファイル名のリンクを作成するディレクトリ
+        """
+        self.library_dir = library_dir
+        self.blobs_dir = os.path.join(library_dir, "blobs")
+        self.index_file = os.path.join(library_dir, "index.json")
+        self.links_dir = links_dir
+        self.lock = threading.Lock()
+
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.links_dir, exist_ok=True)
+
+        self.index = load_library_index(self.index_file)
+
+    def _save_index(self):
+        """インデックスをアトミックに保存する"""
+        fd, temp_path = tempfile.mkstemp(suffix='.json', dir=self.library_dir)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=4)
+        os.replace(temp_path, self.index_file)
+
+    def blob_path(self, sha256, ext):
+        """
+        ハッシュに対応する実体ファイルのパスを返す
+
+        Args:
+            sha256 (str): 内容のハッシュ
+            ext (str): 拡張子（.mp3など）
+
+        Returns:
+            str: 実体ファイルのパス
+        """
+        return os.path.join(self.blobs_dir, sha256[:2], sha256 + ext)
+
+    def lookup_url(self, url):
+        """
+        ダウンロードURLから登録済みの音源を探す
+
+        Args:
+            url (str): ダウンロードURL
+
+        Returns:
+            dict: 音源のインデックスエントリ（'sha256'を含む）、未登録の場合はNone
+        """
+        sha256 = self.index['urls'].get(url)
+        if sha256 is None:
+            return None
+        entry = dict(self.index['blobs'][sha256], sha256=sha256)
+        if not os.path.exists(self.blob_path(sha256, entry['ext'])):
+            return None
+        return entry
+
+    def _link(self, blob, name):
+        """実体へのハードリンクを音楽ディレクトリに作成する（できない場合はコピー）"""
+        link_path = os.path.join(self.links_dir, name)
+        if os.path.exists(link_path):
+            if os.path.samefile(link_path, blob):
+                return link_path
+            os.remove(link_path)
+        try:
+            os.link(blob, link_path)
+        except OSError:
+            # 別ファイルシステムなどハードリンクできない場合
+            shutil.copy2(blob, link_path)
+        return link_path
+
+    def add_file(self, path, title, url, variant, link_name, credit=None):
+        """
+        ダウンロードしたファイルをライブラリに登録する
+
+        ファイルは実体の保存先に移動され、同じ内容の音源がすでにある場合は削除される。
+
+        Args:
+            path (str): ダウンロードしたファイルのパス
+            title (str): 音源のタイトル
+            url (str): ダウンロードURL
+            variant (str): バリアント（long, short, default）
+            link_name (str): 音楽ディレクトリに作成するファイル名
+            credit (str): 利用時に必要なクレジット表記（不要な場合はNone）
+
+        Returns:
+            str: 音楽ディレクトリに作成したリンクのパス
+        """
+        sha256 = file_sha256(path)
+        ext = os.path.splitext(path)[1].lower() or '.mp3'
+        blob = self.blob_path(sha256, ext)
+
+        with self.lock:
+            if os.path.exists(blob):
+                # 同じ内容の音源は登録済みなので重複ファイルは破棄する
+                os.remove(path)
+            else:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                os.replace(path, blob)
+
+        return self.add_link(blob, sha256, title, url, variant, link_name, credit)
+
+    def add_link(self, blob, sha256, title, url, variant, link_name, credit=None):
+        """
+        登録済みの実体に出典情報を追加し、音楽ディレクトリにリンクを作成する
+
+        Args:
+            blob (str): 実体ファイルのパス
+            sha256 (str): 内容のハッシュ
+            title (str): 音源のタイトル
+            url (str): ダウンロードURL
+            variant (str): バリアント（long, short, default）
+            link_name (str): 音楽ディレクトリに作成するファイル名
+            credit (str): 利用時に必要なクレジット表記（不要な場合はNone）
+
+        Returns:
+            str: 音楽ディレクトリに作成したリンクのパス
+        """
+        with self.lock:
+            entry = self.index['blobs'].setdefault(sha256, {
+                'ext': os.path.splitext(blob)[1],
+                'size': os.path.getsize(blob),
+                'added_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'sources': [],
+                'links': [],
+            })
+            source = {'title': title, 'url': url, 'variant': variant}
+            if credit:
+                # 動画の概要欄にクレジットを表記するために記録する
+                source['credit'] = credit
+            if source not in entry['sources']:
+                entry['sources'].append(source)
+            if link_name not in entry['links']:
+                entry['links'].append(link_name)
+            self.index['urls'][url] = sha256
+
+            link_path = self._link(blob, link_name)
+            self._save_index()
+
+        return link_path
+
+
+def load_library_index(index_file=os.path.join(DEFAULT_LIBRARY_DIR, "index.json")):
+    """
+    ライブラリのインデックスを読み込む
+
+    Args:
+        index_file (str): インデックスファイルのパス
+
+    Returns:
+        dict: 'blobs'（ハッシュ -> エントリ）と 'urls'（URL -> ハッシュ）を含むインデックス
+    """
+    index = {'blobs': {}, 'urls': {}}
+    if os.path.exists(index_file):
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                index.update(json.load(f))
+        except (json.JSONDecodeError, OSError):
+            print(f"警告: ライブラリのインデックスを読み込めませんでした: {index_file}")
+    return index
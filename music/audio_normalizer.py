@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+BGM音源の正規化ツール
+
+ダウンロードした音源（MP3/WAV/OGGなど、サイトごとに形式がばらばら）を、
+動画生成スクリプトがそのまま使える統一フォーマットに一度だけ変換します。
+
+正規化の内容:
+    - サンプルレート・チャンネル数・形式の統一（48kHz ステレオ 16bit PCM WAV）
+    - 先頭と末尾の無音のトリミング
+    - ラウドネスの測定（EBU R128）と目標ラウドネスへの調整（2パスのloudnorm）
+
+変換したファイルは resources/music に「元のファイル名.norm.wav」として保存し、
+測定結果は resources/music/metadata.json に記録します。
+
+使用方法:
+    python audio_normalizer.py                  # resources/music の全音源を正規化
+    python audio_normalizer.py downloads/*.mp3  # 指定したファイルを正規化
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from datetime import datetime
+
+# プロジェクトのルートディレクトリ
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 変換と登録の共通処理（プロジェクトのルートの asset_registry.py）
+sys.path.append(PROJECT_ROOT)
+from asset_registry import AssetConverter, atomic_output, probe_duration
+
+# 動画生成スクリプトが参照する音楽ディレクトリ
+MUSIC_DIR = os.path.join(PROJECT_ROOT, "resources", "music")
+
+# 正規化のデフォルト設定
+DEFAULT_SAMPLE_RATE = 48000
+DEFAULT_CHANNELS = 2
+DEFAULT_TARGET_LUFS = -16.0
+DEFAULT_TRUE_PEAK = -1.5
+DEFAULT_LRA = 11.0
+DEFAULT_SILENCE_THRESHOLD = "-50dB"
+
+# 正規化したファイルの拡張子
+NORMALIZED_SUFFIX = ".norm.wav"
+
+# 正規化対象の拡張子
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.ogg')
+
+
+def build_trim_filter(threshold=DEFAULT_SILENCE_THRESHOLD):
+    """
+    先頭と末尾の無音を取り除くフィルタを構築する
+
+    silenceremove は先頭の無音しか扱えないため、反転して末尾も同じ処理で取り除く。
+
+    Args:
+        threshold (str): 無音とみなす音量
+
+    Returns:
+        str: ffmpegのオーディオフィルタ
+    """
+    trim = f"silenceremove=start_periods=1:start_duration=0.1:start_threshold={threshold}"
+    return f"{trim},areverse,{trim},areverse"
+
+
+def measure_loudness(source, trim_filter, target_lufs=DEFAULT_TARGET_LUFS,
+                     true_peak=DEFAULT_TRUE_PEAK, lra=DEFAULT_LRA):
+    """
+    無音をトリミングした音源のラウドネスを測定する（loudnormの1パス目）
+
+    Args:
+        source (str): 入力ファイルのパス
+        trim_filter (str): 無音トリミングのフィルタ
+        target_lufs (float): 目標の統合ラウドネス（LUFS）
+        true_peak (float): 目標のトゥルーピーク（dBTP）
+        lra (float): 目標のラウドネスレンジ（LU）
+
+    Returns:
+        dict: loudnormの測定結果（input_i, input_tp, input_lra, input_thresh, target_offset）
+    """
+    audio_filter = (f"{trim_filter},"
+                    f"loudnorm=I={target_lufs}:TP={true_peak}:LRA={lra}:print_format=json")
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-nostats", "-i", source,
+         "-af", audio_filter, "-vn", "-f", "null", "-"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True
+    )
+    # 測定結果はstderrの最後にJSONとして出力される
+    output = result.stderr
+    return json.loads(output[output.rindex('{'):output.rindex('}') + 1])
+
+
+def build_ffmpeg_command(source, destination, trim_filter, measured,
+                         sample_rate=DEFAULT_SAMPLE_RATE, channels=DEFAULT_CHANNELS,
+                         target_lufs=DEFAULT_TARGET_LUFS, true_peak=DEFAULT_TRUE_PEAK,
+                         lra=DEFAULT_LRA):
+    """
+    正規化用のffmpegコマンドを構築する（loudnormの2パス目）
+
+    Args:
+        source (str): 入力ファイルのパス
+        destination (str): 出力ファイルのパス
+        trim_filter (str): 無音トリミングのフィルタ
+        measured (dict): measure_loudness の測定結果
+        sample_rate (int): 出力のサンプルレート
+        channels (int): 出力のチャンネル数
+        target_lufs (float): 目標の統合ラウドネス（LUFS）
+        true_peak (float): 目標のトゥルーピーク（dBTP）
+        lra (float): 目標のラウドネスレンジ（LU）
+
+    Returns:
+        list: ffmpegコマンドの引数リスト
+    """
+    loudnorm = (
+        f"loudnorm=I={target_lufs}:TP={true_peak}:LRA={lra}"
+        f":measured_I={measured['input_i']}"
+        f":measured_TP={measured['input_tp']}"
+        f":measured_LRA={measured['input_lra']}"
+        f":measured_thresh={measured['input_thresh']}"
+        f":offset={measured['target_offset']}"
+        ":linear=true"
+    )
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-i", source,
+        "-af", f"{trim_filter},{loudnorm}",
+        "-vn",
+        # loudnormは内部で192kHzにアップサンプリングするため、最後に目標のサンプルレートに戻す
+        "-ar", str(sample_rate),
+        "-ac", str(channels),
+        "-c:a", "pcm_s16le",
+        "-f", "wav",
+        destination,
+    ]
+
+
+def normalize_track(source, destination, sample_rate=DEFAULT_SAMPLE_RATE,
+                    channels=DEFAULT_CHANNELS, target_lufs=DEFAULT_TARGET_LUFS,
+                    true_peak=DEFAULT_TRUE_PEAK, lra=DEFAULT_LRA,
+                    silence_threshold=DEFAULT_SILENCE_THRESHOLD):
+    """
+    1つの音源を正規化する（プロセスプールから呼び出される）
+
+    一時ファイルに書き出してから置き換えるため、途中で中断しても
+    不完全なファイルが音楽ディレクトリに残ることはない。
+
+    Args:
+        source (str): 入力ファイルのパス
+        destination (str): 出力ファイルのパス
+        sample_rate (int): 出力のサンプルレート
+        channels (int): 出力のチャンネル数
+        target_lufs (float): 目標の統合ラウドネス（LUFS）
+        true_peak (float): 目標のトゥルーピーク（dBTP）
+        lra (float): 目標のラウドネスレンジ（LU）
+        silence_threshold (str): 無音とみなす音量
+
+    Returns:
+        dict: 音源メタデータのエントリ
+    """
+    trim_filter = build_trim_filter(silence_threshold)
+    measured = measure_loudness(source, trim_filter, target_lufs, true_peak, lra)
+
+    # 音楽ディレクトリのglob（*.wav）に拾われないよう拡張子を変えておく
+    with atomic_output(destination, '.wav.part') as temp_path:
+        command = build_ffmpeg_command(source, temp_path, trim_filter, measured, sample_rate,
+                                       channels, target_lufs, true_peak, lra)
+        subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+
+    source_stat = os.stat(source)
+    return {
+        'file': os.path.basename(destination),
+        'source': os.path.abspath(source),
+        'source_size': source_stat.st_size,
+        'source_mtime': source_stat.st_mtime,
+        'source_duration': probe_duration(source),
+        'duration': probe_duration(destination),
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'codec': 'pcm_s16le',
+        'target_lufs': target_lufs,
+        'true_peak': true_peak,
+        'lra': lra,
+        'silence_threshold': silence_threshold,
+        'loudness': {
+            'input_i': float(measured['input_i']),
+            'input_tp': float(measured['input_tp']),
+            'input_lra': float(measured['input_lra']),
+            'input_thresh': float(measured['input_thresh']),
+        },
+        'normalized_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+class AudioNormalizer(AssetConverter):
+    """ダウンロードした音源を統一フォーマットに正規化して登録するクラス"""
+    output_suffix = NORMALIZED_SUFFIX
+    label = ("正規化", "音源")
+
+    def __init__(self, music_dir=MUSIC_DIR, sample_rate=DEFAULT_SAMPLE_RATE,
+                 channels=DEFAULT_CHANNELS, target_lufs=DEFAULT_TARGET_LUFS,
+                 true_peak=DEFAULT_TRUE_PEAK, lra=DEFAULT_LRA,
+                 silence_threshold=DEFAULT_SILENCE_THRESHOLD, max_workers=None):
+        """
+        初期化
+
+        Args:
+            music_dir (str): 正規化したファイルの出力先（音楽ディレクトリ）
+            sample_rate (int): 出力のサンプルレート
+            channels (int): 出力のチャンネル数
+            target_lufs (float): 目標の統合ラウドネス（LUFS）
+            true_peak (float): 目標のトゥルーピーク（dBTP）
+            lra (float): 目標のラウドネスレンジ（LU）
+            silence_threshold (str): 無音とみなす音量
+            max_workers (int): 並列変換数（Noneの場合はCPU数）
+        """
+        super().__init__(music_dir, max_workers)
+        self.music_dir = music_dir
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.target_lufs = target_lufs
+        self.true_peak = true_peak
+        self.lra = lra
+        self.silence_threshold = silence_threshold
+
+    def settings(self):
+        return {
+            'sample_rate': self.sample_rate,
+            'channels': self.channels,
+            'target_lufs': self.target_lufs,
+            'true_peak': self.true_peak,
+            'lra': self.lra,
+            'silence_threshold': self.silence_threshold,
+        }
+
+    def task(self):
+        return normalize_track, (self.sample_rate, self.channels, self.target_lufs,
+                                 self.true_peak, self.lra, self.silence_threshold)
+
+    def describe(self, entry):
+        return (f"{entry['file']} "
+                f"({entry['loudness']['input_i']:.1f} LUFS -> {self.target_lufs:.1f} LUFS)")
+
+    def accepts(self, source):
+        return not source.endswith(NORMALIZED_SUFFIX)
+
+    def normalize(self, source_files):
+        """
+        複数の音源をプロセスプールで並列に正規化する
+
+        Args:
+            source_files (list): 音源ファイルのパスのリスト
+
+        Returns:
+            list: 新たに登録した正規化ファイルのパスのリスト
+        """
+        return self.convert(source_files)
+
+    def normalize_directory(self, directory):
+        """
+        ディレクトリ内の音源をすべて正規化する
+
+        Args:
+            directory (str): 音源のディレクトリ
+
+        Returns:
+            list: 新たに登録した正規化ファイルのパスのリスト
+        """
+        source_files = [
+            os.path.join(directory, f) for f in sorted(os.listdir(directory))
+            if f.lower().endswith(AUDIO_EXTENSIONS) and not f.endswith(NORMALIZED_SUFFIX)
+        ]
+        return self.normalize(source_files)
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description='ダウンロードしたBGMを統一フォーマットに正規化するツール')
+    parser.add_argument('inputs', nargs='*', help='音源ファイルまたはディレクトリ（省略時は音楽ディレクトリ）')
+    parser.add_argument('-o', '--output', type=str, default=MUSIC_DIR, help='音楽ディレクトリ')
+    parser.add_argument('--sample-rate', type=int, default=DEFAULT_SAMPLE_RATE, help='出力のサンプルレート')
+    parser.add_argument('--lufs', type=float, default=DEFAULT_TARGET_LUFS, help='目標の統合ラウドネス（LUFS）')
+    parser.add_argument('--true-peak', type=float, default=DEFAULT_TRUE_PEAK, help='目標のトゥルーピーク（dBTP）')
+    parser.add_argument('--silence', type=str, default=DEFAULT_SILENCE_THRESHOLD, help='無音とみなす音量（例: -50dB）')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='並列変換数')
+    args = parser.parse_args()
+
+    normalizer = AudioNormalizer(
+        music_dir=args.output,
+        sample_rate=args.sample_rate,
+        target_lufs=args.lufs,
+        true_peak=args.true_peak,
+        silence_threshold=args.silence,
+        max_workers=args.workers
+    )
+
+    normalized = []
+    for path in args.inputs or [args.output]:
+        if os.path.isdir(path):
+            normalized.extend(normalizer.normalize_directory(path))
+        elif os.path.isfile(path):
+            normalized.extend(normalizer.normalize([path]))
+        else:
+            print(f"警告: 入力が見つかりません: {path}")
+
+    print(f"\n{len(normalized)}件の音源を正規化しました。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import os
+import sys
+import glob
+import argparse
+import statistics
+import time
+
+from bgmer_parser import HAS_LXML, parse_music_page_lxml, parse_music_page_soup
+
+
+def measure(parser_func, html, repeat):
+    """
+    1ページの解析時間を計測する
+
+    Args:
+        parser_func (callable): 解析関数
+        html (str): ページのHTML
+        repeat (int): 繰り返し回数
+
+    Returns:
+        tuple: (解析結果, 各回の解析時間（ミリ秒）のリスト)
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = parser_func(html)
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, timings
+
+
+def main():
+    """
+    メイン関数 - 保存済みの音源ページでパーサーごとの解析時間を比較する
+    """
+    parser = argparse.ArgumentParser(description='BGMer音源ページ解析のマイクロベンチマーク')
+    parser.add_argument('pages_dir', help='保存済みHTMLページ（*.html）のディレクトリ')
+    parser.add_argument('-n', '--repeat', type=int, default=50, help='1ページあたりの繰り返し回数')
+    args = parser.parse_args()
+
+    pages = sorted(glob.glob(os.path.join(args.pages_dir, '*.html')))
+    if not pages:
+        print(f"HTMLページが見つかりません: {args.pages_dir}")
+        sys.exit(1)
+
+    backends = [('BeautifulSoup', parse_music_page_soup)]
+    if HAS_LXML:
+        backends.append(('lxml', parse_music_page_lxml))
+    else:
+        print("警告: lxmlがインストールされていないため、BeautifulSoupのみ計測します。")
+
+    print(f"{len(pages)}ページ x {args.repeat}回 で計測します。\n")
+    header = f"{'ページ':<30}" + "".join(f"{name + ' (ms)':>20}" for name, _ in backends)
+    print(header)
+    print("-" * len(header))
+
+    totals = {name: [] for name, _ in backends}
+    mismatches = []
+    for page in pages:
+        with open(page, 'r', encoding='utf-8') as f:
+            html = f.read()
+
+        row = f"{os.path.basename(page)[:30]:<30}"
+        results = []
+        for name, func in backends:
+            result, timings = measure(func, html, args.repeat)
+            median = statistics.median(timings)
+            totals[name].append(median)
+            results.append(result)
+            row += f"{median:>20.3f}"
+        print(row)
+
+        # 高速パスとフォールバックの結果が一致するか確認
+        if len(results) > 1 and results[0] != results[1]:
+            mismatches.append(os.path.basename(page))
+
+    print("-" * len(header))
+    print(f"{'中央値の平均':<30}" + "".join(f"{statistics.mean(totals[name]):>20.3f}" for name, _ in backends))
+
+    if HAS_LXML:
+        speedup = statistics.mean(totals['BeautifulSoup']) / statistics.mean(totals['lxml'])
+        print(f"\nlxmlはBeautifulSoupの {speedup:.1f} 倍高速です。")
+
+    if mismatches:
+        print(f"\n警告: 解析結果が一致しないページがあります: {', '.join(mismatches)}")
+
+
+if __name__ == "__main__":
+    main()
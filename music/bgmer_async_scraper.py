@@ -0,0 +1,250 @@
+import asyncio
+import random
+import time
+import urllib.parse
+
+import aiohttp
+
+from bgmer_scraper import parse_search_results, parse_music_details
+from http_cache import HTTPCache
+
+# デフォルトの桜関連キーワード（BGMerScraper.search_sakura_musicと同じ）
+DEFAULT_KEYWORDS = ["桜", "サクラ", "さくら", "ソメイヨシノ"]
+
+
+class AsyncRateLimiter:
+    """
+    ホストごとにリクエスト間隔を空けるレートリミッター
+
+    リクエストのたびに一律で待機するのではなく、同じホストへの直前のリクエストから
+    最小間隔が経過していない場合にだけ、その差分だけ待機する。
+    """
+    def __init__(self, min_interval=1.0, jitter=0.5):
+        """
+        初期化
+
+        Args:
+            min_interval (float): 同一ホストへのリクエストの最小間隔（秒）
+            jitter (float): 間隔に加えるランダムな揺らぎの最大値（秒）
+        """
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self.next_allowed = {}
+        self.locks = {}
+
+    async def wait(self, host):
+        """
+        指定したホストへのリクエストが許可されるまで待機する
+
+        Args:
+            host (str): ホスト名
+        """
+        lock = self.locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            delay = self.next_allowed.get(host, now) - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+            interval = self.min_interval + random.uniform(0, self.jitter)
+            self.next_allowed[host] = time.monotonic() + interval
+
+
+class AsyncBGMerScraper:
+    """
+    BGMerサイトから桜関連の音源を並行してスクレイピングするクラス
+
+    キープアライブ接続を再利用するコネクションプールと、ホストごとの同時接続数の上限、
+    レートリミッターにより、サーバーに負荷をかけずに複数ページを並行取得する。
+    結果は BGMerScraper の search_sakura_music / get_music_details と同じ形式。
+    """
+    def __init__(self, base_url="https://bgmer.net", max_connections=8, per_host_limit=2,
+                 min_interval=1.0, jitter=0.5, timeout=30, cache=None):
+        """
+        初期化
+
+        Args:
+            base_url (str): サイトのベースURL（テスト時はローカルサーバーを指定できる）
+            max_connections (int): コネクションプール全体の最大接続数
+            per_host_limit (int): ホストごとの最大同時接続数
+            min_interval (float): 同一ホストへのリクエストの最小間隔（秒）
+            jitter (float): 間隔に加えるランダムな揺らぎの最大値（秒）
+            timeout (float): リクエストのタイムアウト（秒）
+            cache (HTTPCache): 共有するHTTPキャッシュ（Noneの場合はキャッシュしない）
+        """
+        self.base_url = base_url
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        }
+        self.max_connections = max_connections
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.rate_limiter = AsyncRateLimiter(min_interval, jitter)
+        self.cache = cache
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.per_host_limit,
+            keepalive_timeout=30
+        )
+        self.session = aiohttp.ClientSession(
+            headers=self.headers,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        self.session = None
+
+    async def fetch(self, url):
+        """
+        ページを取得する
+
+        Args:
+            url (str): 取得するURL
+
+        Returns:
+            str: レスポンス本文
+        """
+        # キャッシュの読み書きはディスクI/Oを伴うため、イベントループを止めないようスレッドで実行する
+        loop = asyncio.get_running_loop()
+        entry = await loop.run_in_executor(None, self.cache.get, url) if self.cache else None
+        if entry and self.cache.is_fresh(entry):
+            return entry['body'].decode(entry.get('encoding') or 'utf-8', errors='replace')
+
+        headers = self.cache.conditional_headers(entry) if self.cache else {}
+        await self.rate_limiter.wait(urllib.parse.urlsplit(url).netloc)
+        async with self.session.get(url, headers=headers) as response:
+            if response.status == 304 and entry:
+                await loop.run_in_executor(None, self.cache.revalidated, url, entry, response.headers)
+                return entry['body'].decode(entry.get('encoding') or 'utf-8', errors='replace')
+
+            response.raise_for_status()
+            body = await response.read()
+            encoding = response.get_encoding()
+        if self.cache and response.status == 200:
+            await loop.run_in_executor(None, self.cache.put, url, response.status, response.headers,
+                                       body, encoding)
+        return body.decode(encoding, errors='replace')
+
+    async def _search_keyword(self, keyword):
+        """1つのキーワードで検索し、(タイトル, URL) のリストを返す"""
+        print(f"キーワード '{keyword}' で検索中...")
+        search_url = f"{self.base_url}/?s={urllib.parse.quote(keyword)}"
+        try:
+            html = await self.fetch(search_url)
+        except Exception as e:
+            print(f"検索中にエラーが発生しました: {e}")
+            return []
+        return parse_search_results(html)
+
+    async def search_sakura_music(self, keywords=DEFAULT_KEYWORDS):
+        """
+        指定したキーワードに関連する音源を並行して検索する
+
+        Args:
+            keywords (list): 検索キーワードのリスト
+
+        Returns:
+            list: 検索結果の音源情報リスト
+        """
+        results = await asyncio.gather(*(self._search_keyword(k) for k in keywords))
+
+        # キーワード順に結合し、逐次版と同じ順序・重複排除にする
+        music_list = []
+        seen_urls = set()
+        for keyword, items in zip(keywords, results):
+            for title, url in items:
+                if url in seen_urls:
+                    continue
+                seen_urls.add(url)
+                music_list.append({
+                    'title': title,
+                    'url': url,
+                    'keyword': keyword
+                })
+                print(f"見つかった音源: {title}")
+
+        return music_list
+
+    async def get_music_details(self, music_info):
+        """
+        音源の詳細情報を取得する
+
+        Args:
+            music_info (dict): 音源の基本情報
+
+        Returns:
+            dict: 詳細情報を追加した音源情報
+        """
+        try:
+            html = await self.fetch(music_info['url'])
+            download_links, description = parse_music_details(html)
+            music_info.update({
+                'download_links': download_links,
+                'description': description
+            })
+        except Exception as e:
+            print(f"{music_info['title']} の詳細取得中にエラーが発生しました: {e}")
+            music_info['download_links'] = {}
+            music_info['description'] = ""
+        return music_info
+
+    async def get_all_music_details(self, music_list):
+        """
+        複数の音源の詳細情報を並行して取得する
+
+        Args:
+            music_list (list): 音源の基本情報のリスト
+
+        Returns:
+            list: 詳細情報を追加した音源情報のリスト（入力と同じ順序）
+        """
+        return list(await asyncio.gather(*(self.get_music_details(m) for m in music_list)))
+
+
+def scrape_sakura_music(keywords=DEFAULT_KEYWORDS, **kwargs):
+    """
+    検索と詳細取得をまとめて実行する（同期コードから呼び出すための関数）
+
+    Args:
+        keywords (list): 検索キーワードのリスト
+        **kwargs: AsyncBGMerScraper に渡す設定
+
+    Returns:
+        list: 詳細情報を追加した音源情報のリスト
+    """
+    kwargs.setdefault('cache', HTTPCache())
+
+    async def run():
+        async with AsyncBGMerScraper(**kwargs) as scraper:
+            music_list = await scraper.search_sakura_music(keywords)
+            return await scraper.get_all_music_details(music_list)
+
+    return asyncio.run(run())
+
+
+# 使用例
+if __name__ == "__main__":
+    start = time.monotonic()
+    music_list = scrape_sakura_music()
+
+    print(f"\n合計 {len(music_list)} 件の桜関連音源が見つかりました "
+          f"({time.monotonic() - start:.1f}秒)。\n")
+
+    for i, music in enumerate(music_list):
+        print(f"\n===== 音源 {i+1} =====")
+        print(f"タイトル: {music['title']}")
+        print(f"URL: {music['url']}")
+        print(f"検索キーワード: {music['keyword']}")
+        print(f"説明: {music['description']}")
+        print("ダウンロードリンク:")
+
+        if music['download_links']:
+            for type_, link in music['download_links'].items():
+                print(f"  - {type_}: {link}")
+        else:
+            print("  ダウンロードリンクが見つかりませんでした。")
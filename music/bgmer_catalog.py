@@ -0,0 +1,280 @@
+import os
+import json
+import time
+import random
+import hashlib
+import tempfile
+import urllib.parse
+from datetime import datetime
+
+from bs4 import BeautifulSoup
+
+# カタログファイルのデフォルトパス
+DEFAULT_CATALOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bgmer_catalog.json")
+
+# 1つの一覧あたりの最大ページ数（無限ループ防止）
+DEFAULT_MAX_PAGES = 50
+
+# 詳細の取得中にカタログを保存する間隔（件数・秒数のどちらかに達したら保存）
+CHECKPOINT_ITEMS = 25
+CHECKPOINT_SECONDS = 30
+
+# エントリの状態
+ENTRY_NEW = 'new'
+ENTRY_CHANGED = 'changed'
+ENTRY_UNCHANGED = 'unchanged'
+
+
+def parse_listing_page(html, base_url):
+    """
+    検索結果・カテゴリ一覧のページから音源と次ページのURLを抽出する
+
+    Args:
+        html (str): 一覧ページのHTML
+        base_url (str): 相対URLを解決するためのページURL
+
+    Returns:
+        tuple: ((タイトル, URL, フィンガープリント) のリスト, 次ページのURL（ない場合はNone）)
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+
+    items = []
+    for item in soup.select('article.music'):
+        title_elem = item.select_one('h2.music-title a')
+        if not title_elem or not title_elem.get('href'):
+            continue
+        url = urllib.parse.urljoin(base_url, title_elem.get('href'))
+        # 一覧上の表示内容（タイトル・更新日・タグなど）が変わったら詳細を取り直す
+        text = ' '.join(item.get_text(' ').split())
+        fingerprint = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        items.append((title_elem.text.strip(), url, fingerprint))
+
+    next_url = None
+    next_elem = soup.select_one('link[rel="next"], a[rel="next"], a.next')
+    if next_elem and next_elem.get('href'):
+        next_url = urllib.parse.urljoin(base_url, next_elem.get('href'))
+
+    return items, next_url
+
+
+class MusicCatalog:
+    """
+    サイト上の音源をURLごとに記録するローカルカタログ
+
+    各エントリには最終確認日時と一覧上のフィンガープリントを保存し、
+    新規または変更のあった音源だけ詳細ページを取得できるようにする。
+    """
+    def __init__(self, path=DEFAULT_CATALOG_FILE):
+        """
+        初期化
+
+        Args:
+            path (str): カタログファイルのパス
+        """
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                print(f"警告: カタログを読み込めませんでした: {path}")
+
+    def save(self):
+        """カタログをアトミックに保存する"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(suffix='.json', dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=4)
+        os.replace(temp_path, self.path)
+
+    def record(self, url, title, fingerprint, keyword):
+        """
+        一覧で見つかった音源を記録する
+
+        Args:
+            url (str): 音源ページのURL
+            title (str): タイトル
+            fingerprint (str): 一覧上の表示内容のハッシュ
+            keyword (str): 見つけた検索キーワードまたはカテゴリ
+
+        Returns:
+            str: エントリの状態（new, changed, unchanged）
+        """
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        entry = self.entries.get(url)
+        if entry is None:
+            self.entries[url] = {
+                'title': title,
+                'url': url,
+                'keyword': keyword,
+                'fingerprint': fingerprint,
+                'first_seen': now,
+                'last_seen': now,
+                'details_fetched_at': None,
+            }
+            return ENTRY_NEW
+
+        entry['last_seen'] = now
+        entry['title'] = title
+        if entry.get('fingerprint') != fingerprint:
+            entry['fingerprint'] = fingerprint
+            entry['details_fetched_at'] = None
+            return ENTRY_CHANGED
+        return ENTRY_UNCHANGED
+
+    def needs_details(self, url):
+        """
+        詳細ページの取得が必要か確認する
+
+        Args:
+            url (str): 音源ページのURL
+
+        Returns:
+            bool: 新規・変更ありで詳細が未取得の場合はTrue
+        """
+        entry = self.entries.get(url)
+        return entry is not None and not entry.get('details_fetched_at')
+
+    def update_details(self, music_info):
+        """
+        取得した詳細情報を記録する
+
+        Args:
+            music_info (dict): 詳細情報を含む音源情報
+        """
+        entry = self.entries[music_info['url']]
+        entry['download_links'] = music_info.get('download_links', {})
+        entry['description'] = music_info.get('description', "")
+        # リンクが取れなかった場合は次回も再取得する
+        if entry['download_links']:
+            entry['details_fetched_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def music_list(self):
+        """
+        カタログの全音源を音源情報のリストとして返す
+
+        Returns:
+            list: 音源情報のリスト
+        """
+        return [
+            {
+                'title': entry['title'],
+                'url': entry['url'],
+                'keyword': entry.get('keyword', ''),
+                'download_links': entry.get('download_links', {}),
+                'description': entry.get('description', ""),
+            }
+            for entry in self.entries.values()
+        ]
+
+
+class CatalogCrawler:
+    """
+    BGMerサイトの検索結果とカテゴリ一覧を全ページ巡回してカタログを更新するクラス
+    """
+    def __init__(self, scraper, catalog, max_pages=DEFAULT_MAX_PAGES):
+        """
+        初期化
+
+        Args:
+            scraper (BGMerScraper): ページ取得と詳細取得に使用するスクレイパー
+            catalog (MusicCatalog): 更新するカタログ
+            max_pages (int): 1つの一覧あたりの最大ページ数
+        """
+        self.scraper = scraper
+        self.catalog = catalog
+        self.max_pages = max_pages
+
+    def _crawl_listing(self, start_url, keyword):
+        """一覧の全ページを巡回し、状態ごとの件数を返す"""
+        counts = {ENTRY_NEW: 0, ENTRY_CHANGED: 0, ENTRY_UNCHANGED: 0}
+        url = start_url
+        visited = set()
+        pages = 0
+
+        while url and url not in visited and pages < self.max_pages:
+            visited.add(url)
+            pages += 1
+            try:
+                response = self.scraper.session.get(url)
+                if response.status_code == 404:
+                    break
+                response.raise_for_status()
+            except Exception as e:
+                print(f"一覧ページの取得中にエラーが発生しました: {url}: {e}")
+                break
+
+            items, url = parse_listing_page(response.text, url)
+            if not items:
+                break
+            for title, item_url, fingerprint in items:
+                counts[self.catalog.record(item_url, title, fingerprint, keyword)] += 1
+
+            # キャッシュから返された場合はサーバーにアクセスしていないので待機しない
+            if not getattr(response, 'from_cache', False):
+                time.sleep(random.uniform(1, 2))
+
+        print(f"  {keyword}: {pages}ページ, 新規 {counts[ENTRY_NEW]}件, "
+              f"変更 {counts[ENTRY_CHANGED]}件, 変更なし {counts[ENTRY_UNCHANGED]}件")
+        return counts
+
+    def crawl(self, keywords=(), categories=()):
+        """
+        検索キーワードとカテゴリの一覧を巡回してカタログを更新する
+
+        Args:
+            keywords (list): 検索キーワードのリスト
+            categories (list): カテゴリのスラッグのリスト（例: "spring"）
+
+        Returns:
+            list: 詳細の取得が必要な音源のURLのリスト
+        """
+        base_url = self.scraper.base_url
+        for keyword in keywords:
+            self._crawl_listing(f"{base_url}/?s={urllib.parse.quote(keyword)}", keyword)
+        for category in categories:
+            self._crawl_listing(f"{base_url}/category/{urllib.parse.quote(category)}/", category)
+        self.catalog.save()
+
+        return [url for url in self.catalog.entries if self.catalog.needs_details(url)]
+
+    def refresh(self, keywords=(), categories=()):
+        """
+        カタログを更新し、新規・変更のあった音源だけ詳細ページを取得する
+
+        Args:
+            keywords (list): 検索キーワードのリスト
+            categories (list): カテゴリのスラッグのリスト
+
+        Returns:
+            list: カタログの全音源の音源情報リスト
+        """
+        pending = self.crawl(keywords, categories)
+        print(f"詳細の取得が必要な音源: {len(pending)}件")
+
+        # カタログ全体を書き直すため1件ごとには保存せず、一定の件数か時間ごとに保存する
+        # （途中で中断しても、最後の保存までの取得済みの分と中断時点の分は残る）
+        unsaved = 0
+        saved_at = time.monotonic()
+        try:
+            for i, url in enumerate(pending):
+                entry = self.catalog.entries[url]
+                print(f"  [{i+1}/{len(pending)}] {entry['title']} の詳細を取得中...")
+                music_info = self.scraper.get_music_details({
+                    'title': entry['title'],
+                    'url': url,
+                    'keyword': entry.get('keyword', '')
+                })
+                self.catalog.update_details(music_info)
+                unsaved += 1
+                if unsaved >= CHECKPOINT_ITEMS or time.monotonic() - saved_at >= CHECKPOINT_SECONDS:
+                    self.catalog.save()
+                    unsaved = 0
+                    saved_at = time.monotonic()
+        finally:
+            if unsaved:
+                self.catalog.save()
+
+        return self.catalog.music_list()
@@ -0,0 +1,181 @@
+from bs4 import BeautifulSoup
+
+# lxmlが利用できる場合は高速なパーサーを使用する
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:
+    etree = None
+    lxml_html = None
+
+HAS_LXML = etree is not None
+
+
+def _has_class(name):
+    """クラス属性に指定したクラスを含む要素を判定するXPath式"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+if HAS_LXML:
+    # 音源ページの抽出に必要な候補要素を、文書順に1回の評価でまとめて取得する
+    MUSIC_PAGE_XPATH = etree.XPath(
+        "//h1 | //h2 | //h3"
+        " | //a[contains(., 'SHORT') or contains(., 'LONG')]"
+        f" | //*[{_has_class('music-title')} or {_has_class('music-description')}"
+        f" or {_has_class('description')}]"
+    )
+
+
+def _element_classes(elem):
+    return (elem.get('class') or '').split()
+
+
+def _next_element(elem):
+    """コメントなどを飛ばして次の兄弟要素を返す"""
+    sibling = elem.getnext()
+    while sibling is not None and not isinstance(sibling.tag, str):
+        sibling = sibling.getnext()
+    return sibling
+
+
+def parse_music_page_lxml(html):
+    """
+    lxmlとプリコンパイル済みXPathで音源ページを解析する
+
+    Args:
+        html (str): 音源ページのHTML
+
+    Returns:
+        dict: タイトル（'title'）、ダウンロードリンク（'download_links'）、説明文（'description'）
+    """
+    tree = lxml_html.fromstring(html)
+
+    h1 = music_title = short_link = long_link = None
+    music_description = description_elem = None
+    summary_description = ""
+
+    for elem in MUSIC_PAGE_XPATH(tree):
+        tag = elem.tag
+        classes = _element_classes(elem)
+
+        if tag == 'h1' and h1 is None:
+            h1 = elem
+        if 'music-title' in classes and music_title is None:
+            music_title = elem
+        if 'music-description' in classes and music_description is None:
+            music_description = elem
+        if 'description' in classes and description_elem is None:
+            description_elem = elem
+
+        if tag == 'a':
+            text = elem.text_content()
+            if short_link is None and 'SHORT' in text:
+                short_link = elem
+            if long_link is None and 'LONG' in text:
+                long_link = elem
+        elif tag in ('h2', 'h3') and '概要' in elem.text_content():
+            # BeautifulSoup版と同じく、最後に見つかった「概要」見出しを採用する
+            next_elem = _next_element(elem)
+            if next_elem is not None:
+                summary_description = next_elem.text_content().strip()
+
+    title_elem = h1 if h1 is not None else music_title
+    title = title_elem.text_content().strip() if title_elem is not None else "不明なタイトル"
+
+    download_links = {}
+    if short_link is not None and short_link.get('href') is not None:
+        download_links['short'] = short_link.get('href')
+    if long_link is not None and long_link.get('href') is not None:
+        download_links['long'] = long_link.get('href')
+
+    desc_elem = music_description if music_description is not None else description_elem
+    if desc_elem is not None:
+        description = desc_elem.text_content().strip()
+    else:
+        description = summary_description
+
+    return {
+        'title': title,
+        'download_links': download_links,
+        'description': description
+    }
+
+
+def parse_music_page_soup(html):
+    """
+    BeautifulSoupで音源ページを解析する（lxmlが使えない場合のフォールバック）
+
+    Args:
+        html (str): 音源ページのHTML
+
+    Returns:
+        dict: タイトル（'title'）、ダウンロードリンク（'download_links'）、説明文（'description'）
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # タイトルを取得
+    title_elem = soup.select_one('h1') or soup.select_one('.music-title')
+    title = title_elem.text.strip() if title_elem else "不明なタイトル"
+
+    # ダウンロードリンクを探す
+    download_links = {}
+
+    # SHORT版とLONG版のリンクを探す（BGMerサイト特有の構造）
+    short_link = soup.select_one('a:-soup-contains("SHORT")')
+    long_link = soup.select_one('a:-soup-contains("LONG")')
+
+    if not short_link:
+        # 代替方法
+        short_links = [a for a in soup.find_all('a') if 'SHORT' in a.text]
+        if short_links:
+            short_link = short_links[0]
+
+    if not long_link:
+        # 代替方法
+        long_links = [a for a in soup.find_all('a') if 'LONG' in a.text]
+        if long_links:
+            long_link = long_links[0]
+
+    if short_link and 'href' in short_link.attrs:
+        download_links['short'] = short_link['href']
+
+    if long_link and 'href' in long_link.attrs:
+        download_links['long'] = long_link['href']
+
+    # 説明文を取得
+    description = ""
+    desc_elem = soup.select_one('.music-description') or soup.select_one('.description')
+
+    if desc_elem:
+        description = desc_elem.text.strip()
+    else:
+        # 楽曲概要セクションを探す
+        for elem in soup.find_all(['h2', 'h3']):
+            if '概要' in elem.text:
+                next_elem = elem.find_next_sibling()
+                if next_elem:
+                    description = next_elem.text.strip()
+
+    return {
+        'title': title,
+        'download_links': download_links,
+        'description': description
+    }
+
+
+def parse_music_page(html):
+    """
+    音源ページを解析する（lxmlが使える場合は高速パスを使用する）
+
+    Args:
+        html (str): 音源ページのHTML
+
+    Returns:
+        dict: タイトル（'title'）、ダウンロードリンク（'download_links'）、説明文（'description'）
+    """
+    if HAS_LXML:
+        try:
+            return parse_music_page_lxml(html)
+        except (etree.ParserError, ValueError):
+            # 空のページなどlxmlで解析できない場合はBeautifulSoupで再試行する
+            pass
+    return parse_music_page_soup(html)
@@ -6,17 +6,105 @@ import time
 import random
 import urllib.parse
 
+from http_cache import install_cache, DEFAULT_CACHE_DIR, DEFAULT_CACHE_TTL, DEFAULT_CACHE_MAX_BYTES
+
+
+def parse_search_results(html):
+    """
+    検索結果ページから音源のタイトルとURLを抽出する
+    
+    Args:
+        html (str): 検索結果ページのHTML
+        
+    Returns:
+        list: (タイトル, URL) のタプルのリスト
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    results = []
+    for item in soup.select('article.music'):
+        title_elem = item.select_one('h2.music-title a')
+        if not title_elem:
+            continue
+        results.append((title_elem.text.strip(), title_elem.get('href')))
+    
+    return results
+
+
+def parse_music_details(html):
+    """
+    音源ページからダウンロードリンクと説明文を抽出する
+    
+    Args:
+        html (str): 音源ページのHTML
+        
+    Returns:
+        tuple: (ダウンロードリンクの辞書, 説明文)
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # ダウンロードリンクを探す
+    download_links = {}
+    
+    # SHORT版とLONG版のリンクを探す
+    short_link = soup.select_one('a:contains("SHORT")')
+    long_link = soup.select_one('a:contains("LONG")')
+    
+    if short_link:
+        download_links['short'] = short_link.get('href')
+    
+    if long_link:
+        download_links['long'] = long_link.get('href')
+    
+    # 代替方法: クラスやIDで検索
+    if not download_links:
+        download_elements = soup.select('.download-button a, .btn-download')
+        for elem in download_elements:
+            text = elem.text.lower()
+            href = elem.get('href')
+            if href and href.endswith('.mp3'):
+                if 'short' in text:
+                    download_links['short'] = href
+                elif 'long' in text:
+                    download_links['long'] = href
+                else:
+                    download_links['default'] = href
+    
+    # 説明文を取得
+    description = ""
+    desc_elem = soup.select_one('.music-description, .description')
+    if desc_elem:
+        description = desc_elem.text.strip()
+    
+    return download_links, description
+
+
 class BGMerScraper:
     """
     BGMerサイトから桜関連の音源をスクレイピングするクラス
     """
-    def __init__(self, base_url="https://bgmer.net"):
+    def __init__(self, base_url="https://bgmer.net", cache_dir=DEFAULT_CACHE_DIR,
+                 cache_ttl=DEFAULT_CACHE_TTL, cache_max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        """
+        初期化
+        
+        Args:
+            base_url (str): サイトのベースURL
+            cache_dir (str): HTTPキャッシュのディレクトリ（Noneの場合はキャッシュしない）
+            cache_ttl (float): 再検証せずにキャッシュを使用する期間（秒）
+            cache_max_bytes (int): キャッシュの合計サイズの上限（バイト）
+        """
         self.base_url = base_url
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        
+        # ETag / Last-Modified を使った条件付きリクエストで、変更されたページだけを再取得する
+        self.cache = None
+        if cache_dir:
+            self.cache = install_cache(self.session, cache_dir, cache_ttl, cache_max_bytes)
     
     def search_sakura_music(self, keywords=["桜", "サクラ", "さくら", "ソメイヨシノ"]):
         """
@@ -40,19 +128,8 @@ class BGMerScraper:
                 response = self.session.get(search_url)
                 response.raise_for_status()
                 
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
                 # 検索結果から音源情報を抽出
-                music_items = soup.select('article.music')
-                
-                for item in music_items:
-                    title_elem = item.select_one('h2.music-title a')
-                    if not title_elem:
-                        continue
-                    
-                    title = title_elem.text.strip()
-                    url = title_elem.get('href')
-                    
+                for title, url in parse_search_results(response.text):
                     # 重複チェック
                     if any(music['url'] == url for music in music_list):
                         continue
@@ -88,40 +165,7 @@ class BGMerScraper:
             response = self.session.get(music_info['url'])
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # ダウンロードリンクを探す
-            download_links = {}
-            
-            # SHORT版とLONG版のリンクを探す
-            short_link = soup.select_one('a:contains("SHORT")')
-            long_link = soup.select_one('a:contains("LONG")')
-            
-            if short_link:
-                download_links['short'] = short_link.get('href')
-            
-            if long_link:
-                download_links['long'] = long_link.get('href')
-            
-            # 代替方法: クラスやIDで検索
-            if not download_links:
-                download_elements = soup.select('.download-button a, .btn-download')
-                for elem in download_elements:
-                    text = elem.text.lower()
-                    href = elem.get('href')
-                    if href and href.endswith('.mp3'):
-                        if 'short' in text:
-                            download_links['short'] = href
-                        elif 'long' in text:
-                            download_links['long'] = href
-                        else:
-                            download_links['default'] = href
-            
-            # 説明文を取得
-            description = ""
-            desc_elem = soup.select_one('.music-description, .description')
-            if desc_elem:
-                description = desc_elem.text.strip()
+            download_links, description = parse_music_details(response.text)
             
             # 情報を更新
             music_info.update({
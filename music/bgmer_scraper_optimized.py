@@ -1,35 +1,96 @@
 import requests
-from bs4 import BeautifulSoup
 import re
 import os
+import sys
 import time
 import random
 import urllib.parse
 
+from bgmer_parser import parse_music_page
+from bgmer_catalog import MusicCatalog, CatalogCrawler, DEFAULT_CATALOG_FILE
+from http_cache import install_cache, DEFAULT_CACHE_DIR, DEFAULT_CACHE_TTL, DEFAULT_CACHE_MAX_BYTES
+
+# 処理時間の計測（プロジェクトのルートの tracing.py）
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import tracing
+
+# 桜関連の検索キーワード
+SAKURA_KEYWORDS = ["桜", "サクラ", "さくら", "ソメイヨシノ"]
+
+# 検索で見つからない場合に備えて直接登録する桜関連の音源URL
+SEED_MUSIC_URLS = [
+    "https://bgmer.net/music/220",  # ソメイヨシノ
+]
+
 class BGMerScraper:
     """
     BGMerサイトから桜関連の音源をスクレイピングするクラス
     """
-    def __init__(self, base_url="https://bgmer.net"):
+    def __init__(self, base_url="https://bgmer.net", cache_dir=DEFAULT_CACHE_DIR,
+                 cache_ttl=DEFAULT_CACHE_TTL, cache_max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        """
+        初期化
+        
+        Args:
+            base_url (str): サイトのベースURL
+            cache_dir (str): HTTPキャッシュのディレクトリ（Noneの場合はキャッシュしない）
+            cache_ttl (float): 再検証せずにキャッシュを使用する期間（秒）
+            cache_max_bytes (int): キャッシュの合計サイズの上限（バイト）
+        """
         self.base_url = base_url
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        # キャッシュから返したものも含めて、取得したページ数を計測する
+        self.session.hooks['response'].append(lambda response, *args, **kwargs: tracing.count('http.requests'))
+        
+        # ETag / Last-Modified を使った条件付きリクエストで、変更されたページだけを再取得する
+        self.cache = None
+        if cache_dir:
+            self.cache = install_cache(self.session, cache_dir, cache_ttl, cache_max_bytes)
     
-    def get_sakura_music_list(self):
+    def get_sakura_music_list(self, keywords=SAKURA_KEYWORDS, categories=(), catalog_file=DEFAULT_CATALOG_FILE):
+        """
+        桜関連の音源リストを取得する
+        
+        検索結果とカテゴリ一覧を全ページ巡回してローカルカタログを更新し、
+        新規または変更のあった音源だけ詳細ページを取得する。
+        検索で見つからない既知の音源（SEED_MUSIC_URLS）もカタログに登録する。
+        
+        Args:
+            keywords (list): 検索キーワードのリスト
+            categories (list): 巡回するカテゴリのスラッグのリスト
+            catalog_file (str): カタログファイルのパス
+            
+        Returns:
+            list: 桜関連音源情報のリスト（詳細情報を含む）
+        """
+        catalog = MusicCatalog(catalog_file)
+        crawler = CatalogCrawler(self, catalog)
+        
+        print("検索結果とカテゴリ一覧を巡回しています...")
+        with tracing.span('scrape.crawl', 'music'):
+            crawler.crawl(keywords, categories)
+        
+        seed_urls = [url for url in SEED_MUSIC_URLS if url not in catalog.entries]
+        for music_info in self._get_seed_music_list(seed_urls):
+            catalog.record(music_info['url'], music_info['title'], 'seed', music_info['keyword'])
+        
+        with tracing.span('scrape.refresh_details', 'music'):
+            return crawler.refresh()
+    
+    def _get_seed_music_list(self, sakura_music_urls):
         """
         桜関連の音源リストを直接取得する（検索機能を使わない方法）
         
+        Args:
+            sakura_music_urls (list): 音源ページのURLのリスト
+            
         Returns:
             list: 桜関連音源情報のリスト
         """
-        # 桜関連の音源URLを直接指定
-        sakura_music_urls = [
-            "https://bgmer.net/music/220",  # ソメイヨシノ
-        ]
-        
         music_list = []
         
         for url in sakura_music_urls:
@@ -38,11 +99,8 @@ class BGMerScraper:
                 response = self.session.get(url)
                 response.raise_for_status()
                 
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
                 # タイトルを取得
-                title_elem = soup.select_one('h1') or soup.select_one('.music-title')
-                title = title_elem.text.strip() if title_elem else "不明なタイトル"
+                title = parse_music_page(response.text)['title']
                 
                 music_info = {
                     'title': title,
@@ -53,8 +111,9 @@ class BGMerScraper:
                 music_list.append(music_info)
                 print(f"見つかった音源: {title}")
                 
-                # サーバー負荷軽減のための待機
-                time.sleep(random.uniform(1, 2))
+                # サーバー負荷軽減のための待機（キャッシュから返された場合は待機しない）
+                if not getattr(response, 'from_cache', False):
+                    time.sleep(random.uniform(1, 2))
                 
             except Exception as e:
                 print(f"音源ページの取得中にエラーが発生しました: {e}")
@@ -75,49 +134,11 @@ class BGMerScraper:
             response = self.session.get(music_info['url'])
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # ダウンロードリンクを探す
-            download_links = {}
-            
-            # SHORT版とLONG版のリンクを探す（BGMerサイト特有の構造）
-            short_link = soup.select_one('a:-soup-contains("SHORT")')
-            long_link = soup.select_one('a:-soup-contains("LONG")')
-            
-            if not short_link:
-                # 代替方法
-                short_links = [a for a in soup.find_all('a') if 'SHORT' in a.text]
-                if short_links:
-                    short_link = short_links[0]
-            
-            if not long_link:
-                # 代替方法
-                long_links = [a for a in soup.find_all('a') if 'LONG' in a.text]
-                if long_links:
-                    long_link = long_links[0]
-            
-            if short_link and 'href' in short_link.attrs:
-                download_links['short'] = short_link['href']
-            
-            if long_link and 'href' in long_link.attrs:
-                download_links['long'] = long_link['href']
-            
-            # 説明文を取得
-            description = ""
-            desc_elem = soup.select_one('.music-description') or soup.select_one('.description')
-            if not desc_elem:
-                # 代替方法
-                desc_elem = soup.select_one('楽曲概要')
-            
-            if desc_elem:
-                description = desc_elem.text.strip()
-            else:
-                # 楽曲概要セクションを探す
-                for elem in soup.find_all(['h2', 'h3']):
-                    if '概要' in elem.text:
-                        next_elem = elem.find_next_sibling()
-                        if next_elem:
-                            description = next_elem.text.strip()
+            # タイトル・ダウンロードリンク・説明文を1回の解析で抽出
+            with tracing.span('scrape.parse_music_page', 'music'):
+                page = parse_music_page(response.text)
+            download_links = page['download_links']
+            description = page['description']
             
             # 情報を更新
             music_info.update({
@@ -125,8 +146,9 @@ class BGMerScraper:
                 'description': description
             })
             
-            # サーバー負荷軽減のための待機
-            time.sleep(random.uniform(1, 2))
+            # サーバー負荷軽減のための待機（キャッシュから返された場合は待機しない）
+            if not getattr(response, 'from_cache', False):
+                time.sleep(random.uniform(1, 2))
             
             return music_info
             
@@ -175,16 +197,12 @@ class BGMerScraper:
 if __name__ == "__main__":
     scraper = BGMerScraper()
     
-    # 桜関連の音源を直接取得
+    # 桜関連の音源をカタログから差分取得（新規・変更分のみ詳細を取得）
     music_list = scraper.get_sakura_music_list()
     
     print(f"\n合計 {len(music_list)} 件の桜関連音源が見つかりました。\n")
     
-    # 各音源の詳細情報を取得
     for i, music in enumerate(music_list):
-        print(f"[{i+1}/{len(music_list)}] {music['title']} の詳細を取得中...")
-        music_list[i] = scraper.get_music_details(music)
-        
         # ダウンロードリンクが見つからない場合は手動で抽出
         if not music_list[i].get('download_links'):
             print(f"ダウンロードリンクが見つからないため、手動で抽出します...")
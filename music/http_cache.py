@@ -0,0 +1,273 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# デフォルトのキャッシュ設定
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".http_cache")
+DEFAULT_CACHE_TTL = 6 * 60 * 60  # 6時間
+DEFAULT_CACHE_MAX_BYTES = 200 * 1024 * 1024  # 200MB
+
+# キャッシュに保存するレスポンスヘッダー
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control')
+
+
+class HTTPCache:
+    """
+    HTTPレスポンス本文をディスクに保存するキャッシュ
+
+    URLのハッシュをキーに、本文（.body）とメタデータ（.json）を保存する。
+    ETag / Last-Modified を保持し、TTLを過ぎたエントリは条件付きリクエストで再検証する。
+    合計サイズが上限を超えた場合は、最後に使われた時刻が古いものから削除する。
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_CACHE_TTL, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        """
+        初期化
+
+        Args:
+            cache_dir (str): キャッシュディレクトリ
+            ttl (float): 再検証せずにキャッシュを使用する期間（秒）
+            max_bytes (int): キャッシュの合計サイズの上限（バイト）
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # 本文の合計サイズ（最初の書き込み時に一度だけ集計し、以降は書き込みごとに更新する）
+        self.total_bytes = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.json', base + '.body'
+
+    def _write_atomic(self, path, data):
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def get(self, url):
+        """
+        キャッシュエントリを取得する
+
+        Args:
+            url (str): URL
+
+        Returns:
+            dict: メタデータと本文（'body'）を含むエントリ、存在しない場合はNone
+        """
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            with open(body_path, 'rb') as f:
+                entry['body'] = f.read()
+            # 削除の優先順位に使うため、最終使用時刻を更新
+            os.utime(body_path)
+        except (OSError, json.JSONDecodeError):
+            # 読み込み中に削除されたエントリもキャッシュミスとして扱う
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        """
+        エントリが再検証なしで使用できるか確認する
+
+        Args:
+            entry (dict): キャッシュエントリ
+
+        Returns:
+            bool: TTL以内の場合はTrue
+        """
+        return time.time() - entry['stored_at'] < self.ttl
+
+    def conditional_headers(self, entry):
+        """
+        再検証用の条件付きリクエストヘッダーを作成する
+
+        Args:
+            entry (dict): キャッシュエントリ
+
+        Returns:
+            dict: If-None-Match / If-Modified-Since ヘッダー
+        """
+        headers = {}
+        if not entry:
+            return headers
+        stored = entry.get('headers', {})
+        if stored.get('ETag'):
+            headers['If-None-Match'] = stored['ETag']
+        if stored.get('Last-Modified'):
+            headers['If-Modified-Since'] = stored['Last-Modified']
+        return headers
+
+    def put(self, url, status, headers, body, encoding=None):
+        """
+        レスポンスを保存する
+
+        Args:
+            url (str): URL
+            status (int): ステータスコード
+            headers (Mapping): レスポンスヘッダー
+            body (bytes): レスポンス本文
+            encoding (str): 本文の文字コード
+
+        Returns:
+            dict: 保存したエントリ（no-storeの場合はNone）
+        """
+        if 'no-store' in (headers.get('Cache-Control') or ''):
+            return None
+        entry = {
+            'url': url,
+            'status': status,
+            'headers': {name: headers[name] for name in STORED_HEADERS if headers.get(name)},
+            'encoding': encoding,
+            'stored_at': time.time(),
+        }
+        meta_path, body_path = self._paths(url)
+        with self.lock:
+            if self.total_bytes is None:
+                self.total_bytes = sum(size for _, size, _ in self._bodies())
+            try:
+                replaced = os.path.getsize(body_path)
+            except OSError:
+                replaced = 0
+            self._write_atomic(body_path, body)
+            self._write_atomic(meta_path, json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+            self.total_bytes += len(body) - replaced
+            # 上限を超えた場合だけディレクトリを走査して削除する
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+        entry['body'] = body
+        return entry
+
+    def revalidated(self, url, entry, headers):
+        """
+        304 Not Modified を受け取ったエントリの保存時刻と検証子を更新する
+
+        Args:
+            url (str): URL
+            entry (dict): キャッシュエントリ
+            headers (Mapping): 304レスポンスのヘッダー
+        """
+        for name in ('ETag', 'Last-Modified'):
+            if headers.get(name):
+                entry['headers'][name] = headers[name]
+        entry['stored_at'] = time.time()
+        meta = {k: v for k, v in entry.items() if k != 'body'}
+        meta_path, _ = self._paths(url)
+        with self.lock:
+            self._write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+    def _bodies(self):
+        """保存されている本文の (最終使用時刻, サイズ, パス) のリスト"""
+        bodies = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.body'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            bodies.append((stat.st_mtime, stat.st_size, path))
+        return bodies
+
+    def evict(self):
+        """合計サイズが上限を超えている場合、最終使用時刻が古いエントリから削除する"""
+        # 他のプロセスと共有している場合もあるため、削除時は実際のサイズを集計し直す
+        bodies = self._bodies()
+        total = sum(size for _, size, _ in bodies)
+
+        for _, size, path in sorted(bodies):
+            if total <= self.max_bytes:
+                break
+            for target in (path, path[:-len('.body')] + '.json'):
+                try:
+                    os.remove(target)
+                except OSError:
+                    pass
+            total -= size
+        self.total_bytes = total
+
+
+class CachingAdapter(HTTPAdapter):
+    """
+    requests.Session にマウントして GET レスポンスをキャッシュするアダプター
+
+    ストリーミング（stream=True）のリクエストはキャッシュせずにそのまま送信する。
+    """
+    def __init__(self, cache, **kwargs):
+        """
+        初期化
+
+        Args:
+            cache (HTTPCache): 使用するキャッシュ
+            **kwargs: HTTPAdapter に渡す設定
+        """
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def _build_response(self, request, entry):
+        response = Response()
+        response.status_code = entry['status']
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = entry.get('encoding')
+        response.url = request.url
+        response.request = request
+        response._content = entry['body']
+        response.from_cache = True
+        return response
+
+    def send(self, request, stream=False, **kwargs):
+        if request.method != 'GET' or stream:
+            return super().send(request, stream=stream, **kwargs)
+
+        entry = self.cache.get(request.url)
+        if entry and self.cache.is_fresh(entry):
+            return self._build_response(request, entry)
+
+        request.headers.update(self.cache.conditional_headers(entry))
+        response = super().send(request, stream=stream, **kwargs)
+
+        if response.status_code == 304 and entry:
+            self.cache.revalidated(request.url, entry, response.headers)
+            # 本文のない304レスポンスを閉じて、接続をプールに戻す
+            response.close()
+            return self._build_response(request, entry)
+
+        response.from_cache = False
+        if response.status_code == 200:
+            self.cache.put(request.url, response.status_code, response.headers,
+                           response.content, response.encoding)
+        return response
+
+
+def install_cache(session, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_CACHE_TTL,
+                  max_bytes=DEFAULT_CACHE_MAX_BYTES):
+    """
+    セッションにHTTPキャッシュを組み込む
+
+    Args:
+        session (requests.Session): 対象のセッション
+        cache_dir (str): キャッシュディレクトリ
+        ttl (float): 再検証せずにキャッシュを使用する期間（秒）
+        max_bytes (int): キャッシュの合計サイズの上限（バイト）
+
+    Returns:
+        HTTPCache: 組み込んだキャッシュ
+    """
+    cache = HTTPCache(cache_dir, ttl, max_bytes)
+    adapter = CachingAdapter(cache)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return cache
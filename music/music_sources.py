@@ -0,0 +1,440 @@
+import os
+import sys
+import asyncio
+import hashlib
+import argparse
+import urllib.parse
+
+from bs4 import BeautifulSoup
+
+from bgmer_scraper import parse_search_results
+from bgmer_parser import parse_music_page
+from bgmer_async_scraper import AsyncBGMerScraper, DEFAULT_KEYWORDS
+from http_cache import HTTPCache
+
+# 音源ファイルとして扱う拡張子
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.m4a')
+
+# 記録済みページ（フィクスチャ）のデフォルトの保存先
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# 登録済みの音源サイト（名前 -> クラス）
+SOURCES = {}
+
+
+def register_source(cls):
+    """
+    音源サイトのプラグインを登録するデコレータ
+
+    Args:
+        cls (type): MusicSource のサブクラス
+
+    Returns:
+        type: 登録したクラス
+    """
+    SOURCES[cls.name] = cls
+    return cls
+
+
+class MusicSource:
+    """
+    音源サイトのプラグインの基底クラス
+
+    プラグインはURLの組み立てとHTMLの解析だけを担当し、ページの取得は共通の
+    ランナーが行う。そのため、記録済みのHTMLを渡すだけでネットワークなしに検証できる。
+    結果は BGMerScraper と同じ形式（'download_links' は 'short'/'long'/'default' -> URL）。
+    """
+    # プラグイン名（SOURCES のキー、音源情報の 'source'）
+    name = None
+    # サイトのベースURL
+    base_url = None
+    # クレジット表記が必要な場合の表記（不要な場合はNone）
+    credit = None
+
+    def __init__(self, base_url=None):
+        """
+        初期化
+
+        Args:
+            base_url (str): サイトのベースURL（テスト時はローカルサーバーを指定できる）
+        """
+        if base_url:
+            self.base_url = base_url
+
+    def search_url(self, keyword):
+        """
+        キーワード検索のURLを返す
+
+        Args:
+            keyword (str): 検索キーワード
+
+        Returns:
+            str: 検索結果ページのURL
+        """
+        return f"{self.base_url}/?s={urllib.parse.quote(keyword)}"
+
+    def parse_search(self, html, page_url):
+        """
+        検索結果ページを解析する
+
+        Args:
+            html (str): 検索結果ページのHTML
+            page_url (str): 相対URLを解決するためのページURL
+
+        Returns:
+            list: (タイトル, 音源ページのURL) のリスト
+        """
+        raise NotImplementedError
+
+    def parse_detail(self, html, page_url):
+        """
+        音源ページを解析する
+
+        Args:
+            html (str): 音源ページのHTML
+            page_url (str): 相対URLを解決するためのページURL
+
+        Returns:
+            dict: ダウンロードリンク（'download_links'）と説明文（'description'）
+        """
+        raise NotImplementedError
+
+    async def resolve_download_links(self, download_links, fetch):
+        """
+        ダウンロードリンクを実際の音源ファイルのURLに解決する
+
+        中間ページを経由するサイトはこのメソッドをオーバーライドし、
+        fetch で中間ページを取得して最終的なURLを返す。
+
+        Args:
+            download_links (dict): 種類 -> 音源ページ上のリンク
+            fetch (callable): URLを受け取り本文を返すコルーチン関数
+
+        Returns:
+            dict: 種類 -> 音源ファイルのURL
+        """
+        return download_links
+
+
+@register_source
+class BGMerSource(MusicSource):
+    """
+    BGMer（https://bgmer.net/）のプラグイン
+    """
+    name = 'bgmer'
+    base_url = 'https://bgmer.net'
+
+    def parse_search(self, html, page_url):
+        return parse_search_results(html)
+
+    def parse_detail(self, html, page_url):
+        page = parse_music_page(html)
+        return {
+            'download_links': page['download_links'],
+            'description': page['description']
+        }
+
+
+@register_source
+class MomizizmSource(MusicSource):
+    """
+    MOMIZizm MUSiC（https://music.storyinvention.com/）のプラグイン
+
+    利用時にはクレジット表記が必要なため、音源情報に 'credit' を付与する。
+    """
+    name = 'momizizm'
+    base_url = 'https://music.storyinvention.com'
+    credit = 'MOMIZizm MUSiC'
+
+    def parse_search(self, html, page_url):
+        soup = BeautifulSoup(html, 'html.parser')
+        results = []
+        for link in soup.select('article h2 a, article h3 a, .entry-title a'):
+            if link.get('href'):
+                results.append((link.text.strip(), urllib.parse.urljoin(page_url, link['href'])))
+        return results
+
+    def parse_detail(self, html, page_url):
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # 記事本文中の音源ファイルへの直接リンクを探す
+        download_links = {}
+        for link in soup.select('a[href]'):
+            href = urllib.parse.urljoin(page_url, link['href'])
+            if not urllib.parse.urlsplit(href).path.lower().endswith(AUDIO_EXTENSIONS):
+                continue
+            text = link.text.upper()
+            if 'LOOP' in text or 'ループ' in link.text:
+                download_links.setdefault('long', href)
+            elif 'SHORT' in text or 'ショート' in link.text:
+                download_links.setdefault('short', href)
+            else:
+                download_links.setdefault('default', href)
+
+        desc_elem = soup.select_one('.entry-content p')
+        description = desc_elem.text.strip() if desc_elem else ""
+
+        return {
+            'download_links': download_links,
+            'description': description
+        }
+
+
+def create_sources(names=None, base_urls=None):
+    """
+    名前を指定して音源サイトのプラグインを生成する
+
+    Args:
+        names (list): プラグイン名のリスト（Noneの場合は登録済みの全て）
+        base_urls (dict): プラグイン名 -> ベースURL の上書き
+
+    Returns:
+        list: MusicSource のリスト
+    """
+    base_urls = base_urls or {}
+    names = list(SOURCES) if names is None else names
+    unknown = [name for name in names if name not in SOURCES]
+    if unknown:
+        raise ValueError(f"未登録の音源サイトです: {', '.join(unknown)} "
+                         f"(利用可能: {', '.join(SOURCES)})")
+    return [SOURCES[name](base_urls.get(name)) for name in names]
+
+
+def fixture_path(fixtures_dir, source_name, url):
+    """
+    記録済みページのファイルパスを返す
+
+    Args:
+        fixtures_dir (str): フィクスチャのディレクトリ
+        source_name (str): プラグイン名
+        url (str): ページのURL
+
+    Returns:
+        str: フィクスチャファイルのパス
+    """
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(fixtures_dir, source_name, digest + '.html')
+
+
+class RecordedFetcher:
+    """
+    記録済みのページを返すフェッチャー（ネットワークなしでプラグインを検証するため）
+
+    record=True の場合は実際に取得したページをフィクスチャとして保存する。
+    """
+    def __init__(self, fixtures_dir=DEFAULT_FIXTURES_DIR, client=None, record=False):
+        """
+        初期化
+
+        Args:
+            fixtures_dir (str): フィクスチャのディレクトリ
+            client (AsyncBGMerScraper): 記録時にページを取得するクライアント
+            record (bool): 取得したページをフィクスチャとして保存するかどうか
+        """
+        self.fixtures_dir = fixtures_dir
+        self.client = client
+        self.record = record
+
+    def for_source(self, source):
+        """プラグイン用のフェッチ関数を返す"""
+        async def fetch(url):
+            path = fixture_path(self.fixtures_dir, source.name, url)
+            if self.record:
+                html = await self.client.fetch(url)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(html)
+                return html
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"フィクスチャがありません: {url} -> {path}")
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        return fetch
+
+
+class MultiSourceScraper:
+    """
+    複数の音源サイトを並行して検索し、結果を統合するランナー
+
+    全てのサイトで1つのコネクションプールとホストごとのレートリミッターを共有する。
+    結果は音源ページのURLとダウンロードURLで重複を除き、プラグインの指定順に並べる。
+    """
+    def __init__(self, sources=None, fetcher=None, **client_kwargs):
+        """
+        初期化
+
+        Args:
+            sources (list): MusicSource のリスト（Noneの場合は登録済みの全て）
+            fetcher (RecordedFetcher): ページ取得の差し替え（Noneの場合はネットワークから取得）
+            **client_kwargs: ページ取得に使う AsyncBGMerScraper に渡す設定
+        """
+        self.sources = sources if sources is not None else create_sources()
+        self.fetcher = fetcher
+        self.client = AsyncBGMerScraper(**client_kwargs)
+
+    async def __aenter__(self):
+        await self.client.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.client.__aexit__(exc_type, exc, tb)
+
+    def _fetch_for(self, source):
+        if self.fetcher:
+            return self.fetcher.for_source(source)
+        return self.client.fetch
+
+    async def _search_source(self, source, keywords):
+        """1つのサイトを全キーワードで検索し、音源情報のリストを返す"""
+        fetch = self._fetch_for(source)
+
+        async def search(keyword):
+            url = source.search_url(keyword)
+            try:
+                return source.parse_search(await fetch(url), url)
+            except Exception as e:
+                print(f"[{source.name}] '{keyword}' の検索中にエラーが発生しました: {e}")
+                return []
+
+        results = await asyncio.gather(*(search(k) for k in keywords))
+
+        music_list = []
+        for keyword, items in zip(keywords, results):
+            for title, url in items:
+                music_list.append({
+                    'title': title,
+                    'url': url,
+                    'keyword': keyword,
+                    'source': source.name
+                })
+        return music_list
+
+    async def _get_details(self, source, music_info):
+        """音源ページを解析し、ダウンロードリンクを解決する"""
+        fetch = self._fetch_for(source)
+        try:
+            details = source.parse_detail(await fetch(music_info['url']), music_info['url'])
+            details['download_links'] = await source.resolve_download_links(
+                details['download_links'], fetch)
+        except Exception as e:
+            print(f"[{source.name}] {music_info['title']} の詳細取得中にエラーが発生しました: {e}")
+            details = {'download_links': {}, 'description': ""}
+
+        music_info.update(details)
+        if source.credit:
+            music_info['credit'] = source.credit
+        return music_info
+
+    async def scrape(self, keywords=DEFAULT_KEYWORDS):
+        """
+        全てのサイトを並行して検索し、詳細情報を取得する
+
+        Args:
+            keywords (list): 検索キーワードのリスト
+
+        Returns:
+            list: 詳細情報を追加した音源情報のリスト
+        """
+        searched = await asyncio.gather(*(self._search_source(s, keywords) for s in self.sources))
+
+        # 同じ音源ページが複数のキーワードで見つかった場合は最初のものだけ残す
+        pending = []
+        seen_urls = set()
+        for source, music_list in zip(self.sources, searched):
+            for music_info in music_list:
+                if music_info['url'] not in seen_urls:
+                    seen_urls.add(music_info['url'])
+                    pending.append((source, music_info))
+        print(f"{len(self.sources)}サイトで {len(pending)} 件の音源が見つかりました。")
+
+        detailed = await asyncio.gather(*(self._get_details(s, m) for s, m in pending))
+        return merge_music_lists(detailed)
+
+
+def merge_music_lists(music_list):
+    """
+    ダウンロードURLが同じ音源（転載・ミラーなど）を1つにまとめる
+
+    内容が同じで URL が異なる音源は、ダウンロード後に AudioLibrary のハッシュで統合される。
+
+    Args:
+        music_list (list): 音源情報のリスト
+
+    Returns:
+        list: 重複を除いた音源情報のリスト（元の順序を保持）
+    """
+    merged = []
+    seen_links = set()
+    for music_info in music_list:
+        links = set(music_info.get('download_links', {}).values())
+        if links and links & seen_links:
+            continue
+        seen_links |= links
+        merged.append(music_info)
+    return merged
+
+
+def scrape_all_sources(keywords=DEFAULT_KEYWORDS, source_names=None, fixtures_dir=None,
+                       record=False, **kwargs):
+    """
+    設定された全ての音源サイトから音源を取得する（同期コードから呼び出すための関数）
+
+    Args:
+        keywords (list): 検索キーワードのリスト
+        source_names (list): 使用するプラグイン名のリスト（Noneの場合は登録済みの全て）
+        fixtures_dir (str): 記録済みページのディレクトリ（指定した場合はネットワークを使わない）
+        record (bool): 取得したページを fixtures_dir に記録するかどうか
+        **kwargs: ページ取得に使う AsyncBGMerScraper に渡す設定
+
+    Returns:
+        list: 詳細情報を追加した音源情報のリスト（SakuraSoundDownloader にそのまま渡せる）
+    """
+    sources = create_sources(source_names)
+    if fixtures_dir is None or record:
+        kwargs.setdefault('cache', HTTPCache())
+
+    async def run():
+        async with MultiSourceScraper(sources, **kwargs) as scraper:
+            if fixtures_dir:
+                scraper.fetcher = RecordedFetcher(fixtures_dir, scraper.client, record)
+            return await scraper.scrape(keywords)
+
+    return asyncio.run(run())
+
+
+def main():
+    """
+    メイン関数 - 複数サイトから桜関連の音源を検索して一覧を表示する
+    """
+    parser = argparse.ArgumentParser(description='複数の無料BGMサイトから桜関連の音源を検索')
+    parser.add_argument('-s', '--source', action='append', dest='sources',
+                        help=f"使用する音源サイト（複数指定可、利用可能: {', '.join(SOURCES)}）")
+    parser.add_argument('-k', '--keyword', action='append', dest='keywords',
+                        help='検索キーワード（複数指定可）')
+    parser.add_argument('--fixtures', help='記録済みページのディレクトリ（ネットワークを使わずに解析を確認）')
+    parser.add_argument('--record', action='store_true', help='取得したページを --fixtures に記録する')
+    args = parser.parse_args()
+
+    if args.record and not args.fixtures:
+        args.fixtures = DEFAULT_FIXTURES_DIR
+
+    try:
+        music_list = scrape_all_sources(args.keywords or DEFAULT_KEYWORDS, args.sources,
+                                        args.fixtures, args.record)
+    except ValueError as e:
+        print(f"エラー: {e}")
+        sys.exit(1)
+
+    print(f"\n合計 {len(music_list)} 件の桜関連音源が見つかりました。")
+    for i, music in enumerate(music_list):
+        print(f"\n===== 音源 {i+1} [{music['source']}] =====")
+        print(f"タイトル: {music['title']}")
+        print(f"URL: {music['url']}")
+        if music.get('credit'):
+            print(f"クレジット: {music['credit']}")
+        for type_, link in music['download_links'].items():
+            print(f"  - {type_}: {link}")
+
+
+if __name__ == "__main__":
+    main()
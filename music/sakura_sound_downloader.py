@@ -1,27 +1,62 @@
 import os
+import sys
+import hashlib
+import argparse
 import requests
 import time
 import random
-from bgmer_scraper import BGMerScraper
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+# 処理時間の計測（プロジェクトのルートの tracing.py）
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import tracing
+
+# ダウンロード設定
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_CHUNK_SIZE = 1024 * 1024  # 1MB
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 1.0  # 秒
+
+# 再試行するHTTPステータス
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+class RetryableError(Exception):
+    """再試行で回復する可能性のあるダウンロードエラー"""
+    pass
 
 class SakuraSoundDownloader:
     """
     桜関連の音源をダウンロードするクラス
     """
-    def __init__(self, download_dir="sakura_sounds_downloads"):
+    def __init__(self, download_dir="sakura_sounds_downloads", max_workers=DEFAULT_MAX_WORKERS,
+                 chunk_size=DEFAULT_CHUNK_SIZE, max_retries=DEFAULT_MAX_RETRIES, library=None):
         """
         初期化
         
         Args:
             download_dir (str): ダウンロード先ディレクトリ
+            max_workers (int): 同時ダウンロード数
+            chunk_size (int): 読み書きのチャンクサイズ（バイト）
+            max_retries (int): 1ファイルあたりの最大再試行回数
+            library (AudioLibrary): 登録先の音源ライブラリ（Noneの場合はダウンロード先に保存するだけ）
         """
         self.download_dir = download_dir
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.library = library
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
         
+        # 同時ダウンロード数に合わせて接続プールを広げ、キープアライブ接続を再利用する
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
         # ダウンロードディレクトリの作成
         os.makedirs(self.download_dir, exist_ok=True)
     
@@ -43,14 +78,15 @@ class SakuraSoundDownloader:
         # ダウンロードするリンクを選択
         download_link = None
         if prefer_long and 'long' in music_info['download_links']:
-            download_link = music_info['download_links']['long']
+            variant = 'long'
         elif 'short' in music_info['download_links']:
-            download_link = music_info['download_links']['short']
+            variant = 'short'
         elif 'default' in music_info['download_links']:
-            download_link = music_info['download_links']['default']
+            variant = 'default'
         else:
             # 最初のリンクを使用
-            download_link = next(iter(music_info['download_links'].values()))
+            variant = next(iter(music_info['download_links']))
+        download_link = music_info['download_links'][variant]
         
         if not download_link:
             print(f"'{music_info['title']}' の有効なダウンロードリンクが見つかりませんでした。")
@@ -58,6 +94,9 @@ class SakuraSoundDownloader:
         
         # ファイル名を生成
         filename = self._sanitize_filename(music_info['title'])
+        if music_info.get('source', 'bgmer') != 'bgmer':
+            # 別サイトの同名の音源と区別する
+            filename = f"{music_info['source']}_{filename}"
         if prefer_long and 'long' in music_info['download_links']:
             filename += "_long"
         elif 'short' in music_info['download_links']:
@@ -75,53 +114,197 @@ class SakuraSoundDownloader:
         
         file_path = os.path.join(self.download_dir, filename)
         
-        # ダウンロード
+        # ライブラリに登録済みのURLはダウンロードせずにリンクだけ作成する
+        if self.library:
+            entry = self.library.lookup_url(download_link)
+            if entry:
+                print(f"'{music_info['title']}' はライブラリに登録済みです: {entry['sha256'][:12]}")
+                blob = self.library.blob_path(entry['sha256'], entry['ext'])
+                return self.library.add_link(blob, entry['sha256'], music_info['title'],
+                                             download_link, variant, filename,
+                                             music_info.get('credit'))
+        
+        # ダウンロード済みで、サーバー上のサイズと一致する場合はスキップ
+        if not self.library and self._is_complete(download_link, file_path):
+            print(f"'{music_info['title']}' はダウンロード済みです: {file_path}")
+            return file_path
+        
+        # ダウンロード（一時的なエラーは指数バックオフで再試行）
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                print(f"'{music_info['title']}' をダウンロード中...")
+                self._fetch_to_file(download_link, file_path)
+                if self.library:
+                    # 内容のハッシュで保存し、音楽ディレクトリに読みやすい名前のリンクを作成
+                    file_path = self.library.add_file(file_path, music_info['title'],
+                                                      download_link, variant, filename,
+                                                      music_info.get('credit'))
+                print(f"'{music_info['title']}' のダウンロードが完了しました: {file_path}")
+                return file_path
+                
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError, RetryableError) as e:
+                if attempt == self.max_retries:
+                    print(f"'{music_info['title']}' のダウンロード中にエラーが発生しました: {e}")
+                    break
+                delay = DEFAULT_BACKOFF_BASE * (2 ** (attempt - 1)) + random.uniform(0, 1)
+                print(f"'{music_info['title']}' のダウンロードを{delay:.1f}秒後に再試行します: {e}")
+                time.sleep(delay)
+                
+            except Exception as e:
+                print(f"'{music_info['title']}' のダウンロード中にエラーが発生しました: {e}")
+                break
+        
+        # 部分的にダウンロードされたファイル（.part）は次回の再開用に残す
+        return None
+    
+    def _is_complete(self, url, file_path):
+        """
+        ダウンロード済みのファイルが完全か確認する
+        
+        Args:
+            url (str): ダウンロードURL
+            file_path (str): 保存先のパス
+            
+        Returns:
+            bool: ファイルが存在し、サーバー上のサイズと一致する場合はTrue
+        """
+        if not os.path.exists(file_path):
+            return False
         try:
-            print(f"'{music_info['title']}' をダウンロード中...")
-            response = self.session.get(download_link, stream=True)
+            response = self.session.head(url, allow_redirects=True, timeout=30)
             response.raise_for_status()
+        except requests.RequestException:
+            # サイズを確認できない場合は、アトミックに置き換えた完成ファイルを信頼する
+            return True
+        expected = response.headers.get('Content-Length')
+        return expected is None or int(expected) == os.path.getsize(file_path)
+    
+    def _part_path(self, url):
+        """
+        ダウンロード途中のファイル（.part）のパスを返す
+        
+        タイトルが変わっても、同名の別の音源でも取り違えないように、URLのハッシュで名前を付ける。
+        
+        Args:
+            url (str): ダウンロードURL
             
-            # ファイルに保存
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            
-            print(f"'{music_info['title']}' のダウンロードが完了しました: {file_path}")
-            
-            # サーバー負荷軽減のための待機
-            time.sleep(random.uniform(1, 3))
+        Returns:
+            str: .partファイルのパス
+        """
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.download_dir, f".{digest}.part")
+    
+    def _fetch_to_file(self, url, file_path):
+        """
+        .partファイルに追記しながらダウンロードし、完了後にアトミックに置き換える
+        
+        既存の.partファイルがある場合は、最初に受け取ったETag（なければLast-Modified）を
+        If-Rangeに付けたRangeリクエストで続きから取得する。サーバー上のファイルが
+        変わっている場合（200が返る、またはContent-Rangeの開始位置が一致しない場合）は
+        最初から取り直す。
+        
+        Args:
+            url (str): ダウンロードURL
+            file_path (str): 保存先のパス
+        """
+        part_path = self._part_path(url)
+        validator_path = part_path + '.validator'
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        validator = None
+        if offset and os.path.exists(validator_path):
+            with open(validator_path, 'r', encoding='utf-8') as f:
+                validator = f.read().strip() or None
+        if not validator:
+            # 同じファイルの続きか確認できない部分ファイルは使わない
+            offset = 0
+        
+        headers = {'Range': f'bytes={offset}-', 'If-Range': validator} if offset else {}
+        tracing.count('http.requests')
+        with tracing.span('download.music_file', 'music', file=os.path.basename(file_path)), \
+                self.session.get(url, stream=True, headers=headers, timeout=60) as response:
+            if response.status_code == 416 and offset:
+                # 要求範囲が存在しない = .partファイルがすでに完全
+                total = response.headers.get('Content-Range', '').rpartition('/')[2]
+                if total.isdigit() and int(total) == offset:
+                    self._finish_part(part_path, file_path)
+                    return
+                # サイズが合わない場合は最初から取り直す
+                self._discard_part(part_path)
+                raise RetryableError('部分ファイルのサイズがサーバーと一致しません')
+            if response.status_code in RETRY_STATUS_CODES:
+                raise RetryableError(f'HTTP {response.status_code}')
+            response.raise_for_status()
             
-            return file_path
+            if response.status_code == 206:
+                content_range = response.headers.get('Content-Range', '')
+                start = content_range.partition(' ')[2].partition('-')[0]
+                if not offset or start != str(offset):
+                    # 要求した位置の続きでなければ、追記すると壊れたファイルになる
+                    self._discard_part(part_path)
+                    raise RetryableError(f'要求した位置と異なる範囲が返されました: {content_range}')
+                mode = 'ab'
+                total = content_range.rpartition('/')[2]
+                expected = int(total) if total.isdigit() else None
+            else:
+                # Rangeに対応していないサーバーや、If-Rangeが一致しない（ファイルが変わった）
+                # 場合は最初から送ってくるので上書きする
+                mode, offset = 'wb', 0
+                length = response.headers.get('Content-Length')
+                expected = int(length) if length else None
+                # 次回の再開時にIf-Rangeで送る検証子（弱いETagはIf-Rangeに使えない）
+                etag = response.headers.get('ETag', '')
+                validator = etag if etag and not etag.startswith('W/') else response.headers.get('Last-Modified')
+                if validator:
+                    with open(validator_path, 'w', encoding='utf-8') as f:
+                        f.write(validator)
+                elif os.path.exists(validator_path):
+                    os.remove(validator_path)
             
-        except Exception as e:
-            print(f"'{music_info['title']}' のダウンロード中にエラーが発生しました: {e}")
-            # 部分的にダウンロードされたファイルを削除
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            return None
+            with open(part_path, mode, buffering=self.chunk_size) as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if chunk:
+                        f.write(chunk)
+        
+        size = os.path.getsize(part_path)
+        tracing.count('bytes.downloaded', size - offset)
+        if expected is not None and size != expected:
+            raise RetryableError(f'ダウンロードが途中で終了しました ({size}/{expected}バイト)')
+        
+        self._finish_part(part_path, file_path)
+    
+    def _finish_part(self, part_path, file_path):
+        """完成した.partファイルを保存先に置き換え、検証子を削除する"""
+        os.replace(part_path, file_path)
+        if os.path.exists(part_path + '.validator'):
+            os.remove(part_path + '.validator')
+    
+    def _discard_part(self, part_path):
+        """使えなくなった.partファイルと検証子を削除する"""
+        for path in (part_path, part_path + '.validator'):
+            if os.path.exists(path):
+                os.remove(path)
     
     def download_all_music(self, music_list, prefer_long=True):
         """
-        複数の音源をダウンロードする
+        複数の音源を並行してダウンロードする
         
         Args:
             music_list (list): 音源情報のリスト
             prefer_long (bool): LONG版を優先するかどうか
             
         Returns:
-            list: ダウンロードしたファイルのパスのリスト
+            list: ダウンロードに成功したファイルのパスのリスト（音源情報のリストの順序、失敗した音源は含まない）
         """
-        downloaded_files = []
-        
-        for i, music in enumerate(music_list):
+        def download(indexed_music):
+            i, music = indexed_music
             print(f"\n[{i+1}/{len(music_list)}] '{music['title']}' をダウンロードしています...")
-            file_path = self.download_music(music, prefer_long)
-            
-            if file_path:
-                downloaded_files.append(file_path)
+            return self.download_music(music, prefer_long)
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(download, enumerate(music_list)))
         
-        return downloaded_files
+        return [file_path for file_path in results if file_path]
     
     def _sanitize_filename(self, filename):
         """
@@ -144,32 +327,46 @@ class SakuraSoundDownloader:
         
         return filename
 
-# 使用例
-if __name__ == "__main__":
-    # スクレイパーを初期化
-    scraper = BGMerScraper()
+def main():
+    """
+    メイン関数 - 登録済みの音源サイトから桜関連の音源を検索してダウンロードする
+    """
+    parser = argparse.ArgumentParser(description='桜関連の音源を検索してダウンロード')
+    parser.add_argument('-d', '--download-dir', default='sakura_sounds_downloads',
+                        help='ダウンロード先ディレクトリ（デフォルト: sakura_sounds_downloads）')
+    parser.add_argument('-w', '--workers', type=int, default=DEFAULT_MAX_WORKERS,
+                        help=f'同時ダウンロード数（デフォルト: {DEFAULT_MAX_WORKERS}）')
+    parser.add_argument('-s', '--source', action='append', dest='sources',
+                        help='使用する音源サイト（複数指定可、デフォルト: 登録済みの全て）')
+    parser.add_argument('--short', action='store_true', help='LONG版よりも通常版を優先する')
+    args = parser.parse_args()
+    
+    # 音源サイトのプラグインは aiohttp を使うため、検索する場合だけ読み込む
+    from music_sources import scrape_all_sources
     
-    # 桜関連の音源を検索
+    # 登録済みの全ての音源サイトを並行して検索し、詳細情報を取得
     print("桜関連の音源を検索中...")
-    music_list = scraper.search_sakura_music()
+    try:
+        music_list = scrape_all_sources(source_names=args.sources)
+    except ValueError as e:
+        print(f"エラー: {e}")
+        sys.exit(1)
     
     if not music_list:
         print("桜関連の音源が見つかりませんでした。")
-        exit()
+        return
     
     print(f"\n合計 {len(music_list)} 件の桜関連音源が見つかりました。\n")
     
-    # 各音源の詳細情報を取得
-    for i, music in enumerate(music_list):
-        print(f"[{i+1}/{len(music_list)}] {music['title']} の詳細を取得中...")
-        music_list[i] = scraper.get_music_details(music)
-    
     # ダウンローダーを初期化
-    downloader = SakuraSoundDownloader()
+    downloader = SakuraSoundDownloader(download_dir=args.download_dir, max_workers=args.workers)
     
     # 全ての音源をダウンロード
-    downloaded_files = downloader.download_all_music(music_list)
+    downloaded_files = downloader.download_all_music(music_list, prefer_long=not args.short)
     
     print(f"\n合計 {len(downloaded_files)} 件の音源をダウンロードしました。")
     for file_path in downloaded_files:
         print(f"- {file_path}")
+
+if __name__ == "__main__":
+    main()
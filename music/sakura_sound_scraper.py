@@ -2,6 +2,8 @@ import os
 import sys
 from bgmer_scraper_optimized import BGMerScraper
 from sakura_sound_downloader import SakuraSoundDownloader
+from audio_library import AudioLibrary
+from audio_normalizer import AudioNormalizer
 
 def main():
     """
@@ -18,7 +20,7 @@ def main():
     # スクレイパーを初期化
     scraper = BGMerScraper()
     
-    # 桜関連の音源を直接取得
+    # 桜関連の音源をカタログから差分取得
     print("\n1. 桜関連の音源を取得中...")
     music_list = scraper.get_sakura_music_list()
     
@@ -28,12 +30,9 @@ def main():
     
     print(f"\n合計 {len(music_list)} 件の桜関連音源が見つかりました。")
     
-    # 各音源の詳細情報を取得
-    print("\n2. 音源の詳細情報を取得中...")
+    # 詳細情報はカタログで新規・変更のあった音源だけ取得済み
+    print("\n2. 音源の詳細情報を確認中...")
     for i, music in enumerate(music_list):
-        print(f"  [{i+1}/{len(music_list)}] {music['title']} の詳細を取得中...")
-        music_list[i] = scraper.get_music_details(music)
-        
         # ダウンロードリンクが見つからない場合は手動で抽出
         if not music_list[i].get('download_links'):
             print(f"  ダウンロードリンクが見つからないため、手動で抽出します...")
@@ -62,7 +61,8 @@ def main():
     print("\n4. 音源のダウンロード:")
     
     # ダウンローダーを初期化
-    downloader = SakuraSoundDownloader(download_dir=download_dir)
+    # 音源は内容のハッシュで保存し、resources/music に読みやすい名前のリンクを作成
+    downloader = SakuraSoundDownloader(download_dir=download_dir, library=AudioLibrary())
     
     # 全ての音源をダウンロード
     downloaded_files = downloader.download_all_music(music_list)
@@ -76,6 +76,12 @@ def main():
     else:
         print("  音源のダウンロードに失敗しました。")
     
+    # 動画生成でそのまま使えるよう、形式とラウドネスを統一
+    if downloaded_files:
+        print("\n6. 音源の正規化:")
+        normalized_files = AudioNormalizer().normalize(downloaded_files)
+        print(f"  合計 {len(normalized_files)} 件の音源を正規化しました。")
+    
     print("\n処理が完了しました！")
 
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+"""
+bgmer_async_scraper.py をローカルのスタンドインHTTPサーバーで検証するテスト
+
+サーバーは fixtures/bgmer/ の記録済みページを、本物のサイトと同じパスで返す
+（ページ内の https://bgmer.net はサーバーのURLに書き換える）。aiohttp の接続プール、
+ホストごとの同時接続数の上限とレートリミッターを、実際のHTTP通信で確認する。
+
+使用方法:
+    python -m pytest test_bgmer_async_scraper.py
+"""
+
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('aiohttp')
+pytest.importorskip('bs4')
+
+from bgmer_async_scraper import scrape_sakura_music
+from music_sources import DEFAULT_FIXTURES_DIR, BGMerSource, fixture_path
+
+# 記録したサイトのベースURL（スタンドインサーバーのURLに置き換える）
+RECORDED_BASE_URL = BGMerSource.base_url
+
+# 1リクエストあたりの応答時間（同時接続数を観測するため）
+RESPONSE_DELAY = 0.1
+
+
+class StandInServer:
+    """記録済みページを返し、同時に処理中のリクエスト数と開始時刻を記録するサーバー"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started = []
+        self.requested = []
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                with server.lock:
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                    server.started.append(time.monotonic())
+                    server.requested.append(self.path)
+                try:
+                    time.sleep(RESPONSE_DELAY)
+                    path = fixture_path(DEFAULT_FIXTURES_DIR, BGMerSource.name, RECORDED_BASE_URL + self.path)
+                    if not os.path.exists(path):
+                        self.send_error(404)
+                        return
+                    with open(path, 'r', encoding='utf-8') as f:
+                        body = f.read().replace(RECORDED_BASE_URL, server.base_url).encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with server.lock:
+                        server.in_flight -= 1
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    with StandInServer() as server:
+        yield server
+
+
+def test_scrapes_recorded_pages(server):
+    music_list = scrape_sakura_music(['桜'], base_url=server.base_url, min_interval=0, jitter=0,
+                                     cache=None)
+
+    assert [(m['title'], m['url'], m['keyword']) for m in music_list] == [
+        ('桜ひらり', f"{server.base_url}/music/sakura_hirari", '桜'),
+        ('春風の道', f"{server.base_url}/music/harukaze_no_michi", '桜'),
+    ]
+    assert music_list[0]['download_links'] == {
+        'short': f"{server.base_url}/wp-content/uploads/sakura_hirari_short.mp3",
+        'long': f"{server.base_url}/wp-content/uploads/sakura_hirari_long.mp3",
+    }
+    assert music_list[0]['description'] == '琴と尺八で桜が舞い散る様子を表現した和風BGMです。'
+    assert music_list[1]['download_links'] == {
+        'short': f"{server.base_url}/wp-content/uploads/harukaze_no_michi_short.mp3",
+    }
+
+
+def test_respects_per_host_limit(server):
+    # 記録されていないキーワードは404になり、そのキーワードの結果は空になる
+    keywords = ['桜', 'サクラ', 'さくら', 'ソメイヨシノ']
+    music_list = scrape_sakura_music(keywords, base_url=server.base_url, per_host_limit=2,
+                                     min_interval=0, jitter=0, cache=None)
+
+    assert len(music_list) == 2
+    assert len(server.requested) == len(keywords) + 2
+    # 並行して取得しつつ、ホストごとの上限は超えない
+    assert server.max_in_flight == 2
+
+
+def test_rate_limiter_spaces_requests(server):
+    min_interval = 0.2
+    scrape_sakura_music(['桜', 'サクラ'], base_url=server.base_url, per_host_limit=4,
+                        min_interval=min_interval, jitter=0, cache=None)
+
+    started = sorted(server.started)
+    gaps = [b - a for a, b in zip(started, started[1:])]
+    assert len(started) == 4
+    # 到着時刻はスレッドの切り替えなどで揺らぐため、少し余裕を持たせる
+    assert min(gaps) >= min_interval * 0.75
@@ -0,0 +1,80 @@
+"""
+music_sources.py のプラグインを記録済みページ（fixtures/）で検証するテスト
+
+ネットワークは使わず、RecordedFetcher が fixtures/<プラグイン名>/ のページを返す。
+サイトの構造が変わった場合は、実際のページを記録し直してから期待値を更新する:
+    python music_sources.py --record -k 桜
+
+使用方法:
+    python -m pytest test_music_sources.py
+"""
+
+import pytest
+
+pytest.importorskip('aiohttp')
+pytest.importorskip('bs4')
+
+from music_sources import DEFAULT_FIXTURES_DIR, scrape_all_sources
+
+
+def replay(source_names, keywords=('桜',)):
+    """記録済みページだけを使って検索と詳細取得を行う"""
+    return scrape_all_sources(list(keywords), source_names, DEFAULT_FIXTURES_DIR)
+
+
+def test_bgmer_replay():
+    music_list = replay(['bgmer'])
+
+    assert [(m['title'], m['url']) for m in music_list] == [
+        ('桜ひらり', 'https://bgmer.net/music/sakura_hirari'),
+        ('春風の道', 'https://bgmer.net/music/harukaze_no_michi'),
+    ]
+    assert music_list[0]['download_links'] == {
+        'short': 'https://bgmer.net/wp-content/uploads/sakura_hirari_short.mp3',
+        'long': 'https://bgmer.net/wp-content/uploads/sakura_hirari_long.mp3',
+    }
+    assert music_list[0]['description'] == '琴と尺八で桜が舞い散る様子を表現した和風BGMです。'
+    # LONG版がないページと、「概要」見出しの後の説明文
+    assert music_list[1]['download_links'] == {
+        'short': 'https://bgmer.net/wp-content/uploads/harukaze_no_michi_short.mp3',
+    }
+    assert music_list[1]['description'] == '桜並木を歩くような、穏やかなピアノのBGMです。'
+    assert all(m['source'] == 'bgmer' and 'credit' not in m for m in music_list)
+
+
+def test_momizizm_replay():
+    music_list = replay(['momizizm'])
+
+    # 相対URLは検索結果ページを基準に解決される
+    assert [(m['title'], m['url']) for m in music_list] == [
+        ('【和風BGM】桜唄', 'https://music.storyinvention.com/archives/sakura-uta'),
+        ('【和風BGM】夜桜', 'https://music.storyinvention.com/archives/yozakura'),
+    ]
+    # 音源ファイル以外のリンク（利用規約）は含まない
+    assert music_list[0]['download_links'] == {
+        'default': 'https://music.storyinvention.com/wp-content/uploads/sakura-uta.mp3',
+        'long': 'https://music.storyinvention.com/wp-content/uploads/sakura-uta_loop.mp3',
+    }
+    assert music_list[0]['description'] == '桜の花が咲き誇る情景をイメージした、琴が印象的な和風BGMです。'
+    # クエリ文字列付きのURLも拡張子で判定する
+    assert music_list[1]['download_links'] == {
+        'default': 'https://music.storyinvention.com/wp-content/uploads/yozakura.mp3?ver=2',
+        'short': 'https://music.storyinvention.com/wp-content/uploads/yozakura_short.mp3',
+    }
+    assert all(m['source'] == 'momizizm' and m['credit'] == 'MOMIZizm MUSiC' for m in music_list)
+
+
+def test_sources_are_merged_in_plugin_order():
+    music_list = replay(['momizizm', 'bgmer'])
+    assert [m['source'] for m in music_list] == ['momizizm', 'momizizm', 'bgmer', 'bgmer']
+
+
+def test_unrecorded_page_is_skipped():
+    # 記録されていない検索ページはエラーとして扱い、そのキーワードの結果は空になる
+    music_list = replay(['bgmer'], keywords=('桜', 'ソメイヨシノ'))
+    assert [m['keyword'] for m in music_list] == ['桜', '桜']
+
+
+def test_unknown_source_is_rejected():
+    with pytest.raises(ValueError):
+        replay(['unknown'])
@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+桜動画の日次パイプライン
+
+素材の収集からアップロードまでの各スクリプトを、入力と出力を明示したステージとして
+依存関係のグラフ（DAG）にまとめて実行するツールです。
+
+    harvest_video ─→ ingest ─┐
+                             ├─→ generate_<スタイル> ─→ upload_<スタイル>
+    harvest_music ───────────┘
+
+- 依存関係のないステージは同時に実行（動画の収集と音源の収集、アップロードと次の動画の生成）
+- 重いステージは資源ごとの同時実行数で制限（動画の生成は1つずつ、通信は複数）
+- ステージの結果は入力の内容ハッシュで記録し、入力が変わらなければ再実行しない
+- 途中で失敗・中断しても、同じコマンドで完了済みのステージを飛ばして再開
+"""
+
+import os
+import sys
+import argparse
+import hashlib
+import json
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+# プロジェクトのルートディレクトリ
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+MUSIC_SCRIPT_DIR = os.path.join(PROJECT_ROOT, "music")
+VIDEO_SCRIPT_DIR = os.path.join(PROJECT_ROOT, "video")
+
+# 各スクリプトの入出力先
+RESOURCES_DIR = os.path.join(PROJECT_ROOT, "resources")
+VIDEO_DIR = os.path.join(RESOURCES_DIR, "videos")
+MUSIC_DIR = os.path.join(RESOURCES_DIR, "music")
+OUTPUT_DIR = os.path.join(PROJECT_ROOT, "output")
+DOWNLOAD_QUEUE_FILE = os.path.join(OUTPUT_DIR, "download_queue.db")
+# キュー使用時のダウンロード先（sakura_video_downloader.py の既定）
+DOWNLOAD_DIR = os.path.join(OUTPUT_DIR, "sakura_queue")
+
+# パイプラインの状態とログ
+STATE_FILE = os.path.join(OUTPUT_DIR, "pipeline_state.json")
+LOG_DIR = os.path.join(OUTPUT_DIR, "pipeline_logs")
+
+# この大きさ以下のファイルは内容のハッシュ、超えるファイル（動画など）はサイズと更新時刻で判定する
+HASH_CONTENT_LIMIT = 16 * 1024 * 1024
+
+# 資源ごとの同時実行数（cpu: 動画の変換・生成、network: 収集・アップロード）
+DEFAULT_LIMITS = {"cpu": 1, "network": 2}
+
+# デフォルト設定
+DEFAULT_QUERY = "桜 4K"
+DEFAULT_NUMBER = 10
+DEFAULT_STYLES = ["ranking"]
+DEFAULT_LENGTH = 180
+
+# ステージの状態
+STATUS_DONE = "done"
+STATUS_CACHED = "cached"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+
+
+def fingerprint(path):
+    """
+    ファイルまたはディレクトリの内容を表すハッシュを計算する
+
+    Args:
+        path (str): ファイルまたはディレクトリのパス
+
+    Returns:
+        str: ハッシュ（存在しない場合は 'missing'）
+    """
+    if not os.path.exists(path):
+        return "missing"
+
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode("utf-8"))
+                digest.update(fingerprint(file_path).encode("ascii"))
+        return digest.hexdigest()
+
+    stat = os.stat(path)
+    if stat.st_size > HASH_CONTENT_LIMIT:
+        # 大きな動画を毎回読み直さないよう、サイズと更新時刻で判定する
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode("ascii"))
+    else:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_state(state_file=STATE_FILE):
+    """
+    パイプラインの状態を読み込む
+
+    Args:
+        state_file (str): 状態ファイルのパス
+
+    Returns:
+        dict: ステージ名をキーとした実行結果
+    """
+    if not os.path.exists(state_file):
+        return {}
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        print(f"警告: パイプラインの状態を読み込めませんでした: {state_file}")
+        return {}
+
+
+def save_state(state, state_file=STATE_FILE):
+    """
+    パイプラインの状態をアトミックに保存する
+
+    Args:
+        state (dict): ステージ名をキーとした実行結果
+        state_file (str): 状態ファイルのパス
+    """
+    state_dir = os.path.dirname(os.path.abspath(state_file))
+    os.makedirs(state_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(suffix=".json", dir=state_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=4)
+    os.replace(temp_path, state_file)
+
+
+class Stage:
+    """パイプラインの1つのステージ（外部スクリプトの1回の実行）"""
+
+    def __init__(self, name, command, cwd=PROJECT_ROOT, deps=(), inputs=(), outputs=(),
+                 resource="cpu", key_extra=None):
+        """
+        初期化メソッド
+
+        Args:
+            name (str): ステージ名
+            command (list): 実行するコマンド
+            cwd (str): 実行するディレクトリ（スクリプトは同じディレクトリのモジュールを読み込むため）
+            deps (tuple): 先に完了している必要があるステージ名
+            inputs (tuple): 結果を左右する入力ファイル・ディレクトリ
+            outputs (tuple): ステージが作成するファイル・ディレクトリ
+            resource (str): 同時実行数を制限する資源（cpu, network）
+            key_extra (str): キャッシュキーに含める追加の値（日付など）
+        """
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.deps = tuple(deps)
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.resource = resource
+        self.key_extra = key_extra
+
+    def cache_key(self, dep_outputs):
+        """
+        入力の内容からキャッシュキーを計算する
+
+        Args:
+            dep_outputs (dict): 依存ステージ名と、その出力のハッシュの対応
+
+        Returns:
+            str: キャッシュキー
+        """
+        digest = hashlib.sha256()
+        digest.update(json.dumps([self.command, self.key_extra], ensure_ascii=False).encode("utf-8"))
+        for dep in self.deps:
+            digest.update(f"{dep}:{dep_outputs.get(dep)}".encode("utf-8"))
+        for path in self.inputs:
+            digest.update(f"{path}:{fingerprint(path)}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def output_fingerprint(self):
+        """出力の内容のハッシュ（依存するステージのキャッシュキーに使う）"""
+        digest = hashlib.sha256()
+        for path in self.outputs:
+            digest.update(f"{path}:{fingerprint(path)}".encode("utf-8"))
+        return digest.hexdigest()
+
+
+class Pipeline:
+    """ステージの依存関係に従って、独立したステージを並列に実行するクラス"""
+
+    def __init__(self, stages, state_file=STATE_FILE, log_dir=LOG_DIR, limits=None, force=()):
+        """
+        初期化メソッド
+
+        Args:
+            stages (list): ステージのリスト
+            state_file (str): 状態ファイルのパス（再開とキャッシュに使用）
+            log_dir (str): ステージごとのログの出力先
+            limits (dict): 資源ごとの同時実行数
+            force (tuple): キャッシュを無視して再実行するステージ名
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_file = state_file
+        self.log_dir = log_dir
+        limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.limits = {resource: max(1, limit) for resource, limit in limits.items()}
+        self.force = set(force)
+        self.state = load_state(state_file)
+
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"ステージ '{stage.name}' の依存先 '{dep}' が見つかりません")
+        self._check_cycles()
+
+    def _check_cycles(self):
+        """依存関係が循環していないことを確認する"""
+        visiting, visited = set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"ステージの依存関係が循環しています: {name}")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def _dep_outputs(self, stage):
+        return {dep: self.state.get(dep, {}).get("outputs") for dep in stage.deps}
+
+    def _is_cached(self, stage, key):
+        """前回の実行結果がそのまま使えるか"""
+        if stage.name in self.force:
+            return False
+        entry = self.state.get(stage.name)
+        if not entry or entry.get("status") != STATUS_DONE or entry.get("key") != key:
+            return False
+        return all(os.path.exists(path) for path in stage.outputs)
+
+    def _run_stage(self, stage):
+        """
+        ステージのコマンドを実行する（ワーカースレッドで呼ばれる）
+
+        Returns:
+            tuple: (終了コード, 所要時間[秒], ログファイルのパス)
+        """
+        os.makedirs(self.log_dir, exist_ok=True)
+        log_file = os.path.join(self.log_dir, f"{stage.name}.log")
+        start = time.monotonic()
+        with open(log_file, "w", encoding="utf-8") as log:
+            log.write(f"$ {' '.join(stage.command)}\n")
+            log.flush()
+            try:
+                process = subprocess.run(
+                    stage.command,
+                    cwd=stage.cwd,
+                    stdin=subprocess.DEVNULL,
+                    stdout=log,
+                    stderr=subprocess.STDOUT
+                )
+                returncode = process.returncode
+            except OSError as e:
+                log.write(f"\nコマンドを実行できませんでした: {e}\n")
+                returncode = -1
+        return returncode, time.monotonic() - start, log_file
+
+    def _record(self, stage, status, key=None, elapsed=None):
+        """ステージの結果を状態ファイルに記録する（完了ごとに保存して再開できるようにする）"""
+        entry = {
+            "status": status,
+            "key": key,
+            "finished_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        if status == STATUS_DONE:
+            entry["outputs"] = stage.output_fingerprint()
+        if elapsed is not None:
+            entry["elapsed"] = round(elapsed, 2)
+        self.state[stage.name] = entry
+        save_state(self.state, self.state_file)
+
+    def run(self, dry_run=False):
+        """
+        全てのステージを依存関係の順に実行する
+
+        失敗したステージに依存するステージは実行せず、それ以外のステージは続行する。
+
+        Args:
+            dry_run (bool): 実行せずに、実行されるステージとキャッシュの状態だけを表示する
+
+        Returns:
+            dict: ステージ名と状態（done, cached, failed, skipped）の対応
+        """
+        results = {}
+        pending = list(self.stages)
+        running = {}
+        in_use = {resource: 0 for resource in self.limits}
+
+        with ThreadPoolExecutor(max_workers=max(1, sum(self.limits.values()))) as executor:
+            while pending or running:
+                progressed = False
+                for name in list(pending):
+                    stage = self.stages[name]
+                    dep_results = [results.get(dep) for dep in stage.deps]
+                    if any(result in (STATUS_FAILED, STATUS_SKIPPED) for result in dep_results):
+                        print(f"[{name}] 依存するステージが失敗したため実行しません")
+                        results[name] = STATUS_SKIPPED
+                        pending.remove(name)
+                        progressed = True
+                        continue
+                    if not all(result in (STATUS_DONE, STATUS_CACHED) for result in dep_results):
+                        continue
+
+                    key = stage.cache_key(self._dep_outputs(stage))
+                    if self._is_cached(stage, key):
+                        print(f"[{name}] 入力に変更がないため前回の結果を使用します")
+                        results[name] = STATUS_CACHED
+                        pending.remove(name)
+                        progressed = True
+                        continue
+                    if dry_run:
+                        print(f"[{name}] 実行予定: {' '.join(stage.command)}")
+                        # 依存するステージの表示を続けるため完了扱いにする
+                        results[name] = STATUS_DONE
+                        pending.remove(name)
+                        progressed = True
+                        continue
+                    if in_use.get(stage.resource, 0) >= self.limits.get(stage.resource, 1):
+                        continue
+
+                    print(f"[{name}] 開始: {' '.join(stage.command)}")
+                    in_use[stage.resource] = in_use.get(stage.resource, 0) + 1
+                    running[executor.submit(self._run_stage, stage)] = (name, key)
+                    pending.remove(name)
+                    progressed = True
+
+                if progressed or not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, key = running.pop(future)
+                    stage = self.stages[name]
+                    in_use[stage.resource] -= 1
+                    returncode, elapsed, log_file = future.result()
+                    if returncode == 0:
+                        print(f"[{name}] 完了しました（{elapsed:.1f}秒）")
+                        results[name] = STATUS_DONE
+                        self._record(stage, STATUS_DONE, key, elapsed)
+                    else:
+                        print(f"[{name}] 失敗しました（終了コード: {returncode}、ログ: {log_file}）")
+                        results[name] = STATUS_FAILED
+                        self._record(stage, STATUS_FAILED, key, elapsed)
+
+        return results
+
+
+def build_daily_stages(query=DEFAULT_QUERY, number=DEFAULT_NUMBER, styles=DEFAULT_STYLES,
+                       length=DEFAULT_LENGTH, privacy="private", upload=True, thumbnail=False,
+                       date=None):
+    """
+    1日分の収集・変換・生成・アップロードのステージを作成する
+
+    Args:
+        query (str): 動画の検索クエリ
+        number (int): ダウンロードする最大動画数
+        styles (list): 生成する動画のスタイル（スタイルごとに1本生成）
+        length (int): 動画の長さ（秒）
+        privacy (str): アップロード時のプライバシー設定
+        upload (bool): 生成した動画をアップロードするか
+        thumbnail (bool): サムネイルを自動生成して設定するか
+        date (str): 収集の日付（同じ日の再実行では収集を繰り返さない）
+
+    Returns:
+        list: ステージのリスト
+    """
+    python = sys.executable
+    date = date or datetime.now().strftime("%Y%m%d")
+
+    stages = [
+        # 動画と音源の収集は互いに独立しているため同時に実行される
+        Stage(
+            "harvest_video",
+            [python, "sakura_video_downloader.py", "-q", query, "-n", str(number),
+             "--queue", DOWNLOAD_QUEUE_FILE],
+            outputs=(DOWNLOAD_DIR,),
+            resource="network",
+            key_extra=date
+        ),
+        Stage(
+            "harvest_music",
+            [python, "sakura_sound_scraper.py"],
+            cwd=MUSIC_SCRIPT_DIR,
+            outputs=(MUSIC_DIR,),
+            resource="network",
+            key_extra=date
+        ),
+        Stage(
+            "ingest",
+            [python, "sakura_video_ingest.py", DOWNLOAD_DIR, "-o", VIDEO_DIR],
+            deps=("harvest_video",),
+            inputs=(DOWNLOAD_DIR,),
+            outputs=(VIDEO_DIR,)
+        ),
+    ]
+
+    for style in styles:
+        output_name = f"sakura_{date}_{style}.mp4"
+        output_file = os.path.join(OUTPUT_DIR, output_name)
+        stages.append(Stage(
+            f"generate_{style}",
+            [python, "sakura_video_generator.py", "--output", output_name,
+             "--style", style, "--length", str(length)],
+            cwd=VIDEO_SCRIPT_DIR,
+            deps=("ingest", "harvest_music"),
+            inputs=(VIDEO_DIR, MUSIC_DIR),
+            outputs=(output_file,)
+        ))
+        if not upload:
+            continue
+        # アップロードは通信の資源を使うため、次のスタイルの動画の生成と重なって実行される
+        command = [python, "youtube_uploader.py", "--video", output_file,
+                   "--privacy", privacy, "--queue"]
+        if thumbnail:
+            command.append("--thumbnail")
+        stages.append(Stage(
+            f"upload_{style}",
+            command,
+            cwd=VIDEO_SCRIPT_DIR,
+            deps=(f"generate_{style}",),
+            inputs=(output_file,),
+            resource="network"
+        ))
+
+    return stages
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description='桜動画の収集から公開までを実行する日次パイプライン')
+    parser.add_argument('-q', '--query', type=str, default=DEFAULT_QUERY, help='動画の検索クエリ')
+    parser.add_argument('-n', '--number', type=int, default=DEFAULT_NUMBER, help='ダウンロードする最大動画数')
+    parser.add_argument('-s', '--styles', type=str, default=",".join(DEFAULT_STYLES),
+                        help='生成する動画のスタイル（カンマ区切り、スタイルごとに1本生成）')
+    parser.add_argument('-l', '--length', type=int, default=DEFAULT_LENGTH, help='動画の長さ（秒）')
+    parser.add_argument('--privacy', type=str, default='private', choices=['public', 'unlisted', 'private'],
+                        help='アップロード時のプライバシー設定')
+    parser.add_argument('--thumbnail', action='store_true', help='サムネイルを自動生成して設定する')
+    parser.add_argument('--no-upload', action='store_true', help='動画の生成までで終了する')
+    parser.add_argument('--date', type=str, help='収集の日付（YYYYMMDD、デフォルト: 今日）')
+    parser.add_argument('--render-jobs', type=int, default=DEFAULT_LIMITS['cpu'],
+                        help='同時に実行する変換・生成の数')
+    parser.add_argument('--network-jobs', type=int, default=DEFAULT_LIMITS['network'],
+                        help='同時に実行する収集・アップロードの数')
+    parser.add_argument('--force', type=str, default='',
+                        help='キャッシュを無視して再実行するステージ（カンマ区切り）')
+    parser.add_argument('--state', type=str, default=STATE_FILE, help='パイプラインの状態ファイル')
+    parser.add_argument('--dry-run', action='store_true', help='実行せずに実行予定のステージを表示する')
+    args = parser.parse_args()
+
+    stages = build_daily_stages(
+        query=args.query,
+        number=args.number,
+        styles=[style for style in args.styles.split(",") if style],
+        length=args.length,
+        privacy=args.privacy,
+        upload=not args.no_upload,
+        thumbnail=args.thumbnail,
+        date=args.date
+    )
+    pipeline = Pipeline(
+        stages,
+        state_file=args.state,
+        limits={'cpu': args.render_jobs, 'network': args.network_jobs},
+        force=[name for name in args.force.split(",") if name]
+    )
+    results = pipeline.run(dry_run=args.dry_run)
+
+    print("\n===== パイプラインの結果 =====")
+    for name, status in results.items():
+        print(f"{name}: {status}")
+    print("===========================")
+
+    if any(status in (STATUS_FAILED, STATUS_SKIPPED) for status in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
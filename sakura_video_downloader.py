@@ -6,21 +6,49 @@
 
 このスクリプトは、YouTubeなどの動画サイトから桜に関する動画を検索し、
 自動的にダウンロードするためのツールです。yt-dlpライブラリを使用しています。
+yt-dlpはダウンロードの処理で初めて読み込むため、--help やキューの状態の確認は速く起動します。
 """
 
 import os
 import sys
 import argparse
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from yt_dlp import YoutubeDL
-from yt_dlp.utils import DownloadError
+
+from download_queue import DownloadQueue
+from lease_queue import LeaseLost
+from download_throttle import DownloadThrottle, SKIP_RUN_QUOTA
+from sakura_video_ingest import MezzanineIngester
+import tracing
+
+# ジョブキューの処理中にリースを延長する間隔（秒）
+HEARTBEAT_INTERVAL = 60
+
+
+class DownloadSkipped(Exception):
+    """帯域・容量制御によりダウンロードがスキップされた場合の例外（再試行しても成功しない）"""
+    
+    def __init__(self, message, retry_later=False):
+        """
+        Args:
+            message (str): スキップした理由
+            retry_later (bool): 次回の実行では回復するかどうか（実行ごとのクォータ）
+        """
+        super().__init__(message)
+        self.retry_later = retry_later
+
 
 class SakuraVideoDownloader:
     """桜の動画をダウンロードするためのクラス"""
     
     def __init__(self, output_dir=None, max_downloads=10, video_format='mp4', 
-                 resolution='720', language='ja', subtitles=False):
+                 resolution='720', language='ja', subtitles=False, ingest=False,
+                 ingest_workers=None, rate_limit=None, max_file_size=None,
+                 max_run_bytes=None, max_daily_bytes=None, min_free_space=None,
+                 throttle=None, queue_file=None, max_retries=5):
         """
         初期化メソッド
         
@@ -31,6 +59,17 @@ class SakuraVideoDownloader:
             resolution (str): 動画の解像度
             language (str): 検索言語設定
             subtitles (bool): 字幕をダウンロードするかどうか
+            ingest (bool): ダウンロード後に素材フォーマットへ変換して登録するかどうか
+            ingest_workers (int): 素材変換の並列数（Noneの場合はCPU数）
+            rate_limit (str|int): 帯域上限（バイト/秒、"5M"のような表記も可）
+            max_file_size (str|int): 1ファイルあたりの最大サイズ
+            max_run_bytes (str|int): 実行ごとの合計ダウンロード量の上限
+            max_daily_bytes (str|int): 1日あたりの合計ダウンロード量の上限
+            min_free_space (str|int): 空きディスク容量の下限（下回るとダウンロードを一時停止）
+            throttle (DownloadThrottle): 他のダウンローダーと共有する帯域・容量制御
+                                         （指定した場合は上記の個別設定より優先）
+            queue_file (str): 永続ジョブキューのSQLiteファイル（指定すると再開可能なダウンロードになる）
+            max_retries (int): ジョブキュー使用時の1動画あたりの最大試行回数
         """
         # 出力ディレクトリの設定
         if output_dir is None:
@@ -54,10 +93,15 @@ class SakuraVideoDownloader:
         self.resolution = resolution
         self.language = language
         self.subtitles = subtitles
+        self.ingest = ingest
+        self.ingest_workers = ingest_workers
         
         # ダウンロード済み動画のリスト
         self.downloaded_videos = []
         
+        # 後処理まで完了した動画ファイル（動画ID -> ファイルパス）
+        self.finished_files = {}
+        
         # yt-dlpのオプション設定
         self.ydl_opts = {
             'format': f'bestvideo[height<={resolution}]+bestaudio/best[height<={resolution}]',
@@ -76,50 +120,134 @@ class SakuraVideoDownloader:
                 'key': 'FFmpegVideoConvertor',
                 'preferedformat': video_format,
             }],
+            'progress_hooks': [self._progress_hook],
+            'postprocessor_hooks': [self._postprocessor_hook],
         }
         
-    def search_and_download(self, query, site='youtube'):
+        # 帯域・ディスク容量の制御
+        if throttle is None and any([rate_limit, max_file_size, max_run_bytes,
+                                     max_daily_bytes, min_free_space]):
+            throttle = DownloadThrottle(
+                self.output_dir,
+                rate_limit=rate_limit,
+                max_file_size=max_file_size,
+                max_run_bytes=max_run_bytes,
+                max_daily_bytes=max_daily_bytes,
+                min_free_space=min_free_space
+            )
+        self.throttle = throttle
+        if self.throttle:
+            self.throttle.apply_to(self.ydl_opts)
+        
+        # 永続ジョブキュー
+        self.queue = DownloadQueue(queue_file, max_attempts=max_retries) if queue_file else None
+    
+    @staticmethod
+    def _progress_hook(d):
+        """ダウンロードが完了したファイルの数とバイト数を計測する"""
+        if d.get('status') != 'finished':
+            return
+        tracing.count('files.downloaded')
+        tracing.count('bytes.downloaded', d.get('downloaded_bytes') or d.get('total_bytes') or 0)
+    
+    def _postprocessor_hook(self, d):
+        """後処理の完了ごとに最終的な動画ファイルのパスを記録する"""
+        if d.get('status') != 'finished':
+            return
+        info = d.get('info_dict') or {}
+        if info.get('id') and info.get('filepath'):
+            self.finished_files[info['id']] = info['filepath']
+    
+    def _settle_throttle(self):
+        """yt-dlpの呼び出し後に、使わなかった帯域・容量の予約を解放する"""
+        if self.throttle:
+            self.throttle.settle()
+    
+    def ingest_downloads(self):
         """
-        指定したクエリで動画を検索してダウンロードする
+        ダウンロードした動画を素材フォーマットに変換して素材ディレクトリに登録する
+        
+        Returns:
+            list: 登録したメザニンファイルのパスのリスト
+        """
+        source_files = list(self.finished_files.values())
+        if not source_files:
+            # フックで記録できなかった場合は出力ディレクトリから収集
+            source_files = [
+                os.path.join(self.output_dir, f) for f in os.listdir(self.output_dir)
+                if f.endswith(f'.{self.video_format}')
+            ]
+        
+        ingester = MezzanineIngester(max_workers=self.ingest_workers)
+        with tracing.span('download.ingest', 'download', files=len(source_files)):
+            return ingester.ingest(source_files)
+        
+    def _build_search_url(self, query, site):
+        """
+        サイト別の検索URLを構築する
         
         Args:
             query (str): 検索クエリ
             site (str): 検索サイト (youtube, nicovideo, vimeo)
             
         Returns:
-            list: ダウンロードした動画のリスト
+            str: 検索URL（サポートされていないサイトの場合はNone）
         """
-        print(f"「{query}」の検索を開始します...")
-        
         # サイト別の検索URL形式
         search_url = {
             'youtube': f'ytsearch{self.max_downloads}:{query}',
             'nicovideo': f'nicosearch{self.max_downloads}:{query}',
             'vimeo': f'vimsearch{self.max_downloads}:{query}'
         }
+        return search_url.get(site)
+    
+    @staticmethod
+    def _build_video_info(entry):
+        """yt-dlpの動画情報から保存用の動画情報を作成する"""
+        return {
+            'id': entry.get('id', 'unknown'),
+            'title': entry.get('title', 'unknown'),
+            'url': entry.get('webpage_url', 'unknown'),
+            'upload_date': entry.get('upload_date', 'unknown'),
+            'duration': entry.get('duration', 0),
+            'view_count': entry.get('view_count', 0),
+            'like_count': entry.get('like_count', 0),
+            'uploader': entry.get('uploader', 'unknown')
+        }
+    
+    def search_and_download(self, query, site='youtube'):
+        """
+        指定したクエリで動画を検索してダウンロードする
+        
+        Args:
+            query (str): 検索クエリ
+            site (str): 検索サイト (youtube, nicovideo, vimeo)
+            
+        Returns:
+            list: ダウンロードした動画のリスト
+        """
+        from yt_dlp import YoutubeDL
+        from yt_dlp.utils import DownloadError
+        
+        print(f"「{query}」の検索を開始します...")
         
-        if site not in search_url:
+        search_url = self._build_search_url(query, site)
+        if search_url is None:
             print(f"エラー: サポートされていないサイト '{site}'")
             return []
         
         try:
-            with YoutubeDL(self.ydl_opts) as ydl:
-                info = ydl.extract_info(search_url[site], download=True)
+            with YoutubeDL(self.ydl_opts) as ydl, tracing.span('download.search', 'download', query=query):
+                try:
+                    info = ydl.extract_info(search_url, download=True)
+                finally:
+                    self._settle_throttle()
                 
                 if info and 'entries' in info:
                     # 検索結果の処理
                     for entry in info['entries']:
                         if entry:
-                            video_info = {
-                                'id': entry.get('id', 'unknown'),
-                                'title': entry.get('title', 'unknown'),
-                                'url': entry.get('webpage_url', 'unknown'),
-                                'upload_date': entry.get('upload_date', 'unknown'),
-                                'duration': entry.get('duration', 0),
-                                'view_count': entry.get('view_count', 0),
-                                'like_count': entry.get('like_count', 0),
-                                'uploader': entry.get('uploader', 'unknown')
-                            }
+                            video_info = self._build_video_info(entry)
                             self.downloaded_videos.append(video_info)
                             
                     # メタデータをJSONファイルに保存
@@ -128,6 +256,8 @@ class SakuraVideoDownloader:
                         json.dump(self.downloaded_videos, f, ensure_ascii=False, indent=4)
                         
                     print(f"{len(self.downloaded_videos)}件の動画をダウンロードしました。")
+                    if self.ingest:
+                        self.ingest_downloads()
                     return self.downloaded_videos
                 else:
                     print("検索結果が見つかりませんでした。")
@@ -150,6 +280,9 @@ class SakuraVideoDownloader:
         Returns:
             list: ダウンロードした動画のリスト
         """
+        from yt_dlp import YoutubeDL
+        from yt_dlp.utils import DownloadError
+        
         print(f"プレイリスト '{playlist_url}' のダウンロードを開始します...")
         
         # プレイリスト用にオプションを調整
@@ -157,24 +290,18 @@ class SakuraVideoDownloader:
         playlist_opts['playlistend'] = self.max_downloads
         
         try:
-            with YoutubeDL(playlist_opts) as ydl:
-                info = ydl.extract_info(playlist_url, download=True)
+            with YoutubeDL(playlist_opts) as ydl, tracing.span('download.playlist', 'download'):
+                try:
+                    info = ydl.extract_info(playlist_url, download=True)
+                finally:
+                    self._settle_throttle()
                 
                 if info and 'entries' in info:
                     # プレイリスト結果の処理
                     playlist_videos = []
                     for entry in info['entries']:
                         if entry:
-                            video_info = {
-                                'id': entry.get('id', 'unknown'),
-                                'title': entry.get('title', 'unknown'),
-                                'url': entry.get('webpage_url', 'unknown'),
-                                'upload_date': entry.get('upload_date', 'unknown'),
-                                'duration': entry.get('duration', 0),
-                                'view_count': entry.get('view_count', 0),
-                                'like_count': entry.get('like_count', 0),
-                                'uploader': entry.get('uploader', 'unknown')
-                            }
+                            video_info = self._build_video_info(entry)
                             playlist_videos.append(video_info)
                             
                     # メタデータをJSONファイルに保存
@@ -185,6 +312,8 @@ class SakuraVideoDownloader:
                         
                     print(f"プレイリストから{len(playlist_videos)}件の動画をダウンロードしました。")
                     self.downloaded_videos.extend(playlist_videos)
+                    if self.ingest:
+                        self.ingest_downloads()
                     return playlist_videos
                 else:
                     print("プレイリストが見つかりませんでした。")
@@ -197,6 +326,234 @@ class SakuraVideoDownloader:
             print(f"エラーが発生しました: {e}")
             return []
             
+    def _extract_entries(self, url, playlistend=None):
+        """
+        ダウンロードせずに検索結果・プレイリストの動画一覧を取得する
+        
+        Args:
+            url (str): 検索URLまたはプレイリストURL
+            playlistend (int): 取得する最大件数
+            
+        Returns:
+            list: 動画の簡易情報（id, title, url）のリスト
+        """
+        from yt_dlp import YoutubeDL
+        
+        opts = {
+            'quiet': True,
+            'extract_flat': 'in_playlist',
+            'ignoreerrors': True,
+        }
+        if playlistend:
+            opts['playlistend'] = playlistend
+        
+        with YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+        
+        entries = []
+        for entry in (info or {}).get('entries') or []:
+            if not entry:
+                continue
+            video_url = entry.get('webpage_url') or entry.get('url')
+            if video_url:
+                entries.append({
+                    'id': entry.get('id'),
+                    'title': entry.get('title'),
+                    'url': video_url
+                })
+        return entries
+    
+    def enqueue_search(self, query, site='youtube'):
+        """
+        検索結果の動画をジョブキューに追加する
+        
+        Args:
+            query (str): 検索クエリ
+            site (str): 検索サイト (youtube, nicovideo, vimeo)
+            
+        Returns:
+            int: 新たに追加したジョブ数
+        """
+        from yt_dlp.utils import DownloadError
+        
+        search_url = self._build_search_url(query, site)
+        if search_url is None:
+            print(f"エラー: サポートされていないサイト '{site}'")
+            return 0
+        
+        print(f"「{query}」の検索結果をキューに追加します...")
+        try:
+            entries = self._extract_entries(search_url)
+        except DownloadError as e:
+            print(f"検索エラー: {e}")
+            return 0
+        
+        added = self.queue.enqueue(entries, 'search', query, self.output_dir)
+        print(f"{len(entries)}件中{added}件の動画をキューに追加しました。")
+        return added
+    
+    def enqueue_playlist(self, playlist_url):
+        """
+        プレイリストの動画をジョブキューに追加する
+        
+        Args:
+            playlist_url (str): プレイリストのURL
+            
+        Returns:
+            int: 新たに追加したジョブ数
+        """
+        from yt_dlp.utils import DownloadError
+        
+        print(f"プレイリスト '{playlist_url}' をキューに追加します...")
+        try:
+            entries = self._extract_entries(playlist_url, playlistend=self.max_downloads)
+        except DownloadError as e:
+            print(f"プレイリスト取得エラー: {e}")
+            return 0
+        
+        added = self.queue.enqueue(entries, 'playlist', playlist_url, self.output_dir)
+        print(f"{len(entries)}件中{added}件の動画をキューに追加しました。")
+        return added
+    
+    def _download_job(self, job):
+        """
+        キューのジョブを1件ダウンロードする
+        
+        Args:
+            job (dict): ジョブ情報
+            
+        Returns:
+            dict: ダウンロードした動画の情報
+        """
+        from yt_dlp import YoutubeDL
+        
+        opts = self.ydl_opts.copy()
+        opts['outtmpl'] = os.path.join(job['output_dir'], '%(title)s.%(ext)s')
+        opts['ignoreerrors'] = False  # エラーを例外として受け取り再試行する
+        opts['continuedl'] = True     # .partファイルから再開する
+        opts.pop('max_downloads', None)
+        
+        # ダウンロード中も後処理（FFmpegでの変換）中もリースを延長し、他のワーカーに奪われないようにする
+        stop = threading.Event()
+        lost = threading.Event()
+        
+        def heartbeat():
+            while not stop.wait(HEARTBEAT_INTERVAL):
+                if not self.queue.heartbeat(job):
+                    lost.set()
+                    return
+        
+        def check_lease(d):
+            # リースを失ったジョブは他のワーカーが処理しているため、ダウンロードを中断する
+            if lost.is_set():
+                raise LeaseLost(f"ジョブ {job['id']} のリースが切れました")
+        
+        opts['progress_hooks'] = opts['progress_hooks'] + [check_lease]
+        if self.throttle:
+            self.throttle.pop_skip_reason()
+        os.makedirs(job['output_dir'], exist_ok=True)
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        heartbeat_thread.start()
+        try:
+            with YoutubeDL(opts) as ydl, tracing.span('download.job', 'download', url=job['url']):
+                info = ydl.extract_info(job['url'], download=True)
+        finally:
+            stop.set()
+            heartbeat_thread.join()
+            self._settle_throttle()
+        
+        if not info or not info.get('requested_downloads'):
+            skip = self.throttle.pop_skip_reason() if self.throttle else None
+            if skip:
+                kind, reason = skip
+                raise DownloadSkipped(reason, retry_later=(kind == SKIP_RUN_QUOTA))
+            raise DownloadSkipped('ダウンロードがスキップされました')
+        return self._build_video_info(info)
+    
+    def _queue_worker(self):
+        """ジョブキューが空になるまでジョブを処理するワーカー"""
+        from yt_dlp.utils import DownloadError
+        
+        completed = []
+        while True:
+            job = self.queue.claim()
+            if job is None:
+                # 再試行待ちのジョブがあれば実行可能になるまで待つ
+                wait = self.queue.next_attempt_in()
+                if wait is None:
+                    return completed
+                time.sleep(min(wait, 60) + 0.1)
+                continue
+            
+            print(f"[ジョブ {job['id']}] ダウンロード中 ({job['attempts']}回目): {job['title'] or job['url']}")
+            try:
+                video_info = self._download_job(job)
+            except DownloadSkipped as e:
+                if e.retry_later:
+                    # 実行ごとのクォータは今回の実行中には回復しないため、ジョブを戻して次回の実行に回す
+                    self.queue.release(job)
+                    print(f"[ジョブ {job['id']}] 次回の実行に回します: {e}")
+                    return completed
+                self.queue.fail(job, e, retry=False)
+                print(f"[ジョブ {job['id']}] スキップしました: {e}")
+                continue
+            except LeaseLost as e:
+                print(f"[ジョブ {job['id']}] 中断しました（他のワーカーが処理しています）: {e}")
+                continue
+            except DownloadError as e:
+                recorded, delay = self.queue.fail(job, e)
+                if not recorded:
+                    print(f"[ジョブ {job['id']}] リースが切れていたため結果を記録しません: {e}")
+                elif delay is None:
+                    print(f"[ジョブ {job['id']}] 再試行回数の上限に達しました: {e}")
+                else:
+                    print(f"[ジョブ {job['id']}] ダウンロードエラー、{int(delay)}秒後に再試行します: {e}")
+                continue
+            except Exception as e:
+                self.queue.fail(job, e, retry=False)
+                print(f"[ジョブ {job['id']}] エラーが発生しました: {e}")
+                continue
+            
+            if not self.queue.complete(job, video_info):
+                print(f"[ジョブ {job['id']}] リースが切れていたため結果を記録しません")
+                continue
+            completed.append(video_info)
+            print(f"[ジョブ {job['id']}] 完了しました: {video_info['title']}")
+    
+    def drain_queue(self, workers=1):
+        """
+        ジョブキューを空になるまで処理する
+        
+        Args:
+            workers (int): 同時に実行するワーカー数
+            
+        Returns:
+            list: 今回ダウンロードした動画のリスト
+        """
+        counts = self.queue.counts()
+        print(f"ジョブキューを処理します: 未処理 {counts['pending']}件, "
+              f"処理中 {counts['in_progress']}件, 完了 {counts['done']}件, 失敗 {counts['failed']}件")
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self._queue_worker) for _ in range(workers)]
+            completed = []
+            for future in futures:
+                completed.extend(future.result())
+        
+        self.downloaded_videos.extend(completed)
+        
+        # キュー全体の完了結果をメタデータとして保存
+        metadata_file = os.path.join(self.metadata_dir, 'queue_results.json')
+        with open(metadata_file, 'w', encoding='utf-8') as f:
+            json.dump(self.queue.results(), f, ensure_ascii=False, indent=4)
+        
+        counts = self.queue.counts()
+        print(f"{len(completed)}件の動画をダウンロードしました "
+              f"(完了 {counts['done']}件, 失敗 {counts['failed']}件)。")
+        if self.ingest:
+            self.ingest_downloads()
+        return completed
+    
     def get_download_summary(self):
         """
         ダウンロードの概要を取得する
@@ -250,6 +607,23 @@ def main():
     parser.add_argument('--site', type=str, default='youtube', 
                         choices=['youtube', 'nicovideo', 'vimeo'], 
                         help='検索サイト')
+    parser.add_argument('--ingest', action='store_true',
+                        help='ダウンロード後に素材フォーマットへ変換してresources/videosに登録する')
+    parser.add_argument('--ingest-workers', type=int, default=None, help='素材変換の並列数')
+    
+    # 帯域・容量制御オプション
+    parser.add_argument('--rate-limit', type=str, help='帯域上限（例: 5M = 5MB/秒）')
+    parser.add_argument('--max-file-size', type=str, help='1ファイルあたりの最大サイズ（例: 2G）')
+    parser.add_argument('--run-quota', type=str, help='実行ごとの合計ダウンロード量の上限（例: 20G）')
+    parser.add_argument('--daily-quota', type=str, help='1日あたりの合計ダウンロード量の上限（例: 100G）')
+    parser.add_argument('--min-free-space', type=str,
+                        help='空きディスク容量の下限（下回るとダウンロードを一時停止、例: 50G）')
+    
+    # 再開可能なジョブキューのオプション
+    parser.add_argument('--queue', type=str, help='ジョブキューのSQLiteファイル（再開可能なダウンロード）')
+    parser.add_argument('--resume', action='store_true', help='新しいジョブを追加せずにキューの残りを処理する')
+    parser.add_argument('--workers', type=int, default=1, help='ジョブキューの同時ダウンロード数')
+    parser.add_argument('--max-retries', type=int, default=5, help='1動画あたりの最大試行回数')
     
     # 桜関連の検索クエリプリセット
     sakura_queries = [
@@ -272,6 +646,13 @@ def main():
     
     args = parser.parse_args()
     
+    if args.resume and not args.queue:
+        parser.error('--resume には --queue の指定が必要です')
+    
+    # キュー使用時はタイムスタンプ付きでない固定の出力先にして、再実行時も同じ場所で再開する
+    if args.queue and not args.output:
+        args.output = os.path.join(os.path.dirname(os.path.abspath(args.queue)), 'sakura_queue')
+    
     # ダウンローダーの初期化
     downloader = SakuraVideoDownloader(
         output_dir=args.output,
@@ -279,11 +660,24 @@ def main():
         video_format=args.format,
         resolution=args.resolution,
         language=args.language,
-        subtitles=args.subtitles
+        subtitles=args.subtitles,
+        ingest=args.ingest,
+        ingest_workers=args.ingest_workers,
+        rate_limit=args.rate_limit,
+        max_file_size=args.max_file_size,
+        max_run_bytes=args.run_quota,
+        max_daily_bytes=args.daily_quota,
+        min_free_space=args.min_free_space,
+        queue_file=args.queue,
+        max_retries=args.max_retries
     )
     
+    # キューの残りだけを処理する場合
+    if args.resume:
+        downloader.drain_queue(args.workers)
+    
     # 引数がない場合はヘルプを表示
-    if len(sys.argv) == 1:
+    elif len(sys.argv) == 1:
         print("引数が指定されていません。以下のプリセットから選択するか、--helpでヘルプを表示してください。")
         print("\n桜関連の検索クエリプリセット:")
         for i, query in enumerate(sakura_queries, 1):
@@ -323,13 +717,21 @@ def main():
             print("無効な選択です。")
             return
     
-    # 検索クエリが指定されている場合
-    if args.query:
-        downloader.search_and_download(args.query, args.site)
-    
-    # プレイリストが指定されている場合
-    if args.playlist:
-        downloader.download_playlist(args.playlist)
+    # ジョブキューを使用する場合は追加してから処理する
+    if args.queue and not args.resume:
+        if args.query:
+            downloader.enqueue_search(args.query, args.site)
+        if args.playlist:
+            downloader.enqueue_playlist(args.playlist)
+        downloader.drain_queue(args.workers)
+    elif not args.resume:
+        # 検索クエリが指定されている場合
+        if args.query:
+            downloader.search_and_download(args.query, args.site)
+        
+        # プレイリストが指定されている場合
+        if args.playlist:
+            downloader.download_playlist(args.playlist)
     
     # ダウンロード概要の表示
     summary = downloader.get_download_summary()
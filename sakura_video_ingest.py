@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+桜の動画素材インジェストツール
+
+このスクリプトは、sakura_video_downloader.pyでダウンロードした動画を
+動画生成スクリプトがそのまま扱える統一フォーマット（メザニン）に一度だけ変換し、
+resources/videos に配置して素材メタデータに登録します。
+
+メザニンの仕様:
+    - 解像度: 目標解像度（高さを合わせて中央クロップ、幅が足りない場合は黒帯）
+    - フレームレート: 固定
+    - GOP: 固定長（キーフレーム間隔を一定にし、再エンコードなしで切り出し・連結可能にする）
+    - ピクセルフォーマット: yuv420p
+    - 音声: なし
+
+使用方法:
+    python sakura_video_ingest.py downloads/sakura_20250401_120000
+"""
+
+import os
+import argparse
+import json
+import subprocess
+from datetime import datetime
+
+from asset_registry import AssetConverter, atomic_output, probe_duration
+
+# プロジェクトのルートディレクトリ
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# 素材ディレクトリ（動画生成スクリプトと同じ場所）
+VIDEO_DIR = os.path.join(PROJECT_ROOT, "resources", "videos")
+
+# メザニンのデフォルト設定（動画生成スクリプトの出力設定に合わせる）
+DEFAULT_RESOLUTION = (3840, 2160)
+DEFAULT_FPS = 30
+DEFAULT_GOP_SECONDS = 1
+DEFAULT_CODEC = "libx264"
+DEFAULT_CRF = 18
+DEFAULT_PRESET = "medium"
+
+# インジェスト対象の拡張子
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.webm')
+
+
+def build_ffmpeg_command(source, destination, resolution=DEFAULT_RESOLUTION, fps=DEFAULT_FPS,
+                         gop_seconds=DEFAULT_GOP_SECONDS, crf=DEFAULT_CRF, preset=DEFAULT_PRESET):
+    """
+    メザニン変換用のffmpegコマンドを構築する
+
+    高さを目標解像度に合わせてから、幅が大きい場合は中央をクロップし、
+    小さい場合は左右に黒帯を追加する（動画生成スクリプトのリサイズ処理と同じ結果）。
+
+    Args:
+        source (str): 入力ファイルのパス
+        destination (str): 出力ファイルのパス
+        resolution (tuple): 目標解像度 (幅, 高さ)
+        fps (int): 固定フレームレート
+        gop_seconds (int): キーフレーム間隔（秒）
+        crf (int): x264の品質設定
+        preset (str): x264のプリセット
+
+    Returns:
+        list: ffmpegコマンドの引数リスト
+    """
+    width, height = resolution
+    gop = max(1, int(fps * gop_seconds))
+    video_filter = (
+        f"scale=-2:{height},"
+        f"crop='min(iw,{width})':{height},"
+        f"pad={width}:{height}:(ow-iw)/2:0,"
+        f"fps={fps},"
+        f"format=yuv420p"
+    )
+    return [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-i", source,
+        "-vf", video_filter,
+        "-an",
+        "-c:v", DEFAULT_CODEC,
+        "-preset", preset,
+        "-crf", str(crf),
+        "-g", str(gop),
+        "-keyint_min", str(gop),
+        "-sc_threshold", "0",
+        "-movflags", "+faststart",
+        "-f", "mp4",
+        destination,
+    ]
+
+
+def transcode_to_mezzanine(source, destination, resolution=DEFAULT_RESOLUTION, fps=DEFAULT_FPS,
+                           gop_seconds=DEFAULT_GOP_SECONDS, crf=DEFAULT_CRF, preset=DEFAULT_PRESET):
+    """
+    1本の動画をメザニンフォーマットに変換する（プロセスプールから呼び出される）
+
+    一時ファイルに書き出してから置き換えるため、途中で中断しても
+    不完全なファイルが素材ディレクトリに残ることはない。
+
+    Args:
+        source (str): 入力ファイルのパス
+        destination (str): 出力ファイルのパス
+        resolution (tuple): 目標解像度 (幅, 高さ)
+        fps (int): 固定フレームレート
+        gop_seconds (int): キーフレーム間隔（秒）
+        crf (int): x264の品質設定
+        preset (str): x264のプリセット
+
+    Returns:
+        dict: 素材メタデータのエントリ
+    """
+    # 素材ディレクトリのglob（*.mp4）に拾われないよう拡張子を変えておく
+    with atomic_output(destination, '.mp4.part') as temp_path:
+        command = build_ffmpeg_command(source, temp_path, resolution, fps, gop_seconds, crf, preset)
+        subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+
+    source_stat = os.stat(source)
+    return {
+        'file': os.path.basename(destination),
+        'source': os.path.abspath(source),
+        'source_size': source_stat.st_size,
+        'source_mtime': source_stat.st_mtime,
+        'width': resolution[0],
+        'height': resolution[1],
+        'fps': fps,
+        'gop': max(1, int(fps * gop_seconds)),
+        'pix_fmt': 'yuv420p',
+        'audio': False,
+        'duration': probe_duration(destination),
+        'source_info': load_source_info(source),
+        'ingested_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def load_source_info(source):
+    """
+    yt-dlpが書き出した .info.json から素材の出典情報を取得する
+
+    Args:
+        source (str): ダウンロードした動画ファイルのパス
+
+    Returns:
+        dict: 出典情報（見つからない場合は空の辞書）
+    """
+    info_file = os.path.splitext(source)[0] + '.info.json'
+    if not os.path.exists(info_file):
+        return {}
+    try:
+        with open(info_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return {}
+    return {
+        'id': data.get('id', 'unknown'),
+        'title': data.get('title', 'unknown'),
+        'url': data.get('webpage_url', 'unknown'),
+        'uploader': data.get('uploader', 'unknown'),
+        'license': data.get('license'),
+    }
+
+
+class MezzanineIngester(AssetConverter):
+    """ダウンロード済み動画をメザニンフォーマットに変換して素材登録するクラス"""
+    output_suffix = ".mp4"
+    label = ("変換", "動画")
+
+    def __init__(self, video_dir=VIDEO_DIR, resolution=DEFAULT_RESOLUTION, fps=DEFAULT_FPS,
+                 gop_seconds=DEFAULT_GOP_SECONDS, crf=DEFAULT_CRF, preset=DEFAULT_PRESET,
+                 max_workers=None):
+        """
+        初期化メソッド
+
+        Args:
+            video_dir (str): メザニンの出力先（素材ディレクトリ）
+            resolution (tuple): 目標解像度 (幅, 高さ)
+            fps (int): 固定フレームレート
+            gop_seconds (int): キーフレーム間隔（秒）
+            crf (int): x264の品質設定
+            preset (str): x264のプリセット
+            max_workers (int): 並列変換数（Noneの場合はCPU数）
+        """
+        super().__init__(video_dir, max_workers)
+        self.video_dir = video_dir
+        self.resolution = tuple(resolution)
+        self.fps = fps
+        self.gop_seconds = gop_seconds
+        self.crf = crf
+        self.preset = preset
+
+    def settings(self):
+        return {
+            'width': self.resolution[0],
+            'height': self.resolution[1],
+            'fps': self.fps,
+            'gop': max(1, int(self.fps * self.gop_seconds)),
+        }
+
+    def task(self):
+        return transcode_to_mezzanine, (self.resolution, self.fps, self.gop_seconds, self.crf, self.preset)
+
+    def ingest(self, source_files):
+        """
+        複数の動画をプロセスプールで並列にメザニン変換する
+
+        Args:
+            source_files (list): ダウンロード済み動画ファイルのパスのリスト
+
+        Returns:
+            list: 新たに登録したメザニンファイルのパスのリスト
+        """
+        return self.convert(source_files)
+
+    def ingest_directory(self, directory):
+        """
+        ディレクトリ内の動画をすべてインジェストする
+
+        Args:
+            directory (str): ダウンロードディレクトリ
+
+        Returns:
+            list: 新たに登録したメザニンファイルのパスのリスト
+        """
+        source_files = [
+            os.path.join(directory, f) for f in sorted(os.listdir(directory))
+            if f.lower().endswith(VIDEO_EXTENSIONS)
+        ]
+        return self.ingest(source_files)
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description='ダウンロードした桜の動画を素材フォーマットに変換するツール')
+    parser.add_argument('inputs', nargs='+', help='ダウンロードディレクトリまたは動画ファイル')
+    parser.add_argument('-o', '--output', type=str, default=VIDEO_DIR, help='素材ディレクトリ')
+    parser.add_argument('--width', type=int, default=DEFAULT_RESOLUTION[0], help='出力の幅')
+    parser.add_argument('--height', type=int, default=DEFAULT_RESOLUTION[1], help='出力の高さ')
+    parser.add_argument('--fps', type=int, default=DEFAULT_FPS, help='固定フレームレート')
+    parser.add_argument('--gop', type=float, default=DEFAULT_GOP_SECONDS, help='キーフレーム間隔（秒）')
+    parser.add_argument('--crf', type=int, default=DEFAULT_CRF, help='x264の品質設定')
+    parser.add_argument('--preset', type=str, default=DEFAULT_PRESET, help='x264のプリセット')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='並列変換数')
+    args = parser.parse_args()
+
+    ingester = MezzanineIngester(
+        video_dir=args.output,
+        resolution=(args.width, args.height),
+        fps=args.fps,
+        gop_seconds=args.gop,
+        crf=args.crf,
+        preset=args.preset,
+        max_workers=args.workers
+    )
+
+    ingested = []
+    for path in args.inputs:
+        if os.path.isdir(path):
+            ingested.extend(ingester.ingest_directory(path))
+        elif os.path.isfile(path):
+            ingested.extend(ingester.ingest([path]))
+        else:
+            print(f"警告: 入力が見つかりません: {path}")
+
+    print(f"\n{len(ingested)}件の素材を登録しました。")
+
+
+if __name__ == "__main__":
+    main()
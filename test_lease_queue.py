@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+lease_queue.py と download_queue.py のテスト
+
+一時ディレクトリのSQLiteと差し替えた時計で、ジョブの取得・リース切れの再取得・
+失敗時のバックオフ・再試行までの待機時間を検証します。
+
+使用方法:
+    python -m pytest test_lease_queue.py
+"""
+
+import sqlite3
+
+import pytest
+
+from download_queue import DownloadQueue, SCHEMA
+from lease_queue import STATUS_PENDING, STATUS_IN_PROGRESS, STATUS_DONE, STATUS_FAILED
+
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    queue = DownloadQueue(str(tmp_path / 'jobs.db'), max_attempts=3, backoff_base=10,
+                          backoff_max=25, lease_seconds=60)
+    queue.enqueue([{'url': 'https://example.com/a', 'id': 'a'},
+                   {'url': 'https://example.com/b', 'id': 'b'}], 'search', '桜', str(tmp_path))
+    return queue
+
+
+def test_enqueue_ignores_known_urls(queue, tmp_path):
+    added = queue.enqueue([{'url': 'https://example.com/a'}, {'url': 'https://example.com/c'}],
+                          'search', '桜', str(tmp_path))
+    assert added == 1
+    assert queue.counts()[STATUS_PENDING] == 3
+
+
+def test_claim_takes_jobs_in_order_and_leases_them(queue, clock):
+    first = queue.claim()
+    second = queue.claim()
+    assert (first['video_id'], second['video_id']) == ('a', 'b')
+    assert first['attempts'] == 1
+    assert queue.claim() is None
+    assert queue.counts()[STATUS_IN_PROGRESS] == 2
+    # リースが切れるまでの時間
+    assert queue.next_attempt_in() == 60
+
+
+def test_expired_lease_is_reclaimed(queue, clock):
+    job = queue.claim()
+    queue.claim()
+
+    clock.now += 59
+    assert queue.heartbeat(job)
+    clock.now += 2
+    # ハートビートのないジョブだけがリース切れで再取得される
+    reclaimed = queue.claim()
+    assert reclaimed['video_id'] == 'b'
+    assert reclaimed['attempts'] == 2
+    assert queue.claim() is None
+
+
+def test_lost_lease_rejects_updates_from_previous_worker(queue, clock):
+    lost = queue.claim()
+    clock.now += 61
+    reclaimed = queue.claim()
+    assert reclaimed['id'] == lost['id']
+    assert reclaimed['worker'] != lost['worker']
+
+    # リースを失ったワーカーの更新は記録されない
+    assert not queue.heartbeat(lost)
+    assert queue.fail(lost, 'timeout') == (False, 10)
+    assert not queue.release(lost)
+    assert not queue.complete(lost, {'id': 'a'})
+    assert queue.counts()[STATUS_IN_PROGRESS] == 1
+
+    assert queue.complete(reclaimed, {'id': 'a'})
+    assert queue.results() == [{'id': 'a'}]
+    # 完了したジョブは、取得したワーカーからも更新できない
+    assert not queue.heartbeat(reclaimed)
+
+
+def test_fail_backs_off_exponentially(queue, clock):
+    job = queue.claim()
+    assert queue.fail(job, 'timeout') == (True, 10)
+    assert queue.complete(queue.claim(), {'id': 'b'})
+
+    assert queue.next_attempt_in() == 10
+    assert queue.claim() is None
+
+    clock.now += 10
+    job = queue.claim()
+    assert job['attempts'] == 2
+    assert job['last_error'] == 'timeout'
+    assert queue.fail(job, 'timeout') == (True, 20)
+
+    clock.now += 20
+    job = queue.claim()
+    # 上限に達したら再試行しない
+    assert queue.fail(job, 'timeout') == (True, None)
+    assert queue.counts()[STATUS_FAILED] == 1
+    assert queue.next_attempt_in() is None
+    assert queue.claim() is None
+
+
+def test_backoff_is_capped(queue, clock):
+    queue.max_attempts = 10
+    job = queue.claim()
+    job['attempts'] = 5
+    assert queue.fail(job, 'timeout') == (True, 25)
+
+
+def test_fail_without_retry_is_permanent(queue, clock):
+    job = queue.claim()
+    assert queue.fail(job, 'private video', retry=False) == (True, None)
+    assert queue.counts()[STATUS_FAILED] == 1
+
+
+def test_release_does_not_count_as_attempt(queue, clock):
+    job = queue.claim()
+    assert queue.release(job, next_attempt_at=clock.now + 300)
+    assert queue.claim()['video_id'] == 'b'
+    assert queue.next_attempt_in() == 60
+
+    clock.now += 300
+    job = queue.claim()
+    assert (job['video_id'], job['attempts']) == ('a', 1)
+
+
+def test_results_returns_completed_jobs(queue):
+    job = queue.claim()
+    assert queue.complete(job, {'id': 'a', 'title': '桜'})
+    assert queue.results() == [{'id': 'a', 'title': '桜'}]
+    assert queue.counts()[STATUS_DONE] == 1
+
+
+def test_queue_survives_reopen(queue, clock):
+    queue.claim()
+    queue.claim()
+    reopened = DownloadQueue(queue.db_path, lease_seconds=60)
+    clock.now += 61
+    # 前回の実行が途中で終了したジョブは再取得される
+    assert reopened.claim()['video_id'] == 'a'
+    assert reopened.claim()['video_id'] == 'b'
+
+
+def test_adds_owner_column_to_old_database(tmp_path, clock):
+    db_path = str(tmp_path / 'jobs.db')
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(SCHEMA.replace('    worker TEXT,\n', ''))
+    queue = DownloadQueue(db_path)
+    queue.enqueue([{'url': 'https://example.com/a'}], 'search', '桜', str(tmp_path))
+    job = queue.claim()
+    assert queue.complete(job, {'id': 'a'})
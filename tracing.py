@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+処理時間の計測とトレースの出力
+
+各スクリプトの処理段階を区間（スパン）として計測し、フレーム数・バイト数・HTTPリクエスト数などの
+カウンターとともに、Chromeのトレース形式（chrome://tracing や Perfetto で表示可能）のJSONと
+集計表を出力します。
+
+計測は環境変数 SAKURA_TRACE_DIR にディレクトリを指定した場合だけ有効になります。
+無効の場合、span() は何もしない共有のコンテキストマネージャを返し、count() はすぐに戻るため、
+計測のコードを残したまま本番で実行できます。
+
+    SAKURA_TRACE_DIR=output/traces python sakura_video_downloader.py -q "桜 4K"
+    SAKURA_TRACE_DIR=output/traces python pipeline.py
+
+各プロセスは終了時に <ディレクトリ>/<スクリプト名>-<プロセスID>.trace.json を書き出します
+（パイプラインから起動したスクリプトや、プロセスプールのワーカーも別々のファイルになります）。
+
+    # 全てのプロセスのトレースを1つにまとめ、集計表を表示
+    python tracing.py output/traces -o output/trace.json
+"""
+
+import os
+import sys
+import argparse
+import atexit
+import glob
+import json
+import tempfile
+import threading
+import time
+
+# 計測を有効にする環境変数（トレースの出力先ディレクトリ）
+TRACE_DIR_ENV = "SAKURA_TRACE_DIR"
+TRACE_SUFFIX = ".trace.json"
+
+
+class _NullSpan:
+    """計測が無効の場合に返す、何もしないスパン"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """1つの区間の計測（with文で使用）"""
+
+    __slots__ = ("tracer", "name", "category", "args", "start")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._record(self.name, self.category, self.start, end, self.args)
+        return False
+
+    def set(self, **args):
+        """区間に付加情報を追加（ファイル名やバイト数など）"""
+        self.args.update(args)
+
+
+class Tracer:
+    """スパンとカウンターを記録するクラス（プロセスごとに1つ）"""
+
+    def __init__(self, trace_dir=None):
+        """
+        初期化メソッド
+
+        Args:
+            trace_dir (str): トレースの出力先ディレクトリ（Noneの場合は計測しない）
+        """
+        self.trace_dir = trace_dir
+        self.enabled = bool(trace_dir)
+        self._lock = threading.Lock()
+        self._events = []
+        self._counters = {}
+        # スパン名 -> [回数, 合計, 最小, 最大]（秒）
+        self._stats = {}
+        self._pid = os.getpid()
+        # トレースの時刻はプロセス開始からの経過時間（マイクロ秒）
+        self._origin = time.perf_counter()
+        self._wall_origin = time.time()
+
+    def span(self, name, category="", **args):
+        """
+        区間を計測するコンテキストマネージャ
+
+        Args:
+            name (str): 区間の名前（集計表ではこの名前ごとに集計）
+            category (str): 分類（video, music, upload など）
+            **args: 区間に付加する情報
+
+        Returns:
+            with文で使用するスパン
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+
+    def count(self, name, value=1):
+        """
+        カウンターを加算
+
+        Args:
+            name (str): カウンターの名前（frames, bytes.downloaded, http.requests など）
+            value (float): 加算する値
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def _record(self, name, category, start, end, args):
+        duration = end - start
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": duration * 1e6,
+            "pid": self._pid,
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with self._lock:
+            self._events.append(event)
+            stats = self._stats.get(name)
+            if stats is None:
+                self._stats[name] = [1, duration, duration, duration]
+            else:
+                stats[0] += 1
+                stats[1] += duration
+                stats[2] = min(stats[2], duration)
+                stats[3] = max(stats[3], duration)
+
+    def to_trace(self):
+        """Chromeのトレース形式の辞書"""
+        now = (time.perf_counter() - self._origin) * 1e6
+        with self._lock:
+            events = list(self._events)
+            counters = dict(self._counters)
+        # カウンターは終了時点の合計を表示する
+        for name, value in sorted(counters.items()):
+            events.append({"name": name, "ph": "C", "ts": now, "pid": self._pid, "args": {name: value}})
+        events.append({
+            "name": "process_name", "ph": "M", "pid": self._pid,
+            "args": {"name": f"{os.path.basename(sys.argv[0]) or 'python'} ({self._pid})"}
+        })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "argv": sys.argv,
+                "started_at": self._wall_origin,
+                "counters": counters,
+            },
+        }
+
+    def write(self):
+        """トレースを出力先ディレクトリに書き出す"""
+        if not self.enabled or (not self._events and not self._counters):
+            return None
+        os.makedirs(self.trace_dir, exist_ok=True)
+        script = os.path.splitext(os.path.basename(sys.argv[0]))[0] or "python"
+        trace_file = os.path.join(self.trace_dir, f"{script}-{os.getpid()}{TRACE_SUFFIX}")
+        fd, temp_path = tempfile.mkstemp(suffix=".json", dir=self.trace_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.to_trace(), f, ensure_ascii=False)
+        os.replace(temp_path, trace_file)
+        return trace_file
+
+    def summary(self):
+        """集計表（スパン名ごとの回数と時間、カウンターの合計）"""
+        with self._lock:
+            stats = {name: list(values) for name, values in self._stats.items()}
+            counters = dict(self._counters)
+        return format_summary(stats, counters)
+
+
+def format_summary(stats, counters):
+    """
+    集計表の文字列を作成
+
+    Args:
+        stats (dict): スパン名 -> [回数, 合計, 最小, 最大]（秒）
+        counters (dict): カウンター名 -> 合計
+
+    Returns:
+        str: 集計表
+    """
+    lines = [f"{'区間':<40} {'回数':>6} {'合計(秒)':>10} {'平均(秒)':>10} {'最大(秒)':>10}"]
+    for name, (n, total, _, longest) in sorted(stats.items(), key=lambda item: -item[1][1]):
+        lines.append(f"{name:<40} {n:>6} {total:>10.3f} {total / n:>10.3f} {longest:>10.3f}")
+    if counters:
+        lines.append("")
+        lines.append(f"{'カウンター':<40} {'合計':>18}")
+        for name, value in sorted(counters.items()):
+            lines.append(f"{name:<40} {value:>18,.0f}")
+    return "\n".join(lines)
+
+
+def _tracer_for_process():
+    """現在のプロセスのトレーサー（fork したワーカーでは作り直す）"""
+    global _tracer
+    if _tracer.enabled and _tracer._pid != os.getpid():
+        _tracer = Tracer(_tracer.trace_dir)
+    return _tracer
+
+
+_tracer = Tracer(os.environ.get(TRACE_DIR_ENV))
+
+
+def span(name, category="", **args):
+    """区間を計測するコンテキストマネージャ（Tracer.span を参照）"""
+    if not _tracer.enabled:
+        return _NULL_SPAN
+    return _tracer_for_process().span(name, category, **args)
+
+
+def count(name, value=1):
+    """カウンターを加算（Tracer.count を参照）"""
+    if not _tracer.enabled:
+        return
+    _tracer_for_process().count(name, value)
+
+
+def is_enabled():
+    """計測が有効か"""
+    return _tracer.enabled
+
+
+def flush():
+    """
+    現在のプロセスのトレースをすぐに書き出す
+
+    プロセスプールのワーカーは終了時の処理（atexit）が実行されないため、
+    ジョブの終わりに呼んでおく。
+
+    Returns:
+        str: 書き出したファイルのパス（計測が無効の場合はNone）
+    """
+    if not _tracer.enabled:
+        return None
+    return _tracer_for_process().write()
+
+
+def _write_at_exit():
+    tracer = _tracer_for_process()
+    trace_file = tracer.write()
+    if trace_file:
+        print(f"\nトレースを書き出しました: {trace_file}", file=sys.stderr)
+        print(tracer.summary(), file=sys.stderr)
+
+
+atexit.register(_write_at_exit)
+
+
+def merge_traces(trace_dir):
+    """
+    ディレクトリ内の全てのトレースを1つにまとめる
+
+    各プロセスの時刻は開始時刻（壁時計）の差でずらして、同じ時間軸に並べる。
+
+    Args:
+        trace_dir (str): トレースのディレクトリ
+
+    Returns:
+        tuple: (まとめたトレース, スパン名ごとの集計, カウンターの合計)
+    """
+    traces = []
+    for trace_file in sorted(glob.glob(os.path.join(trace_dir, f"*{TRACE_SUFFIX}"))):
+        try:
+            with open(trace_file, "r", encoding="utf-8") as f:
+                traces.append(json.load(f))
+        except (json.JSONDecodeError, OSError):
+            print(f"警告: トレースを読み込めませんでした: {trace_file}")
+
+    origin = min((trace["otherData"]["started_at"] for trace in traces), default=0)
+    events, stats, counters = [], {}, {}
+    for trace in traces:
+        offset = (trace["otherData"]["started_at"] - origin) * 1e6
+        for event in trace["traceEvents"]:
+            if "ts" in event:
+                event["ts"] += offset
+            events.append(event)
+            if event["ph"] == "X":
+                duration = event["dur"] / 1e6
+                entry = stats.setdefault(event["name"], [0, 0.0, duration, duration])
+                entry[0] += 1
+                entry[1] += duration
+                entry[2] = min(entry[2], duration)
+                entry[3] = max(entry[3], duration)
+        for name, value in trace["otherData"].get("counters", {}).items():
+            counters[name] = counters.get(name, 0) + value
+
+    merged = {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"counters": counters}}
+    return merged, stats, counters
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description='各プロセスのトレースをまとめて集計表を表示するツール')
+    parser.add_argument('trace_dir', help='トレースのディレクトリ（SAKURA_TRACE_DIR に指定したもの）')
+    parser.add_argument('-o', '--output', type=str, help='まとめたトレースの出力先（chrome://tracing で表示可能）')
+    args = parser.parse_args()
+
+    merged, stats, counters = merge_traces(args.trace_dir)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(merged, f, ensure_ascii=False)
+        print(f"トレースをまとめました: {args.output}")
+    print(format_summary(stats, counters))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+YouTube一括公開スクリプト
+======================
+
+このスクリプトは生成済みの複数の動画を、YouTube Data APIの1日のクォータに収まるように
+スケジュールしながらまとめてアップロードします。
+
+- 1つの認証済みAPIクライアントを全てのアップロードで共有
+- API呼び出しごとに消費したクォータ（ユニット）を記録し、1日の上限を超えないように制御
+- 上限に達した動画はアップロードキューに残し、クォータがリセットされた後の実行で続きを処理
+- 複数の動画を同時にアップロードして回線の帯域を使い切る
+- 公開日時（publishAt）を指定すると、非公開でアップロードして予約公開
+
+使用方法:
+    python batch_publisher.py output/
+    python batch_publisher.py --manifest publish.json
+    python batch_publisher.py output/ --publish-start "2025-04-01 07:00" --publish-interval 24
+
+マニフェスト（JSON）の形式:
+    [
+        {"video": "output/a.mp4", "title": "...", "description_file": "...", "tags": ["桜"],
+         "category": "22", "privacy": "private", "publish_at": "2025-04-01T07:00:00+09:00"}
+    ]
+
+ディレクトリを指定した場合は、各動画と同名のJSONファイル（a.mp4 -> a.json）があれば
+そのメタデータを使用します。
+"""
+
+import os
+import sys
+import glob
+import json
+import argparse
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from youtube_uploader import (
+    DEFAULT_CATEGORY, DEFAULT_CHUNK_SIZE, DEFAULT_PRIVACY, DEFAULT_UPLOAD_WORKERS,
+    API_ENDPOINT, build_service, drain_upload_queue, load_credentials
+)
+from upload_queue import UploadQueue, DEFAULT_QUEUE_FILE, STATUS_DONE, STATUS_FAILED, STATUS_PENDING
+from youtube_quota import QuotaTracker, DEFAULT_DAILY_QUOTA
+
+# ディレクトリから集める動画の拡張子
+VIDEO_PATTERNS = ["*.mp4", "*.mov", "*.mkv"]
+
+
+def _load_sidecar(video_file: str) -> Dict[str, Any]:
+    """動画と同名のJSONファイルからメタデータを読み込む"""
+    sidecar = os.path.splitext(video_file)[0] + ".json"
+    if not os.path.exists(sidecar):
+        return {}
+    try:
+        with open(sidecar, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        print(f"警告: メタデータを読み込めませんでした: {sidecar}")
+        return {}
+
+
+def scan_directory(directory: str) -> List[Dict[str, Any]]:
+    """
+    ディレクトリ内の動画を公開対象として集める
+
+    Args:
+        directory: 動画のディレクトリ
+
+    Returns:
+        公開対象のリスト（'video' と各メタデータ）
+    """
+    video_files = []
+    for pattern in VIDEO_PATTERNS:
+        video_files.extend(glob.glob(os.path.join(directory, pattern)))
+
+    items = []
+    for video_file in sorted(video_files):
+        item = _load_sidecar(video_file)
+        item["video"] = video_file
+        items.append(item)
+    return items
+
+
+def load_manifest(manifest_file: str) -> List[Dict[str, Any]]:
+    """
+    マニフェストから公開対象を読み込む
+
+    Args:
+        manifest_file: マニフェスト（JSON）のパス
+
+    Returns:
+        公開対象のリスト（動画のパスはマニフェストからの相対パスも可）
+    """
+    with open(manifest_file, "r", encoding="utf-8") as f:
+        items = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_file))
+    for item in items:
+        if not os.path.isabs(item["video"]):
+            item["video"] = os.path.join(base_dir, item["video"])
+    return items
+
+
+def assign_publish_times(items: List[Dict[str, Any]], start: datetime, interval: timedelta):
+    """
+    公開日時が未指定の動画に、一定間隔の公開日時を割り当てる
+
+    Args:
+        items: 公開対象のリスト
+        start: 最初の公開日時
+        interval: 公開の間隔
+    """
+    publish_at = start
+    for item in items:
+        if item.get("publish_at"):
+            continue
+        item["publish_at"] = publish_at.isoformat()
+        publish_at += interval
+
+
+def publish(
+    items: List[Dict[str, Any]],
+    queue: UploadQueue,
+    quota: QuotaTracker,
+    workers: int = DEFAULT_UPLOAD_WORKERS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    api_endpoint: Optional[str] = API_ENDPOINT,
+    credentials=None,
+    youtube=None
+) -> Dict[str, int]:
+    """
+    公開対象をアップロードキューに追加し、クォータの範囲内でアップロード
+
+    Args:
+        items: 公開対象のリスト
+        queue: アップロードキュー
+        quota: クォータの管理
+        workers: 同時にアップロードする動画の数
+        chunk_size: アップロードのチャンクサイズ（バイト）
+        api_endpoint: APIのエンドポイント（テスト用のスタンドインサーバーなど）
+        credentials: 認証情報（Noneの場合はトークンファイルから読み込み）
+        youtube: YouTube APIサービス（Noneの場合は credentials と api_endpoint から構築）
+
+    Returns:
+        状態ごとのジョブ数
+    """
+    added = 0
+    for item in items:
+        if not os.path.exists(item["video"]):
+            print(f"警告: 動画ファイルが見つかりません: {item['video']}")
+            continue
+        metadata = {key: value for key, value in item.items() if key != "video"}
+        metadata.setdefault("category", DEFAULT_CATEGORY)
+        metadata.setdefault("privacy", DEFAULT_PRIVACY)
+        added += queue.enqueue(item["video"], metadata)
+
+    counts = queue.counts()
+    print(f"キューに {added} 件を追加しました（未完了 {counts[STATUS_PENDING]} 件）。")
+    print(f"今日の残りクォータ: {quota.remaining}/{quota.daily_quota} ユニット")
+
+    # 認証情報とAPIクライアントは全てのアップロードで共有する
+    if youtube is None:
+        credentials = credentials or load_credentials()
+        youtube = build_service(credentials, api_endpoint)
+
+    return drain_upload_queue(
+        queue,
+        workers=workers,
+        chunk_size=chunk_size,
+        credentials=credentials,
+        youtube=youtube,
+        api_endpoint=api_endpoint,
+        quota=quota
+    )
+
+
+def parse_arguments():
+    """コマンドライン引数をパース"""
+    parser = argparse.ArgumentParser(description="YouTube一括公開スクリプト")
+
+    parser.add_argument(
+        "directory",
+        nargs="?",
+        help="公開する動画のディレクトリ（同名のJSONファイルをメタデータとして使用）"
+    )
+
+    parser.add_argument(
+        "--manifest", "-m",
+        help="公開する動画とメタデータを記載したJSONファイル"
+    )
+
+    parser.add_argument(
+        "--queue", "-q",
+        default=DEFAULT_QUEUE_FILE,
+        help=f"アップロードキューのパス（デフォルト: {DEFAULT_QUEUE_FILE}）"
+    )
+
+    parser.add_argument(
+        "--daily-quota",
+        type=int,
+        default=DEFAULT_DAILY_QUOTA,
+        help=f"1日のクォータ（ユニット）（デフォルト: {DEFAULT_DAILY_QUOTA}）"
+    )
+
+    parser.add_argument(
+        "--publish-start",
+        help="最初の公開日時（例: \"2025-04-01 07:00\"、指定した場合は非公開でアップロードして予約公開）"
+    )
+
+    parser.add_argument(
+        "--publish-interval",
+        type=float,
+        default=24,
+        help="公開の間隔（時間）（デフォルト: 24）"
+    )
+
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=DEFAULT_UPLOAD_WORKERS,
+        help=f"同時にアップロードする動画の数（デフォルト: {DEFAULT_UPLOAD_WORKERS}）"
+    )
+
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE // 1024 // 1024,
+        help=f"アップロードのチャンクサイズ（MB）（デフォルト: {DEFAULT_CHUNK_SIZE // 1024 // 1024}）"
+    )
+
+    parser.add_argument(
+        "--api-endpoint",
+        default=API_ENDPOINT,
+        help="APIのエンドポイント（テスト用のスタンドインサーバーなど）"
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    """メイン関数"""
+    args = parse_arguments()
+
+    items = []
+    if args.manifest:
+        items.extend(load_manifest(args.manifest))
+    if args.directory:
+        items.extend(scan_directory(args.directory))
+
+    if args.publish_start:
+        # タイムゾーンの指定がない場合はローカル時刻として扱う
+        start = datetime.fromisoformat(args.publish_start)
+        if start.tzinfo is None:
+            start = start.astimezone()
+        assign_publish_times(items, start, timedelta(hours=args.publish_interval))
+
+    queue = UploadQueue(args.queue)
+    quota = QuotaTracker(args.daily_quota)
+    counts = publish(
+        items, queue, quota,
+        workers=args.workers,
+        chunk_size=args.chunk_size * 1024 * 1024,
+        api_endpoint=args.api_endpoint
+    )
+
+    for job in queue.jobs(STATUS_DONE):
+        publish_at = job["metadata"].get("publish_at")
+        suffix = f"（公開予定: {publish_at}）" if publish_at else ""
+        print(f"{os.path.basename(job['video_file'])}: https://www.youtube.com/watch?v={job['video_id']}{suffix}")
+    for job in queue.jobs(STATUS_FAILED):
+        print(f"アップロードに失敗しました: {job['video_file']}: {job['last_error']}")
+
+    print(f"\n完了 {counts[STATUS_DONE]}件, 未完了 {counts[STATUS_PENDING]}件, 失敗 {counts[STATUS_FAILED]}件")
+    print(f"今日の残りクォータ: {quota.remaining}/{quota.daily_quota} ユニット")
+    if counts[STATUS_PENDING]:
+        print(f"未完了の動画はクォータのリセット（{quota.next_reset():%Y-%m-%d %H:%M %Z}）後に再実行すると続きから処理します。")
+    if counts[STATUS_FAILED]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
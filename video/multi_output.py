@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+1回のデコードからの複数出力
+========================
+
+合成済みの動画（テキストなし）を1回だけデコード・合成し、各フレームを複数のエンコーダー
+（ffmpegのプロセス）に配ります。4K・1080p・ショート動画（9:16）を別々に生成すると
+素材のデコードと合成が出力の数だけ繰り返されますが、この方式では追加の出力には
+その出力の縮小・切り出し・テキストの合成・エンコードの分しか時間がかかりません。
+
+出力ごとに次の設定を持ちます（OUTPUT_PROFILES）:
+    size    : 出力の解像度 (幅, 高さ)
+    crop    : 縦横比が異なる場合の切り出し方（center: 中央、saliency: 被写体の多い位置）
+    layout  : テキストの配置（OVERLAY_LAYOUTS）
+    codec, preset, bitrate : エンコードの設定
+    suffix  : 出力ファイル名に付ける接尾辞
+
+テキストは出力ごとの解像度と配置で描画し直すため、縦動画でも文字が切れたり小さくなりすぎたりしません。
+各エンコーダーは専用のスレッドで縮小・合成・書き込みを行い、デコードと並行して進みます。
+
+sakura_video_generator.py の --outputs から使用します。
+"""
+
+from __future__ import annotations
+
+import os
+import bisect
+import queue
+import subprocess
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+from thumbnail_generator import find_font_path, load_font
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# 出力の設定
+OUTPUT_PROFILES = {
+    "4k": {
+        "size": (3840, 2160),
+        "crop": "center",
+        "layout": "landscape",
+        "codec": "libx264",
+        "preset": "medium",
+        "bitrate": "20000k",
+        "suffix": "",
+    },
+    "1080p": {
+        "size": (1920, 1080),
+        "crop": "center",
+        "layout": "landscape",
+        "codec": "libx264",
+        "preset": "medium",
+        "bitrate": "8000k",
+        "suffix": "_1080p",
+    },
+    "shorts": {
+        "size": (1080, 1920),
+        "crop": "saliency",
+        "layout": "vertical",
+        "codec": "libx264",
+        "preset": "medium",
+        "bitrate": "8000k",
+        "suffix": "_shorts",
+    },
+}
+DEFAULT_OUTPUTS = ["4k", "1080p", "shorts"]
+
+# テキストの配置（大きさは出力の短辺、位置は高さに対する割合）
+#   font_ratio : 基準の文字の大きさ
+#   label_top  : セグメントのテキスト（順位・地域など）の上端
+#   title_center : タイトル・エンディングのテキストの中心
+#   max_width  : テキストの最大幅（出力の幅に対する割合、超える場合は文字を小さくする）
+OVERLAY_LAYOUTS = {
+    "landscape": {"font_ratio": 0.028, "label_top": 0.023, "title_center": 0.5, "max_width": 0.9},
+    # ショート動画は上下にアプリの操作ボタンが重なるため、少し内側に配置する
+    "vertical": {"font_ratio": 0.05, "label_top": 0.14, "title_center": 0.42, "max_width": 0.85},
+}
+
+# 縁取りの太さ（文字の大きさに対する割合）
+STROKE_RATIO = 0.04
+
+# 被写体の位置の推定に使うフレーム数（セグメントごと）と評価用の幅
+SALIENCY_SAMPLES = 5
+SALIENCY_WIDTH = 320
+
+# 中央からの距離に応じて評価を下げる割合（画面の端に寄りすぎないようにする）
+SALIENCY_CENTER_BIAS = 0.3
+
+# エンコーダーに渡す前に溜めておくフレーム数（出力ごと）
+QUEUE_FRAMES = 8
+
+
+def output_path(output_file: str, name: str) -> str:
+    """
+    出力の設定に応じたファイル名
+
+    Args:
+        output_file: 基準の出力ファイルのパス
+        name: 出力の名前（OUTPUT_PROFILES のキー）
+
+    Returns:
+        出力ファイルのパス
+    """
+    base, ext = os.path.splitext(output_file)
+    return f"{base}{OUTPUT_PROFILES[name]['suffix']}{ext}"
+
+
+def crop_size(source_size: Tuple[int, int], target_size: Tuple[int, int]) -> Tuple[int, int]:
+    """元のフレームから切り出す大きさ（出力と同じ縦横比で、できるだけ大きく）"""
+    source_width, source_height = source_size
+    target_width, target_height = target_size
+    if source_width * target_height > target_width * source_height:
+        return round(source_height * target_width / target_height), source_height
+    return source_width, round(source_width * target_height / target_width)
+
+
+def saliency_offset(frames: List[np.ndarray], crop: Tuple[int, int]) -> Tuple[int, int]:
+    """
+    被写体の多い位置を含むように切り出し位置を決める
+
+    細部（エッジ）の多さと色の鮮やかさを縮小したフレームで評価し、
+    切り出す方向に投影して、評価の合計が最も大きくなる位置を選ぶ。
+
+    Args:
+        frames: 評価するフレーム（高さ x 幅 x 3、RGB、同じ大きさ、1枚以上）
+        crop: 切り出す大きさ (幅, 高さ)
+
+    Returns:
+        切り出す位置 (x, y)
+    """
+    import cv2
+    import numpy as np
+
+    height, width = frames[0].shape[:2]
+    crop_width, crop_height = crop
+    if crop_width >= width and crop_height >= height:
+        return 0, 0
+
+    scale = min(1.0, SALIENCY_WIDTH / width)
+    small_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    saliency = np.zeros((small_size[1], small_size[0]), dtype=np.float32)
+    for frame in frames:
+        small = cv2.resize(np.asarray(frame, dtype=np.uint8), small_size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+        edges = np.abs(cv2.Laplacian(gray, cv2.CV_32F))
+        saturation = cv2.cvtColor(small, cv2.COLOR_RGB2HSV)[..., 1].astype(np.float32)
+        saliency += edges / max(float(edges.max()), 1.0) + saturation / 255.0
+
+    # 横に切り出す（縦動画）場合は列ごと、縦に切り出す場合は行ごとに合計する
+    horizontal = crop_width < width
+    profile = saliency.sum(axis=0 if horizontal else 1)
+    length = len(profile)
+    window = max(1, min(length, round((crop_width if horizontal else crop_height) * scale)))
+
+    positions = np.linspace(-1.0, 1.0, length)
+    profile = profile * (1.0 - SALIENCY_CENTER_BIAS * positions ** 2)
+    sums = np.convolve(profile, np.ones(window), mode="valid")
+    offset = int(round(int(sums.argmax()) / scale))
+    if horizontal:
+        return min(offset, width - crop_width), (height - crop_height) // 2
+    return (width - crop_width) // 2, min(offset, height - crop_height)
+
+
+def _render_line(text: str, font_size: int, stroke: bool, max_width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    1行のテキストを描画
+
+    Returns:
+        (色（高さ x 幅 x 3、RGB、float32）, 不透明度（高さ x 幅 x 1、0〜1、float32）)
+    """
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    font_path = find_font_path()
+    stroke_width = max(1, round(font_size * STROKE_RATIO)) if stroke else 0
+    font = load_font(font_path, font_size)
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    left, top, right, bottom = measure.textbbox((0, 0), text, font=font, stroke_width=stroke_width)
+    if right - left > max_width and font_path is not None:
+        font_size = max(1, int(font_size * max_width / (right - left)))
+        stroke_width = max(1, round(font_size * STROKE_RATIO)) if stroke else 0
+        font = load_font(font_path, font_size)
+        left, top, right, bottom = measure.textbbox((0, 0), text, font=font, stroke_width=stroke_width)
+
+    image = Image.new("RGBA", (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0))
+    ImageDraw.Draw(image).text(
+        (-left, -top), text, font=font, fill="white",
+        stroke_width=stroke_width, stroke_fill="black"
+    )
+    pixels = np.asarray(image, dtype=np.float32)
+    return pixels[..., :3], pixels[..., 3:] / 255.0
+
+
+def render_overlay(lines: List[Tuple[str, float, bool]], placement: str,
+                   size: Tuple[int, int], layout: Dict) -> List[Tuple[int, int, np.ndarray, np.ndarray]]:
+    """
+    テキストを出力の解像度と配置で描画
+
+    Args:
+        lines: (テキスト, 基準に対する文字の大きさ, 縁取りの有無) のリスト
+        placement: 'top'（セグメント）または 'center'（タイトル・エンディング）
+        size: 出力の解像度 (幅, 高さ)
+        layout: テキストの配置（OVERLAY_LAYOUTS の値）
+
+    Returns:
+        (x, y, 色, 不透明度) のリスト（行ごと）
+    """
+    width, height = size
+    base_size = min(width, height) * layout["font_ratio"]
+    max_width = int(width * layout["max_width"])
+    rendered = [
+        _render_line(text, max(1, round(base_size * scale)), stroke, max_width)
+        for text, scale, stroke in lines if text
+    ]
+
+    # 行の間隔は基準の文字の大きさの半分
+    gap = round(base_size * 0.5)
+    block_height = sum(color.shape[0] for color, _ in rendered) + gap * max(0, len(rendered) - 1)
+    if placement == "center":
+        y = round(height * layout["title_center"] - block_height / 2)
+    else:
+        y = round(height * layout["label_top"])
+
+    patches = []
+    for color, alpha in rendered:
+        patch_height, patch_width = color.shape[:2]
+        x = (width - patch_width) // 2
+        if 0 <= x and 0 <= y and x + patch_width <= width and y + patch_height <= height:
+            patches.append((x, y, color, alpha))
+        y += patch_height + gap
+    return patches
+
+
+class OutputEncoder:
+    """1つの出力の縮小・切り出し・テキストの合成・エンコードを専用のスレッドで行う"""
+
+    def __init__(self, name: str, output_file: str, source_size: Tuple[int, int], fps: int,
+                 parts: List[Dict], audio_file: Optional[str] = None,
+                 audio_bitrate: str = "192k"):
+        """
+        Args:
+            name: 出力の名前（OUTPUT_PROFILES のキー）
+            output_file: 出力ファイルのパス
+            source_size: 配られるフレームの解像度 (幅, 高さ)
+            fps: フレームレート
+            parts: 部分ごとの {start, end, offset, overlay, fade}（開始時刻の順）
+            audio_file: 多重化する音声ファイル（Noneの場合は音声なし）
+            audio_bitrate: 音声を再エンコードする場合のビットレート
+        """
+        self.name = name
+        self.profile = OUTPUT_PROFILES[name]
+        self.output_file = output_file
+        self.temp_file = os.path.splitext(output_file)[0] + ".tmp.mp4"
+        self.source_size = source_size
+        self.fps = fps
+        self.parts = parts
+        self.starts = [part["start"] for part in parts]
+        self.crop = crop_size(source_size, self.profile["size"])
+        self.audio_file = audio_file
+        self.audio_bitrate = audio_bitrate
+        self.frames: queue.Queue = queue.Queue(maxsize=QUEUE_FRAMES)
+        self.error: Optional[BaseException] = None
+        self.frame_count = 0
+        self.process: Optional[subprocess.Popen] = None
+        self.thread: Optional[threading.Thread] = None
+
+    def command(self) -> List[str]:
+        """生のフレームを標準入力から受け取ってエンコードするffmpegコマンド"""
+        width, height = self.profile["size"]
+        command = [
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}",
+            "-r", str(self.fps), "-i", "-",
+        ]
+        if self.audio_file:
+            command += ["-i", self.audio_file, "-map", "0:v", "-map", "1:a"]
+        command += [
+            "-c:v", self.profile["codec"], "-preset", self.profile["preset"],
+            "-b:v", self.profile["bitrate"], "-pix_fmt", "yuv420p",
+        ]
+        if self.audio_file:
+            # 音声は全ての出力で共通のため、エンコード済みのAACはそのまま使う
+            if self.audio_file.endswith((".m4a", ".aac")):
+                command += ["-c:a", "copy"]
+            else:
+                command += ["-c:a", "aac", "-b:a", self.audio_bitrate]
+            command += ["-shortest"]
+        command += ["-movflags", "+faststart", self.temp_file]
+        return command
+
+    def start(self):
+        """エンコーダーとフレームを処理するスレッドを起動"""
+        self.process = subprocess.Popen(
+            self.command(), stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+        self.thread = threading.Thread(target=self._run, name=f"encoder-{self.name}", daemon=True)
+        self.thread.start()
+
+    def submit(self, frame: np.ndarray, t: float):
+        """フレームを渡す（エンコーダーが遅れている場合は空きができるまで待つ）"""
+        if self.error is None:
+            self.frames.put((frame, t))
+
+    def _part_at(self, t: float) -> Dict:
+        """時刻 t を含む部分"""
+        return self.parts[max(0, bisect.bisect_right(self.starts, t) - 1)]
+
+    def transform(self, frame: np.ndarray, t: float) -> np.ndarray:
+        """
+        1フレームを出力の解像度に切り出して縮小し、テキストを合成
+
+        配られたフレームは全ての出力で共有しているため、書き換えずに新しい配列を作る。
+        """
+        import cv2
+        import numpy as np
+
+        part = self._part_at(t)
+        x, y = part["offset"]
+        crop_width, crop_height = self.crop
+        frame = frame[y:y + crop_height, x:x + crop_width]
+        if (crop_width, crop_height) != self.profile["size"]:
+            frame = cv2.resize(frame, self.profile["size"], interpolation=cv2.INTER_AREA)
+        else:
+            frame = np.array(frame)
+
+        # タイトル・エンディングのテキストはフェードイン・フェードアウトする
+        opacity = 1.0
+        if part["fade"]:
+            opacity = max(0.0, min(1.0, (t - part["start"]) / part["fade"], (part["end"] - t) / part["fade"]))
+        if opacity > 0:
+            for px, py, color, alpha in part["overlay"]:
+                region = frame[py:py + color.shape[0], px:px + color.shape[1]]
+                weight = alpha * opacity
+                region[:] = (color * weight + region * (1.0 - weight)).astype(np.uint8)
+        return frame
+
+    def _run(self):
+        """キューのフレームを変換してエンコーダーに書き込む"""
+        try:
+            while True:
+                item = self.frames.get()
+                if item is None:
+                    break
+                frame, t = item
+                self.process.stdin.write(self.transform(frame, t).tobytes())
+                self.frame_count += 1
+        except BaseException as e:
+            self.error = e
+            # 配る側が待ち続けないよう、残りのフレームを捨てる
+            while self.frames.get() is not None:
+                pass
+
+    def finish(self) -> str:
+        """
+        残りのフレームを書き込んでエンコードを完了する
+
+        Returns:
+            出力ファイルのパス
+        """
+        self.frames.put(None)
+        self.thread.join()
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        stderr = self.process.stderr.read().decode("utf-8", errors="replace")
+        self.process.wait()
+        if self.error is not None or self.process.returncode != 0:
+            if os.path.exists(self.temp_file):
+                os.remove(self.temp_file)
+            detail = stderr.strip() or str(self.error)
+            raise RuntimeError(f"{self.name} のエンコードに失敗しました: {detail}")
+        os.replace(self.temp_file, self.output_file)
+        return self.output_file
+
+    def abort(self):
+        """エンコードを中止して一時ファイルを削除"""
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+        if self.thread is not None:
+            if self.thread.is_alive():
+                self.frames.put(None)
+            self.thread.join()
+        if self.process is not None:
+            self.process.wait()
+        if os.path.exists(self.temp_file):
+            os.remove(self.temp_file)
+
+
+def plan_outputs(names: List[str], source_size: Tuple[int, int], parts: List[Dict],
+                 get_frame: Callable[[float], np.ndarray]) -> Dict[str, List[Dict]]:
+    """
+    出力ごとに各部分の切り出し位置とテキストを決める
+
+    Args:
+        names: 出力の名前のリスト
+        source_size: 合成済みのフレームの解像度 (幅, 高さ)
+        parts: 部分ごとの {start, end, kind, lines, fade}（開始時刻の順）
+        get_frame: 時刻を受け取って合成済みのフレームを返す関数（saliency の場合に使用）
+
+    Returns:
+        出力の名前 -> 部分ごとの {start, end, offset, overlay, fade}
+    """
+    samples: Dict[int, List[np.ndarray]] = {}
+    plans = {}
+    for name in names:
+        profile = OUTPUT_PROFILES[name]
+        crop = crop_size(source_size, profile["size"])
+        centered = ((source_size[0] - crop[0]) // 2, (source_size[1] - crop[1]) // 2)
+        layout = OVERLAY_LAYOUTS[profile["layout"]]
+        plan = []
+        for index, part in enumerate(parts):
+            offset = centered
+            # 文字だけの黒画面（タイトル・エンディング）は中央のまま
+            if profile["crop"] == "saliency" and crop != source_size and part["kind"] == "segment":
+                if index not in samples:
+                    # 区間を等分した中央の時刻（前後のフェードを避ける）
+                    length = part["end"] - part["start"]
+                    samples[index] = [
+                        get_frame(part["start"] + length * (i + 0.5) / SALIENCY_SAMPLES)
+                        for i in range(SALIENCY_SAMPLES)
+                    ]
+                offset = saliency_offset(samples[index], crop)
+            placement = "top" if part["kind"] == "segment" else "center"
+            plan.append({
+                "start": part["start"],
+                "end": part["end"],
+                "offset": offset,
+                "overlay": render_overlay(part["lines"], placement, profile["size"], layout),
+                "fade": part["fade"],
+            })
+        plans[name] = plan
+    return plans
+
+
+def fan_out(frames: Iterable[np.ndarray], encoders: List[OutputEncoder], fps: int,
+            progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    1回のデコードで得たフレームを全てのエンコーダーに配る
+
+    Args:
+        frames: 合成済みのフレーム（時刻の順）
+        encoders: 起動済みのエンコーダー
+        fps: フレームレート
+        progress: 配ったフレーム数を受け取る関数（進捗の表示用）
+
+    Returns:
+        配ったフレーム数
+    """
+    count = 0
+    for frame in frames:
+        t = count / fps
+        for encoder in encoders:
+            encoder.submit(frame, t)
+        count += 1
+        if progress is not None:
+            progress(count)
+        # どれかのエンコーダーが失敗した場合は残りのデコードをやめる
+        if any(encoder.error is not None for encoder in encoders):
+            break
+    return count
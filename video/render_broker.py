@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分散レンダリングのジョブブローカー
+==============================
+
+このスクリプトは1本の動画の生成を、タイトル・各セグメント・エンディングの
+部分ごとのジョブに分割し、複数のワーカー（同じストレージを共有する複数のマシン）で
+並列に作成してから最後に連結します。
+
+- ジョブはSQLiteのブローカーに保存（ワーカーは共有ストレージ上の同じファイルを使用）
+- 処理中のワーカーは定期的にハートビートを送り、途絶えたジョブは他のワーカーが再実行
+  （リース付きジョブキュー lease_queue.py を使用し、リースを失ったワーカーの結果は記録しない）
+- 失敗したジョブは上限回数まで、待機時間を延ばしながら再試行
+- 全ての部分が揃ったら、再エンコードせずに連結してBGMを追加（ffmpegのconcat）
+
+ジョブの状態:
+    pending     : 未処理（再試行待ちを含む）
+    in_progress : ワーカーが処理中（ハートビートが途絶えると pending と同様に再取得される）
+    done        : 完了
+    failed      : 再試行回数の上限に達した
+
+使用方法:
+    # 動画の構成を決めてジョブを登録
+    python render_broker.py submit --output sakura_video.mp4 --style ranking --length 180
+
+    # ワーカーを起動（マシンごと、または1台で複数起動）
+    python render_broker.py worker
+    python render_broker.py worker --exit-when-idle
+
+    # 進捗を確認
+    python render_broker.py status
+"""
+
+import os
+import sys
+import argparse
+import json
+import shutil
+import socket
+import subprocess
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sakura_video_generator import (
+    SakuraVideoGenerator, OUTPUT_DIR, VIDEO_STYLES, DEFAULT_DURATION, DEFAULT_FPS,
+    DEFAULT_CODEC, DEFAULT_BITRATE, DEFAULT_AUDIO_CODEC, DEFAULT_AUDIO_BITRATE
+)
+# sakura_video_generator がプロジェクトのルートを検索パスに追加している
+from lease_queue import LeaseQueue, STATUS_PENDING, STATUS_IN_PROGRESS, STATUS_DONE, STATUS_FAILED
+
+# ブローカーと部分ファイルの保存先（複数のマシンで使う場合は共有ストレージ上に置く）
+DEFAULT_BROKER_FILE = os.path.join(OUTPUT_DIR, "render_broker.db")
+PARTS_DIR = os.path.join(OUTPUT_DIR, "render_parts")
+
+# ジョブの種類（assemble は全ての部分が完了してから実行される）
+KIND_TITLE = "title"
+KIND_SEGMENT = "segment"
+KIND_ENDING = "ending"
+KIND_ASSEMBLE = "assemble"
+
+# デフォルト設定
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF_BASE = 10  # 秒
+DEFAULT_BACKOFF_MAX = 300  # 秒
+DEFAULT_LEASE_SECONDS = 120  # この秒数ハートビートがないジョブは失われたとみなす
+HEARTBEAT_INTERVAL = 30  # 秒
+POLL_INTERVAL = 5  # 実行可能なジョブがない場合の待機時間（秒）
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS renders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    output_file TEXT NOT NULL,
+    style TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    bgm_file TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    last_error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    render_id INTEGER NOT NULL REFERENCES renders (id),
+    seq INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    lease_until REAL NOT NULL DEFAULT 0,
+    worker TEXT,
+    output TEXT,
+    duration REAL,
+    last_error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    UNIQUE (render_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, render_id, seq);
+"""
+
+
+class RenderBroker(LeaseQueue):
+    """
+    SQLiteに保存される動画生成のジョブブローカー
+
+    ジョブの取得・リースの延長・失敗の記録は LeaseQueue と同じで、連結のジョブを
+    部分が揃うまで取得しないことと、失敗した動画の残りのジョブを取得しないことだけが異なる。
+    """
+    table = "jobs"
+    schema = SCHEMA
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_BROKER_FILE,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX
+    ):
+        """
+        初期化メソッド
+
+        Args:
+            db_path: SQLiteデータベースのパス
+            max_attempts: 1ジョブあたりの最大試行回数
+            lease_seconds: ハートビートが途絶えてからジョブを再取得可能にするまでの秒数
+            backoff_base: 再試行の基本待機時間（秒）
+            backoff_max: 再試行の最大待機時間（秒）
+        """
+        super().__init__(db_path, max_attempts, backoff_base, backoff_max, lease_seconds)
+        # 再試行の待機時間の列がない古いデータベースには追加する
+        with self._connect() as conn:
+            columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({self.table})")}
+            if "next_attempt_at" not in columns:
+                conn.execute(f"ALTER TABLE {self.table} ADD COLUMN next_attempt_at REAL NOT NULL DEFAULT 0")
+
+    def _decode(self, row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"]) if job["payload"] else None
+        return job
+
+    def submit(self, generator: SakuraVideoGenerator) -> int:
+        """
+        動画の構成を決めて、部分ごとのジョブを登録する
+
+        Args:
+            generator: 出力ファイル・スタイル・長さ・タイトル・BGMを設定した動画生成器
+
+        Returns:
+            登録した動画のID
+        """
+        plan = generator.plan_segments()
+        parts = (
+            [(KIND_TITLE, None)]
+            + [(KIND_SEGMENT, entry) for entry in plan]
+            + [(KIND_ENDING, None), (KIND_ASSEMBLE, None)]
+        )
+
+        now = self._now()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                """INSERT INTO renders (output_file, style, length, title, bgm_file, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (generator.output_file, generator.style, generator.length, generator.title,
+                 generator.bgm_file and os.path.abspath(generator.bgm_file), now, now)
+            )
+            render_id = cursor.lastrowid
+            for seq, (kind, entry) in enumerate(parts):
+                conn.execute(
+                    """INSERT INTO jobs (render_id, seq, kind, payload, created_at, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    (render_id, seq, kind, json.dumps(entry, ensure_ascii=False) if entry else None, now, now)
+                )
+            conn.execute("COMMIT")
+        return render_id
+
+    def _select_claimable(self, conn, now: float):
+        """
+        実行可能なジョブを1件選ぶ（claim() のトランザクション内で呼ばれる）
+
+        ハートビートが途絶えた処理中のジョブ（ワーカーが停止したもの）も対象になる。
+        連結のジョブは、同じ動画の全ての部分が完了するまで選ばれない。
+        """
+        # 試行回数の上限に達したまま失われたジョブは失敗にする
+        lost = conn.execute(
+            "SELECT id, render_id FROM jobs WHERE status = ? AND lease_until < ? AND attempts >= ?",
+            (STATUS_IN_PROGRESS, now, self.max_attempts)
+        ).fetchall()
+        for row in lost:
+            conn.execute(
+                "UPDATE jobs SET status = ?, lease_until = 0, last_error = ?, updated_at = ? WHERE id = ?",
+                (STATUS_FAILED, "ワーカーからの応答が途絶えました", self._now(), row["id"])
+            )
+            self._fail_render(conn, row["render_id"], "ワーカーからの応答が途絶えました")
+
+        row = conn.execute(
+            """SELECT j.* FROM jobs j JOIN renders r ON r.id = j.render_id
+               WHERE r.status != ?
+                 AND ((j.status = ? AND j.next_attempt_at <= ?) OR (j.status = ? AND j.lease_until < ?))
+                 AND (j.kind != ? OR NOT EXISTS (
+                     SELECT 1 FROM jobs p
+                     WHERE p.render_id = j.render_id AND p.kind != ? AND p.status != ?))
+               ORDER BY j.render_id, j.seq LIMIT 1""",
+            (STATUS_FAILED, STATUS_PENDING, now, STATUS_IN_PROGRESS, now,
+             KIND_ASSEMBLE, KIND_ASSEMBLE, STATUS_DONE)
+        ).fetchone()
+        if row is not None:
+            conn.execute(
+                "UPDATE renders SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (STATUS_IN_PROGRESS, self._now(), row["render_id"], STATUS_PENDING)
+            )
+        return row
+
+    def _fail_render(self, conn, render_id: int, error: str):
+        """動画を失敗にする"""
+        conn.execute(
+            "UPDATE renders SET status = ?, last_error = ?, updated_at = ? WHERE id = ?",
+            (STATUS_FAILED, error, self._now(), render_id)
+        )
+
+    def complete(self, job: Dict[str, Any], output: str, duration: Optional[float] = None) -> bool:
+        """
+        ジョブを完了にする
+
+        Args:
+            job: claim() で取得したジョブ
+            output: 作成したファイルのパス
+            duration: 作成したクリップの長さ（秒）
+
+        Returns:
+            記録できた場合はTrue（リースが切れて他のワーカーに渡っていた場合はFalse）
+        """
+        recorded = self._update_owned(
+            job, "status = ?, output = ?, duration = ?, lease_until = 0, last_error = NULL, updated_at = ?",
+            (STATUS_DONE, output, duration, self._now())
+        )
+        if recorded and job["kind"] == KIND_ASSEMBLE:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE renders SET status = ?, updated_at = ? WHERE id = ?",
+                    (STATUS_DONE, self._now(), job["render_id"])
+                )
+        return recorded
+
+    def fail(self, job: Dict[str, Any], error: str, retry: bool = True):
+        """
+        ジョブの失敗を記録する（上限に達するまでは再試行し、上限に達したら動画も失敗にする）
+
+        Args:
+            job: claim() で取得したジョブ
+            error: エラー内容
+            retry: 再試行するかどうか
+
+        Returns:
+            (記録できた場合はTrue, 次の試行までの待機時間（秒、再試行しない場合はNone）)
+        """
+        recorded, delay = super().fail(job, error, retry)
+        if recorded and delay is None:
+            with self._connect() as conn:
+                self._fail_render(conn, job["render_id"], str(error))
+        return recorded, delay
+
+    def render(self, render_id: int) -> Dict[str, Any]:
+        """動画の情報を取得する"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM renders WHERE id = ?", (render_id,)).fetchone()
+        return dict(row)
+
+    def renders(self) -> List[Dict[str, Any]]:
+        """全ての動画の情報と、状態ごとのジョブ数を取得する"""
+        with self._connect() as conn:
+            rows = [dict(row) for row in conn.execute("SELECT * FROM renders ORDER BY id")]
+            for render in rows:
+                render["jobs"] = {
+                    row["status"]: row["n"] for row in conn.execute(
+                        "SELECT status, COUNT(*) AS n FROM jobs WHERE render_id = ? GROUP BY status",
+                        (render["id"],)
+                    )
+                }
+        return rows
+
+    def parts(self, render_id: int) -> List[Dict[str, Any]]:
+        """連結する部分（タイトル、セグメント、エンディング）のジョブを順番に取得する"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE render_id = ? AND kind != ? ORDER BY seq",
+                (render_id, KIND_ASSEMBLE)
+            ).fetchall()
+        parts = [dict(row) for row in rows]
+        for part in parts:
+            part["payload"] = json.loads(part["payload"]) if part["payload"] else None
+        return parts
+
+    def has_unfinished(self) -> bool:
+        """未完了のジョブが残っているか"""
+        with self._connect() as conn:
+            row = conn.execute(
+                """SELECT COUNT(*) AS n FROM jobs j JOIN renders r ON r.id = j.render_id
+                   WHERE r.status != ? AND j.status IN (?, ?)""",
+                (STATUS_FAILED, STATUS_PENDING, STATUS_IN_PROGRESS)
+            ).fetchone()
+        return row["n"] > 0
+
+
+def build_assemble_command(list_file: str, output_file: str, bgm_file: Optional[str]) -> List[str]:
+    """
+    部分ファイルを再エンコードせずに連結し、BGMを追加するffmpegコマンド
+
+    部分ファイルは同じ設定でエンコードされ、それぞれキーフレームから始まるため
+    concatデマルチプレクサでそのまま連結できる。BGMは動画の長さまでループし、
+    動画生成スクリプトと同じく音量を50%にする。
+    """
+    command = ["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", list_file]
+    if bgm_file and os.path.exists(bgm_file):
+        command += [
+            "-stream_loop", "-1", "-i", bgm_file,
+            "-map", "0:v", "-map", "1:a",
+            "-af", "volume=0.5",
+            "-c:a", DEFAULT_AUDIO_CODEC, "-b:a", DEFAULT_AUDIO_BITRATE,
+            "-shortest"
+        ]
+    command += ["-c:v", "copy", "-movflags", "+faststart", output_file]
+    return command
+
+
+def close_clip(clip):
+    """
+    クリップを閉じる
+
+    合成したクリップ（CompositeVideoClip）の close() は合成元のクリップを閉じないため、
+    合成元のクリップもたどって閉じる。
+    """
+    for child in getattr(clip, "clips", []):
+        close_clip(child)
+    clip.close()
+
+
+class RenderWorker:
+    """ブローカーからジョブを取得して動画の部分を作成するワーカー"""
+
+    def __init__(self, broker: RenderBroker, worker_id: Optional[str] = None, parts_dir: str = PARTS_DIR):
+        """
+        初期化メソッド
+
+        Args:
+            broker: ジョブブローカー
+            worker_id: ワーカーの識別子（Noneの場合は ホスト名:プロセスID）
+            parts_dir: 部分ファイルの保存先（全てのワーカーから見える共有ストレージ）
+        """
+        self.broker = broker
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.parts_dir = parts_dir
+
+    def _generator(self, render: Dict[str, Any]) -> SakuraVideoGenerator:
+        """登録時と同じ設定の動画生成器（クリップの作成と連結に使用）"""
+        return SakuraVideoGenerator(
+            output_file=os.path.basename(render["output_file"]),
+            style=render["style"],
+            length=render["length"],
+            title=render["title"],
+            bgm_file=render["bgm_file"]
+        )
+
+    def _heartbeat(self, job: Dict[str, Any], stop: threading.Event):
+        """ジョブの処理中は定期的にリースを延長（リースを失ったら止める）"""
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            if not self.broker.heartbeat(job):
+                print(f"警告: ジョブ {job['id']} のリースが切れ、他のワーカーに再割り当てされました")
+                return
+
+    def render_part(self, job: Dict[str, Any], render: Dict[str, Any]):
+        """タイトル・セグメント・エンディングのいずれかを部分ファイルとして書き出す"""
+        part_dir = os.path.join(self.parts_dir, str(job["render_id"]))
+        os.makedirs(part_dir, exist_ok=True)
+        part_file = os.path.join(part_dir, f"{job['seq']:04d}.mp4")
+        # 書き込み途中のファイルが連結されないよう、一時ファイルに書き出してから置き換える
+        temp_file = os.path.join(part_dir, f"{job['seq']:04d}.{self.worker_id.replace(':', '_')}.tmp.mp4")
+
+        clip = self._generator(render).create_part(job["kind"], job["payload"])
+        try:
+            clip.write_videofile(
+                temp_file,
+                fps=DEFAULT_FPS,
+                codec=DEFAULT_CODEC,
+                bitrate=DEFAULT_BITRATE,
+                audio=False,
+                threads=4
+            )
+            duration = clip.duration
+        finally:
+            # 素材の動画ファイルのリーダー（ffmpegのプロセス）を閉じる
+            close_clip(clip)
+        os.replace(temp_file, part_file)
+        if not self.broker.complete(job, part_file, duration):
+            print(f"警告: ジョブ {job['id']} は他のワーカーに再割り当てされていました")
+
+    def assemble(self, job: Dict[str, Any], render: Dict[str, Any]):
+        """部分ファイルを連結してBGMを追加し、タイムラインを書き出す"""
+        parts = self.broker.parts(job["render_id"])
+        part_dir = os.path.join(self.parts_dir, str(job["render_id"]))
+        list_file = os.path.join(part_dir, "concat.txt")
+        with open(list_file, "w", encoding="utf-8") as f:
+            for part in parts:
+                path = part["output"].replace("'", "'\\''")
+                f.write(f"file '{path}'\n")
+
+        output_file = render["output_file"]
+        temp_file = os.path.splitext(output_file)[0] + ".tmp.mp4"
+        subprocess.run(
+            build_assemble_command(list_file, temp_file, render["bgm_file"]),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True
+        )
+        os.replace(temp_file, output_file)
+
+        # チャプターとクレジットの元になるタイムライン（登録時の構成を使用）
+        generator = self._generator(render)
+        generator.segment_plan = [part["payload"] for part in parts if part["kind"] == KIND_SEGMENT]
+        generator.write_timeline([part["duration"] for part in parts])
+
+        if self.broker.complete(job, output_file):
+            shutil.rmtree(part_dir, ignore_errors=True)
+        print(f"動画生成が完了しました: {output_file}")
+
+    def run_job(self, job: Dict[str, Any]):
+        """ジョブを1件実行（失敗した場合はブローカーに記録して再試行に回す）"""
+        render = self.broker.render(job["render_id"])
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, stop), daemon=True)
+        heartbeat.start()
+        try:
+            print(f"[{self.worker_id}] 動画 {job['render_id']} の {job['kind']} {job['seq']} を処理中...")
+            if job["kind"] == KIND_ASSEMBLE:
+                self.assemble(job, render)
+            else:
+                self.render_part(job, render)
+        except Exception as e:
+            print(f"エラー: ジョブ {job['id']} の処理中に問題が発生しました: {e}")
+            recorded, _ = self.broker.fail(job, e)
+            if not recorded:
+                print(f"警告: ジョブ {job['id']} は他のワーカーに再割り当てされていました")
+        finally:
+            stop.set()
+            heartbeat.join()
+
+    def run(self, exit_when_idle: bool = False):
+        """
+        ジョブを取得して実行し続ける
+
+        Args:
+            exit_when_idle: 未完了のジョブがなくなったら終了する
+        """
+        print(f"ワーカーを開始しました: {self.worker_id}")
+        while True:
+            job = self.broker.claim(self.worker_id)
+            if job is not None:
+                self.run_job(job)
+                continue
+            if exit_when_idle and not self.broker.has_unfinished():
+                print("未完了のジョブがないため終了します。")
+                return
+            time.sleep(POLL_INTERVAL)
+
+
+def parse_arguments():
+    """コマンドライン引数をパース"""
+    parser = argparse.ArgumentParser(description="分散レンダリングのジョブブローカー")
+    parser.add_argument(
+        "--broker",
+        default=DEFAULT_BROKER_FILE,
+        help=f"ブローカーのSQLiteファイル（デフォルト: {DEFAULT_BROKER_FILE}）"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    submit = subparsers.add_parser("submit", help="動画の構成を決めてジョブを登録")
+    submit.add_argument("--output", "-o", default="sakura_video.mp4", help="出力ファイル名")
+    submit.add_argument("--style", "-s", choices=list(VIDEO_STYLES.keys()), default="ranking", help="動画スタイル")
+    submit.add_argument("--length", "-l", type=int, default=DEFAULT_DURATION, help="動画の長さ（秒）")
+    submit.add_argument("--title", "-t", help="動画のタイトル（デフォルト: 自動生成）")
+    submit.add_argument("--bgm", "-b", help="BGMファイルのパス（デフォルト: ランダム選択）")
+
+    worker = subparsers.add_parser("worker", help="ジョブを取得して処理するワーカーを起動")
+    worker.add_argument("--worker-id", help="ワーカーの識別子（デフォルト: ホスト名:プロセスID）")
+    worker.add_argument("--parts-dir", default=PARTS_DIR, help="部分ファイルの保存先（共有ストレージ）")
+    worker.add_argument("--exit-when-idle", action="store_true", help="未完了のジョブがなくなったら終了する")
+
+    subparsers.add_parser("status", help="動画ごとの進捗を表示")
+
+    return parser.parse_args()
+
+
+def main():
+    """メイン関数"""
+    args = parse_arguments()
+    broker = RenderBroker(args.broker)
+
+    if args.command == "submit":
+        generator = SakuraVideoGenerator(
+            output_file=args.output,
+            style=args.style,
+            length=args.length,
+            title=args.title,
+            bgm_file=args.bgm
+        )
+        render_id = broker.submit(generator)
+        print(f"動画 {render_id} を登録しました: {generator.output_file}")
+
+    elif args.command == "worker":
+        RenderWorker(broker, args.worker_id, args.parts_dir).run(args.exit_when_idle)
+
+    elif args.command == "status":
+        renders = broker.renders()
+        for render in renders:
+            jobs = ", ".join(f"{status} {n}" for status, n in sorted(render["jobs"].items()))
+            print(f"{render['id']}: {render['status']} {os.path.basename(render['output_file'])} ({jobs})")
+            if render["last_error"]:
+                print(f"  エラー: {render['last_error']}")
+        if any(render["status"] == STATUS_FAILED for render in renders):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,37 +19,61 @@ MoviePy、OpenCV、Pillowなどのライブラリを使用して、映像編集
     --title: 動画のタイトル（デフォルト: 自動生成）
     --bgm: BGMファイルのパス（デフォルト: ランダム選択）
     --narration: ナレーションの有無（True/False）（デフォルト: False）
+    --outputs: 1回のデコードから生成する出力（例: 4k,1080p,shorts、デフォルト: 4Kのみ）
+
+出力ファイルと同じ場所に、各セグメントの開始時刻・テキスト・素材の出典を記録した
+タイムライン（<出力ファイル名>.timeline.json）を書き出します。
+youtube_uploader.py はこれを使ってチャプターとクレジットを含む概要欄を作成します。
+
+--outputs を指定すると、素材のデコードと合成を1回だけ行い、4K・1080p・ショート動画（9:16）などの
+複数の出力を同時にエンコードします（multi_output.py）。各出力のファイル名には接尾辞が付きます
+（例: sakura_video_1080p.mp4、sakura_video_shorts.mp4）。
+
+MoviePy と NumPy は動画を作成する処理で初めて読み込むため、--help や構成の作成
+（plan_segments）だけを行う場合は起動が速くなります。
 """
 
+from __future__ import annotations
+
 import os
 import sys
 import random
 import argparse
 import glob
+import json
+import tempfile
 import textwrap
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional, Union
+from typing import TYPE_CHECKING, List, Dict, Tuple, Optional, Union
+
+from thumbnail_generator import probe_video
+from multi_output import OUTPUT_PROFILES, OutputEncoder, fan_out, output_path, plan_outputs
 
-import cv2
-import numpy as np
-from PIL import Image, ImageDraw, ImageFont
-from moviepy.editor import (
-    VideoFileClip, AudioFileClip, ImageClip, TextClip, CompositeVideoClip,
-    concatenate_videoclips, vfx, afx, VideoClip
-)
-from pydub import AudioSegment
+if TYPE_CHECKING:
+    from moviepy.editor import VideoClip, VideoFileClip
 
 # プロジェクトのルートディレクトリ
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# 処理時間の計測（プロジェクトのルートの tracing.py）
+sys.path.append(PROJECT_ROOT)
+import tracing
+
 # リソースディレクトリ
 RESOURCES_DIR = os.path.join(PROJECT_ROOT, "resources")
 VIDEO_DIR = os.path.join(RESOURCES_DIR, "videos")
+VIDEO_METADATA_FILE = os.path.join(VIDEO_DIR, "metadata.json")
 MUSIC_DIR = os.path.join(RESOURCES_DIR, "music")
 SFX_DIR = os.path.join(RESOURCES_DIR, "sfx")
+MUSIC_LIBRARY_INDEX = os.path.join(MUSIC_DIR, ".library", "index.json")
+MUSIC_METADATA_FILE = os.path.join(MUSIC_DIR, "metadata.json")
+NORMALIZED_MUSIC_SUFFIX = ".norm.wav"
 FONT_DIR = os.path.join(RESOURCES_DIR, "fonts")
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "output")
 
+# タイムライン（チャプターとクレジットの元データ）の拡張子
+TIMELINE_SUFFIX = ".timeline.json"
+
 # デフォルト設定
 DEFAULT_RESOLUTION = (3840, 2160)  # 4K
 DEFAULT_FPS = 30
@@ -66,6 +90,15 @@ DEFAULT_FONT_COLOR = "white"
 DEFAULT_FONT_STROKE_COLOR = "black"
 DEFAULT_FONT_STROKE_WIDTH = 2
 
+# タイトル・エンディングのテキスト
+SUBTITLE_FORMAT = "Beautiful Cherry Blossoms in Japan {year}"
+ENDING_TEXT = "ご視聴ありがとうございました"
+SUBSCRIBE_TEXT = "チャンネル登録よろしくお願いします"
+
+# タイトル・エンディングの長さとフェードの長さ（秒）
+TITLE_DURATION = 5.0
+TITLE_FADE = 1.0
+
 # 動画スタイル
 VIDEO_STYLES = {
     "ranking": "日本の桜名所ランキング",
@@ -114,13 +147,18 @@ class SakuraVideoGenerator:
         self.bgm_file = bgm_file
         self.use_narration = use_narration
         
+        # 各セグメントの素材・切り出し位置・テキスト（タイムラインの書き出しに使用）
+        self.segment_plan: List[Dict] = []
+        
         # 出力ディレクトリが存在しない場合は作成
         os.makedirs(OUTPUT_DIR, exist_ok=True)
         
         # 動画素材のリストを取得
         self.video_files = self._get_video_files()
         
-        # BGMファイルのリストを取得
+        # BGMファイルのリストを取得（ファイルパスと内容ハッシュの対応も記録）
+        self.music_hashes: Dict[str, str] = {}
+        self.music_sources: Dict[str, str] = {}
         self.music_files = self._get_music_files()
         
         # 効果音ファイルのリストを取得
@@ -162,7 +200,65 @@ class SakuraVideoGenerator:
         if not music_files:
             print(f"警告: 音楽ファイルが見つかりません: {MUSIC_DIR}")
         
-        return music_files
+        return self._deduplicate_music_files(self._prefer_normalized_music(music_files))
+    
+    def _prefer_normalized_music(self, music_files: List[str]) -> List[str]:
+        """正規化済みの音源（audio_normalizer.py の出力）がある場合は元の音源の代わりに使う"""
+        # 正規化したファイルのパスと元の音源のパスの対応
+        self.music_sources: Dict[str, str] = {}
+        if not os.path.exists(MUSIC_METADATA_FILE):
+            return music_files
+        try:
+            with open(MUSIC_METADATA_FILE, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            print(f"警告: 音源メタデータを読み込めませんでした: {MUSIC_METADATA_FILE}")
+            return music_files
+        
+        replaced = set()
+        for music_file in music_files:
+            entry = metadata.get(os.path.basename(music_file))
+            if music_file.endswith(NORMALIZED_MUSIC_SUFFIX) and entry:
+                self.music_sources[music_file] = entry["source"]
+                replaced.add(os.path.abspath(entry["source"]))
+        
+        return [f for f in music_files if os.path.abspath(f) not in replaced]
+    
+    def _deduplicate_music_files(self, music_files: List[str]) -> List[str]:
+        """同じ内容の音源（音源ライブラリのハードリンク）を1つにまとめる"""
+        # 音源ライブラリに登録済みのファイルは、再計算せずにインデックスの内容ハッシュを使う
+        link_hashes = {}
+        if os.path.exists(MUSIC_LIBRARY_INDEX):
+            try:
+                with open(MUSIC_LIBRARY_INDEX, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+                for sha256, entry in index.get("blobs", {}).items():
+                    for name in entry.get("links", []):
+                        link_hashes[name] = sha256
+            except (json.JSONDecodeError, OSError):
+                print(f"警告: 音源ライブラリのインデックスを読み込めませんでした: {MUSIC_LIBRARY_INDEX}")
+        
+        # ファイルパスと内容ハッシュの対応（音声のキャッシュキーなどに使用）
+        self.music_hashes = {}
+        
+        unique_files = []
+        seen = set()
+        for music_file in sorted(music_files):
+            # 正規化済みの音源は元の音源の内容ハッシュで判定する
+            source = self.music_sources.get(music_file, music_file)
+            key = link_hashes.get(os.path.basename(source))
+            if key is not None:
+                self.music_hashes[music_file] = key
+            else:
+                # ライブラリ外のファイルはiノードで同一性を判定
+                stat = os.stat(music_file)
+                key = (stat.st_dev, stat.st_ino)
+            if key in seen:
+                continue
+            seen.add(key)
+            unique_files.append(music_file)
+        
+        return unique_files
     
     def _get_sfx_files(self) -> List[str]:
         """効果音素材のリストを取得"""
@@ -193,8 +289,11 @@ class SakuraVideoGenerator:
         else:
             return f"日本の美しい桜特集 {current_year}"
     
-    def _create_title_clip(self, duration: float = 5.0) -> VideoClip:
+    def _create_title_clip(self, duration: float = TITLE_DURATION) -> VideoClip:
         """タイトルクリップを作成"""
+        import numpy as np
+        from moviepy.editor import ImageClip, TextClip, CompositeVideoClip
+        
         # 背景画像（黒背景）
         background = ImageClip(
             np.zeros((DEFAULT_RESOLUTION[1], DEFAULT_RESOLUTION[0], 3), dtype=np.uint8)
@@ -212,7 +311,7 @@ class SakuraVideoGenerator:
         
         # サブタイトル（英語）
         sub_title = TextClip(
-            f"Beautiful Cherry Blossoms in Japan {datetime.now().year}",
+            SUBTITLE_FORMAT.format(year=datetime.now().year),
             fontsize=DEFAULT_FONT_SIZE,
             color=DEFAULT_FONT_COLOR,
             font=DEFAULT_FONT
@@ -226,12 +325,15 @@ class SakuraVideoGenerator:
         ], size=DEFAULT_RESOLUTION)
         
         # フェードイン・フェードアウト効果を追加
-        title_clip = title_clip.fadein(1.0).fadeout(1.0)
+        title_clip = title_clip.fadein(TITLE_FADE).fadeout(TITLE_FADE)
         
         return title_clip
     
-    def _create_ending_clip(self, duration: float = 5.0) -> VideoClip:
+    def _create_ending_clip(self, duration: float = TITLE_DURATION) -> VideoClip:
         """エンディングクリップを作成"""
+        import numpy as np
+        from moviepy.editor import ImageClip, TextClip, CompositeVideoClip
+        
         # 背景画像（黒背景）
         background = ImageClip(
             np.zeros((DEFAULT_RESOLUTION[1], DEFAULT_RESOLUTION[0], 3), dtype=np.uint8)
@@ -239,7 +341,7 @@ class SakuraVideoGenerator:
         
         # エンディングテキスト
         ending_text = TextClip(
-            "ご視聴ありがとうございました",
+            ENDING_TEXT,
             fontsize=DEFAULT_FONT_SIZE * 1.5,
             color=DEFAULT_FONT_COLOR,
             stroke_color=DEFAULT_FONT_STROKE_COLOR,
@@ -249,7 +351,7 @@ class SakuraVideoGenerator:
         
         # チャンネル登録テキスト
         subscribe_text = TextClip(
-            "チャンネル登録よろしくお願いします",
+            SUBSCRIBE_TEXT,
             fontsize=DEFAULT_FONT_SIZE,
             color=DEFAULT_FONT_COLOR,
             font=DEFAULT_FONT
@@ -263,12 +365,20 @@ class SakuraVideoGenerator:
         ], size=DEFAULT_RESOLUTION)
         
         # フェードイン・フェードアウト効果を追加
-        ending_clip = ending_clip.fadein(1.0).fadeout(1.0)
+        ending_clip = ending_clip.fadein(TITLE_FADE).fadeout(TITLE_FADE)
         
         return ending_clip
     
-    def _prepare_video_segments(self) -> List[VideoFileClip]:
-        """動画セグメントを準備"""
+    def plan_segments(self) -> List[Dict]:
+        """
+        動画セグメントの構成（素材・切り出し位置・長さ・テキスト）を決める
+        
+        クリップの作成とは分けておき、render_broker.py で複数のワーカーに
+        セグメントごとの作成を任せられるようにする。
+        
+        Returns:
+            セグメントごとの構成のリスト（self.segment_plan にも保存）
+        """
         if not self.video_files:
             raise ValueError("動画ファイルが見つかりません。素材を追加してください。")
         
@@ -294,105 +404,169 @@ class SakuraVideoGenerator:
         while len(selected_videos) < len(segment_durations):
             selected_videos.append(random.choice(self.video_files))
         
-        # 動画セグメントを作成
-        video_segments = []
+        self.segment_plan = []
         for video_file, duration in zip(selected_videos, segment_durations):
             try:
-                clip = VideoFileClip(video_file)
-                
-                # 動画の長さが指定した長さより短い場合はループ
-                if clip.duration < duration:
-                    clip = clip.loop(duration=duration)
-                else:
-                    # ランダムな開始位置から指定した長さだけ切り出し
-                    max_start = max(0, clip.duration - duration)
-                    start = random.uniform(0, max_start)
-                    clip = clip.subclip(start, start + duration)
-                
-                # 解像度を統一
-                if clip.size != DEFAULT_RESOLUTION:
-                    clip = clip.resize(height=DEFAULT_RESOLUTION[1])
-                    
-                    # リサイズ後の幅が目標解像度より大きい場合はクロップ
-                    if clip.size[0] > DEFAULT_RESOLUTION[0]:
-                        x_center = clip.size[0] // 2
-                        x1 = x_center - DEFAULT_RESOLUTION[0] // 2
-                        clip = clip.crop(x1=x1, y1=0, x2=x1 + DEFAULT_RESOLUTION[0], y2=DEFAULT_RESOLUTION[1])
-                    # リサイズ後の幅が目標解像度より小さい場合は黒帯を追加
-                    elif clip.size[0] < DEFAULT_RESOLUTION[0]:
-                        bg = ImageClip(
-                            np.zeros((DEFAULT_RESOLUTION[1], DEFAULT_RESOLUTION[0], 3), dtype=np.uint8)
-                        ).set_duration(clip.duration)
-                        x_offset = (DEFAULT_RESOLUTION[0] - clip.size[0]) // 2
-                        clip = CompositeVideoClip(
-                            [bg, clip.set_position((x_offset, 0))],
-                            size=DEFAULT_RESOLUTION
-                        )
-                
-                # トランジション効果を追加（フェードイン・フェードアウト）
-                clip = clip.fadein(0.5).fadeout(0.5)
-                
-                video_segments.append(clip)
+                # 長さだけが必要なので、フレームを読み込まずに ffprobe で調べる
+                source_duration = probe_video(video_file)[0]
             except Exception as e:
                 print(f"警告: 動画ファイルの処理中にエラーが発生しました: {video_file}")
                 print(f"エラー詳細: {str(e)}")
                 continue
+            
+            # 動画の長さが指定した長さより短い場合はループ、それ以外はランダムな開始位置から切り出し
+            loop = source_duration < duration
+            start = 0.0 if loop else random.uniform(0, max(0, source_duration - duration))
+            self.segment_plan.append({
+                'video_file': video_file,
+                'duration': duration,
+                'source_start': round(start, 3),
+                'loop': loop,
+            })
+        
+        self._assign_labels()
+        return self.segment_plan
+    
+    def _segment_label(self, i: int, count: int) -> Tuple[str, str]:
+        """スタイルに応じたテキスト内容を生成"""
+        if self.style == "ranking":
+            text = f"第{count - i}位"
+            subtext = f"Rank {count - i}"
+        elif self.style == "regional":
+            text = random.choice(REGIONS)
+            subtext = f"Region: {text}"
+        elif self.style == "theme":
+            text = random.choice(THEMES)
+            subtext = f"Theme: {text}"
+        elif self.style == "seasonal":
+            stages = ["つぼみ", "開花", "満開", "散り始め", "葉桜"]
+            text = stages[min(i, len(stages) - 1)]
+            subtext = f"Stage: {text}"
+        else:
+            text = f"桜の風景 {i + 1}"
+            subtext = f"Cherry Blossom Scene {i + 1}"
+        return text, subtext
+    
+    def _assign_labels(self):
+        """各セグメントのテキストを決める（順位はセグメント数に依存するため構成の確定後に行う）"""
+        for i, entry in enumerate(self.segment_plan):
+            entry['label'], entry['sublabel'] = self._segment_label(i, len(self.segment_plan))
+    
+    def _load_segment(self, entry: Dict) -> VideoClip:
+        """構成に従って1つのセグメントのクリップを作成（テキストなし）"""
+        import numpy as np
+        from moviepy.editor import VideoFileClip, ImageClip, CompositeVideoClip
+        
+        clip = VideoFileClip(entry['video_file'])
+        duration = entry['duration']
+        
+        if entry['loop']:
+            clip = clip.loop(duration=duration)
+        else:
+            start = entry['source_start']
+            clip = clip.subclip(start, start + duration)
+        
+        # 解像度を統一
+        if clip.size != DEFAULT_RESOLUTION:
+            clip = clip.resize(height=DEFAULT_RESOLUTION[1])
+            
+            # リサイズ後の幅が目標解像度より大きい場合はクロップ
+            if clip.size[0] > DEFAULT_RESOLUTION[0]:
+                x_center = clip.size[0] // 2
+                x1 = x_center - DEFAULT_RESOLUTION[0] // 2
+                clip = clip.crop(x1=x1, y1=0, x2=x1 + DEFAULT_RESOLUTION[0], y2=DEFAULT_RESOLUTION[1])
+            # リサイズ後の幅が目標解像度より小さい場合は黒帯を追加
+            elif clip.size[0] < DEFAULT_RESOLUTION[0]:
+                bg = ImageClip(
+                    np.zeros((DEFAULT_RESOLUTION[1], DEFAULT_RESOLUTION[0], 3), dtype=np.uint8)
+                ).set_duration(clip.duration)
+                x_offset = (DEFAULT_RESOLUTION[0] - clip.size[0]) // 2
+                clip = CompositeVideoClip(
+                    [bg, clip.set_position((x_offset, 0))],
+                    size=DEFAULT_RESOLUTION
+                )
+        
+        # トランジション効果を追加（フェードイン・フェードアウト）
+        return clip.fadein(0.5).fadeout(0.5)
+    
+    def _prepare_video_segments(self) -> List[VideoFileClip]:
+        """動画セグメントを準備"""
+        self.plan_segments()
+        
+        # 動画セグメントを作成
+        video_segments = []
+        loaded_plan = []
+        for entry in self.segment_plan:
+            try:
+                video_segments.append(self._load_segment(entry))
+                loaded_plan.append(entry)
+            except Exception as e:
+                print(f"警告: 動画ファイルの処理中にエラーが発生しました: {entry['video_file']}")
+                print(f"エラー詳細: {str(e)}")
+                continue
+        
+        if len(loaded_plan) != len(self.segment_plan):
+            self.segment_plan = loaded_plan
+            self._assign_labels()
         
         return video_segments
     
+    def _overlay_text(self, clip: VideoClip, entry: Dict) -> VideoClip:
+        """1つのセグメントにテキストオーバーレイを追加"""
+        from moviepy.editor import TextClip, CompositeVideoClip
+        
+        # メインテキスト
+        main_text = TextClip(
+            entry['label'],
+            fontsize=DEFAULT_FONT_SIZE * 1.5,
+            color=DEFAULT_FONT_COLOR,
+            stroke_color=DEFAULT_FONT_STROKE_COLOR,
+            stroke_width=DEFAULT_FONT_STROKE_WIDTH,
+            font=DEFAULT_FONT
+        ).set_position(('center', 50)).set_duration(clip.duration)
+        
+        # サブテキスト
+        sub_text = TextClip(
+            entry['sublabel'],
+            fontsize=DEFAULT_FONT_SIZE,
+            color=DEFAULT_FONT_COLOR,
+            font=DEFAULT_FONT
+        ).set_position(('center', 50 + DEFAULT_FONT_SIZE * 2)).set_duration(clip.duration)
+        
+        # テキストを追加
+        return CompositeVideoClip(
+            [clip, main_text, sub_text],
+            size=DEFAULT_RESOLUTION
+        )
+    
     def _add_text_overlays(self, video_segments: List[VideoFileClip]) -> List[VideoFileClip]:
         """テキストオーバーレイを追加"""
-        segments_with_text = []
-        
-        for i, clip in enumerate(video_segments):
-            # スタイルに応じたテキスト内容を生成
-            if self.style == "ranking":
-                text = f"第{len(video_segments) - i}位"
-                subtext = f"Rank {len(video_segments) - i}"
-            elif self.style == "regional":
-                text = random.choice(REGIONS)
-                subtext = f"Region: {text}"
-            elif self.style == "theme":
-                text = random.choice(THEMES)
-                subtext = f"Theme: {text}"
-            elif self.style == "seasonal":
-                stages = ["つぼみ", "開花", "満開", "散り始め", "葉桜"]
-                text = stages[min(i, len(stages) - 1)]
-                subtext = f"Stage: {text}"
-            else:
-                text = f"桜の風景 {i + 1}"
-                subtext = f"Cherry Blossom Scene {i + 1}"
-            
-            # メインテキスト
-            main_text = TextClip(
-                text,
-                fontsize=DEFAULT_FONT_SIZE * 1.5,
-                color=DEFAULT_FONT_COLOR,
-                stroke_color=DEFAULT_FONT_STROKE_COLOR,
-                stroke_width=DEFAULT_FONT_STROKE_WIDTH,
-                font=DEFAULT_FONT
-            ).set_position(('center', 50)).set_duration(clip.duration)
-            
-            # サブテキスト
-            sub_text = TextClip(
-                subtext,
-                fontsize=DEFAULT_FONT_SIZE,
-                color=DEFAULT_FONT_COLOR,
-                font=DEFAULT_FONT
-            ).set_position(('center', 50 + DEFAULT_FONT_SIZE * 2)).set_duration(clip.duration)
-            
-            # テキストを追加
-            clip_with_text = CompositeVideoClip(
-                [clip, main_text, sub_text],
-                size=DEFAULT_RESOLUTION
-            )
-            
-            segments_with_text.append(clip_with_text)
+        return [
+            self._overlay_text(clip, entry)
+            for clip, entry in zip(video_segments, self.segment_plan)
+        ]
+    
+    def create_part(self, kind: str, entry: Optional[Dict] = None) -> VideoClip:
+        """
+        動画の一部分（タイトル、セグメント、エンディング）のクリップを作成
+        
+        Args:
+            kind: 'title', 'segment', 'ending' のいずれか
+            entry: セグメントの構成（plan_segments() の要素、kind が 'segment' の場合）
         
-        return segments_with_text
+        Returns:
+            作成したクリップ
+        """
+        if kind == "title":
+            return self._create_title_clip()
+        if kind == "ending":
+            return self._create_ending_clip()
+        return self._overlay_text(self._load_segment(entry), entry)
     
     def _add_audio(self, video: VideoClip) -> VideoClip:
         """BGMと効果音を追加"""
+        from moviepy.editor import AudioFileClip, afx
+        
         if self.bgm_file and os.path.exists(self.bgm_file):
             try:
                 # BGMを読み込み
@@ -415,42 +589,143 @@ class SakuraVideoGenerator:
         
         return video
     
+    def _get_video_credit(self, video_file: str, asset_metadata: Dict) -> Dict:
+        """素材の出典情報を取得（sakura_video_ingest.py の素材メタデータから）"""
+        entry = asset_metadata.get(os.path.basename(video_file), {})
+        credit = {'file': os.path.basename(video_file)}
+        credit.update(entry.get('source_info', {}))
+        return credit
+    
+    def _get_music_credit(self) -> Optional[Dict]:
+        """BGMの出典情報を取得（音源ライブラリのインデックスから）"""
+        if not self.bgm_file:
+            return None
+        credit = {'file': os.path.basename(self.bgm_file)}
+        sha256 = self.music_hashes.get(self.bgm_file)
+        if sha256 and os.path.exists(MUSIC_LIBRARY_INDEX):
+            try:
+                with open(MUSIC_LIBRARY_INDEX, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+                sources = index.get("blobs", {}).get(sha256, {}).get("sources", [])
+                if sources:
+                    credit.update(sources[0])
+            except (json.JSONDecodeError, OSError):
+                print(f"警告: 音源ライブラリのインデックスを読み込めませんでした: {MUSIC_LIBRARY_INDEX}")
+        return credit
+    
+    def write_timeline(self, durations: List[float], output_file: Optional[str] = None) -> str:
+        """
+        各セグメントの開始時刻・テキスト・出典をタイムラインとして書き出す
+        
+        Args:
+            durations: タイトル、各セグメント、エンディングの順のクリップの長さ（秒）
+            output_file: タイムラインを対応させる動画ファイル（Noneの場合は self.output_file）
+        
+        Returns:
+            タイムラインファイルのパス
+        """
+        output_file = output_file or self.output_file
+        asset_metadata = {}
+        if os.path.exists(VIDEO_METADATA_FILE):
+            try:
+                with open(VIDEO_METADATA_FILE, "r", encoding="utf-8") as f:
+                    asset_metadata = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                print(f"警告: 素材メタデータを読み込めませんでした: {VIDEO_METADATA_FILE}")
+        
+        # クリップは重なりなく連結されるため、長さの累積が各セグメントの開始時刻になる
+        segments = []
+        position = 0.0
+        entries = (
+            [{'kind': 'title', 'label': self.title}]
+            + [dict(plan, kind='segment') for plan in self.segment_plan]
+            + [{'kind': 'ending', 'label': "エンディング"}]
+        )
+        for entry, duration in zip(entries, durations):
+            segment = {
+                'kind': entry['kind'],
+                'start': round(position, 3),
+                'end': round(position + duration, 3),
+                'label': entry.get('label'),
+                'sublabel': entry.get('sublabel'),
+            }
+            if 'video_file' in entry:
+                segment['source'] = self._get_video_credit(entry['video_file'], asset_metadata)
+                segment['source_start'] = entry['source_start']
+            segments.append(segment)
+            position += duration
+        
+        timeline = {
+            'title': self.title,
+            'style': self.style,
+            'video_file': os.path.basename(output_file),
+            'duration': round(position, 3),
+            'segments': segments,
+            'music': self._get_music_credit(),
+            'generated_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        
+        timeline_file = os.path.splitext(output_file)[0] + TIMELINE_SUFFIX
+        fd, temp_path = tempfile.mkstemp(suffix=".json", dir=os.path.dirname(timeline_file))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(timeline, f, ensure_ascii=False, indent=4)
+        os.replace(temp_path, timeline_file)
+        return timeline_file
+    
     def generate_video(self) -> str:
         """動画を生成"""
+        from moviepy.editor import concatenate_videoclips
+        
         try:
             print(f"動画生成を開始します: スタイル={self.style}, 長さ={self.length}秒")
             
             # タイトルクリップを作成
-            title_clip = self._create_title_clip()
+            with tracing.span("generate.title_clip", "video"):
+                title_clip = self._create_title_clip()
             
             # エンディングクリップを作成
-            ending_clip = self._create_ending_clip()
+            with tracing.span("generate.ending_clip", "video"):
+                ending_clip = self._create_ending_clip()
             
             # 動画セグメントを準備
-            video_segments = self._prepare_video_segments()
+            with tracing.span("generate.prepare_segments", "video") as span:
+                video_segments = self._prepare_video_segments()
+                span.set(segments=len(video_segments))
             
             # テキストオーバーレイを追加
-            video_segments = self._add_text_overlays(video_segments)
+            with tracing.span("generate.text_overlays", "video"):
+                video_segments = self._add_text_overlays(video_segments)
             
             # すべてのクリップを連結
-            final_video = concatenate_videoclips(
-                [title_clip] + video_segments + [ending_clip]
-            )
+            with tracing.span("generate.concatenate", "video"):
+                final_video = concatenate_videoclips(
+                    [title_clip] + video_segments + [ending_clip]
+                )
             
             # BGMを追加
-            final_video = self._add_audio(final_video)
+            with tracing.span("generate.add_audio", "video"):
+                final_video = self._add_audio(final_video)
             
-            # 動画を書き出し
+            # 動画を書き出し（デコード・合成・エンコードの大部分はここで行われる）
             print(f"動画を書き出しています: {self.output_file}")
-            final_video.write_videofile(
-                self.output_file,
-                fps=DEFAULT_FPS,
-                codec=DEFAULT_CODEC,
-                bitrate=DEFAULT_BITRATE,
-                audio_codec=DEFAULT_AUDIO_CODEC,
-                audio_bitrate=DEFAULT_AUDIO_BITRATE,
-                threads=4
+            with tracing.span("generate.write_video", "video", output=os.path.basename(self.output_file)):
+                final_video.write_videofile(
+                    self.output_file,
+                    fps=DEFAULT_FPS,
+                    codec=DEFAULT_CODEC,
+                    bitrate=DEFAULT_BITRATE,
+                    audio_codec=DEFAULT_AUDIO_CODEC,
+                    audio_bitrate=DEFAULT_AUDIO_BITRATE,
+                    threads=4
+                )
+            tracing.count("frames.rendered", int(final_video.duration * DEFAULT_FPS))
+            tracing.count("bytes.written", os.path.getsize(self.output_file))
+            
+            # チャプターとクレジットの元になるタイムラインを書き出し
+            timeline_file = self.write_timeline(
+                [clip.duration for clip in [title_clip] + video_segments + [ending_clip]]
             )
+            print(f"タイムラインを書き出しました: {timeline_file}")
             
             print(f"動画生成が完了しました: {self.output_file}")
             return self.output_file
@@ -460,6 +735,126 @@ class SakuraVideoGenerator:
             print(f"エラー詳細: {str(e)}")
             raise
     
+    def _overlay_parts(self, durations: List[float]) -> List[Dict]:
+        """
+        タイトル・各セグメント・エンディングの区間と、出力ごとに描画するテキスト
+        
+        Args:
+            durations: タイトル、各セグメント、エンディングの順のクリップの長さ（秒）
+        
+        Returns:
+            部分ごとの {kind, start, end, lines, fade}（lines は (テキスト, 文字の大きさの倍率, 縁取りの有無) のリスト）
+        """
+        entries = (
+            [('title', [(self.title, 2.0, True), (SUBTITLE_FORMAT.format(year=datetime.now().year), 1.0, False)])]
+            + [('segment', [(plan['label'], 1.5, True), (plan['sublabel'], 1.0, False)]) for plan in self.segment_plan]
+            + [('ending', [(ENDING_TEXT, 1.5, True), (SUBSCRIBE_TEXT, 1.0, False)])]
+        )
+        parts = []
+        position = 0.0
+        for (kind, lines), duration in zip(entries, durations):
+            parts.append({
+                'kind': kind,
+                'start': position,
+                'end': position + duration,
+                'lines': lines,
+                # セグメントのテキストはフェードせず、タイトル・エンディングは文字ごとフェードする
+                'fade': 0.0 if kind == 'segment' else TITLE_FADE,
+            })
+            position += duration
+        return parts
+    
+    def generate_outputs(self, outputs: List[str]) -> Dict[str, str]:
+        """
+        素材のデコードと合成を1回だけ行い、複数の出力を同時に生成
+        
+        テキストを除いた動画を合成してフレームごとに各出力のエンコーダーに配り、
+        切り出し・縮小・テキストの合成は出力ごとに行う。音声は1回だけエンコードして全ての出力で共有する。
+        
+        Args:
+            outputs: 出力の名前のリスト（multi_output.OUTPUT_PROFILES のキー）
+        
+        Returns:
+            出力の名前 -> 出力ファイルのパス
+        """
+        from moviepy.editor import ColorClip, concatenate_videoclips
+        
+        print(f"動画生成を開始します: スタイル={self.style}, 長さ={self.length}秒, 出力={','.join(outputs)}")
+        
+        # タイトル・エンディングは黒画面だけを作り、テキストは出力ごとに描画する
+        title_clip = ColorClip(DEFAULT_RESOLUTION, color=(0, 0, 0)).set_duration(TITLE_DURATION)
+        ending_clip = ColorClip(DEFAULT_RESOLUTION, color=(0, 0, 0)).set_duration(TITLE_DURATION)
+        
+        with tracing.span("generate.prepare_segments", "video") as span:
+            video_segments = self._prepare_video_segments()
+            span.set(segments=len(video_segments))
+        
+        with tracing.span("generate.concatenate", "video"):
+            final_video = concatenate_videoclips([title_clip] + video_segments + [ending_clip])
+        
+        with tracing.span("generate.add_audio", "video"):
+            final_video = self._add_audio(final_video)
+        
+        durations = [clip.duration for clip in [title_clip] + video_segments + [ending_clip]]
+        output_files = {name: output_path(self.output_file, name) for name in outputs}
+        audio_file = None
+        encoders = []
+        try:
+            # 音声は全ての出力で共通のため、先に1回だけエンコードしておく
+            if final_video.audio is not None:
+                audio_file = os.path.splitext(self.output_file)[0] + ".audio.m4a"
+                with tracing.span("generate.write_audio", "video"):
+                    final_video.audio.write_audiofile(
+                        audio_file, fps=44100, codec=DEFAULT_AUDIO_CODEC,
+                        bitrate=DEFAULT_AUDIO_BITRATE, logger=None
+                    )
+            
+            # 出力ごとの切り出し位置（縦動画は被写体の位置）とテキストを決める
+            with tracing.span("generate.plan_outputs", "video"):
+                plans = plan_outputs(outputs, DEFAULT_RESOLUTION, self._overlay_parts(durations), final_video.get_frame)
+            
+            for name in outputs:
+                encoders.append(OutputEncoder(
+                    name, output_files[name], DEFAULT_RESOLUTION, DEFAULT_FPS, plans[name],
+                    audio_file=audio_file, audio_bitrate=DEFAULT_AUDIO_BITRATE
+                ))
+            for encoder in encoders:
+                encoder.start()
+            
+            # デコードと合成は1回だけ行い、同じフレームを全てのエンコーダーに配る
+            total = int(final_video.duration * DEFAULT_FPS)
+            step = max(1, total // 10)
+            
+            def report(count: int):
+                if count % step == 0:
+                    print(f"  {count}/{total} フレーム ({count * 100 // max(total, 1)}%)")
+            
+            print(f"動画を書き出しています: {', '.join(output_files.values())}")
+            with tracing.span("generate.write_outputs", "video", outputs=",".join(outputs)):
+                frames = fan_out(final_video.iter_frames(fps=DEFAULT_FPS, dtype="uint8"), encoders, DEFAULT_FPS, report)
+                for encoder in encoders:
+                    encoder.finish()
+            tracing.count("frames.rendered", frames)
+            for encoder in encoders:
+                tracing.count("frames.encoded", encoder.frame_count)
+                tracing.count("bytes.written", os.path.getsize(encoder.output_file))
+        except Exception as e:
+            for encoder in encoders:
+                encoder.abort()
+            print(f"エラー: 動画生成中に問題が発生しました")
+            print(f"エラー詳細: {str(e)}")
+            raise
+        finally:
+            if audio_file and os.path.exists(audio_file):
+                os.remove(audio_file)
+        
+        # 出力ごとにタイムラインを書き出す（アップロード時に同名のタイムラインが使われる）
+        for output_file in output_files.values():
+            self.write_timeline(durations, output_file=output_file)
+        
+        print(f"動画生成が完了しました: {', '.join(output_files.values())}")
+        return output_files
+    
 def parse_arguments():
     """コマンドライン引数をパース"""
     parser = argparse.ArgumentParser(description="桜を題材にしたYouTube動画自動生成スクリプト")
@@ -467,4 +862,75 @@ def parse_arguments():
     parser.add_argument(
         "--output", "-o",
         default="sakura_video.mp4",
-        help="出力<response clipped><NOTE>To save on context only part of this file has been shown to you. You should retry this tool after you have searched inside the file with `grep -n` in order to find the line numbers of what you are looking for.</NOTE>
\ No newline at end of file
+        help="出力ファイル名（デフォルト: sakura_video.mp4）"
+    )
+    
+    parser.add_argument(
+        "--style", "-s",
+        choices=list(VIDEO_STYLES.keys()),
+        default="ranking",
+        help="動画スタイル（デフォルト: ranking）"
+    )
+    
+    parser.add_argument(
+        "--length", "-l",
+        type=int,
+        default=DEFAULT_DURATION,
+        help=f"動画の長さ（秒）（デフォルト: {DEFAULT_DURATION}）"
+    )
+    
+    parser.add_argument(
+        "--title", "-t",
+        help="動画のタイトル（デフォルト: 自動生成）"
+    )
+    
+    parser.add_argument(
+        "--bgm", "-b",
+        help="BGMファイルのパス（デフォルト: ランダム選択）"
+    )
+    
+    parser.add_argument(
+        "--narration", "-n",
+        action="store_true",
+        help="ナレーションを追加する（デフォルト: False）"
+    )
+    
+    parser.add_argument(
+        "--outputs",
+        help=f"1回のデコードから同時に生成する出力（カンマ区切り、{', '.join(OUTPUT_PROFILES)} から選択）"
+             "（デフォルト: 4Kのみ）"
+    )
+    
+    args = parser.parse_args()
+    if args.outputs:
+        unknown = [name for name in args.outputs.split(",") if name not in OUTPUT_PROFILES]
+        if unknown:
+            parser.error(f"不明な出力です: {', '.join(unknown)}")
+    return args
+
+def main():
+    """メイン関数"""
+    args = parse_arguments()
+    
+    # 動画生成器を初期化
+    generator = SakuraVideoGenerator(
+        output_file=args.output,
+        style=args.style,
+        length=args.length,
+        title=args.title,
+        bgm_file=args.bgm,
+        use_narration=args.narration
+    )
+    
+    # 動画を生成
+    if args.outputs:
+        output_files = generator.generate_outputs(list(dict.fromkeys(args.outputs.split(","))))
+        for name, output_file in output_files.items():
+            print(f"出力ファイル ({name}): {output_file}")
+    else:
+        output_file = generator.generate_video()
+        print(f"出力ファイル: {output_file}")
+    print("完了しました。")
+
+if __name__ == "__main__":
+    main()
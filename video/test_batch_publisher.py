@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+batch_publisher.py のテスト
+
+公開日時の割り当てと、ローカルのスタンドインサーバー（YouTube Data APIの再開可能な
+アップロードと同じ手順でチャンクを受け取る、conftest.py の youtube）に対する publish() を
+検証します。認証情報は使わず、匿名の認証情報で構築したAPIサービスを渡します。
+
+使用方法:
+    python -m pytest video/test_batch_publisher.py（プロジェクトのルートで実行）
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+from batch_publisher import assign_publish_times, publish
+from upload_queue import UploadQueue, STATUS_DONE, STATUS_PENDING
+from youtube_quota import QuotaTracker, QUOTA_COSTS
+
+
+@pytest.fixture
+def items(tmp_path):
+    items = []
+    for name in ("a", "b"):
+        path = tmp_path / f"{name}.mp4"
+        path.write_bytes(b"\0" * 4096)
+        items.append({"video": str(path), "title": f"桜 {name}", "tags": ["桜"]})
+    return items
+
+
+def test_assign_publish_times_keeps_explicit_times():
+    start = datetime(2025, 4, 1, 7, 0, tzinfo=timezone(timedelta(hours=9)))
+    items = [{"video": "a.mp4"}, {"video": "b.mp4", "publish_at": "2025-05-01T07:00:00+09:00"}, {"video": "c.mp4"}]
+    assign_publish_times(items, start, timedelta(hours=24))
+
+    assert [item["publish_at"] for item in items] == [
+        "2025-04-01T07:00:00+09:00",
+        "2025-05-01T07:00:00+09:00",
+        "2025-04-02T07:00:00+09:00",
+    ]
+
+
+def test_publish_uploads_within_quota(youtube, items, tmp_path):
+    assign_publish_times(items, datetime(2025, 4, 1, 7, 0, tzinfo=timezone.utc), timedelta(hours=24))
+    queue = UploadQueue(str(tmp_path / "uploads.db"))
+    # 1本分のクォータしかない
+    quota = QuotaTracker(daily_quota=QUOTA_COSTS["videos.insert"], state_file=str(tmp_path / "quota.json"))
+    counts = publish(items, queue, quota, workers=1, credentials=youtube.credentials, youtube=youtube.service)
+
+    assert (counts[STATUS_DONE], counts[STATUS_PENDING]) == (1, 1)
+    assert quota.remaining == 0
+    [inserted] = youtube.server.inserted
+    assert inserted["snippet"]["title"] == "桜 a"
+    # 公開日時を指定した動画は非公開でアップロードして予約公開する
+    assert inserted["status"] == {
+        "privacyStatus": "private", "publishAt": "2025-04-01T07:00:00+00:00", "selfDeclaredMadeForKids": False
+    }
+    [job] = queue.jobs(STATUS_DONE)
+    assert job["video_id"] == "video0"
+    # クォータが足りない動画はリセット後まで保留される
+    assert queue.next_attempt_in() > 0
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+render_broker.py のテスト
+
+一時ディレクトリのSQLiteと差し替えた時計で、部分ジョブの取得順・連結ジョブの待機・
+ハートビートが途絶えたジョブの再取得・リースを失ったワーカーの更新の拒否・
+再試行の待機と試行回数の上限を検証します。
+
+使用方法:
+    python -m pytest video/test_render_broker.py（プロジェクトのルートで実行）
+"""
+
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+import render_broker
+from render_broker import (
+    RenderBroker, KIND_ASSEMBLE, KIND_ENDING, KIND_SEGMENT, KIND_TITLE, STATUS_DONE, STATUS_FAILED,
+    DEFAULT_BACKOFF_BASE
+)
+
+
+@pytest.fixture
+def broker(tmp_path, clock) -> RenderBroker:
+    return RenderBroker(str(tmp_path / "render_broker.db"), max_attempts=2, lease_seconds=120)
+
+
+def submit(broker: RenderBroker, segments: int = 2) -> int:
+    """セグメント数を指定して動画を登録する（動画生成器の代わりに構成だけを渡す）"""
+    generator = SimpleNamespace(
+        output_file="sakura.mp4", style="ranking", length=60, title="桜", bgm_file=None,
+        plan_segments=lambda: [{"video": f"{i}.mp4", "duration": 10} for i in range(segments)]
+    )
+    return broker.submit(generator)
+
+
+def run_parts(broker: RenderBroker, count: int, worker: str = "w1"):
+    """連結以外の部分ジョブを順番に完了にする"""
+    for _ in range(count):
+        job = broker.claim(worker)
+        assert job["kind"] != KIND_ASSEMBLE
+        broker.complete(job, f"{job['seq']}.mp4")
+
+
+def test_claim_returns_parts_in_order(broker):
+    submit(broker)
+    kinds = [broker.claim("w1")["kind"] for _ in range(4)]
+    assert kinds == [KIND_TITLE, KIND_SEGMENT, KIND_SEGMENT, KIND_ENDING]
+    # 全ての部分が完了するまで連結は取得されない
+    assert broker.claim("w1") is None
+
+
+def test_assemble_waits_for_all_parts(broker):
+    render_id = submit(broker)
+    run_parts(broker, 3)
+    ending = broker.claim("w1")
+    assert ending["kind"] == KIND_ENDING
+    assert broker.claim("w1") is None
+    broker.complete(ending, "3.mp4")
+
+    job = broker.claim("w1")
+    assert job["kind"] == KIND_ASSEMBLE
+    assert broker.complete(job, "sakura.mp4")
+    assert broker.render(render_id)["status"] == STATUS_DONE
+    assert [part["output"] for part in broker.parts(render_id)] == ["0.mp4", "1.mp4", "2.mp4", "3.mp4"]
+
+
+def test_lost_job_is_reclaimed_by_another_worker(broker, clock):
+    submit(broker, segments=0)
+    lost = broker.claim("w1")
+    alive = broker.claim("w2")
+
+    clock.now += 100
+    assert broker.heartbeat(alive)
+    clock.now += 21
+
+    reclaimed = broker.claim("w3")
+    assert (reclaimed["id"], reclaimed["attempts"]) == (lost["id"], 2)
+    assert broker.claim("w3") is None
+    # 再取得されたジョブの結果は、元のワーカーからは記録できない
+    assert not broker.heartbeat(lost)
+    assert not broker.complete(lost, "0.mp4")
+    recorded, _ = broker.fail(lost, "timeout")
+    assert not recorded
+    assert broker.complete(reclaimed, "0.mp4")
+
+
+def test_fail_retries_until_max_attempts(broker, clock):
+    render_id = submit(broker, segments=0)
+    job = broker.claim("w1")
+    assert broker.fail(job, "ffmpeg error") == (True, DEFAULT_BACKOFF_BASE)
+
+    # 失敗したタイトルは待機時間が過ぎるまで取得されない
+    assert broker.claim("w1")["kind"] == KIND_ENDING
+    clock.now += DEFAULT_BACKOFF_BASE
+    job = broker.claim("w1")
+    assert (job["seq"], job["attempts"], job["last_error"]) == (0, 2, "ffmpeg error")
+    assert broker.fail(job, "ffmpeg error") == (True, None)
+
+    render = broker.render(render_id)
+    assert (render["status"], render["last_error"]) == (STATUS_FAILED, "ffmpeg error")
+    # 失敗した動画の残りのジョブは取得されない
+    assert broker.claim("w1") is None
+    assert not broker.has_unfinished()
+
+
+def test_lost_job_at_max_attempts_fails_render(broker, clock):
+    render_id = submit(broker, segments=0)
+    job = broker.claim("w1")
+    broker.fail(job, "ffmpeg error")
+    clock.now += DEFAULT_BACKOFF_BASE
+    broker.claim("w1")
+
+    clock.now += 121
+    assert broker.claim("w2") is None
+    assert broker.render(render_id)["status"] == STATUS_FAILED
+
+
+def test_old_database_gets_retry_column(tmp_path, clock):
+    path = str(tmp_path / "render_broker.db")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(render_broker.SCHEMA.replace("    next_attempt_at REAL NOT NULL DEFAULT 0,\n", ""))
+    broker = RenderBroker(path)
+    submit(broker, segments=0)
+    assert broker.claim("w1")["kind"] == KIND_TITLE
+
+
+class FakeClip:
+    def __init__(self, clips=()):
+        self.clips = list(clips)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_close_clip_closes_composited_sources():
+    source = FakeClip()
+    text = FakeClip()
+    clip = FakeClip([FakeClip([source]), text])
+    render_broker.close_clip(clip)
+    assert clip.closed and source.closed and text.closed
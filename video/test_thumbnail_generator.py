@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+thumbnail_generator.py のテスト
+
+ffmpegで合成した、40フレームごと（4/3秒ごと、時刻が3桁に丸められない）にキーフレームがあり、
+フレームごとに明るさが変わる動画で、キーフレームの取り出し（時刻とフレームの対応）を検証します。
+ffmpegがない環境ではスキップします。
+
+使用方法:
+    python -m pytest video/test_thumbnail_generator.py（プロジェクトのルートで実行）
+"""
+
+import shutil
+import subprocess
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from thumbnail_generator import extract_frame, extract_keyframes
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpegが必要です")
+
+FPS = 30
+GOP = 40
+DURATION = 6
+KEYFRAMES = list(range(0, FPS * DURATION, GOP))
+SIZE = (64, 36)
+
+
+@pytest.fixture(scope="module")
+def clip(tmp_path_factory) -> str:
+    """40フレームごとにキーフレームがあり、フレーム番号に応じて明るくなる動画"""
+    path = str(tmp_path_factory.mktemp("clip") / "clip.mp4")
+    subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+         "-f", "lavfi", "-i", f"color=black:s=320x180:r={FPS}:d={DURATION}",
+         "-vf", "geq=lum='16+N*1.2':cb=128:cr=128",
+         "-c:v", "mpeg4", "-q:v", "2", "-g", str(GOP), "-pix_fmt", "yuv420p", path],
+        check=True
+    )
+    return path
+
+
+def decode_frame(clip: str, number: int) -> np.ndarray:
+    """全フレームをデコードして、指定した番号のフレームを取り出す（比較用）"""
+    width, height = SIZE
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", clip,
+         "-vf", f"select=eq(n\\,{number}),scale={width}:{height}", "-frames:v", "1",
+         "-f", "rawvideo", "-pix_fmt", "bgr24", "-"],
+        stdout=subprocess.PIPE, check=True
+    )
+    return np.frombuffer(result.stdout, dtype=np.uint8).reshape(height, width, 3)
+
+
+@pytest.mark.parametrize("number", KEYFRAMES)
+def test_extract_frame_returns_keyframe(clip, number):
+    # extract_keyframes と同じく、丸めていない時刻（2.666667秒など）を渡す
+    frame = extract_frame(clip, round(number / FPS, 6), SIZE)
+    expected = decode_frame(clip, number)
+    # 隣のフレームとは明るさが1.2ずつ違う
+    assert np.abs(frame.astype(int) - expected).mean() < 0.7
+
+
+def test_extract_frame_falls_back_between_keyframes(clip):
+    # 最後のキーフレームより後の時刻は、キーフレーム以外のフレームをデコードする
+    frame = extract_frame(clip, 174 / FPS, SIZE)
+    expected = decode_frame(clip, 174)
+    assert np.abs(frame.astype(int) - expected).mean() < 0.7
+
+
+def test_extract_frame_past_end_raises(clip):
+    with pytest.raises(ValueError):
+        extract_frame(clip, DURATION + 5.0, SIZE)
+
+
+@pytest.mark.skipif(shutil.which("ffprobe") is None, reason="ffprobeが必要です")
+def test_extract_keyframes_reports_keyframe_times(clip):
+    frames, timestamps = extract_keyframes(clip, SIZE, skip_seconds=0)
+    assert timestamps == pytest.approx([number / FPS for number in KEYFRAMES], abs=0.001)
+    assert frames.shape == (len(KEYFRAMES),) + SIZE[::-1] + (3,)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+upload_queue.py のテスト
+
+一時ディレクトリのSQLiteと差し替えた時計で、アップロードジョブの取得・再登録・
+失敗後の再開（セッションURIと送信済みバイト数の保持）を検証します。
+
+使用方法:
+    python -m pytest video/test_upload_queue.py（プロジェクトのルートで実行）
+"""
+
+import os
+
+import pytest
+
+from upload_queue import UploadQueue, STATUS_DONE, STATUS_FAILED, STATUS_PENDING
+
+
+@pytest.fixture
+def video_file(tmp_path) -> str:
+    path = tmp_path / "sakura.mp4"
+    path.write_bytes(b"\0" * 1024)
+    return str(path)
+
+
+@pytest.fixture
+def queue(tmp_path, clock) -> UploadQueue:
+    return UploadQueue(str(tmp_path / "uploads.db"), max_attempts=2, backoff_base=30,
+                       backoff_max=3600, lease_seconds=900)
+
+
+def test_claim_decodes_metadata(queue, video_file):
+    assert queue.enqueue(video_file, {"title": "桜", "tags": ["桜"]})
+    assert not queue.enqueue(video_file, {"title": "桜"})
+
+    job = queue.claim()
+    assert job["metadata"] == {"title": "桜", "tags": ["桜"]}
+    assert job["attempts"] == 1
+    assert queue.claim() is None
+
+
+def test_failed_upload_resumes_from_confirmed_bytes(queue, video_file, clock):
+    queue.enqueue(video_file)
+    job = queue.claim()
+    queue.save_progress(job, "https://upload.example/session", 512)
+
+    assert queue.fail(job, "503") == (True, 30)
+    assert queue.next_attempt_in() == 30
+    assert queue.claim() is None
+
+    clock.now += 30
+    job = queue.claim()
+    assert (job["session_uri"], job["confirmed_bytes"]) == ("https://upload.example/session", 512)
+
+    assert queue.fail(job, "503") == (True, None)
+    assert queue.counts()[STATUS_FAILED] == 1
+
+
+def test_save_progress_extends_lease(queue, video_file, clock):
+    queue.enqueue(video_file)
+    job = queue.claim()
+
+    clock.now += 800
+    assert queue.save_progress(job, "https://upload.example/session", 512)
+    clock.now += 800
+    assert queue.claim() is None
+    assert queue.next_attempt_in() == 100
+
+
+def test_lost_lease_keeps_new_owner_session(queue, video_file, clock):
+    queue.enqueue(video_file)
+    lost = queue.claim()
+    clock.now += 901
+    job = queue.claim()
+    assert queue.save_progress(job, "https://upload.example/new", 256)
+
+    # リースを失ったワーカーは、新しいワーカーのセッションを上書き・破棄できない
+    assert not queue.save_progress(lost, "https://upload.example/old", 512)
+    assert not queue.reset_session(lost)
+    assert not queue.complete(lost, {"id": "abc"})
+    assert queue.fail(lost, "503") == (False, 30)
+
+    [row] = queue.jobs()
+    assert (row["session_uri"], row["confirmed_bytes"]) == ("https://upload.example/new", 256)
+    assert queue.reset_session(job)
+
+
+def test_release_until_quota_reset(queue, video_file, clock):
+    queue.enqueue(video_file)
+    job = queue.claim()
+    queue.release(job, next_attempt_at=clock.now + 3600)
+    assert queue.next_attempt_in() == 3600
+
+    clock.now += 3600
+    assert queue.claim()["attempts"] == 1
+
+
+def test_regenerated_file_restarts_upload(queue, video_file):
+    queue.enqueue(video_file)
+    job = queue.claim()
+    queue.save_progress(job, "https://upload.example/session", 512)
+    assert queue.complete(job, {"id": "abc"})
+    assert queue.counts()[STATUS_DONE] == 1
+
+    with open(video_file, "ab") as f:
+        f.write(b"\0" * 1024)
+    os.utime(video_file, (0, 0))
+    assert queue.enqueue(video_file)
+
+    job = queue.claim()
+    assert job["status"] == STATUS_PENDING
+    assert (job["session_uri"], job["confirmed_bytes"], job["attempts"]) == (None, 0, 1)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+youtube_quota.py のテスト
+
+一時ディレクトリの記録ファイルで、クォータの確保・上限・日付が変わった時のリセット・
+複数のプロセス（同じ記録ファイルを使う複数のトラッカー）の使用量の合算を検証します。
+
+使用方法:
+    python -m pytest video/test_youtube_quota.py（プロジェクトのルートで実行）
+"""
+
+import os
+
+import pytest
+
+import youtube_quota
+from youtube_quota import QuotaTracker, QuotaExceeded, QUOTA_COSTS
+
+
+@pytest.fixture
+def state_file(tmp_path) -> str:
+    return str(tmp_path / "quota_usage.json")
+
+
+def test_reserve_records_usage(state_file):
+    quota = QuotaTracker(daily_quota=2000, state_file=state_file)
+    quota.reserve("videos.insert")
+    quota.reserve("thumbnails.set", count=2)
+
+    assert quota.remaining == 2000 - QUOTA_COSTS["videos.insert"] - 2 * QUOTA_COSTS["thumbnails.set"]
+    assert quota.state["calls"] == {"videos.insert": 1, "thumbnails.set": 2}
+
+
+def test_reserve_beyond_quota_is_rejected(state_file):
+    quota = QuotaTracker(daily_quota=2000, state_file=state_file)
+    quota.reserve("videos.insert")
+    with pytest.raises(QuotaExceeded):
+        quota.reserve("videos.insert")
+    # 確保できなかった分は使用量に含まれない
+    assert quota.remaining == 2000 - QUOTA_COSTS["videos.insert"]
+
+
+def test_usage_resets_on_new_day(state_file, monkeypatch):
+    monkeypatch.setattr(QuotaTracker, "_today", staticmethod(lambda: "2025-04-01"))
+    quota = QuotaTracker(daily_quota=2000, state_file=state_file)
+    quota.reserve("videos.insert")
+
+    monkeypatch.setattr(QuotaTracker, "_today", staticmethod(lambda: "2025-04-02"))
+    assert quota.remaining == 2000
+    quota.reserve("videos.insert")
+    assert QuotaTracker(daily_quota=2000, state_file=state_file).state["used"] == QUOTA_COSTS["videos.insert"]
+
+
+def test_trackers_sharing_a_file_add_up(state_file):
+    # 同時に実行している別々のプロセスの代わり
+    first = QuotaTracker(daily_quota=3000, state_file=state_file)
+    second = QuotaTracker(daily_quota=3000, state_file=state_file)
+
+    first.reserve("videos.insert")
+    with pytest.raises(QuotaExceeded):
+        second.reserve("videos.insert")
+    second.reserve("thumbnails.set")
+
+    assert first.remaining == second.remaining == 3000 - QUOTA_COSTS["videos.insert"] - QUOTA_COSTS["thumbnails.set"]
+
+
+def test_failed_save_removes_temp_file(state_file, monkeypatch):
+    quota = QuotaTracker(daily_quota=2000, state_file=state_file)
+
+    def broken_dump(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(youtube_quota.json, "dump", broken_dump)
+    with pytest.raises(OSError):
+        quota.reserve("videos.insert")
+    assert [name for name in os.listdir(os.path.dirname(state_file)) if name.endswith(".json")] == []
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+youtube_uploader.py のテスト
+
+ローカルのスタンドインサーバー（conftest.py の youtube）に対して、一時的なエラーの再試行・
+期限切れのセッションのやり直しとクォータの確保・認証情報の更新タイマーを検証します。
+
+使用方法:
+    python -m pytest video/test_youtube_uploader.py（プロジェクトのルートで実行）
+"""
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+from googleapiclient.errors import HttpError
+
+import youtube_uploader
+from youtube_quota import QuotaTracker, QuotaExceeded, QUOTA_COSTS
+from youtube_uploader import YouTubeUploader, CHUNK_SIZE_UNIT, CREDENTIALS_REFRESH_MARGIN
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(youtube_uploader, "backoff_delay", lambda retry: 0)
+
+
+@pytest.fixture
+def video_file(tmp_path) -> str:
+    path = tmp_path / "sakura.mp4"
+    path.write_bytes(b"\0" * 4096)
+    return str(path)
+
+
+def make_uploader(youtube, video_file: str, quota=None) -> YouTubeUploader:
+    return YouTubeUploader(video_file, title="桜", chunk_size=CHUNK_SIZE_UNIT, progress_callback=None,
+                           credentials=youtube.credentials, youtube=youtube.service, quota=quota)
+
+
+def test_chunks_report_confirmed_bytes(youtube, tmp_path):
+    path = tmp_path / "long.mp4"
+    path.write_bytes(b"\0" * (CHUNK_SIZE_UNIT * 2 + 1024))
+    progress = []
+
+    response = make_uploader(youtube, str(path)).upload_video(
+        session_callback=lambda uri, confirmed: progress.append(confirmed)
+    )
+
+    assert response["id"] == "video0"
+    # 最後のチャンク以外は、サーバーが確認した位置（308のRange）が記録される
+    assert progress == [CHUNK_SIZE_UNIT, CHUNK_SIZE_UNIT * 2]
+
+
+def test_rate_limited_chunk_is_retried(youtube, video_file):
+    youtube.server.put_errors = [(403, "rateLimitExceeded"), (403, "userRateLimitExceeded")]
+    response = make_uploader(youtube, video_file).upload_video()
+
+    assert response["id"] == "video0"
+    assert youtube.server.put_errors == []
+
+
+def test_other_forbidden_errors_are_not_retried(youtube, video_file):
+    youtube.server.put_errors = [(403, "forbidden")]
+    with pytest.raises(HttpError):
+        make_uploader(youtube, video_file).upload_video()
+    assert youtube.server.inserted == []
+
+
+def test_expired_session_reserves_quota_for_new_insert(youtube, video_file, tmp_path):
+    quota = QuotaTracker(daily_quota=2 * QUOTA_COSTS["videos.insert"], state_file=str(tmp_path / "quota.json"))
+    sessions = []
+    expired = f"{youtube.server.base_url}/upload/session/expired"
+
+    response = make_uploader(youtube, video_file, quota).upload_video(
+        expired, lambda uri, confirmed: sessions.append(uri)
+    )
+
+    assert response["id"] == "video0"
+    # 期限切れのセッションを破棄してから、新しいセッションで送り直す
+    assert sessions == [None]
+    assert len(youtube.server.inserted) == 1
+    assert quota.remaining == QUOTA_COSTS["videos.insert"]
+
+
+def test_expired_session_without_quota_stops(youtube, video_file, tmp_path):
+    quota = QuotaTracker(daily_quota=QUOTA_COSTS["videos.insert"] - 1, state_file=str(tmp_path / "quota.json"))
+    expired = f"{youtube.server.base_url}/upload/session/expired"
+
+    with pytest.raises(QuotaExceeded):
+        make_uploader(youtube, video_file, quota).upload_video(expired)
+    assert youtube.server.inserted == []
+
+
+def test_refresh_is_scheduled_before_expiry(monkeypatch):
+    timers = []
+
+    class Timer:
+        def __init__(self, delay, function):
+            timers.append(delay)
+
+        def start(self):
+            pass
+
+        def cancel(self):
+            pass
+
+    monkeypatch.setattr(youtube_uploader.threading, "Timer", Timer)
+    # google-auth の expiry はタイムゾーンなしのUTC
+    expiry = (datetime.now(timezone.utc) + timedelta(seconds=1000)).replace(tzinfo=None)
+    youtube_uploader._schedule_refresh(SimpleNamespace(refresh_token="token", expiry=expiry))
+
+    assert timers[0] == pytest.approx(1000 - CREDENTIALS_REFRESH_MARGIN, abs=5)
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+サムネイル自動生成スクリプト
+========================
+
+このスクリプトは生成済みの動画からサムネイル画像を自動生成します。
+動画全体をデコードせず、キーフレームだけを縮小して取り出すため、3分の4K動画でも数秒で処理できます。
+
+処理の流れ:
+    1. ffmpegでキーフレームだけをデコードし、評価用に小さく縮小して取り出す
+    2. シャープネス・色の鮮やかさ・露出をOpenCV/NumPyでまとめて評価
+    3. 最も評価の高いキーフレームだけをサムネイルのサイズで取り出し直す
+    4. タイトルを合成してJPEGで保存
+
+使用方法:
+    python thumbnail_generator.py output/sakura_video.mp4 --title "日本の美しい桜特集 2025"
+
+OpenCV・NumPy・Pillow はサムネイルを作成する処理で初めて読み込むため、
+probe_video だけを使うスクリプト（動画生成、素材フォルダの監視）の起動は遅くなりません。
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import glob
+import argparse
+import subprocess
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+    from PIL import Image, ImageDraw, ImageFont
+
+# プロジェクトのルートディレクトリ
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# フォントディレクトリ
+FONT_DIR = os.path.join(PROJECT_ROOT, "resources", "fonts")
+
+# 日本語を表示できるフォントの候補（FONT_DIRにフォントがない場合）
+SYSTEM_FONT_CANDIDATES = [
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Bold.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Bold.ttc",
+    "/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc",
+    "C:/Windows/Fonts/meiryob.ttc",
+    "C:/Windows/Fonts/msgothic.ttc",
+]
+
+# サムネイルの設定（YouTubeの推奨サイズ、上限2MB）
+THUMBNAIL_SIZE = (1280, 720)
+THUMBNAIL_QUALITY = 90
+MAX_THUMBNAIL_BYTES = 2 * 1024 * 1024
+
+# 評価用に取り出すフレームのサイズ（全キーフレームをメモリに載せても数十MBに収まる）
+SCORING_SIZE = (320, 180)
+
+# タイトル・エンディングのクリップ（文字だけの黒画面）を候補から除外する秒数
+DEFAULT_SKIP_SECONDS = 5.0
+
+# キーフレームを取り出し直す時に、キーフレームの何秒前にシークするか
+KEYFRAME_SEEK_MARGIN = 1.0
+# キーフレームの時刻（showinfoの出力）を選ぶ時の許容誤差（秒）
+KEYFRAME_TOLERANCE = 0.01
+
+# 評価の重み（シャープネス, 色の鮮やかさ, 露出）
+SCORE_WEIGHTS = (0.4, 0.35, 0.25)
+
+# タイトルの表示設定
+TITLE_FONT_RATIO = 0.09  # 画像の高さに対するフォントサイズ
+TITLE_MAX_WIDTH_RATIO = 0.9
+TITLE_STROKE_RATIO = 0.08  # フォントサイズに対する縁取りの太さ
+
+
+def probe_video(video_file: str) -> Tuple[float, int, int]:
+    """
+    ffprobeで動画の長さと解像度を取得
+
+    Args:
+        video_file: 動画ファイルのパス
+
+    Returns:
+        (長さ（秒）, 幅, 高さ)
+    """
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "stream=width,height:format=duration",
+         "-of", "default=noprint_wrappers=1", video_file],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True
+    )
+    values = dict(line.split("=", 1) for line in result.stdout.split() if "=" in line)
+    return float(values.get("duration", 0)), int(values["width"]), int(values["height"])
+
+
+def _scale_filter(size: Tuple[int, int]) -> str:
+    """指定したサイズに縮小して中央をクロップするフィルタ"""
+    width, height = size
+    return f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height}"
+
+
+def extract_keyframes(
+    video_file: str,
+    size: Tuple[int, int] = SCORING_SIZE,
+    skip_seconds: float = DEFAULT_SKIP_SECONDS
+) -> Tuple[np.ndarray, List[float]]:
+    """
+    キーフレームだけをデコードして縮小したフレームを取り出す
+
+    -skip_frame nokey によりデコーダーがキーフレーム以外を読み飛ばすため、
+    全フレームをデコードするよりも大幅に速い。
+
+    Args:
+        video_file: 動画ファイルのパス
+        size: 取り出すフレームのサイズ (幅, 高さ)
+        skip_seconds: 先頭と末尾から除外する秒数
+
+    Returns:
+        (フレームの配列（枚数 x 高さ x 幅 x 3、BGR）, 各フレームの時刻（秒）のリスト)
+    """
+    import numpy as np
+
+    duration, _, _ = probe_video(video_file)
+    width, height = size
+
+    # 短い動画では除外区間を設けない
+    skip = skip_seconds if duration > skip_seconds * 3 else 0.0
+    command = [
+        "ffmpeg", "-hide_banner", "-nostats", "-loglevel", "info",
+        "-skip_frame", "nokey",
+        "-ss", str(skip),
+        "-i", video_file,
+    ]
+    if skip:
+        command += ["-t", str(max(duration - skip * 2, 1.0))]
+    command += [
+        "-an",
+        "-vsync", "vfr",
+        # showinfo で各フレームの時刻をstderrに出力する
+        "-vf", f"{_scale_filter(size)},showinfo",
+        "-f", "rawvideo",
+        "-pix_fmt", "bgr24",
+        "-",
+    ]
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+
+    timestamps = [
+        skip + float(t)
+        for t in re.findall(r"pts_time:\s*([0-9.]+)", result.stderr.decode("utf-8", errors="replace"))
+    ]
+    frame_bytes = width * height * 3
+    count = min(len(result.stdout) // frame_bytes, len(timestamps))
+    frames = np.frombuffer(result.stdout[:count * frame_bytes], dtype=np.uint8).reshape(count, height, width, 3)
+    return frames, timestamps[:count]
+
+
+def extract_frame(video_file: str, timestamp: float, size: Tuple[int, int] = THUMBNAIL_SIZE) -> np.ndarray:
+    """
+    指定した時刻のキーフレームを1枚だけ取り出す
+
+    キーフレームの少し前にシークしてキーフレームだけをデコードし、時刻（pts）で選ぶ。
+    丸めた時刻にそのままシークすると、キーフレームの直後の位置になって何も出力されない
+    ことがあるため。それでも取り出せない場合は、キーフレーム以外も含めてその時刻の
+    フレームをデコードする。
+
+    Args:
+        video_file: 動画ファイルのパス
+        timestamp: キーフレームの時刻（秒、extract_keyframes が返した値）
+        size: 取り出すフレームのサイズ (幅, 高さ)
+
+    Returns:
+        フレーム（高さ x 幅 x 3、BGR）
+
+    Raises:
+        ValueError: フレームを取り出せなかった場合
+    """
+    import numpy as np
+
+    width, height = size
+    frame_bytes = width * height * 3
+    seek = max(timestamp - KEYFRAME_SEEK_MARGIN, 0.0)
+    # -ss を入力に指定すると、出力の時刻はシーク位置からの経過時間になる
+    select = f"select=gte(t\\,{timestamp - seek - KEYFRAME_TOLERANCE:.6f})"
+    attempts = [
+        ["-skip_frame", "nokey", "-ss", f"{seek:.6f}", "-i", video_file, "-vf", f"{select},{_scale_filter(size)}"],
+        ["-ss", f"{timestamp:.6f}", "-i", video_file, "-vf", _scale_filter(size)],
+    ]
+    for arguments in attempts:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error"] + arguments
+            + ["-an", "-frames:v", "1", "-f", "rawvideo", "-pix_fmt", "bgr24", "-"],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+        )
+        if len(result.stdout) >= frame_bytes:
+            return np.frombuffer(result.stdout[:frame_bytes], dtype=np.uint8).reshape(height, width, 3)
+    raise ValueError(f"{timestamp:.3f}秒のフレームを取り出せませんでした: {video_file}")
+
+
+def score_frames(frames: np.ndarray) -> np.ndarray:
+    """
+    各フレームをシャープネス・色の鮮やかさ・露出で評価
+
+    Args:
+        frames: フレームの配列（枚数 x 高さ x 幅 x 3、BGR）
+
+    Returns:
+        各フレームの評価値（0〜1）
+    """
+    import cv2
+    import numpy as np
+
+    if len(frames) == 0:
+        return np.zeros(0)
+
+    # シャープネス: グレースケールのラプラシアンの分散（ブレ・ピンぼけほど小さい）
+    sharpness = np.array([
+        cv2.Laplacian(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), cv2.CV_64F).var()
+        for frame in frames
+    ])
+
+    # 色の鮮やかさ: Hasler & Süsstrunk の指標を全フレームまとめて計算
+    f = frames.astype(np.float32)
+    b, g, r = f[..., 0], f[..., 1], f[..., 2]
+    rg = r - g
+    yb = 0.5 * (r + g) - b
+    colorfulness = (
+        np.sqrt(rg.std(axis=(1, 2)) ** 2 + yb.std(axis=(1, 2)) ** 2)
+        + 0.3 * np.sqrt(rg.mean(axis=(1, 2)) ** 2 + yb.mean(axis=(1, 2)) ** 2)
+    )
+
+    # 露出: 平均輝度が中間に近く、白飛び・黒つぶれが少ないほど高い
+    luma = 0.114 * b + 0.587 * g + 0.299 * r
+    mean_luma = luma.mean(axis=(1, 2)) / 255.0
+    clipped = ((luma < 8) | (luma > 247)).mean(axis=(1, 2))
+    exposure = np.clip(1.0 - np.abs(mean_luma - 0.5) * 2 - clipped, 0.0, 1.0)
+
+    def normalize(values):
+        peak = values.max()
+        return values / peak if peak > 0 else values
+
+    w_sharp, w_color, w_exposure = SCORE_WEIGHTS
+    return (w_sharp * normalize(sharpness)
+            + w_color * normalize(colorfulness)
+            + w_exposure * exposure)
+
+
+def find_font_path() -> Optional[str]:
+    """タイトルに使用するフォントのパスを探す"""
+    for pattern in ("*.ttf", "*.otf", "*.ttc"):
+        fonts = sorted(glob.glob(os.path.join(FONT_DIR, pattern)))
+        if fonts:
+            return fonts[0]
+    for candidate in SYSTEM_FONT_CANDIDATES:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+@lru_cache(maxsize=32)
+def load_font(font_path: Optional[str], size: int) -> ImageFont.ImageFont:
+    """
+    フォントを読み込む（同じパスとサイズのフォントは再利用する）
+
+    Args:
+        font_path: フォントファイルのパス（Noneの場合はPILのデフォルト）
+        size: フォントサイズ
+
+    Returns:
+        フォント
+    """
+    from PIL import ImageFont
+
+    if font_path is None:
+        return ImageFont.load_default()
+    return ImageFont.truetype(font_path, size)
+
+
+def _wrap_title(draw: ImageDraw.ImageDraw, title: str, font, max_width: int) -> List[str]:
+    """タイトルを指定した幅に収まるように改行"""
+    lines = []
+    line = ""
+    for char in title:
+        candidate = line + char
+        if line and draw.textlength(candidate, font=font) > max_width:
+            lines.append(line.strip())
+            line = char
+        else:
+            line = candidate
+    if line.strip():
+        lines.append(line.strip())
+    return lines
+
+
+def compose_thumbnail(frame: np.ndarray, title: Optional[str] = None,
+                      font_path: Optional[str] = None) -> Image.Image:
+    """
+    フレームにタイトルを合成してサムネイル画像を作成
+
+    Args:
+        frame: フレーム（高さ x 幅 x 3、BGR）
+        title: 合成するタイトル（Noneの場合は合成しない）
+        font_path: フォントファイルのパス（Noneの場合は自動で探す）
+
+    Returns:
+        サムネイル画像
+    """
+    import cv2
+    from PIL import Image, ImageDraw
+
+    image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    if not title:
+        return image
+
+    width, height = image.size
+    font_size = int(height * TITLE_FONT_RATIO)
+    font = load_font(font_path or find_font_path(), font_size)
+    stroke = max(2, int(font_size * TITLE_STROKE_RATIO))
+
+    # 文字を読みやすくするため、下部を半透明の黒で暗くする
+    overlay = Image.new("RGBA", image.size, (0, 0, 0, 0))
+    overlay_draw = ImageDraw.Draw(overlay)
+    lines = _wrap_title(overlay_draw, title, font, int(width * TITLE_MAX_WIDTH_RATIO))
+    line_height = int(font_size * 1.25)
+    text_top = height - line_height * len(lines) - int(height * 0.08)
+    overlay_draw.rectangle([0, text_top - int(height * 0.04), width, height], fill=(0, 0, 0, 110))
+    image = Image.alpha_composite(image.convert("RGBA"), overlay)
+
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(lines):
+        line_width = draw.textlength(line, font=font)
+        draw.text(
+            ((width - line_width) / 2, text_top + i * line_height),
+            line,
+            font=font,
+            fill="white",
+            stroke_width=stroke,
+            stroke_fill="black"
+        )
+
+    return image.convert("RGB")
+
+
+def save_thumbnail(image: Image.Image, output_file: str) -> str:
+    """
+    YouTubeの上限（2MB）に収まるようにJPEGで保存
+
+    Args:
+        image: サムネイル画像
+        output_file: 保存先のパス
+
+    Returns:
+        保存したファイルのパス
+    """
+    quality = THUMBNAIL_QUALITY
+    while True:
+        image.save(output_file, "JPEG", quality=quality, optimize=True)
+        if os.path.getsize(output_file) <= MAX_THUMBNAIL_BYTES or quality <= 50:
+            return output_file
+        quality -= 10
+
+
+def generate_thumbnail(
+    video_file: str,
+    title: Optional[str] = None,
+    output_file: Optional[str] = None,
+    font_path: Optional[str] = None,
+    skip_seconds: float = DEFAULT_SKIP_SECONDS
+) -> str:
+    """
+    動画からサムネイルを生成
+
+    Args:
+        video_file: 動画ファイルのパス
+        title: 合成するタイトル（Noneの場合は合成しない）
+        output_file: 保存先のパス（Noneの場合は「動画ファイル名.thumbnail.jpg」）
+        font_path: フォントファイルのパス（Noneの場合は自動で探す）
+        skip_seconds: 先頭と末尾から除外する秒数（タイトル・エンディングのクリップ）
+
+    Returns:
+        保存したサムネイルのパス
+    """
+    if output_file is None:
+        output_file = os.path.splitext(video_file)[0] + ".thumbnail.jpg"
+
+    frames, timestamps = extract_keyframes(video_file, SCORING_SIZE, skip_seconds)
+    if len(frames) == 0:
+        raise ValueError(f"キーフレームを取り出せませんでした: {video_file}")
+
+    scores = score_frames(frames)
+    best = int(scores.argmax())
+    print(f"{len(frames)}枚のキーフレームから {timestamps[best]:.1f}秒 のフレームを選びました"
+          f"（評価値: {scores[best]:.2f}）")
+
+    frame = extract_frame(video_file, timestamps[best], THUMBNAIL_SIZE)
+    image = compose_thumbnail(frame, title, font_path)
+    return save_thumbnail(image, output_file)
+
+
+def main():
+    """メイン関数"""
+    parser = argparse.ArgumentParser(description="動画からサムネイルを自動生成するスクリプト")
+    parser.add_argument("video", help="動画ファイルのパス")
+    parser.add_argument("--title", "-t", help="サムネイルに合成するタイトル")
+    parser.add_argument("--output", "-o", help="保存先のパス（デフォルト: 動画ファイル名.thumbnail.jpg）")
+    parser.add_argument("--font", help="フォントファイルのパス（デフォルト: resources/fonts から自動選択）")
+    parser.add_argument("--skip", type=float, default=DEFAULT_SKIP_SECONDS,
+                        help=f"先頭と末尾から除外する秒数（デフォルト: {DEFAULT_SKIP_SECONDS}）")
+    args = parser.parse_args()
+
+    output_file = generate_thumbnail(args.video, args.title, args.output, args.font, args.skip)
+    print(f"サムネイルを保存しました: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
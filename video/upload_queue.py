@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+再開可能なアップロードキュー
+========================
+
+アップロードする動画と、その再開可能アップロードのセッションURI・サーバーが確認した
+送信済みバイト数をSQLiteに記録します。アップロード処理が途中で終了しても、
+次回の実行時にはサーバーに送信済みの位置を問い合わせて続きから再開するため、
+送信済みのバイトを再送することはありません。
+
+ジョブの状態:
+    pending     : 未処理（再試行待ちを含む）
+    in_progress : ワーカーが処理中（リース期限切れで pending に戻る）
+    done        : 完了
+    failed      : 再試行回数の上限に達した
+"""
+
+import os
+import sys
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+# プロジェクトのルートディレクトリ
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# リース付きジョブキューの基底クラス（プロジェクトのルートの lease_queue.py）
+sys.path.append(PROJECT_ROOT)
+from lease_queue import LeaseQueue, LeaseLost, STATUS_PENDING, STATUS_IN_PROGRESS, STATUS_DONE, STATUS_FAILED
+
+# キューのデフォルトの保存先
+DEFAULT_QUEUE_FILE = os.path.join(PROJECT_ROOT, "output", "upload_queue.db")
+
+# デフォルト設定
+DEFAULT_MAX_ATTEMPTS = 8
+DEFAULT_BACKOFF_BASE = 30  # 秒
+DEFAULT_BACKOFF_MAX = 3600  # 秒
+DEFAULT_LEASE_SECONDS = 900  # 処理中ジョブのリース期間（秒、チャンクごとに延長）
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_file TEXT NOT NULL UNIQUE,
+    metadata TEXT NOT NULL,
+    file_size INTEGER NOT NULL,
+    file_mtime REAL NOT NULL,
+    session_uri TEXT,
+    confirmed_bytes INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    lease_until REAL NOT NULL DEFAULT 0,
+    worker TEXT,
+    last_error TEXT,
+    video_id TEXT,
+    result TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_status ON uploads (status, next_attempt_at);
+"""
+
+
+class UploadQueue(LeaseQueue):
+    """
+    SQLiteに保存される永続アップロードキュー
+
+    失敗時もセッションURIと送信済みバイト数は残すため、再試行時は続きから再開する。
+    """
+    table = "uploads"
+    schema = SCHEMA
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_QUEUE_FILE,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS
+    ):
+        """
+        初期化メソッド
+
+        Args:
+            db_path: SQLiteデータベースのパス
+            max_attempts: 1ジョブあたりの最大試行回数
+            backoff_base: 再試行の基本待機時間（秒）
+            backoff_max: 再試行の最大待機時間（秒）
+            lease_seconds: 処理中ジョブのリース期間（秒）
+        """
+        super().__init__(db_path, max_attempts, backoff_base, backoff_max, lease_seconds)
+
+    def _decode(self, row) -> Dict[str, Any]:
+        job = dict(row)
+        job["metadata"] = json.loads(job["metadata"])
+        return job
+
+    def enqueue(self, video_file: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        動画をアップロードジョブとして追加する
+
+        登録済みの動画は無視される。ただし、ファイルが再生成されてサイズや更新日時が
+        変わっている場合は、古いセッションを破棄して最初からアップロードし直す。
+
+        Args:
+            video_file: 動画ファイルのパス
+            metadata: YouTubeUploader に渡すメタデータ（title, description_file, tags など）
+
+        Returns:
+            新たに追加（または再登録）した場合はTrue
+        """
+        video_file = os.path.abspath(video_file)
+        stat = os.stat(video_file)
+        metadata_json = json.dumps(metadata or {}, ensure_ascii=False)
+        now = self._now()
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT file_size, file_mtime FROM uploads WHERE video_file = ?", (video_file,)
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    """INSERT INTO uploads
+                       (video_file, metadata, file_size, file_mtime, created_at, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    (video_file, metadata_json, stat.st_size, stat.st_mtime, now, now)
+                )
+                changed = True
+            elif (row["file_size"], row["file_mtime"]) != (stat.st_size, stat.st_mtime):
+                conn.execute(
+                    """UPDATE uploads SET metadata = ?, file_size = ?, file_mtime = ?,
+                       session_uri = NULL, confirmed_bytes = 0, status = ?, attempts = 0,
+                       next_attempt_at = 0, lease_until = 0, last_error = NULL,
+                       video_id = NULL, result = NULL, updated_at = ?
+                       WHERE video_file = ?""",
+                    (metadata_json, stat.st_size, stat.st_mtime, STATUS_PENDING, now, video_file)
+                )
+                changed = True
+            else:
+                changed = False
+            conn.execute("COMMIT")
+        return changed
+
+    def save_progress(self, job: Dict[str, Any], session_uri: str, confirmed_bytes: int) -> bool:
+        """
+        セッションURIとサーバーが確認した送信済みバイト数を記録する（リースも延長する）
+
+        Args:
+            job: claim() で取得したジョブ
+            session_uri: 再開可能アップロードのセッションURI
+            confirmed_bytes: サーバーが受信を確認したバイト数
+
+        Returns:
+            記録できた場合はTrue（リースが切れて他のワーカーに渡っていた場合はFalse）
+        """
+        return self._update_owned(
+            job, "session_uri = ?, confirmed_bytes = ?, lease_until = ?, updated_at = ?",
+            (session_uri, confirmed_bytes, time.time() + self.lease_seconds, self._now())
+        )
+
+    def reset_session(self, job: Dict[str, Any]) -> bool:
+        """
+        期限切れなどで使えなくなったセッションを破棄する
+
+        Args:
+            job: claim() で取得したジョブ
+
+        Returns:
+            破棄できた場合はTrue（リースを失っていた場合はFalse）
+        """
+        return self._update_owned(
+            job, "session_uri = NULL, confirmed_bytes = 0, updated_at = ?", (self._now(),)
+        )
+
+    def complete(self, job: Dict[str, Any], result: Dict[str, Any]) -> bool:
+        """
+        ジョブを完了にする
+
+        Args:
+            job: claim() で取得したジョブ
+            result: videos.insert のレスポンス
+
+        Returns:
+            記録できた場合はTrue（リースが切れて他のワーカーに渡っていた場合はFalse）
+        """
+        return self._update_owned(
+            job,
+            """status = ?, video_id = ?, result = ?, confirmed_bytes = file_size, session_uri = NULL,
+               lease_until = 0, last_error = NULL, updated_at = ?""",
+            (STATUS_DONE, result.get("id"), json.dumps(result, ensure_ascii=False), self._now())
+        )
+
+    def jobs(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        ジョブの一覧を取得する
+
+        Args:
+            status: 絞り込む状態（Noneの場合は全て）
+
+        Returns:
+            ジョブ情報のリスト
+        """
+        with self._connect() as conn:
+            if status is None:
+                rows = conn.execute("SELECT * FROM uploads ORDER BY id").fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM uploads WHERE status = ? ORDER BY id", (status,)
+                ).fetchall()
+        return [self._decode(row) for row in rows]
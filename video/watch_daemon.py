@@ -0,0 +1,650 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+素材フォルダの監視デーモン
+======================
+
+このスクリプトは素材ディレクトリ（resources/videos, resources/music）を監視し、
+新しい素材が届くたびに動画の生成とアップロードを自動で行う常駐プロセスです。
+
+- inotify（watchdog）で変更を検知し、使用できない環境ではポーリングで監視
+- コピー中のファイルを拾わないよう、一定時間変化がなくなってから処理（デバウンス）
+- 素材メタデータと音源の正規化は、届いたファイルの分だけ差分で更新
+- メタデータ更新・アップロード・動画生成を優先度付きの上限のあるキューで実行
+- 動画生成は常駐するプロセスプールで行い、MoviePyやOpenCVの読み込みを毎回繰り返さない
+
+使用方法:
+    python watch_daemon.py
+    python watch_daemon.py --styles ranking,seasonal --upload --privacy private
+    python watch_daemon.py --polling --min-render-interval 1800
+"""
+
+import os
+import sys
+import argparse
+import itertools
+import json
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# watchdogが利用できる場合はinotifyなどのOSの通知で監視する
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import (
+        FileSystemEventHandler, EVENT_TYPE_CREATED, EVENT_TYPE_MODIFIED, EVENT_TYPE_MOVED, EVENT_TYPE_DELETED
+    )
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+    EVENT_TYPE_CREATED, EVENT_TYPE_MODIFIED, EVENT_TYPE_MOVED, EVENT_TYPE_DELETED = (
+        "created", "modified", "moved", "deleted"
+    )
+
+# 素材の到着として扱うイベント（opened・closed_no_write などの読み取りだけのイベントは除く）
+ARRIVAL_EVENT_TYPES = (EVENT_TYPE_CREATED, EVENT_TYPE_MODIFIED, EVENT_TYPE_MOVED, EVENT_TYPE_DELETED)
+
+from sakura_video_generator import (
+    SakuraVideoGenerator, VIDEO_DIR, MUSIC_DIR, VIDEO_METADATA_FILE, NORMALIZED_MUSIC_SUFFIX,
+    VIDEO_STYLES, DEFAULT_DURATION, OUTPUT_DIR, PROJECT_ROOT
+)
+from thumbnail_generator import probe_video
+# sakura_video_generator がプロジェクトのルートを検索パスに追加している
+import tracing
+from file_lock import locked
+
+HAS_WATCHDOG = Observer is not None
+
+# 音源の正規化スクリプトのディレクトリ
+MUSIC_SCRIPT_DIR = os.path.join(PROJECT_ROOT, "music")
+
+# 監視対象の拡張子（動画生成スクリプトが使用する素材と同じ）
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv")
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a", ".ogg")
+
+# デフォルト設定
+DEFAULT_DEBOUNCE_SECONDS = 10.0  # 最後の変更からこの秒数たったファイルを処理する
+DEFAULT_POLL_INTERVAL = 5.0  # ポーリングの間隔（秒）
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_RENDER_WORKERS = 1
+DEFAULT_UPLOAD_WORKERS = 1
+DEFAULT_MIN_RENDER_INTERVAL = 3600.0  # 動画生成の最短間隔（秒）
+
+# ジョブの優先度（小さいほど先に実行）
+PRIORITY_METADATA = 0
+PRIORITY_UPLOAD = 1
+PRIORITY_RENDER = 2
+
+JOB_METADATA = "metadata"
+JOB_NORMALIZE = "normalize"
+JOB_UPLOAD = "upload"
+JOB_RENDER = "render"
+
+
+def render_video(output_name: str, style: str, length: int) -> str:
+    """
+    動画を生成（常駐するプロセスプールのワーカーで実行）
+
+    Args:
+        output_name: 出力ファイル名（output ディレクトリ内）
+        style: 動画スタイル
+        length: 動画の長さ（秒）
+
+    Returns:
+        生成した動画のパス
+    """
+    generator = SakuraVideoGenerator(output_file=output_name, style=style, length=length)
+    try:
+        return generator.generate_video()
+    finally:
+        # プールのワーカーは終了時の処理が実行されないため、ジョブごとにトレースを書き出す
+        tracing.flush()
+
+
+def _is_temporary(path: str) -> bool:
+    """書き込み途中の一時ファイルや隠しファイルか"""
+    name = os.path.basename(path)
+    return name.startswith(".") or name.endswith((".part", ".tmp"))
+
+
+def _snapshot(directory: str, extensions: Tuple[str, ...]) -> Dict[str, Tuple[int, int]]:
+    """ディレクトリ直下の対象ファイルのサイズと更新時刻"""
+    snapshot = {}
+    if not os.path.isdir(directory):
+        return snapshot
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.is_file() or _is_temporary(entry.path):
+                continue
+            if not entry.name.lower().endswith(extensions):
+                continue
+            stat = entry.stat()
+            snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+class ArrivalDebouncer:
+    """変更のあったファイルを、一定時間変化がなくなるまで保留するクラス"""
+
+    def __init__(self, quiet_seconds: float = DEFAULT_DEBOUNCE_SECONDS):
+        """
+        初期化メソッド
+
+        Args:
+            quiet_seconds: 最後の変更から処理するまでの秒数
+        """
+        self.quiet_seconds = quiet_seconds
+        self._lock = threading.Lock()
+        # パス -> (最後に変更を検知した時刻, 最後に確認したサイズ)
+        self._pending: Dict[str, Tuple[float, Optional[int]]] = {}
+
+    def record(self, path: str):
+        """変更を記録（同じファイルの変更が続く間は保留を延長）"""
+        if _is_temporary(path):
+            return
+        with self._lock:
+            self._pending[path] = (time.monotonic(), self._size(path))
+
+    @staticmethod
+    def _size(path: str) -> Optional[int]:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return None
+
+    def ready(self) -> List[str]:
+        """
+        一定時間変化のなかったファイルを取り出す
+
+        コピー中でサイズが変わり続けているファイルは、通知がなくても保留を延長する。
+        """
+        now = time.monotonic()
+        ready = []
+        with self._lock:
+            for path, (changed_at, size) in list(self._pending.items()):
+                if now - changed_at < self.quiet_seconds:
+                    continue
+                current = self._size(path)
+                if current != size:
+                    self._pending[path] = (now, current)
+                    continue
+                ready.append(path)
+                del self._pending[path]
+        return ready
+
+
+class _WatchdogHandler(FileSystemEventHandler):
+    """watchdogのイベントをデバウンサーに渡すハンドラ"""
+
+    def __init__(self, debouncer: ArrivalDebouncer):
+        super().__init__()
+        self.debouncer = debouncer
+
+    def on_any_event(self, event):
+        # ffprobe や動画生成が素材を読むだけのイベントで生成が繰り返されないようにする
+        if event.is_directory or event.event_type not in ARRIVAL_EVENT_TYPES:
+            return
+        # 一時ファイルからのリネーム（os.replace）は移動先を記録する
+        self.debouncer.record(getattr(event, "dest_path", "") or event.src_path)
+
+
+class PollingWatcher:
+    """watchdogが使えない環境向けの、ディレクトリの定期的な比較による監視"""
+
+    def __init__(self, directories: Dict[str, Tuple[str, ...]]):
+        """
+        初期化メソッド
+
+        Args:
+            directories: 監視するディレクトリと対象の拡張子の対応
+        """
+        self.directories = directories
+        self._snapshots = {directory: _snapshot(directory, extensions)
+                           for directory, extensions in directories.items()}
+
+    def poll(self) -> List[str]:
+        """前回から追加・変更・削除されたファイルのパス"""
+        changed = []
+        for directory, extensions in self.directories.items():
+            current = _snapshot(directory, extensions)
+            previous = self._snapshots[directory]
+            for path in set(current) | set(previous):
+                if current.get(path) != previous.get(path):
+                    changed.append(path)
+            self._snapshots[directory] = current
+        return changed
+
+
+class WatchDaemon:
+    """素材の到着を監視して、メタデータ更新・動画生成・アップロードを行う常駐サービス"""
+
+    def __init__(
+        self,
+        video_dir: str = VIDEO_DIR,
+        music_dir: str = MUSIC_DIR,
+        styles: Optional[List[str]] = None,
+        length: int = DEFAULT_DURATION,
+        upload: bool = False,
+        privacy: str = "private",
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        render_workers: int = DEFAULT_RENDER_WORKERS,
+        upload_workers: int = DEFAULT_UPLOAD_WORKERS,
+        debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        min_render_interval: float = DEFAULT_MIN_RENDER_INTERVAL,
+        use_polling: bool = False
+    ):
+        """
+        初期化メソッド
+
+        Args:
+            video_dir: 監視する動画素材のディレクトリ
+            music_dir: 監視する音源のディレクトリ
+            styles: 生成する動画のスタイル（生成ごとに順番に使用）
+            length: 動画の長さ（秒）
+            upload: 生成した動画をアップロードするか
+            privacy: アップロード時のプライバシー設定
+            queue_size: ジョブキューの上限（超えた動画生成は次の到着時にまとめる）
+            render_workers: 同時に動画を生成するプロセス数
+            upload_workers: 同時にアップロードする動画の数
+            debounce_seconds: 最後の変更から処理するまでの秒数
+            poll_interval: ポーリングの間隔（秒）
+            min_render_interval: 動画生成の最短間隔（秒）
+            use_polling: watchdogが使える場合もポーリングで監視する
+        """
+        self.video_dir = video_dir
+        self.music_dir = music_dir
+        self.styles = itertools.cycle(styles or list(VIDEO_STYLES))
+        self.length = length
+        self.upload = upload
+        self.privacy = privacy
+        self.render_workers = render_workers
+        self.upload_workers = upload_workers
+        self.poll_interval = poll_interval
+        self.min_render_interval = min_render_interval
+        self.use_polling = use_polling or not HAS_WATCHDOG
+
+        self.debouncer = ArrivalDebouncer(debounce_seconds)
+        self.jobs: "queue.PriorityQueue" = queue.PriorityQueue(maxsize=queue_size)
+        self._sequence = itertools.count()
+        self._stop = threading.Event()
+
+        # 動画生成はキューに1つだけ置き、その間に届いた素材は次の生成にまとめる
+        self._render_lock = threading.Lock()
+        self._render_queued = False
+        self._render_requested = False
+        self._last_render = 0.0
+
+        # 動画生成の要否の判定に使う素材のサイズと更新時刻（ファイル名 -> (サイズ, 更新時刻)）
+        self._footage: Dict[str, Tuple[int, float]] = {}
+        self._metadata_lock = threading.Lock()
+
+        # 常駐するプロセスで動画を生成し、重いライブラリの読み込みを1回で済ませる
+        self.render_pool = ProcessPoolExecutor(max_workers=render_workers)
+
+    def submit(self, priority: int, kind: str, payload=None) -> bool:
+        """
+        ジョブをキューに追加
+
+        Returns:
+            追加できた場合はTrue（キューが満杯の場合はFalse）
+        """
+        try:
+            self.jobs.put_nowait((priority, next(self._sequence), kind, payload))
+            return True
+        except queue.Full:
+            print(f"警告: ジョブキューが満杯のため {kind} を追加できませんでした")
+            return False
+
+    def request_render(self):
+        """素材が更新されたことを記録（最短間隔を空けてから動画生成をキューに追加）"""
+        with self._render_lock:
+            self._render_requested = True
+
+    def _schedule_render(self):
+        """保留中の動画生成を、最短間隔を過ぎていればキューに追加"""
+        with self._render_lock:
+            if not self._render_requested or self._render_queued:
+                return
+            if self._last_render and time.monotonic() - self._last_render < self.min_render_interval:
+                return
+            if self.submit(PRIORITY_RENDER, JOB_RENDER, next(self.styles)):
+                self._render_requested = False
+                self._render_queued = True
+
+    def handle_arrivals(self, paths: Iterable[str]):
+        """デバウンス後の変更ファイルを種類ごとのジョブに振り分ける"""
+        video_dir = os.path.abspath(self.video_dir)
+        music_dir = os.path.abspath(self.music_dir)
+        videos, music = [], []
+        for path in paths:
+            directory = os.path.dirname(os.path.abspath(path))
+            name = path.lower()
+            if directory == video_dir and name.endswith(VIDEO_EXTENSIONS):
+                videos.append(path)
+            elif directory == music_dir and name.endswith(AUDIO_EXTENSIONS) \
+                    and not name.endswith(NORMALIZED_MUSIC_SUFFIX):
+                # 正規化済みの音源は正規化スクリプト自身の出力なので対象外
+                music.append(path)
+
+        if videos:
+            print(f"新しい動画素材: {len(videos)}件")
+            self.submit(PRIORITY_METADATA, JOB_METADATA, (videos, True))
+        if music:
+            print(f"新しい音源: {len(music)}件")
+            self.submit(PRIORITY_METADATA, JOB_NORMALIZE, music)
+
+    def update_video_metadata(self, job: Tuple[List[str], bool]):
+        """
+        届いた動画素材の分だけ素材メタデータを更新
+
+        sakura_video_ingest.py で登録された素材はそのまま残し、直接置かれた素材は
+        ffprobeで調べた長さと解像度を登録する。削除された素材はメタデータからも削除する。
+
+        Args:
+            job: (動画素材のパスのリスト, 更新後に動画生成を要求するか)
+        """
+        paths, render = job
+        # sakura_video_ingest.py も別のプロセスから同じファイルを更新するため、ファイルもロックする
+        with self._metadata_lock, locked(VIDEO_METADATA_FILE):
+            new_footage = self._update_video_metadata(paths)
+        # 素材が実際に追加・変更・削除された場合だけ動画生成を要求する
+        if render and new_footage:
+            self.request_render()
+
+    def _update_video_metadata(self, paths: List[str]) -> bool:
+        """
+        素材メタデータを更新
+
+        Returns:
+            前回から素材が追加・変更・削除されていればTrue
+        """
+        new_footage = False
+        metadata = {}
+        if os.path.exists(VIDEO_METADATA_FILE):
+            try:
+                with open(VIDEO_METADATA_FILE, "r", encoding="utf-8") as f:
+                    metadata = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                print(f"警告: 素材メタデータを読み込めませんでした: {VIDEO_METADATA_FILE}")
+                return False
+
+        changed = False
+        for path in paths:
+            name = os.path.basename(path)
+            entry = metadata.get(name)
+            if not os.path.exists(path):
+                if entry is not None:
+                    del metadata[name]
+                    changed = True
+                if self._footage.pop(name, None) is not None:
+                    new_footage = True
+                continue
+            stat = os.stat(path)
+            footage = (stat.st_size, stat.st_mtime)
+            if self._footage.get(name) != footage:
+                self._footage[name] = footage
+                new_footage = True
+            if entry and "source" in entry:
+                continue
+            if entry and entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime:
+                continue
+            try:
+                duration, width, height = probe_video(path)
+            except (subprocess.CalledProcessError, KeyError, ValueError):
+                print(f"警告: 動画素材を読み込めませんでした: {path}")
+                self._footage.pop(name, None)
+                continue
+            metadata[name] = {
+                "file": name,
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "width": width,
+                "height": height,
+                "duration": duration,
+                "source_info": {},
+                "ingested_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            changed = True
+
+        if changed:
+            fd, temp_path = tempfile.mkstemp(suffix=".json", dir=os.path.dirname(VIDEO_METADATA_FILE))
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(metadata, f, ensure_ascii=False, indent=4)
+            os.replace(temp_path, VIDEO_METADATA_FILE)
+        return new_footage
+
+    def normalize_music(self, paths: List[str]):
+        """届いた音源だけを正規化（music/audio_normalizer.py）"""
+        paths = [path for path in paths if os.path.exists(path)]
+        if paths:
+            result = subprocess.run(
+                [sys.executable, "audio_normalizer.py", "-o", self.music_dir] + paths,
+                cwd=MUSIC_SCRIPT_DIR
+            )
+            if result.returncode != 0:
+                print(f"警告: 音源の正規化に失敗しました（終了コード: {result.returncode}）")
+        self.request_render()
+
+    def render(self, style: str):
+        """動画を生成し、アップロードする場合はアップロードをキューに追加"""
+        output_name = f"watch_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{style}.mp4"
+        try:
+            output_file = self.render_pool.submit(render_video, output_name, style, self.length).result()
+        except Exception as e:
+            print(f"エラー: 動画生成中に問題が発生しました: {e}")
+            return
+        finally:
+            with self._render_lock:
+                self._render_queued = False
+                self._last_render = time.monotonic()
+        if self.upload:
+            self.submit(PRIORITY_UPLOAD, JOB_UPLOAD, output_file)
+
+    def upload_video(self, video_file: str):
+        """アップロードキューを使ってアップロード（中断しても次回に続きから再開）"""
+        # アップロードしない場合はGoogleのライブラリを読み込まない
+        from upload_queue import UploadQueue
+        from youtube_uploader import DEFAULT_CATEGORY, drain_upload_queue
+
+        upload_queue = UploadQueue()
+        upload_queue.enqueue(video_file, {"category": DEFAULT_CATEGORY, "privacy": self.privacy})
+        # アップロードのワーカー（upload_workers個のスレッド）がそれぞれ1本ずつ処理する
+        drain_upload_queue(upload_queue, workers=1)
+
+    def _worker(self):
+        """キューからジョブを優先度順に取り出して実行"""
+        handlers = {
+            JOB_METADATA: self.update_video_metadata,
+            JOB_NORMALIZE: self.normalize_music,
+            JOB_RENDER: self.render,
+            JOB_UPLOAD: self.upload_video,
+        }
+        while True:
+            _, _, kind, payload = self.jobs.get()
+            try:
+                if kind is None:
+                    return
+                handlers[kind](payload)
+            except Exception as e:
+                print(f"エラー: ジョブ {kind} の実行中に問題が発生しました: {e}")
+            finally:
+                self.jobs.task_done()
+
+    def stop(self):
+        """監視を終了"""
+        self._stop.set()
+
+    def run(self):
+        """監視を開始（stop() または Ctrl+C で終了）"""
+        directories = {self.video_dir: VIDEO_EXTENSIONS, self.music_dir: AUDIO_EXTENSIONS}
+        for directory in directories:
+            os.makedirs(directory, exist_ok=True)
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+        # 生成とアップロードが同時に進むよう、それぞれのワーカー数の合計だけスレッドを起動
+        workers = [threading.Thread(target=self._worker, daemon=True)
+                   for _ in range(self.render_workers + self.upload_workers)]
+        for worker in workers:
+            worker.start()
+
+        # 起動前に置かれた素材もメタデータに反映する（登録済みの素材は調べ直さない）
+        existing = list(_snapshot(self.video_dir, VIDEO_EXTENSIONS))
+        if existing:
+            self.submit(PRIORITY_METADATA, JOB_METADATA, (existing, False))
+
+        observer = None
+        poller = None
+        if self.use_polling:
+            print(f"ポーリングで監視します（{self.poll_interval}秒間隔）")
+            poller = PollingWatcher(directories)
+        else:
+            observer = Observer()
+            handler = _WatchdogHandler(self.debouncer)
+            for directory in directories:
+                observer.schedule(handler, directory, recursive=False)
+            observer.start()
+            print("ファイルシステムの通知で監視します")
+        print(f"監視中: {self.video_dir}, {self.music_dir}")
+
+        last_poll = 0.0
+        try:
+            while not self._stop.is_set():
+                if poller and time.monotonic() - last_poll >= self.poll_interval:
+                    for path in poller.poll():
+                        self.debouncer.record(path)
+                    last_poll = time.monotonic()
+                ready = self.debouncer.ready()
+                if ready:
+                    self.handle_arrivals(ready)
+                self._schedule_render()
+                self._stop.wait(1.0)
+        except KeyboardInterrupt:
+            print("\n監視を終了します...")
+        finally:
+            if observer:
+                observer.stop()
+                observer.join()
+            # 実行中のジョブが終わってからワーカーを終了する
+            for _ in workers:
+                self.jobs.put((sys.maxsize, next(self._sequence), None, None))
+            for worker in workers:
+                worker.join()
+            self.render_pool.shutdown()
+
+
+def parse_arguments():
+    """コマンドライン引数をパース"""
+    parser = argparse.ArgumentParser(description="素材フォルダを監視して動画の生成と公開を行う常駐サービス")
+
+    parser.add_argument(
+        "--styles", "-s",
+        default=",".join(VIDEO_STYLES),
+        help="生成する動画のスタイル（カンマ区切り、生成ごとに順番に使用）"
+    )
+
+    parser.add_argument(
+        "--length", "-l",
+        type=int,
+        default=DEFAULT_DURATION,
+        help=f"動画の長さ（秒）（デフォルト: {DEFAULT_DURATION}）"
+    )
+
+    parser.add_argument(
+        "--upload",
+        action="store_true",
+        help="生成した動画をアップロードする"
+    )
+
+    parser.add_argument(
+        "--privacy",
+        choices=["public", "unlisted", "private"],
+        default="private",
+        help="アップロード時のプライバシー設定（デフォルト: private）"
+    )
+
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE_SECONDS,
+        help=f"最後の変更から処理するまでの秒数（デフォルト: {DEFAULT_DEBOUNCE_SECONDS}）"
+    )
+
+    parser.add_argument(
+        "--min-render-interval",
+        type=float,
+        default=DEFAULT_MIN_RENDER_INTERVAL,
+        help=f"動画生成の最短間隔（秒）（デフォルト: {DEFAULT_MIN_RENDER_INTERVAL}）"
+    )
+
+    parser.add_argument(
+        "--render-workers",
+        type=int,
+        default=DEFAULT_RENDER_WORKERS,
+        help=f"同時に動画を生成するプロセス数（デフォルト: {DEFAULT_RENDER_WORKERS}）"
+    )
+
+    parser.add_argument(
+        "--upload-workers",
+        type=int,
+        default=DEFAULT_UPLOAD_WORKERS,
+        help=f"同時にアップロードする動画の数（デフォルト: {DEFAULT_UPLOAD_WORKERS}）"
+    )
+
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        help=f"ジョブキューの上限（デフォルト: {DEFAULT_QUEUE_SIZE}）"
+    )
+
+    parser.add_argument(
+        "--polling",
+        action="store_true",
+        help="ファイルシステムの通知を使わずにポーリングで監視する"
+    )
+
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help=f"ポーリングの間隔（秒）（デフォルト: {DEFAULT_POLL_INTERVAL}）"
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    """メイン関数"""
+    args = parse_arguments()
+
+    styles = [style for style in args.styles.split(",") if style]
+    unknown = [style for style in styles if style not in VIDEO_STYLES]
+    if unknown:
+        print(f"エラー: 不明なスタイルです: {', '.join(unknown)}")
+        sys.exit(1)
+
+    daemon = WatchDaemon(
+        styles=styles,
+        length=args.length,
+        upload=args.upload,
+        privacy=args.privacy,
+        queue_size=args.queue_size,
+        render_workers=args.render_workers,
+        upload_workers=args.upload_workers,
+        debounce_seconds=args.debounce,
+        poll_interval=args.poll_interval,
+        min_render_interval=args.min_render_interval,
+        use_polling=args.polling
+    )
+    daemon.run()
+
+
+if __name__ == "__main__":
+    main()
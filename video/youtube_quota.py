@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+YouTube Data APIのクォータ管理
+==========================
+
+API呼び出しごとに消費するクォータ（ユニット）を記録し、1日の上限を超えないように管理します。
+使用量はファイルに保存されるため、同じ日の複数回の実行で合算されます。
+同時に実行している複数のプロセスの使用量も合算されるように、確保のたびにファイルロックを
+取得して最新の使用量を読み込み直してから更新します。
+"""
+
+import os
+import sys
+import json
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:
+    ZoneInfo = None
+
+# プロジェクトのルートディレクトリ
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# プロセス間の排他ロック（プロジェクトのルートの file_lock.py）
+sys.path.append(PROJECT_ROOT)
+from file_lock import locked
+
+# クォータ使用量の記録ファイル
+QUOTA_FILE = os.path.join(PROJECT_ROOT, "output", "quota_usage.json")
+
+# YouTube Data APIの1日のクォータ（Google Cloud Consoleで増加をリクエストした場合は変更）
+DEFAULT_DAILY_QUOTA = 10000
+
+# API呼び出しごとのクォータコスト（ユニット）
+QUOTA_COSTS = {
+    "videos.insert": 1600,
+    "videos.update": 50,
+    "videos.list": 1,
+    "thumbnails.set": 50,
+}
+
+# クォータは太平洋時間の0時にリセットされる
+if ZoneInfo is not None:
+    QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+else:
+    QUOTA_TIMEZONE = timezone(timedelta(hours=-8))
+
+
+def next_quota_reset() -> datetime:
+    """次にクォータがリセットされる日時（太平洋時間の0時）"""
+    now = datetime.now(QUOTA_TIMEZONE)
+    return (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class QuotaExceeded(Exception):
+    """1日のクォータを使い切った"""
+    pass
+
+
+class QuotaTracker:
+    """API呼び出しごとのクォータ消費量を記録し、1日の上限を超えないように管理するクラス"""
+
+    def __init__(self, daily_quota: int = DEFAULT_DAILY_QUOTA, state_file: str = QUOTA_FILE):
+        """
+        初期化メソッド
+
+        Args:
+            daily_quota: 1日のクォータ（ユニット）
+            state_file: 使用量の記録ファイル（複数回の実行で合算する）
+        """
+        self.daily_quota = daily_quota
+        self.state_file = state_file
+        self.lock = threading.Lock()
+        self.state = self._load()
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(QUOTA_TIMEZONE).strftime("%Y-%m-%d")
+
+    def _load(self) -> Dict[str, Any]:
+        state = {"date": self._today(), "used": 0, "calls": {}}
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+                if saved.get("date") == state["date"]:
+                    state = saved
+            except (json.JSONDecodeError, OSError):
+                print(f"警告: クォータの記録を読み込めませんでした: {self.state_file}")
+        return state
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(suffix=".json", dir=os.path.dirname(self.state_file))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, ensure_ascii=False, indent=4)
+            os.replace(temp_path, self.state_file)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _refresh(self):
+        """他のプロセスの使用量を含む最新の記録を読み込む（日付が変わっていればリセット）"""
+        self.state = self._load()
+
+    @property
+    def remaining(self) -> int:
+        """今日の残りクォータ（ユニット）"""
+        with self.lock, locked(self.state_file):
+            self._refresh()
+            return self.daily_quota - self.state["used"]
+
+    def reserve(self, method: str, count: int = 1):
+        """
+        API呼び出しの前にクォータを確保する
+
+        Args:
+            method: APIメソッド名（例: videos.insert）
+            count: 呼び出し回数
+
+        Raises:
+            QuotaExceeded: 今日の残りクォータが足りない場合
+        """
+        cost = QUOTA_COSTS.get(method, 1) * count
+        # 読み込みから保存までを他のスレッド・プロセスと排他にし、使用量の上書きを防ぐ
+        with self.lock, locked(self.state_file):
+            self._refresh()
+            if self.state["used"] + cost > self.daily_quota:
+                raise QuotaExceeded(
+                    f"{method} に必要なクォータ（{cost}）が残っていません "
+                    f"（使用量 {self.state['used']}/{self.daily_quota}）"
+                )
+            self.state["used"] += cost
+            self.state["calls"][method] = self.state["calls"].get(method, 0) + count
+            self._save()
+
+    def next_reset(self) -> datetime:
+        """次にクォータがリセットされる日時"""
+        return next_quota_reset()
@@ -15,34 +15,43 @@ YouTube Data APIを使用して、動画のアップロード、タイトル設
 オプション:
     --video: アップロードする動画ファイル（必須）
     --title: 動画のタイトル（デフォルト: ファイル名）
-    --description: 説明文ファイルのパス（デフォルト: 自動生成）
+    --description: 説明文ファイルのパス（デフォルト: 自動生成、タイムラインがあればチャプターとクレジットを追加）
     --tags: カンマ区切りのタグリスト（デフォルト: 自動生成）
     --category: 動画カテゴリID（デフォルト: 22=People & Blogs）
     --privacy: プライバシー設定（public, unlisted, private）（デフォルト: private）
+    --chunk-size: アップロードのチャンクサイズ（MB）（デフォルト: 64）
+    --workers: 同時にアップロードする動画の数（--videoを複数指定した場合）（デフォルト: 2）
+    --api-endpoint: APIのエンドポイント（テスト用のローカルサーバーなど）
+    --queue: アップロードキューを使用（中断したアップロードを送信済みの位置から再開）
+    --thumbnail: サムネイル画像のパス（パスを省略すると動画から自動生成）
+
+Google APIクライアントのライブラリは認証やアップロードの処理で初めて読み込むため、
+--help や他のスクリプトからの定数・関数の読み込みだけでは起動が遅くなりません。
 """
 
 import os
 import sys
 import argparse
+import json
+import tempfile
 import http.client
-import httplib2
 import random
+import threading
 import time
-from datetime import datetime
-from typing import List, Dict, Optional, Any
-
-import google.oauth2.credentials
-import google_auth_oauthlib.flow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaFileUpload
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, List, Dict, Optional, Any, Tuple
+
+from upload_queue import UploadQueue, LeaseLost, DEFAULT_QUEUE_FILE, STATUS_DONE, STATUS_FAILED
+from youtube_quota import QuotaExceeded, next_quota_reset
 
 # プロジェクトのルートディレクトリ
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# 処理時間の計測（プロジェクトのルートの tracing.py）
+sys.path.append(PROJECT_ROOT)
+import tracing
+
 # 認証情報ディレクトリ
 CREDENTIALS_DIR = os.path.join(PROJECT_ROOT, "credentials")
 CLIENT_SECRETS_FILE = os.path.join(CREDENTIALS_DIR, "client_secret.json")
@@ -55,12 +64,370 @@ SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
 DEFAULT_CATEGORY = "22"  # People & Blogs
 DEFAULT_PRIVACY = "private"  # private, public, unlisted
 
+# アップロード設定
+# チャンクサイズは256KBの倍数である必要がある（大きいほどリクエスト数が減り、4K動画のスループットが上がる）
+CHUNK_SIZE_UNIT = 256 * 1024
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024  # 64MB
+DEFAULT_UPLOAD_WORKERS = 2
+
+# 再試行の設定（指数バックオフ + ジッター）
+MAX_RETRIES = 10
+RETRY_BACKOFF_BASE = 1.0  # 秒
+RETRY_BACKOFF_MAX = 64.0  # 秒
+RETRIABLE_STATUS_CODES = [500, 502, 503, 504]
+
+# 1日のクォータの超過を示す403のエラー理由（リセットまで待てば成功する）
+QUOTA_ERROR_REASONS = ("quotaExceeded", "dailyLimitExceeded")
+# 短時間のリクエスト数の超過を示す403のエラー理由（バックオフして再試行すれば成功する）
+RATE_LIMIT_ERROR_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+# 接続が切れた場合などに発生する例外（セッションURIがあれば送信済みの位置から再開できる）
+# httplib2.HttpLib2Error もアップロード時に追加する
+RETRIABLE_EXCEPTIONS = (
+    IOError, http.client.NotConnected,
+    http.client.IncompleteRead, http.client.ImproperConnectionState,
+    http.client.CannotSendRequest, http.client.CannotSendHeader,
+    http.client.ResponseNotReady, http.client.BadStatusLine
+)
+# セッションが期限切れ・無効になったことを示すステータス
+SESSION_EXPIRED_STATUS_CODES = [404, 410]
+
+# APIのエンドポイント（テスト時はローカルのスタンドインサーバーを環境変数で指定できる）
+API_ENDPOINT = os.environ.get("YOUTUBE_API_ENDPOINT")
+
 # 桜関連のデフォルトタグ
 DEFAULT_TAGS = [
     "桜", "さくら", "サクラ", "cherry blossom", "japan", "日本", "春", "spring",
     "花見", "hanami", "自然", "nature", "風景", "landscape", "4K", "絶景", "beautiful"
 ]
 
+# 動画生成スクリプトが出力するタイムライン（<動画ファイル名>.timeline.json）
+TIMELINE_SUFFIX = ".timeline.json"
+# YouTubeがチャプターとして認識する条件（0:00から始まり、3つ以上、それぞれ10秒以上）
+MIN_CHAPTERS = 3
+MIN_CHAPTER_SECONDS = 10
+# 説明文の上限（バイト）
+MAX_DESCRIPTION_BYTES = 5000
+
+# 有効期限の何秒前に認証情報を更新するか
+CREDENTIALS_REFRESH_MARGIN = 300
+# 更新に失敗した場合の再試行間隔（秒）
+CREDENTIALS_REFRESH_RETRY = 60
+
+# プロセス内で共有する認証情報（全てのアップローダーで1つだけ読み込む）
+_credentials_lock = threading.Lock()
+_cached_credentials = None
+_refresh_timer = None
+
+def _save_credentials(credentials):
+    """トークンをアトミックに保存（書き込み中に中断しても壊れたトークンファイルが残らない）"""
+    fd, temp_path = tempfile.mkstemp(suffix=".json", dir=CREDENTIALS_DIR)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(credentials.to_json())
+        os.chmod(temp_path, 0o600)
+        os.replace(temp_path, TOKEN_FILE)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def _read_token_file() -> Optional[Dict[str, Any]]:
+    """トークンファイルをJSONとして読み込む"""
+    if not os.path.exists(TOKEN_FILE):
+        return None
+    try:
+        with open(TOKEN_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"警告: トークンファイルを読み込めませんでした（再認証します）: {TOKEN_FILE}: {e}")
+        return None
+
+def _schedule_refresh(credentials, delay: Optional[float] = None):
+    """
+    有効期限の少し前に、バックグラウンドで認証情報を更新するタイマーを設定
+    
+    アップロード中のリクエストが期限切れで更新を待つことがないよう、先回りして更新する。
+    """
+    global _refresh_timer
+    
+    if not credentials.refresh_token or credentials.expiry is None:
+        return
+    
+    if delay is None:
+        # expiry はタイムゾーンなしのUTC
+        expiry = credentials.expiry
+        if expiry.tzinfo is None:
+            expiry = expiry.replace(tzinfo=timezone.utc)
+        remaining = (expiry - datetime.now(timezone.utc)).total_seconds()
+        delay = max(0.0, remaining - CREDENTIALS_REFRESH_MARGIN)
+    
+    def refresh():
+        from google.auth.transport.requests import Request
+        
+        try:
+            with _credentials_lock:
+                credentials.refresh(Request())
+                _save_credentials(credentials)
+        except Exception as e:
+            print(f"警告: 認証情報の更新に失敗しました（{CREDENTIALS_REFRESH_RETRY}秒後に再試行）: {e}")
+            _schedule_refresh(credentials, CREDENTIALS_REFRESH_RETRY)
+            return
+        _schedule_refresh(credentials)
+    
+    timer = threading.Timer(delay, refresh)
+    # タイマーが残っていてもプロセスは終了できるようにする
+    timer.daemon = True
+    if _refresh_timer is not None:
+        _refresh_timer.cancel()
+    _refresh_timer = timer
+    timer.start()
+
+def load_credentials():
+    """
+    認証情報を読み込む（無効な場合は更新または新たに取得する）
+    
+    読み込んだ認証情報はプロセス内でキャッシュされ、2回目以降はファイルを読まずに同じものを返す。
+    有効期限の前にはバックグラウンドで更新され、トークンファイルはアトミックに書き換えられる。
+    
+    Returns:
+        認証情報
+    """
+    global _cached_credentials
+    
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    
+    with _credentials_lock:
+        if _cached_credentials is not None:
+            return _cached_credentials
+        
+        credentials = None
+        
+        # トークンファイルが存在する場合は読み込み
+        info = _read_token_file()
+        if info:
+            credentials = Credentials.from_authorized_user_info(info=info, scopes=SCOPES)
+        
+        # 認証情報が存在しないか、無効な場合は新たに取得
+        if not credentials or not credentials.valid:
+            if credentials and credentials.expired and credentials.refresh_token:
+                credentials.refresh(Request())
+            else:
+                if not os.path.exists(CLIENT_SECRETS_FILE):
+                    print(f"エラー: クライアントシークレットファイルが見つかりません: {CLIENT_SECRETS_FILE}")
+                    print("Google Cloud Consoleで認証情報を作成し、以下のパスに保存してください:")
+                    print(CLIENT_SECRETS_FILE)
+                    sys.exit(1)
+                
+                flow = InstalledAppFlow.from_client_secrets_file(CLIENT_SECRETS_FILE, SCOPES)
+                credentials = flow.run_local_server(port=0)
+            
+            # 更新・取得した場合だけトークンを保存
+            os.makedirs(CREDENTIALS_DIR, exist_ok=True)
+            _save_credentials(credentials)
+        
+        _cached_credentials = credentials
+    
+    _schedule_refresh(credentials)
+    return credentials
+
+def build_service(credentials, api_endpoint: Optional[str] = API_ENDPOINT):
+    """
+    YouTube APIサービスを構築
+    
+    Args:
+        credentials: 認証情報
+        api_endpoint: APIのエンドポイント（Noneの場合はYouTubeの本番環境）
+    
+    Returns:
+        YouTube APIサービス
+    """
+    from googleapiclient.discovery import build, build_from_document
+    from googleapiclient.discovery_cache import get_static_doc
+    
+    if not api_endpoint:
+        return build("youtube", "v3", credentials=credentials)
+    # client_options の api_endpoint ではアップロードのURLのスキームが https のまま残るため、
+    # ディスカバリドキュメントのルートURLを書き換えて http のスタンドインサーバーにも送れるようにする
+    document = json.loads(get_static_doc("youtube", "v3"))
+    document["rootUrl"] = document["mtlsRootUrl"] = api_endpoint.rstrip("/") + "/"
+    return build_from_document(document, credentials=credentials)
+
+def error_reasons(error) -> List[str]:
+    """
+    YouTube Data APIのエラー応答に含まれるエラー理由（quotaExceeded など）
+
+    Args:
+        error: googleapiclient の HttpError
+
+    Returns:
+        エラー理由のリスト（応答を解析できない場合は空）
+    """
+    try:
+        content = error.content.decode("utf-8") if isinstance(error.content, bytes) else error.content
+        details = json.loads(content).get("error", {})
+    except (ValueError, AttributeError):
+        return []
+    return [item.get("reason") for item in details.get("errors", []) if item.get("reason")]
+
+
+def is_rate_limited(error) -> bool:
+    """短時間のリクエスト数の超過（403 rateLimitExceeded など、待てば成功する）かどうか"""
+    return error.resp.status == 403 and any(reason in RATE_LIMIT_ERROR_REASONS for reason in error_reasons(error))
+
+
+def backoff_delay(retry: int) -> float:
+    """
+    再試行までの待機時間を計算（フルジッター付きの指数バックオフ）
+    
+    Args:
+        retry: 再試行の回数（1から）
+    
+    Returns:
+        待機時間（秒）
+    """
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** retry)))
+
+def print_progress(video_file: str, bytes_uploaded: int, total_bytes: int, bytes_per_second: float):
+    """デフォルトの進捗表示（複数の動画を同時にアップロードしても混ざらないよう1行ずつ出力）"""
+    progress = bytes_uploaded / total_bytes * 100 if total_bytes else 100
+    print(
+        f"アップロード進捗: {os.path.basename(video_file)} {progress:.0f}% "
+        f"({bytes_uploaded / 1024 / 1024:.0f}/{total_bytes / 1024 / 1024:.0f}MB, "
+        f"{bytes_per_second / 1024 / 1024:.1f}MB/s)",
+        flush=True
+    )
+
+
+def load_timeline(video_file: str) -> Optional[Dict[str, Any]]:
+    """動画と同じ場所にあるタイムライン（sakura_video_generator.py の出力）を読み込む"""
+    timeline_file = os.path.splitext(video_file)[0] + TIMELINE_SUFFIX
+    if not os.path.exists(timeline_file):
+        return None
+    try:
+        with open(timeline_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        print(f"警告: タイムラインを読み込めませんでした: {timeline_file}")
+        return None
+
+
+def format_timestamp(seconds: float) -> str:
+    """チャプターのタイムスタンプ（m:ss または h:mm:ss）"""
+    seconds = int(seconds)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def build_chapters(timeline: Dict[str, Any]) -> List[str]:
+    """
+    タイムラインからYouTubeのチャプター行を作成
+    
+    タイトルは最初のセグメントのチャプターに、エンディングは最後のチャプターに含める。
+    10秒未満になるチャプターは直前のチャプターにまとめる。
+    
+    Args:
+        timeline: 動画生成スクリプトが出力したタイムライン
+    
+    Returns:
+        "0:00 ラベル" 形式の行のリスト（チャプターの条件を満たせない場合は空）
+    """
+    segments = [s for s in timeline.get("segments", []) if s.get("kind") == "segment" and s.get("label")]
+    chapters = []
+    for segment in segments:
+        start = 0.0 if not chapters else segment["start"]
+        if chapters and start - chapters[-1][0] < MIN_CHAPTER_SECONDS:
+            continue
+        chapters.append((start, segment["label"]))
+    
+    # 最後のチャプターが短い場合は直前のチャプターにまとめる
+    duration = timeline.get("duration", 0)
+    if len(chapters) > 1 and duration - chapters[-1][0] < MIN_CHAPTER_SECONDS:
+        chapters.pop()
+    
+    if len(chapters) < MIN_CHAPTERS:
+        return []
+    return [f"{format_timestamp(start)} {label}" for start, label in chapters]
+
+
+def build_credits(timeline: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """
+    タイムラインから撮影素材と音楽のクレジット行を作成
+    
+    Returns:
+        (撮影素材の行のリスト, 音楽の行のリスト)
+    """
+    video_lines = []
+    seen = set()
+    for segment in timeline.get("segments", []):
+        source = segment.get("source")
+        if not source or not source.get("url") or source["url"] == "unknown" or source["url"] in seen:
+            continue
+        seen.add(source["url"])
+        line = f"- {source.get('title', source['url'])}"
+        if source.get("uploader") and source["uploader"] != "unknown":
+            line += f"（{source['uploader']}）"
+        line += f" {source['url']}"
+        if source.get("license"):
+            line += f" [{source['license']}]"
+        video_lines.append(line)
+    
+    music_lines = []
+    music = timeline.get("music")
+    if music and music.get("title"):
+        line = f"- {music['title']}"
+        if music.get("credit"):
+            line += f" / {music['credit']}"
+        music_lines.append(line)
+    
+    return video_lines, music_lines
+
+
+def build_description(timeline: Dict[str, Any]) -> str:
+    """
+    タイムラインからチャプターとクレジットを含む説明文を作成
+    
+    Args:
+        timeline: 動画生成スクリプトが出力したタイムライン
+    
+    Returns:
+        説明文
+    """
+    chapters = build_chapters(timeline)
+    video_lines, music_lines = build_credits(timeline)
+    
+    def render(video_lines: List[str], omitted: int) -> str:
+        lines = [
+            timeline.get("title", ""),
+            "",
+            "この動画では日本各地の美しい桜の風景をお届けします。",
+            "春の訪れを告げる桜は、日本文化において特別な存在です。",
+            "",
+        ]
+        if chapters:
+            lines += ["チャプター:"] + chapters + [""]
+        lines += ["#桜 #日本 #春 #cherryblossom #japan #spring #花見", "", "撮影素材:"]
+        lines += video_lines or ["- 日本各地の桜の名所"]
+        if omitted:
+            lines.append(f"- ほか{omitted}件")
+        lines += ["", "音楽:"]
+        lines += music_lines or ["- フリー素材を使用"]
+        lines += ["", "※この動画は自動生成されています。", ""]
+        return "\n".join(lines)
+    
+    # 上限を超える場合は撮影素材のクレジットを後ろから省略する
+    shown = len(video_lines)
+    description = render(video_lines, 0)
+    while len(description.encode("utf-8")) > MAX_DESCRIPTION_BYTES and shown > 0:
+        shown -= 1
+        description = render(video_lines[:shown], len(video_lines) - shown)
+    return description
+
+
 class YouTubeUploader:
     """YouTubeに動画をアップロードするクラス"""
     
@@ -71,62 +438,79 @@ class YouTubeUploader:
         description_file: Optional[str] = None,
         tags: Optional[List[str]] = None,
         category: str = DEFAULT_CATEGORY,
-        privacy: str = DEFAULT_PRIVACY
+        privacy: str = DEFAULT_PRIVACY,
+        publish_at: Optional[str] = None,
+        thumbnail: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        progress_callback: Optional[Callable[[str, int, int, float], None]] = print_progress,
+        credentials=None,
+        youtube=None,
+        api_endpoint: Optional[str] = API_ENDPOINT,
+        quota=None
     ):
         """
         初期化メソッド
         
         Args:
             video_file: アップロードする動画ファイル
-            title: 動画のタイトル（Noneの場合はファイル名）
+            title: 動画のタイトル（Noneの場合はタイムラインのタイトル、なければファイル名）
             description_file: 説明文ファイルのパス（Noneの場合は自動生成）
             tags: タグリスト（Noneの場合は自動生成）
             category: 動画カテゴリID
             privacy: プライバシー設定（public, unlisted, private）
+            publish_at: 公開日時（ISO 8601、指定した場合は非公開でアップロードして予約公開）
+            thumbnail: サムネイル画像のパス（"auto"の場合は動画から自動生成、Noneの場合はYouTubeに任せる）
+            chunk_size: アップロードのチャンクサイズ（バイト、256KBの倍数に切り上げ）
+            progress_callback: チャンクごとに (動画ファイル, 送信済みバイト数, 総バイト数, 平均スループット[バイト/秒]) で呼ばれる関数
+            credentials: 共有する認証情報（Noneの場合はトークンファイルから読み込み）
+            youtube: 共有するYouTube APIサービス（Noneの場合は新たに構築）
+            api_endpoint: APIのエンドポイント（テスト用のローカルサーバーなど）
+            quota: クォータの管理（QuotaTracker、セッションの期限切れで新たに videos.insert を
+                   呼ぶ前にクォータを確保する。Noneの場合は制限しない）
         """
         self.video_file = video_file
+        self.timeline = load_timeline(video_file)
+        if title is None and self.timeline:
+            title = self.timeline.get("title")
         self.title = title or os.path.splitext(os.path.basename(video_file))[0]
         self.description_file = description_file
         self.tags = tags or DEFAULT_TAGS
         self.category = category
         self.privacy = privacy
+        self.publish_at = publish_at
+        self.thumbnail = thumbnail
+        self.chunk_size = -(-max(chunk_size, 1) // CHUNK_SIZE_UNIT) * CHUNK_SIZE_UNIT
+        self.progress_callback = progress_callback
+        self.api_endpoint = api_endpoint
+        self.quota = quota
         
         # 認証情報ディレクトリが存在しない場合は作成
         os.makedirs(CREDENTIALS_DIR, exist_ok=True)
         
-        # YouTube APIクライアント
-        self.youtube = self._get_authenticated_service()
+        # YouTube APIクライアント（複数の動画をアップロードする場合は共有する）
+        self.credentials = credentials
+        self.youtube = youtube or self._get_authenticated_service()
     
     def _get_authenticated_service(self):
         """認証済みのYouTube APIサービスを取得"""
-        credentials = None
-        
-        # トークンファイルが存在する場合は読み込み
-        if os.path.exists(TOKEN_FILE):
-            credentials = Credentials.from_authorized_user_info(
-                info=eval(open(TOKEN_FILE).read()),
-                scopes=SCOPES
-            )
+        if self.credentials is None:
+            self.credentials = load_credentials()
+        return build_service(self.credentials, self.api_endpoint)
+    
+    def _new_http(self):
+        """
+        このアップロード専用のHTTP接続を作成
         
-        # 認証情報が存在しないか、無効な場合は新たに取得
-        if not credentials or not credentials.valid:
-            if credentials and credentials.expired and credentials.refresh_token:
-                credentials.refresh(Request())
-            else:
-                if not os.path.exists(CLIENT_SECRETS_FILE):
-                    print(f"エラー: クライアントシークレットファイルが見つかりません: {CLIENT_SECRETS_FILE}")
-                    print("Google Cloud Consoleで認証情報を作成し、以下のパスに保存してください:")
-                    print(CLIENT_SECRETS_FILE)
-                    sys.exit(1)
-                
-                flow = InstalledAppFlow.from_client_secrets_file(CLIENT_SECRETS_FILE, SCOPES)
-                credentials = flow.run_local_server(port=0)
-            
-            # トークンを保存
-            with open(TOKEN_FILE, "w") as token:
-                token.write(str(credentials.to_json()))
+        httplib2の接続はスレッドセーフではないため、サービスと認証情報は共有しつつ
+        アップロードごとに別の接続を使う。
+        """
+        from google_auth_httplib2 import AuthorizedHttp
+        from googleapiclient.http import build_http
         
-        return build("youtube", "v3", credentials=credentials)
+        if self.credentials is None:
+            return None
+        # build_http は再開可能なアップロードの308（Resume Incomplete）をリダイレクトとして扱わない
+        return AuthorizedHttp(self.credentials, http=build_http())
     
     def _get_description(self) -> str:
         """動画の説明文を取得"""
@@ -134,6 +518,10 @@ class YouTubeUploader:
             with open(self.description_file, "r", encoding="utf-8") as f:
                 return f.read()
         
+        # 動画生成時のタイムラインがあればチャプターとクレジットを含めて作成
+        if self.timeline:
+            return build_description(self.timeline)
+        
         # デフォルトの説明文を生成
         current_year = datetime.now().year
         description = f"""日本の美しい桜の風景 {current_year}
@@ -153,8 +541,24 @@ class YouTubeUploader:
 """
         return description
     
-    def upload_video(self) -> Dict[str, Any]:
-        """動画をアップロード"""
+    def upload_video(
+        self,
+        session_uri: Optional[str] = None,
+        session_callback: Optional[Callable[[Optional[str], int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        動画をアップロード
+        
+        Args:
+            session_uri: 前回のアップロードのセッションURI（指定した場合はサーバーが確認済みの位置から再開）
+            session_callback: チャンクごとに (セッションURI, サーバーが確認した送信済みバイト数) で呼ばれる関数
+        
+        Returns:
+            videos.insert のレスポンス
+        """
+        from googleapiclient.errors import HttpError
+        from googleapiclient.http import MediaFileUpload
+        
         if not os.path.exists(self.video_file):
             raise FileNotFoundError(f"動画ファイルが見つかりません: {self.video_file}")
         
@@ -171,11 +575,16 @@ class YouTubeUploader:
                 "selfDeclaredMadeForKids": False
             }
         }
+        if self.publish_at:
+            # 予約公開は非公開の動画にのみ設定できる
+            body["status"]["privacyStatus"] = "private"
+            body["status"]["publishAt"] = self.publish_at
         
         # アップロード用のメディアファイルを準備
         media = MediaFileUpload(
             self.video_file,
             mimetype="video/*",
+            chunksize=self.chunk_size,
             resumable=True
         )
         
@@ -190,12 +599,16 @@ class YouTubeUploader:
             )
             
             # アップロードを実行（プログレスコールバック付き）
-            response = self._resumable_upload(request)
+            with tracing.span("upload.video", "upload", file=os.path.basename(self.video_file)):
+                response = self._resumable_upload(request, session_uri, session_callback)
             
             print(f"動画のアップロードが完了しました: {response['id']}")
             print(f"タイトル: {response['snippet']['title']}")
             print(f"URL: https://www.youtube.com/watch?v={response['id']}")
             
+            if self.thumbnail:
+                self.set_thumbnail(response["id"])
+            
             return response
             
         except HttpError as e:
@@ -205,39 +618,281 @@ class YouTubeUploader:
             print(f"エラー: アップロード中に問題が発生しました: {str(e)}")
             raise
     
-    def _resumable_upload(self, request):
+    def set_thumbnail(self, video_id: str) -> Optional[Dict[str, Any]]:
+        """
+        アップロードした動画にサムネイルを設定
+        
+        サムネイルの失敗で動画のアップロード自体を失敗扱いにはしない。
+        
+        Args:
+            video_id: 動画ID
+        
+        Returns:
+            thumbnails.set のレスポンス（失敗した場合はNone）
+        """
+        from googleapiclient.http import MediaFileUpload
+        from thumbnail_generator import generate_thumbnail
+        
+        try:
+            thumbnail_file = self.thumbnail
+            if thumbnail_file == "auto":
+                thumbnail_file = generate_thumbnail(self.video_file, self.title)
+            
+            with tracing.span("upload.thumbnail", "upload"):
+                tracing.count("http.requests")
+                response = self.youtube.thumbnails().set(
+                    videoId=video_id,
+                    media_body=MediaFileUpload(thumbnail_file, mimetype="image/jpeg")
+                ).execute(http=self._new_http())
+            print(f"サムネイルを設定しました: {thumbnail_file}")
+            return response
+        except Exception as e:
+            print(f"警告: サムネイルを設定できませんでした: {e}")
+            return None
+    
+    def _resumable_upload(self, request, session_uri=None, session_callback=None):
         """再開可能なアップロードを実行"""
+        import httplib2
+        from googleapiclient.errors import HttpError
+        
+        retriable_exceptions = RETRIABLE_EXCEPTIONS + (httplib2.HttpLib2Error,)
         response = None
-        error = None
         retry = 0
+        http = self._new_http()
+        total_bytes = os.path.getsize(self.video_file)
+        start = time.monotonic()
+        start_bytes = 0
+        # 計測用: サーバーが確認済みの位置（チャンクごとの送信量の計算に使う）
+        confirmed_bytes = 0
+        
+        if session_uri:
+            # 既存のセッションを使い、最初のリクエストでサーバーに送信済みの位置を問い合わせる
+            print(f"前回のセッションからアップロードを再開します: {os.path.basename(self.video_file)}")
+            request.resumable_uri = session_uri
+            request._in_error_state = True
         
         while response is None:
             try:
-                print(".", end="", flush=True)
-                status, response = request.next_chunk()
+                tracing.count("http.requests")
+                with tracing.span("upload.chunk", "upload"):
+                    status, response = request.next_chunk(http=http)
+                retry = 0
+                progress = status.resumable_progress if status else total_bytes if response else confirmed_bytes
+                tracing.count("bytes.uploaded", max(progress - confirmed_bytes, 0))
+                confirmed_bytes = progress
                 if status:
-                    progress = int(status.progress() * 100)
-                    print(f"\rアップロード進捗: {progress}%", end="", flush=True)
+                    if session_callback:
+                        session_callback(request.resumable_uri, status.resumable_progress)
+                    if session_uri and not start_bytes:
+                        start_bytes = status.resumable_progress
+                    if self.progress_callback:
+                        elapsed = max(time.monotonic() - start, 1e-6)
+                        self.progress_callback(
+                            self.video_file, status.resumable_progress, total_bytes,
+                            (status.resumable_progress - start_bytes) / elapsed
+                        )
+                continue
             except HttpError as e:
-                if e.resp.status in [500, 502, 503, 504]:
-                    if retry > 10:
-                        raise
-                    retry += 1
-                    time.sleep(random.randint(1, 5))
-                else:
+                if session_uri and e.resp.status in SESSION_EXPIRED_STATUS_CODES:
+                    # セッションの期限切れ: 新しいセッションで最初からアップロードし直す
+                    print(f"セッションが無効になったため最初からアップロードします: {os.path.basename(self.video_file)}")
+                    session_uri = None
+                    request.resumable_uri = None
+                    request.resumable_progress = 0
+                    request._in_error_state = False
+                    if session_callback:
+                        session_callback(None, 0)
+                    # 新しいセッションは videos.insert としてクォータを改めて消費する
+                    if self.quota is not None:
+                        self.quota.reserve("videos.insert")
+                    continue
+                # 5xxと、短時間のリクエスト数の超過は待てば成功する
+                if e.resp.status not in RETRIABLE_STATUS_CODES and not is_rate_limited(e):
                     raise
+                error = e
+            except retriable_exceptions as e:
+                error = e
+            
+            # 一時的なエラー: 待機してから送信済みの位置を問い合わせて再開する
+            retry += 1
+            if retry > MAX_RETRIES:
+                raise error
+            delay = backoff_delay(retry)
+            print(f"一時的なエラーのため{delay:.1f}秒後に再試行します（{retry}/{MAX_RETRIES}）: {error}")
+            time.sleep(delay)
         
-        print()  # 改行
+        elapsed = max(time.monotonic() - start, 1e-6)
+        if self.progress_callback:
+            self.progress_callback(self.video_file, total_bytes, total_bytes,
+                                   (total_bytes - start_bytes) / elapsed)
         return response
 
+def upload_videos(uploaders: List[YouTubeUploader], max_workers: int = DEFAULT_UPLOAD_WORKERS) -> List[Any]:
+    """
+    複数の動画を同時にアップロード
+    
+    Args:
+        uploaders: アップローダーのリスト（認証情報とAPIサービスを共有して作成する）
+        max_workers: 同時にアップロードする動画の数
+    
+    Returns:
+        アップロード結果のリスト（入力と同じ順序、失敗した動画は例外オブジェクト）
+    """
+    def upload(uploader):
+        try:
+            return uploader.upload_video()
+        except Exception as e:
+            return e
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(upload, uploaders))
+
+def drain_upload_queue(
+    queue: UploadQueue,
+    workers: int = DEFAULT_UPLOAD_WORKERS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    credentials=None,
+    youtube=None,
+    api_endpoint: Optional[str] = API_ENDPOINT,
+    quota=None
+) -> Dict[str, int]:
+    """
+    アップロードキューのジョブを全て処理
+    
+    各ジョブはキューに記録されたセッションURIから再開し、チャンクごとに
+    サーバーが確認した送信済みバイト数をキューに保存する。
+    quota を指定した場合は新しいアップロードの前にクォータを確保し、
+    足りなくなった時点で残りのジョブをクォータのリセット後まで保留する。
+    
+    Args:
+        queue: アップロードキュー
+        workers: 同時にアップロードする動画の数
+        chunk_size: アップロードのチャンクサイズ（バイト）
+        credentials: 共有する認証情報（Noneの場合はトークンファイルから読み込み）
+        youtube: 共有するYouTube APIサービス（Noneの場合は新たに構築）
+        api_endpoint: APIのエンドポイント
+        quota: クォータの管理（QuotaTracker、Noneの場合は制限しない）
+    
+    Returns:
+        状態ごとのジョブ数
+    """
+    from googleapiclient.errors import HttpError
+    
+    if youtube is None:
+        credentials = credentials or load_credentials()
+        youtube = build_service(credentials, api_endpoint)
+    
+    quota_exhausted = threading.Event()
+    
+    def process(job):
+        metadata = job["metadata"]
+        
+        # 再開するアップロードはセッション開始時にクォータを消費済み
+        if quota is not None and not job["session_uri"]:
+            try:
+                quota.reserve("videos.insert")
+            except QuotaExceeded as e:
+                print(f"クォータが不足しているため保留します: {job['video_file']}: {e}")
+                queue.release(job, quota.next_reset().timestamp())
+                quota_exhausted.set()
+                return
+            if metadata.get("thumbnail"):
+                try:
+                    quota.reserve("thumbnails.set")
+                except QuotaExceeded:
+                    print(f"クォータが不足しているためサムネイルは設定しません: {job['video_file']}")
+                    metadata["thumbnail"] = None
+        
+        uploader = YouTubeUploader(
+            video_file=job["video_file"],
+            title=metadata.get("title"),
+            description_file=metadata.get("description_file"),
+            tags=metadata.get("tags"),
+            category=metadata.get("category", DEFAULT_CATEGORY),
+            privacy=metadata.get("privacy", DEFAULT_PRIVACY),
+            publish_at=metadata.get("publish_at"),
+            thumbnail=metadata.get("thumbnail"),
+            chunk_size=chunk_size,
+            credentials=credentials,
+            youtube=youtube,
+            api_endpoint=api_endpoint,
+            quota=quota
+        )
+        
+        def save_session(session_uri, confirmed_bytes):
+            if session_uri is None:
+                saved = queue.reset_session(job)
+            else:
+                saved = queue.save_progress(job, session_uri, confirmed_bytes)
+            # リースが切れて他のワーカーに渡ったジョブは、同じセッションに送信し続けない
+            if not saved:
+                raise LeaseLost(f"ジョブ {job['id']} のリースが切れました")
+        
+        if job["session_uri"]:
+            print(f"送信済み {job['confirmed_bytes'] / 1024 / 1024:.0f}MB から再開します: {job['video_file']}")
+        try:
+            response = uploader.upload_video(job["session_uri"], save_session)
+        except LeaseLost as e:
+            print(f"アップロードを中断しました（他のワーカーが処理しています）: {e}")
+            return
+        except QuotaExceeded as e:
+            # 期限切れのセッションをやり直す分のクォータが足りない
+            print(f"クォータが不足しているため保留します: {job['video_file']}: {e}")
+            queue.release(job, quota.next_reset().timestamp())
+            quota_exhausted.set()
+            return
+        except FileNotFoundError as e:
+            queue.fail(job, e, retry=False)
+            return
+        except HttpError as e:
+            # 1日のクォータ超過はリセットまで保留し、残りのジョブも次回の実行に回す
+            if e.resp.status == 403 and any(reason in QUOTA_ERROR_REASONS for reason in error_reasons(e)):
+                reset = quota.next_reset() if quota is not None else next_quota_reset()
+                print(f"クォータを超過したため {reset:%Y-%m-%d %H:%M %Z} まで保留します: {job['video_file']}")
+                queue.release(job, reset.timestamp())
+                quota_exhausted.set()
+                return
+            # 短時間のリクエスト数の超過以外の4xx（権限がない、アップロード数の上限など）は
+            # 再試行しても成功しない
+            retry = e.resp.status >= 500 or e.resp.status == 429 or is_rate_limited(e)
+            _, delay = queue.fail(job, e, retry=retry)
+            if delay is not None:
+                print(f"{delay:.0f}秒後に再試行します: {job['video_file']}")
+            return
+        except Exception as e:
+            _, delay = queue.fail(job, e)
+            if delay is not None:
+                print(f"{delay:.0f}秒後に再試行します: {job['video_file']}")
+            return
+        if not queue.complete(job, response):
+            print(f"警告: リースが切れていたためアップロード結果を記録できませんでした: {job['video_file']}")
+    
+    def worker():
+        while not quota_exhausted.is_set():
+            job = queue.claim()
+            if job is None:
+                wait = queue.next_attempt_in()
+                # クォータのリセット待ちなど、長時間先のジョブは次回の実行に任せる
+                if wait is None or wait > queue.backoff_max:
+                    return
+                time.sleep(min(wait, 60) + 0.1)
+                continue
+            process(job)
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(worker) for _ in range(workers)]:
+            future.result()
+    
+    return queue.counts()
+
 def parse_arguments():
     """コマンドライン引数をパース"""
     parser = argparse.ArgumentParser(description="YouTube自動アップロードスクリプト")
     
     parser.add_argument(
         "--video", "-v",
-        required=True,
-        help="アップロードする動画ファイル（必須）"
+        action="append",
+        help="アップロードする動画ファイル（必須、複数指定すると同時にアップロード）"
     )
     
     parser.add_argument(
@@ -268,7 +923,44 @@ def parse_arguments():
         help=f"プライバシー設定（デフォルト: {DEFAULT_PRIVACY}）"
     )
     
-    return parser.parse_args()
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE // 1024 // 1024,
+        help=f"アップロードのチャンクサイズ（MB）（デフォルト: {DEFAULT_CHUNK_SIZE // 1024 // 1024}）"
+    )
+    
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=DEFAULT_UPLOAD_WORKERS,
+        help=f"同時にアップロードする動画の数（デフォルト: {DEFAULT_UPLOAD_WORKERS}）"
+    )
+    
+    parser.add_argument(
+        "--api-endpoint",
+        default=API_ENDPOINT,
+        help="APIのエンドポイント（テスト用のローカルサーバーなど）"
+    )
+    
+    parser.add_argument(
+        "--thumbnail",
+        nargs="?",
+        const="auto",
+        help="サムネイル画像のパス（パスを省略すると動画から自動生成）"
+    )
+    
+    parser.add_argument(
+        "--queue", "-q",
+        nargs="?",
+        const=DEFAULT_QUEUE_FILE,
+        help=f"アップロードキューを使用（動画をキューに追加し、中断したアップロードを再開）（デフォルト: {DEFAULT_QUEUE_FILE}）"
+    )
+    
+    args = parser.parse_args()
+    if not args.video and not args.queue:
+        parser.error("--video または --queue を指定してください")
+    return args
 
 def main():
     """メイン関数"""
@@ -279,21 +971,68 @@ def main():
     if args.tags:
         tags = [tag.strip() for tag in args.tags.split(",")]
     
-    # アップローダーを初期化
-    uploader = YouTubeUploader(
-        video_file=args.video,
-        title=args.title,
-        description_file=args.description,
-        tags=tags,
-        category=args.category,
-        privacy=args.privacy
-    )
+    # キューを使用する場合は、動画をキューに追加してから未完了のジョブを全て処理
+    if args.queue:
+        queue = UploadQueue(args.queue)
+        for video_file in args.video or []:
+            queue.enqueue(video_file, {
+                "title": args.title if len(args.video) == 1 else None,
+                "description_file": args.description,
+                "tags": tags,
+                "category": args.category,
+                "privacy": args.privacy,
+                "thumbnail": args.thumbnail
+            })
+        counts = drain_upload_queue(
+            queue,
+            workers=args.workers,
+            chunk_size=args.chunk_size * 1024 * 1024,
+            api_endpoint=args.api_endpoint
+        )
+        for job in queue.jobs(STATUS_DONE):
+            print(f"{os.path.basename(job['video_file'])}: https://www.youtube.com/watch?v={job['video_id']}")
+        for job in queue.jobs(STATUS_FAILED):
+            print(f"アップロードに失敗しました: {job['video_file']}: {job['last_error']}")
+        print(f"完了 {counts[STATUS_DONE]}件, 失敗 {counts[STATUS_FAILED]}件")
+        if counts[STATUS_FAILED]:
+            sys.exit(1)
+        return
+    
+    # アップローダーを初期化（複数の動画では認証情報とAPIサービスを共有）
+    uploaders = []
+    for video_file in args.video:
+        shared = uploaders[0] if uploaders else None
+        uploaders.append(YouTubeUploader(
+            video_file=video_file,
+            title=args.title if len(args.video) == 1 else None,
+            description_file=args.description,
+            tags=tags,
+            category=args.category,
+            privacy=args.privacy,
+            thumbnail=args.thumbnail,
+            chunk_size=args.chunk_size * 1024 * 1024,
+            credentials=shared.credentials if shared else None,
+            youtube=shared.youtube if shared else None,
+            api_endpoint=args.api_endpoint
+        ))
     
     # 動画をアップロード
-    response = uploader.upload_video()
+    if len(uploaders) == 1:
+        results = [uploaders[0].upload_video()]
+    else:
+        results = upload_videos(uploaders, max_workers=args.workers)
+    
+    failed = 0
+    for uploader, response in zip(uploaders, results):
+        if isinstance(response, Exception):
+            print(f"アップロードに失敗しました: {uploader.video_file}: {response}")
+            failed += 1
+            continue
+        print(f"アップロードされた動画ID: {response['id']}")
+        print(f"視聴URL: https://www.youtube.com/watch?v={response['id']}")
     
-    print(f"アップロードされた動画ID: {response['id']}")
-    print(f"視聴URL: https://www.youtube.com/watch?v={response['id']}")
+    if failed:
+        sys.exit(1)
     print("完了しました。")
 
 if __name__ == "__main__":